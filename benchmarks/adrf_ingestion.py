@@ -0,0 +1,126 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "services" / "adrf"))
+
+from AdrfSampleStore import AdrfSampleStore
+
+
+class InMemoryCollection:
+    """
+    In-process stand-in for a MongoDB collection, only supporting what the sample store needs.
+    """
+
+    def __init__(self):
+        self.documents: list[dict] = []
+        self.indexes: list = []
+
+    def insert_many(self, documents: list[dict], ordered: bool = True):
+        self.documents.extend(dict(document) for document in documents)
+
+    def create_index(self, keys, name: str = None):
+        self.indexes.append((name, keys))
+
+
+class InMemoryDatabase:
+    """
+    In-process stand-in for a MongoDB database.
+    """
+
+    def __init__(self):
+        self._collections: dict[str, InMemoryCollection] = {}
+
+    def create_collection(self, name: str, **_kwargs):
+        return self._collections.setdefault(name, InMemoryCollection())
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        return self._collections.setdefault(name, InMemoryCollection())
+
+
+def generate_samples(count: int, ue_count: int) -> list[tuple]:
+    start = datetime.now()
+    samples = []
+    for i in range(count):
+        supi = f"imsi-{i % ue_count:015d}"
+        timestamp = start + timedelta(milliseconds=i)
+        if i % 2:
+            samples.append(("throughput_dataset", supi, "GMLC", timestamp,
+                            {"latitude": random.uniform(44.97, 44.98), "longitude": random.uniform(-93.26, -93.25),
+                             "movingSpeed": random.uniform(0, 10), "compassDirection": random.randint(0, 360)}))
+        else:
+            samples.append(("throughput_dataset", supi, "RAN", timestamp,
+                            {"lte_rsrp": random.randint(-140, -44), "nr_ssRsrp": random.uniform(-139, -68)}))
+    return samples
+
+
+async def run_ingestion(database, samples: list[tuple], batch_size: int, flush_interval: float) -> dict:
+    store = AdrfSampleStore(database, collection_name=f"bench_{batch_size}", max_batch_size=batch_size,
+                            max_flush_interval=flush_interval)
+    store.ensure_collection()
+    flush_task = asyncio.create_task(store.flush_loop())
+
+    start = time.perf_counter()
+    for i, sample in enumerate(samples):
+        store.add(*sample)
+        # Let the flush loop run, as the Kafka consumer would between messages
+        if i % batch_size == batch_size - 1:
+            await asyncio.sleep(0)
+    flush_task.cancel()
+    await asyncio.to_thread(store.flush)
+    elapsed = time.perf_counter() - start
+
+    return {"batch_size": batch_size,
+            "samples": len(samples),
+            "seconds": elapsed,
+            "samples_per_second": len(samples) / elapsed}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the bulk ingestion path of the ADRF")
+    parser.add_argument("--mongo-uri", help="URI of a local mongod (an in-process stand-in is used if not provided)")
+    parser.add_argument("--samples", type=int, default=100_000, help="Number of samples to ingest")
+    parser.add_argument("--ues", type=int, default=1000, help="Number of distinct UEs")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 5000])
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--output", type=Path, help="Path of the JSON results")
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        client.drop_database("adrf_benchmark")
+        database = client["adrf_benchmark"]
+    else:
+        database = InMemoryDatabase()
+
+    samples = generate_samples(args.samples, args.ues)
+    results = []
+    for batch_size in args.batch_sizes:
+        result = await run_ingestion(database, samples, batch_size, args.flush_interval)
+        print(f"batch_size={batch_size:>6}: {result['samples_per_second']:>12.0f} samples/s")
+        results.append(result)
+
+    report = {"backend": "mongod" if args.mongo_uri else "in-process", "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
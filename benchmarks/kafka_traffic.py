@@ -0,0 +1,300 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import argparse
+import fnmatch
+import gzip
+import json
+import re
+import signal
+import struct
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from confluent_kafka import Consumer, KafkaError, Producer, TIMESTAMP_NOT_AVAILABLE
+
+MAGIC = b"NWDAFCAP1\n"
+
+# Record header: timestamp (ms), topic ID, key length, value length, headers length
+RECORD = struct.Struct("<qHIII")
+# Header of each Kafka header: name length, value length
+HEADER = struct.Struct("<HI")
+# Length of a missing key, value or header value
+NULL_LENGTH = 0xFFFFFFFF
+# Timestamp of the records defining the name of a topic ID, stored as the value
+TOPIC_DEFINITION = -1
+
+
+@dataclass
+class CapturedMessage:
+    """
+    A Kafka message of a capture file, with its original timestamp (in ms) and key.
+    """
+    timestamp: int
+    topic: str
+    key: Optional[bytes]
+    value: Optional[bytes]
+    headers: Optional[list[tuple[str, Optional[bytes]]]] = None
+
+
+def open_capture(path: Path, mode: str) -> BinaryIO:
+    # Gzip files can be appended to, each session being a new member
+    return gzip.open(path, mode) if path.suffix == ".gz" else open(path, mode)
+
+
+class CaptureWriter:
+    """
+    Appends Kafka messages to a capture file.
+
+    A capture is a sequence of binary records, each one being a fixed-size header followed by the key, the value and the
+    headers of a message. Topics are referred to by a numeric ID, defined by a record the first time a topic is seen.
+    """
+
+    def __init__(self, path: Path):
+        new_file = not path.exists() or path.stat().st_size == 0
+        self._topic_ids: dict[str, int] = {}
+        if not new_file:
+            # Topic IDs are defined once per file, the existing ones are reused
+            for message in CaptureReader(path).read(definitions_only=True):
+                self._topic_ids[message.topic] = len(self._topic_ids)
+        self._file = open_capture(path, "ab")
+        if new_file:
+            self._file.write(MAGIC)
+
+    def write(self, message: CapturedMessage):
+        topic_id = self._topic_ids.get(message.topic)
+        if topic_id is None:
+            topic_id = self._topic_ids[message.topic] = len(self._topic_ids)
+            self._write_record(TOPIC_DEFINITION, topic_id, None, message.topic.encode(), b"")
+        headers = b"".join(HEADER.pack(len(name.encode()), NULL_LENGTH if value is None else len(value)) +
+                           name.encode() + (value or b"") for name, value in message.headers or [])
+        self._write_record(message.timestamp, topic_id, message.key, message.value, headers)
+
+    def _write_record(self, timestamp: int, topic_id: int, key: Optional[bytes], value: Optional[bytes],
+                      headers: bytes):
+        self._file.write(RECORD.pack(timestamp, topic_id, NULL_LENGTH if key is None else len(key),
+                                     NULL_LENGTH if value is None else len(value), len(headers)))
+        self._file.write((key or b"") + (value or b"") + headers)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CaptureReader:
+    """
+    Reads the Kafka messages of a capture file, in the order they were captured.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def read(self, definitions_only: bool = False) -> Iterator[CapturedMessage]:
+        """
+        Reads the messages of the capture. A truncated last record (e.g., of a recorder which was killed) is ignored.
+
+        Args:
+            definitions_only (bool): Whether to only yield the topic definitions, as messages without timestamp.
+        """
+        topics: dict[int, str] = {}
+        with open_capture(self._path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{self._path}' is not a capture file")
+            while True:
+                header = file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    return
+                timestamp, topic_id, key_length, value_length, headers_length = RECORD.unpack(header)
+                key_size = 0 if key_length == NULL_LENGTH else key_length
+                value_size = 0 if value_length == NULL_LENGTH else value_length
+                body = file.read(key_size + value_size + headers_length)
+                if len(body) < key_size + value_size + headers_length:
+                    return
+                key = None if key_length == NULL_LENGTH else body[:key_size]
+                value = None if value_length == NULL_LENGTH else body[key_size:key_size + value_size]
+                headers = body[key_size + value_size:]
+
+                if timestamp == TOPIC_DEFINITION:
+                    topics[topic_id] = value.decode()
+                    if definitions_only:
+                        yield CapturedMessage(TOPIC_DEFINITION, topics[topic_id], None, None)
+                elif not definitions_only:
+                    yield CapturedMessage(timestamp, topics[topic_id], key, value, self._parse_headers(headers))
+
+    @staticmethod
+    def _parse_headers(headers: bytes) -> Optional[list[tuple[str, Optional[bytes]]]]:
+        if not headers:
+            return None
+        parsed, offset = [], 0
+        while offset < len(headers):
+            name_length, value_length = HEADER.unpack_from(headers, offset)
+            offset += HEADER.size
+            name = headers[offset:offset + name_length].decode()
+            offset += name_length
+            if value_length == NULL_LENGTH:
+                parsed.append((name, None))
+            else:
+                parsed.append((name, headers[offset:offset + value_length]))
+                offset += value_length
+        return parsed
+
+
+def topic_subscription(pattern: str) -> str:
+    """
+    Converts a topic name or glob (e.g., 'Data.EventExposureDelivery.*') into a Kafka subscription.
+    """
+    if not any(character in pattern for character in "*?["):
+        return pattern
+    return "^" + fnmatch.translate(pattern).removeprefix("(?s:").removesuffix(")\\Z") + "$"
+
+
+def record(args: argparse.Namespace):
+    consumer = Consumer({"bootstrap.servers": args.kafka_bootstrap,
+                         "group.id": f"kafka-traffic-recorder-{uuid.uuid4()}",
+                         "auto.offset.reset": "earliest" if args.from_beginning else "latest",
+                         "enable.auto.commit": False})
+    consumer.subscribe([topic_subscription(topic) for topic in args.topics])
+    writer = CaptureWriter(args.capture)
+
+    stopped = False
+
+    def stop(_sig, _frame):
+        nonlocal stopped
+        stopped = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    count = 0
+    deadline = time.monotonic() + args.duration if args.duration else None
+    last_flush = time.monotonic()
+    try:
+        while not stopped and (deadline is None or time.monotonic() < deadline) and count != args.max_messages:
+            message = consumer.poll(0.5)
+            if message is None:
+                continue
+            if message.error():
+                if message.error().code() != KafkaError._PARTITION_EOF:
+                    print(f"Consumer error: {message.error()}", file=sys.stderr)
+                continue
+            timestamp_type, timestamp = message.timestamp()
+            if timestamp_type == TIMESTAMP_NOT_AVAILABLE:
+                timestamp = int(time.time() * 1000)
+            writer.write(CapturedMessage(timestamp, message.topic(), message.key(), message.value(),
+                                         message.headers()))
+            count += 1
+            if time.monotonic() - last_flush > 1.0:
+                writer.flush()
+                last_flush = time.monotonic()
+    finally:
+        writer.close()
+        consumer.close()
+    print(f"Captured {count} messages into '{args.capture}'")
+
+
+def replay(args: argparse.Namespace):
+    producer = Producer({"bootstrap.servers": args.kafka_bootstrap, "linger.ms": 5})
+    topics = [re.compile(fnmatch.translate(topic)) for topic in args.topics or []]
+
+    count = 0
+    max_delay = 0.0
+    first_timestamp = None
+    start = time.monotonic()
+    for message in CaptureReader(args.capture).read():
+        if topics and not any(topic.match(message.topic) for topic in topics):
+            continue
+        if first_timestamp is None:
+            first_timestamp = message.timestamp
+
+        # Messages keep their relative timing, divided by the speed-up factor (none at maximum speed)
+        if args.speed > 0:
+            scheduled = start + (message.timestamp - first_timestamp) / 1000.0 / args.speed
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                producer.poll(0)
+                time.sleep(delay)
+            else:
+                max_delay = max(max_delay, -delay)
+
+        topic = args.topic_prefix + message.topic
+        while True:
+            try:
+                producer.produce(topic, key=message.key, value=message.value, headers=message.headers)
+                break
+            except BufferError:
+                # Wait for the producer's queue to drain
+                producer.poll(0.5)
+        producer.poll(0)
+        count += 1
+
+    producer.flush()
+    elapsed = time.monotonic() - start
+    print(f"Replayed {count} messages in {elapsed:.1f}s ({count / elapsed if elapsed else 0.0:.0f} messages/s), "
+          f"at most {max_delay * 1e3:.0f}ms behind schedule")
+
+
+def summary(args: argparse.Namespace):
+    topics: dict[str, dict] = {}
+    for message in CaptureReader(args.capture).read():
+        stats = topics.setdefault(message.topic, {"messages": 0, "bytes": 0, "first_timestamp": message.timestamp,
+                                                  "last_timestamp": message.timestamp})
+        stats["messages"] += 1
+        stats["bytes"] += len(message.value or b"")
+        stats["last_timestamp"] = max(stats["last_timestamp"], message.timestamp)
+
+    for stats in topics.values():
+        duration = (stats["last_timestamp"] - stats["first_timestamp"]) / 1000.0
+        stats["duration"] = duration
+        stats["messages_per_second"] = stats["messages"] / duration if duration else None
+    print(json.dumps(topics, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captures Kafka traffic of the NWDAF, and replays it at any speed")
+    parser.add_argument("--kafka-bootstrap", default="localhost:19092", help="Kafka bootstrap server")
+    subparsers = parser.add_subparsers(required=True)
+
+    record_parser = subparsers.add_parser("record", help="Appends the messages of some topics to a capture file")
+    record_parser.add_argument("capture", type=Path, help="Path of the capture file (compressed if ending with .gz)")
+    record_parser.add_argument("--topics", nargs="+",
+                               default=["Control.NwdafEventSubscription.UE_LOC_THROUGHPUT",
+                                        "Data.EventExposureDelivery.*"],
+                               help="Names or globs of the captured topics")
+    record_parser.add_argument("--from-beginning", action="store_true",
+                               help="Captures the messages already in the topics")
+    record_parser.add_argument("--duration", type=float, help="Duration (in seconds) of the capture")
+    record_parser.add_argument("--max-messages", type=int, default=-1, help="Maximum number of captured messages")
+    record_parser.set_defaults(command=record)
+
+    replay_parser = subparsers.add_parser("replay", help="Produces the messages of a capture file again")
+    replay_parser.add_argument("capture", type=Path, help="Path of the capture file")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Speed-up factor of the replay (0 to replay as fast as possible)")
+    replay_parser.add_argument("--topics", nargs="+", help="Names or globs of the replayed topics (all by default)")
+    replay_parser.add_argument("--topic-prefix", default="", help="Prefix added to the name of the replayed topics")
+    replay_parser.set_defaults(command=replay)
+
+    summary_parser = subparsers.add_parser("summary", help="Prints the number and rate of messages per topic")
+    summary_parser.add_argument("capture", type=Path, help="Path of the capture file")
+    summary_parser.set_defaults(command=summary)
+
+    args = parser.parse_args()
+    args.command(args)
+
+
+if __name__ == "__main__":
+    main()
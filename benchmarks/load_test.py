@@ -0,0 +1,477 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+import psutil
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from nf_stubs import ROOT, load_gmlc, load_ran
+
+SUBSCRIPTIONS_PATH = "/nnwdaf-eventssubscription/v1/subscriptions"
+NOTIFICATIONS_PATH = "/analytics-notification"
+
+# The SUPI of the UE subscribed to before each ramp, to detect that the whole chain is up
+WARM_UP_UE = 0
+
+
+def supi(index: int) -> str:
+    return f"imsi-{208930000000000 + index}"
+
+
+class InputRecorder:
+    """
+    Records the time at which the GMLC and RAN stubs craft the notifications of each UE, by wrapping their
+    `build_notification()` functions.
+    """
+
+    def __init__(self, gmlc, ran):
+        self.gmlc_times: dict[str, float] = {}
+        self.ran_times: dict[str, float] = {}
+        build_location_notification = gmlc.build_notification
+        build_rsrp_notification = ran.build_notification
+
+        def record_location(input_data):
+            self.gmlc_times[input_data.supi] = time.monotonic()
+            return build_location_notification(input_data)
+
+        def record_rsrp(correlation_id, ran_sub):
+            now = time.monotonic()
+            for ue_id in ran_sub.ue_ids:
+                self.ran_times[ue_id] = now
+            return build_rsrp_notification(correlation_id, ran_sub)
+
+        gmlc.build_notification = record_location
+        ran.build_notification = record_rsrp
+
+    def last_input_time(self, ue_supi: str) -> Optional[float]:
+        """
+        Returns the time of the last input of a UE, i.e., the input which completed its latest prediction.
+        """
+        gmlc_time, ran_time = self.gmlc_times.get(ue_supi), self.ran_times.get(ue_supi)
+        if gmlc_time is None or ran_time is None:
+            return None
+        return max(gmlc_time, ran_time)
+
+
+class NotificationSink:
+    """
+    Stand-in for the notification client, counting the analytics notifications of each UE and their latency.
+    """
+
+    def __init__(self, inputs: InputRecorder):
+        self._inputs = inputs
+        self.first_notification_times: dict[str, float] = {}
+        self.window_count = 0
+        self.window_latencies: list[float] = []
+        self.app = FastAPI()
+        self.app.add_api_route(NOTIFICATIONS_PATH, self.on_notification, methods=["POST"])
+
+    async def on_notification(self, request: Request) -> Response:
+        # The payload is not validated, so that the sink stays cheap compared with the services under test
+        notification = await request.json()
+        now = time.monotonic()
+        for event in notification.get("eventNotifications", []):
+            for info in event.get("predictedThroughputInfos") or []:
+                ue_supi = info.get("supi")
+                self.first_notification_times.setdefault(ue_supi, now)
+                self.window_count += 1
+                input_time = self._inputs.last_input_time(ue_supi)
+                if input_time is not None:
+                    self.window_latencies.append(now - input_time)
+        return Response(status_code=204)
+
+    def reset_window(self):
+        self.window_count = 0
+        self.window_latencies = []
+
+
+class ServiceProcess:
+    """
+    An NWDAF service running as a subprocess, whose CPU usage and memory are sampled.
+    """
+
+    def __init__(self, name: str, service_dir: str, environment: dict[str, str], log_dir: Path,
+                 script: str = "main.py"):
+        self.name = name
+        self._service_dir = ROOT / service_dir
+        self._script = script
+        self._environment = environment
+        self._log_path = log_dir / f"{name}.log"
+        self._process: Optional[subprocess.Popen] = None
+        self.usage: Optional[psutil.Process] = None
+
+    def start(self):
+        environment = os.environ | self._environment
+        environment["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), environment.get("PYTHONPATH")]))
+        with open(self._log_path, "ab") as log:
+            self._process = subprocess.Popen([sys.executable, self._script], cwd=self._service_dir, env=environment,
+                                             stdout=log, stderr=subprocess.STDOUT)
+        self.usage = psutil.Process(self._process.pid)
+
+    def wait(self) -> int:
+        return self._process.wait()
+
+    def check(self):
+        if self._process.poll() is not None:
+            raise RuntimeError(f"The {self.name} service exited with code {self._process.returncode}, see "
+                               f"'{self._log_path}'")
+
+    def stop(self, timeout: float = 10.0):
+        if self._process is None or self._process.poll() is not None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+class UsageSampler:
+    """
+    Measures the CPU usage and peak memory of a set of processes over a window.
+    """
+
+    def __init__(self, processes: dict[str, psutil.Process], interval: float = 1.0):
+        self._processes = processes
+        self._interval = interval
+        self._start_cpu: dict[str, float] = {}
+        self._peak_rss: dict[str, int] = {}
+        self._start_time = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self._start_cpu = {name: self._cpu_time(process) for name, process in self._processes.items()}
+        self._peak_rss = {name: 0 for name in self._processes}
+        self._task = asyncio.create_task(self._sample_loop())
+
+    def stop(self) -> dict[str, dict]:
+        self._task.cancel()
+        self._sample_rss()
+        elapsed = time.monotonic() - self._start_time
+        return {name: {"cpu_percent": 100.0 * (self._cpu_time(process) - self._start_cpu[name]) / elapsed,
+                       "peak_rss": self._peak_rss[name]}
+                for name, process in self._processes.items()}
+
+    async def _sample_loop(self):
+        while True:
+            self._sample_rss()
+            await asyncio.sleep(self._interval)
+
+    def _sample_rss(self):
+        for name, process in self._processes.items():
+            self._peak_rss[name] = max(self._peak_rss[name], process.memory_info().rss)
+
+    @staticmethod
+    def _cpu_time(process: psutil.Process) -> float:
+        cpu_times = process.cpu_times()
+        return cpu_times.user + cpu_times.system
+
+
+class LoadTest:
+    """
+    Closed-loop load test of the NWDAF: the API gateway, the Throughput AnLF and MTLF run as subprocesses against a
+    Kafka broker, while the GMLC and RAN stubs and a notification sink run in the harness' process.
+
+    For each reporting period, the stack is started from scratch, and the number of subscribed UEs is ramped up step by
+    step. Each step measures the setup time of the new subscriptions, then the notification rate, the latency between
+    the last input of a UE and its analytics notification, and the resource usage of each service over a steady
+    window. The ramp stops at the first saturated step.
+    """
+
+    def __init__(self, args: argparse.Namespace, work_dir: Path, log_dir: Path):
+        self._args = args
+        self._work_dir = work_dir
+        self._log_dir = log_dir
+        self._gmlc = load_gmlc()
+        self._ran = load_ran()
+        self._inputs = InputRecorder(self._gmlc, self._ran)
+        self._sink = NotificationSink(self._inputs)
+        self._client = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=args.concurrency))
+        self._gateway_url = f"http://127.0.0.1:{args.gateway_port}"
+        self._next_subscription = 0
+
+    def _services(self, period: int) -> list[ServiceProcess]:
+        args = self._args
+        common = {"KAFKA_BOOTSTRAP_SERVER": args.kafka_bootstrap, "PROFILING_ENABLED": "0"}
+        log_level = args.service_log_level
+        return [
+            ServiceProcess("api-gateway", "services/api-gateway", common | {
+                "API_GW_SERVICE_NAME": "localhost",
+                "API_GW_SERVICE_PORT": str(args.gateway_port),
+                "API_GW_LOG_LEVEL": log_level,
+                "API_GW_INTERNAL_PORT": str(args.gateway_internal_port),
+                "API_GW_GMLC_FRONT_PORT": str(args.gmlc_front_port),
+                "GMLC_SERVICE_NAME": "127.0.0.1",
+                "GMLC_SERVICE_PORT": str(args.gmlc_port),
+                "RAN_SERVICE_NAME": "127.0.0.1",
+                "RAN_SERVICE_PORT": str(args.ran_port)}, self._log_dir),
+            ServiceProcess("thr-mtlf", "services/thr-mtlf", common | {
+                "THR_MTLF_SERVICE_NAME": "thr-mtlf",
+                "THR_MTLF_LOG_LEVEL": log_level,
+                "THR_MTLF_CHECKPOINT_DIR": str(self._work_dir / "checkpoints"),
+                "THR_MTLF_ARTIFACT_DIR": str(self._work_dir / "artifacts"),
+                "THR_MTLF_ARTIFACT_PORT": str(args.artifact_port),
+                "THR_MTLF_ARTIFACT_URL": f"http://127.0.0.1:{args.artifact_port}",
+                # No training during the load test
+                "THR_MTLF_TRAINING_INTERVAL": "1e9"}, self._log_dir),
+            ServiceProcess("thr-anlf", "services/thr-anlf", common | {
+                "THR_ANLF_SERVICE_NAME": "thr-anlf",
+                "THR_ANLF_LOG_LEVEL": log_level,
+                "THR_ANLF_MODEL_CACHE_DIR": str(self._work_dir / f"model-cache-{period}"),
+                "THR_ANLF_REPORTING_PERIOD": str(period)}, self._log_dir)]
+
+    def init_topics(self):
+        topics_init = ServiceProcess("kafka-topics-init", "services/kafka-topics-init",
+                                     {"KAFKA_BOOTSTRAP_SERVER": self._args.kafka_bootstrap}, self._log_dir,
+                                     "kafka-topics-init.py")
+        topics_init.start()
+        if topics_init.wait() != 0:
+            raise RuntimeError("Failed to create the Kafka topics")
+
+    async def run(self) -> list[dict]:
+        self.init_topics()
+        servers = [uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+                   for app, port in ((self._gmlc.app, self._args.gmlc_port), (self._ran.app, self._args.ran_port),
+                                     (self._sink.app, self._args.sink_port))]
+        server_tasks = [asyncio.create_task(server.serve()) for server in servers]
+        try:
+            return [result for period in self._args.periods for result in await self._run_period(period)]
+        finally:
+            for server in servers:
+                server.should_exit = True
+            await asyncio.gather(*server_tasks, return_exceptions=True)
+            await self._client.aclose()
+
+    async def _run_period(self, period: int) -> list[dict]:
+        # Subscriptions of the previous stack are not served anymore
+        self._gmlc.location_subscriptions.clear()
+        self._ran.rsrp_subscriptions.clear()
+        self._sink.first_notification_times.clear()
+
+        services = self._services(period)
+        results = []
+        try:
+            for service in services:
+                service.start()
+            await self._warm_up(services, period)
+
+            processes = {service.name: service.usage for service in services} | {"stubs": psutil.Process()}
+            subscribed = 0
+            for ue_count in self._args.ue_counts:
+                result = {"period": period, "ues": ue_count}
+                result |= await self._subscribe(range(subscribed + 1, ue_count + 1), period, services)
+                subscribed = ue_count
+                result |= await self._measure(ue_count, period, processes)
+                results.append(result)
+                self._print(result)
+                for service in services:
+                    service.check()
+                if result["saturated"]:
+                    break
+        finally:
+            for service in services:
+                service.stop()
+        return results
+
+    async def _warm_up(self, services: list[ServiceProcess], period: int):
+        deadline = time.monotonic() + self._args.startup_timeout
+        while True:
+            for service in services:
+                service.check()
+            try:
+                await self._post_subscription([supi(WARM_UP_UE)])
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("The API gateway did not start in time")
+                await asyncio.sleep(1.0)
+
+        # The first notification means that the model is loaded and that every service consumes its topics
+        while supi(WARM_UP_UE) not in self._sink.first_notification_times:
+            for service in services:
+                service.check()
+            if time.monotonic() > deadline:
+                raise TimeoutError("No analytics notification received for the warm-up subscription")
+            await asyncio.sleep(min(period, 1.0))
+
+    async def _subscribe(self, ue_indexes: range, period: int, services: list[ServiceProcess]) -> dict:
+        supis = [supi(i) for i in ue_indexes]
+        per_subscription = self._args.ues_per_subscription
+        batches = [supis[i:i + per_subscription] for i in range(0, len(supis), per_subscription)]
+        semaphore = asyncio.Semaphore(self._args.concurrency)
+        request_latencies = []
+
+        async def subscribe(batch: list[str]):
+            async with semaphore:
+                start = time.monotonic()
+                await self._post_subscription(batch)
+                request_latencies.append(time.monotonic() - start)
+
+        start = time.monotonic()
+        await asyncio.gather(*[subscribe(batch) for batch in batches])
+        requests_done = time.monotonic()
+
+        # The subscriptions are set up once each of their UEs has been notified
+        deadline = requests_done + self._args.setup_timeout_periods * period
+        pending = set(supis)
+        while pending and time.monotonic() < deadline:
+            pending.difference_update(self._sink.first_notification_times.keys() & pending)
+            for service in services:
+                service.check()
+            await asyncio.sleep(0.1)
+        notified = [self._sink.first_notification_times[ue_supi] for ue_supi in supis
+                    if ue_supi in self._sink.first_notification_times]
+
+        return {"subscriptions": len(batches),
+                "subscription_request_p50": float(np.percentile(request_latencies, 50)) if batches else 0.0,
+                "subscription_request_p99": float(np.percentile(request_latencies, 99)) if batches else 0.0,
+                "subscription_requests_seconds": requests_done - start,
+                "setup_seconds": (max(notified) - start) if notified else 0.0,
+                "not_set_up": len(pending)}
+
+    async def _measure(self, ue_count: int, period: int, processes: dict[str, psutil.Process]) -> dict:
+        sampler = UsageSampler(processes)
+        self._sink.reset_window()
+        sampler.start()
+        await asyncio.sleep(self._args.duration)
+        usage = sampler.stop()
+        count, latencies = self._sink.window_count, self._sink.window_latencies
+
+        # Every UE, including the warm-up one, is expected to be notified once per period
+        expected_rate = (ue_count + 1) / period
+        rate = count / self._args.duration
+        p50 = float(np.percentile(latencies, 50)) if latencies else None
+        p99 = float(np.percentile(latencies, 99)) if latencies else None
+        max_latency = self._args.max_latency or period
+        saturated = rate < (1.0 - self._args.tolerance) * expected_rate or p99 is None or p99 > max_latency
+
+        return {"notifications_per_second": rate,
+                "expected_notifications_per_second": expected_rate,
+                "latency_p50": p50,
+                "latency_p99": p99,
+                "usage": usage,
+                "saturated": saturated}
+
+    async def _post_subscription(self, supis: list[str]):
+        self._next_subscription += 1
+        subscription = {"eventSubscriptions": [{"event": "UE_LOC_THROUGHPUT", "tgtUe": {"supis": supis}}],
+                        "notificationURI": f"http://127.0.0.1:{self._args.sink_port}{NOTIFICATIONS_PATH}",
+                        "notifCorrId": f"load-test-{self._next_subscription}"}
+        response = await self._client.post(f"{self._gateway_url}{SUBSCRIPTIONS_PATH}", json=subscription)
+        response.raise_for_status()
+
+    @staticmethod
+    def _print(result: dict):
+        latency = (f"p50={result['latency_p50'] * 1e3:.0f}ms, p99={result['latency_p99'] * 1e3:.0f}ms"
+                   if result["latency_p99"] is not None else "no latency sample")
+        usage = ", ".join(f"{name}={usage['cpu_percent']:.0f}%/{usage['peak_rss'] / 2 ** 20:.0f}MiB"
+                          for name, usage in result["usage"].items())
+        print(f"period={result['period']}s ues={result['ues']:>7}: setup={result['setup_seconds']:.1f}s, "
+              f"{result['notifications_per_second']:.1f}/{result['expected_notifications_per_second']:.1f} "
+              f"notifications/s, {latency}, {usage}{' SATURATED' if result['saturated'] else ''}")
+
+
+def saturation_points(results: list[dict]) -> dict:
+    """
+    Returns, for each reporting period, the largest step which was not saturated and the first one which was.
+    """
+    points = {}
+    for period in sorted({result["period"] for result in results}):
+        steps = [result for result in results if result["period"] == period]
+        sustained = [result for result in steps if not result["saturated"]]
+        saturated = next((result for result in steps if result["saturated"]), None)
+        points[str(period)] = {
+            "max_sustained_ues": sustained[-1]["ues"] if sustained else 0,
+            "max_sustained_notifications_per_second": sustained[-1]["notifications_per_second"] if sustained else 0.0,
+            "saturated_at_ues": saturated["ues"] if saturated else None}
+    return points
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Closed-loop load test of the NWDAF, finding its saturation point")
+    parser.add_argument("--kafka-bootstrap", default="localhost:19092", help="Kafka bootstrap server")
+    parser.add_argument("--ue-counts", type=int, nargs="+", default=[10, 100, 500, 1000, 2000, 5000, 10000],
+                        help="Numbers of subscribed UEs of each step of the ramp")
+    parser.add_argument("--periods", type=int, nargs="+", default=[10, 5, 1],
+                        help="Reporting periods (in seconds) of the GMLC and RAN")
+    parser.add_argument("--ues-per-subscription", type=int, default=1, help="Number of UEs per analytics subscription")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duration (in seconds) of the steady window")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="Fraction of the expected notification rate that can be missed before saturation")
+    parser.add_argument("--max-latency", type=float,
+                        help="p99 latency (in seconds) above which a step is saturated (the period by default)")
+    parser.add_argument("--setup-timeout-periods", type=float, default=5.0,
+                        help="Number of periods to wait for the first notification of new subscriptions")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--concurrency", type=int, default=50, help="Number of concurrent subscription requests")
+    parser.add_argument("--gateway-port", type=int, default=5000)
+    parser.add_argument("--gateway-internal-port", type=int, default=5005)
+    parser.add_argument("--gmlc-port", type=int, default=10006)
+    parser.add_argument("--gmlc-front-port", type=int, default=5004)
+    parser.add_argument("--ran-port", type=int, default=10007)
+    parser.add_argument("--sink-port", type=int, default=8181)
+    parser.add_argument("--artifact-port", type=int, default=8090)
+    parser.add_argument("--service-log-level", default="WARNING")
+    parser.add_argument("--log-dir", type=Path, help="Directory of the services' logs (a temporary one by default)")
+    parser.add_argument("--output", type=Path, help="Path of the JSON report")
+    args = parser.parse_args()
+
+    for variable in ("GMLC", "RAN"):
+        os.environ[f"{variable}_SERVICE_PORT"] = str(getattr(args, f"{variable.lower()}_port"))
+        os.environ.setdefault(f"{variable}_LOG_LEVEL", "WARNING")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        log_dir = args.log_dir or work_dir
+        log_dir.mkdir(parents=True, exist_ok=True)
+        load_test = LoadTest(args, work_dir, log_dir)
+        # The stubs configure logging at import time
+        logging.getLogger().setLevel(logging.WARNING)
+        results = await load_test.run()
+
+    points = saturation_points(results)
+    for period, point in points.items():
+        print(f"period={period}s: {point['max_sustained_ues']} UEs sustained "
+              f"({point['max_sustained_notifications_per_second']:.1f} notifications/s), saturated at "
+              f"{point['saturated_at_ues'] if point['saturated_at_ues'] is not None else '-'} UEs")
+
+    report = {"commit": git_commit(), "kafka": args.kafka_bootstrap, "duration": args.duration, "steps": results,
+              "saturation": points}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
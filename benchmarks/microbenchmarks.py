@@ -0,0 +1,403 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "services" / "thr-anlf"))
+
+from nwdaf_api.models import (
+    EventNotifyDataExt,
+    ExternalClientType,
+    InputData,
+    LocationTypeRequested,
+    PeriodicEventInfo,
+    RanEvent,
+    RanEventExposureNotification,
+    RanEventSubscription
+)
+
+from ThroughputAnlfService import ThroughputAnlfService
+from ThroughputEventExposureConsumer import GMLC_TOPIC, ThroughputEventExposureConsumer
+from ThroughputOverloadController import ThroughputOverloadController
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+from ThroughputSubscriptionFSM import ThroughputSubscriptionFSM, Transitions
+from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+from nf_stubs import load_csv_player, load_gmlc, load_ran
+
+# Number of UEs per correlation ID, as batched by the AnLF by default
+CORRELATION_BATCH_SIZE = 1000
+
+# Number of messages consumed at once by the batched event exposure consumer, by default
+CONSUME_BATCH_SIZE = 500
+
+# Transitions of a full cycle of a pipeline, starting from WAITING_FOR_GMLC_NOTIF
+FSM_CYCLE = (Transitions.WAITING_FOR_NOTIFS, Transitions.ALL_NOTIFS_RECEIVED, Transitions.PREDICTION_DONE,
+             Transitions.ANALYTICS_NOTIF_SENT)
+
+
+@dataclass
+class Microbenchmark:
+    """
+    A microbenchmark, timing `operations` operations performed by `run` on the state returned by `setup`. The setup is
+    not timed, and is performed again before each repetition.
+    """
+    name: str
+    operations: int
+    setup: Callable[[], Any]
+    run: Callable[[Any], None]
+
+
+def measure(benchmark: Microbenchmark, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        state = benchmark.setup()
+        start = time.perf_counter_ns()
+        benchmark.run(state)
+        durations.append((time.perf_counter_ns() - start) / benchmark.operations)
+
+    median = statistics.median(durations)
+    return {"name": benchmark.name,
+            "operations": benchmark.operations,
+            "ns_per_op": median,
+            "best_ns_per_op": min(durations),
+            "ops_per_second": 1e9 / median}
+
+
+def supi(index: int) -> str:
+    return f"imsi-{208930000000000 + index}"
+
+
+def correlation_id(index: int, batch_size: int = CORRELATION_BATCH_SIZE) -> str:
+    return f"correlation-{index // batch_size}"
+
+
+def populated_registry(size: int, batch_size: int = CORRELATION_BATCH_SIZE) -> ThroughputSubscriptionRegistry:
+    registry = ThroughputSubscriptionRegistry()
+    for i in range(size):
+        sub_data = ThroughputSubscriptionData(supi(i))
+        sub_data.correlation_id = correlation_id(i, batch_size)
+        sub_data.sub_ids.add(f"sub-{i}")
+        registry.add_subscription(sub_data, ThroughputSubscriptionFSM())
+    return registry
+
+
+def registry_benchmarks(size: int) -> list[Microbenchmark]:
+    pipelines = []
+    for i in range(size):
+        sub_data = ThroughputSubscriptionData(supi(i))
+        sub_data.correlation_id = correlation_id(i)
+        pipelines.append((sub_data, ThroughputSubscriptionFSM()))
+    # Lookups and removals are performed in a random order, as notifications arrive
+    rng = random.Random(size)
+    indexes = rng.sample(range(size), size)
+    lookups = [(supi(i), correlation_id(i)) for i in indexes]
+    registry = populated_registry(size)
+
+    def add(state: ThroughputSubscriptionRegistry):
+        for sub_data, fsm in pipelines:
+            state.add_subscription(sub_data, fsm)
+
+    def get(state: ThroughputSubscriptionRegistry):
+        for ue_supi, _ in lookups:
+            state.get_subscription_data(ue_supi)
+
+    def get_by_correlation(state: ThroughputSubscriptionRegistry):
+        for ue_supi, ue_correlation_id in lookups:
+            state.get_subscription_data_by_correlation(ue_correlation_id, ue_supi)
+
+    def remove(state: ThroughputSubscriptionRegistry):
+        for ue_supi, _ in lookups:
+            state.remove_subscription(ue_supi)
+
+    return [Microbenchmark(f"registry.add[{size}]", size, ThroughputSubscriptionRegistry, add),
+            Microbenchmark(f"registry.get[{size}]", size, lambda: registry, get),
+            Microbenchmark(f"registry.get_by_correlation[{size}]", size, lambda: registry, get_by_correlation),
+            Microbenchmark(f"registry.remove[{size}]", size, lambda: populated_registry(size), remove)]
+
+
+def fsm_benchmark(count: int) -> Microbenchmark:
+    def setup() -> ThroughputSubscriptionFSM:
+        fsm = ThroughputSubscriptionFSM()
+        fsm.transition(Transitions.INITIALIZATION_DONE)
+        return fsm
+
+    def run(fsm: ThroughputSubscriptionFSM):
+        for _ in range(count // len(FSM_CYCLE)):
+            for transition in FSM_CYCLE:
+                fsm.transition(transition)
+
+    return Microbenchmark("fsm.transition", count // len(FSM_CYCLE) * len(FSM_CYCLE), setup, run)
+
+
+def input_array_benchmark(count: int) -> Microbenchmark:
+    sub_data = ThroughputSubscriptionData(supi(0))
+    sub_data.pending_gmlc_data = (44.975, -93.26, 4.2, 180)
+    sub_data.pending_ran_data = (-95, -101.5)
+
+    def run(state: ThroughputSubscriptionData):
+        for _ in range(count):
+            state.to_input_array()
+
+    return Microbenchmark("subscription_data.to_input_array", count, lambda: sub_data, run)
+
+
+def location_input_data(index: int) -> InputData:
+    return InputData(supi=supi(index),
+                     ldrReference=correlation_id(index),
+                     externalClientType=ExternalClientType.VALUE_ADDED_SERVICES,
+                     periodicEventInfo=PeriodicEventInfo(reportingAmount=1, reportingInterval=10,
+                                                         reportingInfiniteInd=True),
+                     locationTypeRequested=LocationTypeRequested.CURRENT_LOCATION)
+
+
+def rsrp_subscription(ue_count: int) -> RanEventSubscription:
+    return RanEventSubscription(event=RanEvent.RSRP_INFO,
+                                correlationId=correlation_id(0),
+                                notifUri="http://thr-anlf/notifications",
+                                ueIds=[supi(i) for i in range(ue_count)],
+                                periodicity=10)
+
+
+def anlf_stand_in(ue_count: int, batch_size: int = CORRELATION_BATCH_SIZE) -> SimpleNamespace:
+    """
+    The state used by the AnLF's notification handlers, without the Kafka clients of the service.
+    """
+    registry = populated_registry(ue_count, batch_size)
+    return SimpleNamespace(subscription_registry=registry,
+                           overload_controller=ThroughputOverloadController(),
+                           on_input_received=ThroughputAnlfService.on_input_received)
+
+
+def gmlc_benchmarks(gmlc, count: int, ue_count: int) -> list[Microbenchmark]:
+    input_data = [location_input_data(i % ue_count) for i in range(count)]
+    notifications = [gmlc.build_notification(data) for data in input_data]
+    payloads = [notification.model_dump_json(exclude_unset=True) for notification in notifications]
+    anlf = anlf_stand_in(ue_count)
+
+    def build(state: list[InputData]):
+        for data in state:
+            gmlc.build_notification(data)
+
+    def decode(state: list[str]):
+        for payload in state:
+            EventNotifyDataExt.model_validate_json(payload)
+
+    def handle(state: list[EventNotifyDataExt]):
+        for notification in state:
+            ThroughputAnlfService.on_ue_location_received(anlf, notification)
+
+    return [Microbenchmark("gmlc.build_notification", count, lambda: input_data, build),
+            Microbenchmark("gmlc.decode_notification", count, lambda: payloads, decode),
+            Microbenchmark("anlf.on_ue_location_received", count, lambda: notifications, handle)]
+
+
+class KafkaMessage:
+    """
+    A consumed Kafka message, as returned by `Consumer.consume()`.
+    """
+
+    def __init__(self, topic: str, offset: int, value: str):
+        self._topic = topic
+        self._offset = offset
+        self._value = value.encode()
+
+    def error(self):
+        return None
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return 0
+
+    def offset(self) -> int:
+        return self._offset
+
+    def value(self) -> bytes:
+        return self._value
+
+    def headers(self):
+        return None
+
+
+def event_exposure_benchmarks(gmlc, count: int, ue_count: int, batch_size: int) -> list[Microbenchmark]:
+    """
+    Compares the two ways the AnLF consumes the GMLC notifications: one by one, validated into the API models by the
+    base service, or in batches decoded straight from JSON by the ThroughputEventExposureConsumer, the base service
+    then consuming none of them.
+    """
+    payloads = [gmlc.build_notification(location_input_data(i % ue_count)).model_dump_json(exclude_unset=True)
+                for i in range(count)]
+    messages = [KafkaMessage(GMLC_TOPIC, i, payload) for i, payload in enumerate(payloads)]
+    batches = [messages[i:i + batch_size] for i in range(0, count, batch_size)]
+    anlf = anlf_stand_in(ue_count)
+    anlf.trace_input = ThroughputAnlfService.trace_input
+    anlf.metrics = SimpleNamespace(record_batch_received=lambda nf_type, timestamps: None,
+                                   event_exposure_batch_size=SimpleNamespace(observe=lambda size: None))
+
+    def per_message(state: list[str]):
+        for payload in state:
+            ThroughputAnlfService.on_ue_location_received(anlf, EventNotifyDataExt.model_validate_json(payload))
+
+    def batched(state: list[list[KafkaMessage]]):
+        for batch in state:
+            gmlc_batch, ran_batch = ThroughputEventExposureConsumer.decode(batch)
+            ThroughputAnlfService.on_event_exposure_batch(anlf, gmlc_batch, ran_batch)
+
+    return [Microbenchmark("anlf.event_exposure.per_message", count, lambda: payloads, per_message),
+            Microbenchmark(f"anlf.event_exposure.batched[{batch_size}]", count, lambda: batches, batched)]
+
+
+def ran_benchmarks(ran, count: int, ue_count: int) -> list[Microbenchmark]:
+    ran_sub = rsrp_subscription(ue_count)
+    notification = ran.build_notification(ran_sub.correlation_id, ran_sub)
+    payload = notification.model_dump_json(exclude_unset=True)
+    # All the UEs of the notification share its correlation ID
+    anlf = anlf_stand_in(ue_count, batch_size=ue_count)
+
+    def build(state: RanEventSubscription):
+        for _ in range(count):
+            ran.build_notification(state.correlation_id, state)
+
+    def decode(state: str):
+        for _ in range(count):
+            RanEventExposureNotification.model_validate_json(state)
+
+    def handle(state: RanEventExposureNotification):
+        for _ in range(count):
+            ThroughputAnlfService.on_ran_rsrp_info_received(anlf, state)
+
+    # Each operation is a notification carrying the RSRP information of ue_count UEs
+    return [Microbenchmark(f"ran.build_notification[{ue_count}]", count, lambda: ran_sub, build),
+            Microbenchmark(f"ran.decode_notification[{ue_count}]", count, lambda: payload, decode),
+            Microbenchmark(f"anlf.on_ran_rsrp_info_received[{ue_count}]", count, lambda: notification, handle)]
+
+
+def csv_rows(path: Path, count: int) -> list[dict]:
+    if path.is_file():
+        with open(path) as file:
+            rows = [row for _, row in zip(range(count), csv.DictReader(file))]
+        if rows:
+            return rows
+    # Rows as read by the CSV player, with string values and some missing fields
+    rng = random.Random(0)
+    return [{"latitude": f"{rng.uniform(44.97, 44.98):.7f}", "longitude": f"{rng.uniform(-93.26, -93.25):.7f}",
+             "movingSpeed": f"{rng.uniform(0, 10):.6f}", "compassDirection": str(rng.randint(0, 360)),
+             "lte_rsrp": str(rng.randint(-140, -44)),
+             "nr_ssRsrp": "" if i % 10 == 0 else f"{rng.uniform(-139, -68):.1f}",
+             "Throughput": f"{rng.uniform(0, 1000):.2f}"} for i in range(count)]
+
+
+def csv_player_benchmark(csv_player, path: Path, count: int) -> Microbenchmark:
+    rows = csv_rows(path, count)
+
+    def run(state: list[dict]):
+        for row in state:
+            csv_player.convert_field_types(row)
+
+    # The conversion is performed in place, each repetition converts fresh copies
+    return Microbenchmark("csv_player.convert_field_types", len(rows), lambda: [dict(row) for row in rows], run)
+
+
+def compare(results: list[dict], baseline_path: Path, max_regression: float) -> list[str]:
+    baseline = {result["name"]: result for result in json.loads(baseline_path.read_text())["results"]}
+    regressions = []
+    for result in results:
+        reference = baseline.get(result["name"])
+        if reference is None:
+            continue
+        change = result["ns_per_op"] / reference["ns_per_op"] - 1.0
+        result["baseline_ns_per_op"] = reference["ns_per_op"]
+        result["change"] = change
+        if change > max_regression:
+            regressions.append(f"{result['name']}: {reference['ns_per_op']:.0f} -> {result['ns_per_op']:.0f} ns/op "
+                               f"({change:+.1%})")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the per-message code of the AnLF and NF stubs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="Numbers of pipelines in the registry")
+    parser.add_argument("--count", type=int, default=100_000, help="Number of operations per benchmark")
+    parser.add_argument("--ran-ues", type=int, default=CORRELATION_BATCH_SIZE,
+                        help="Number of UEs per RAN notification")
+    parser.add_argument("--consume-batch-size", type=int, default=CONSUME_BATCH_SIZE,
+                        help="Number of messages per batch of the batched event exposure consumer")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repetitions of each benchmark")
+    parser.add_argument("--filter", help="Only run the benchmarks whose name contains this string")
+    parser.add_argument("--csv", type=Path, default=ROOT / "nf-stubs" / "csv_file_player" / "csv" / "Lumos5G-v1.0.csv")
+    parser.add_argument("--output", type=Path, help="Path of the JSON results")
+    parser.add_argument("--baseline", type=Path, help="Path of the JSON results to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Maximum relative increase of the time per operation over the baseline")
+    args = parser.parse_args()
+
+    gmlc, ran, csv_player = load_gmlc(), load_ran(), load_csv_player()
+    # Handlers log at the INFO level, the formatting is part of their cost (the stubs configure logging at import time)
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, "w"), force=True)
+
+    # Benchmarks are created lazily, so that only the data of one registry size is held at once
+    factories = [lambda: (benchmark for size in args.sizes for benchmark in registry_benchmarks(size)),
+                 lambda: [fsm_benchmark(args.count)],
+                 lambda: [input_array_benchmark(args.count)],
+                 lambda: gmlc_benchmarks(gmlc, args.count, args.ran_ues),
+                 lambda: event_exposure_benchmarks(gmlc, args.count, args.ran_ues, args.consume_batch_size),
+                 lambda: ran_benchmarks(ran, max(args.count // args.ran_ues, 10), args.ran_ues),
+                 lambda: [csv_player_benchmark(csv_player, args.csv, args.count)]]
+
+    results = []
+    for factory in factories:
+        for benchmark in factory():
+            if args.filter and args.filter not in benchmark.name:
+                continue
+            result = measure(benchmark, args.repeat)
+            print(f"{result['name']:>45}: {result['ns_per_op']:>12.0f} ns/op, {result['ops_per_second']:>12.0f} ops/s")
+            results.append(result)
+
+    regressions = compare(results, args.baseline, args.max_regression) if args.baseline else []
+
+    report = {"commit": git_commit(), "python": sys.version.split()[0], "repeat": args.repeat, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if regressions:
+        print(f"Regressions over {args.max_regression:.0%} compared with '{args.baseline}':", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
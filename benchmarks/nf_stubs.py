@@ -0,0 +1,56 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The stubs read their configuration from the environment at import time
+STUB_ENVIRONMENT = {
+    "GMLC_SERVICE_NAME": "gmlc",
+    "GMLC_SERVICE_PORT": "0",
+    "RAN_SERVICE_NAME": "ran",
+    "RAN_SERVICE_PORT": "0",
+    "CSV_FP_SERVICE_PORT": "0",
+}
+
+
+def load_nf_stub(name: str, relative_path: str):
+    """
+    Imports an NF stub as a module, without starting its server.
+
+    Args:
+        name (str): The name of the module.
+        relative_path (str): The path of the stub's script, relative to the root of the repository.
+    """
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    for variable, value in STUB_ENVIRONMENT.items():
+        os.environ.setdefault(variable, value)
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_csv_player():
+    return load_nf_stub("csv_file_player", "nf-stubs/csv_file_player/main.py")
+
+
+def load_gmlc():
+    return load_nf_stub("gmlc", "nf-stubs/gmlc/gmlc.py")
+
+
+def load_ran():
+    return load_nf_stub("ran", "nf-stubs/ran/ran.py")
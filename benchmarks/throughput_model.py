@@ -0,0 +1,162 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "services" / "thr-anlf"))
+sys.path.insert(0, str(ROOT / "services" / "thr-mtlf"))
+
+from ThroughputModelOptimizer import ThroughputModelOptimizer
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+from common.throughput_model import ModelVariant, ThroughputModelRunner
+from nf_stubs import load_csv_player
+
+# Backend running the Keras model through `model.predict()`, as a generic Keras serving path would
+KERAS_PREDICT = "keras-predict"
+
+
+class KerasPredictRunner(ThroughputModelRunner):
+    """
+    Runner of the float32 model going through `model.predict()` instead of a direct call.
+    """
+
+    def _run_keras(self, x: np.ndarray) -> np.ndarray:
+        return self._model.predict(x, verbose=0)
+
+
+def load_trace(path: Path, ground_truth: str) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Converts the rows of the trace into AnLF input arrays, going through the CSV player's field conversion and the
+    AnLF's pipeline data.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: The inputs (shape (n, 6)), the ground truth (shape (n, 1)), and the number
+            of rows skipped because of a missing value.
+    """
+    csv_player = load_csv_player()
+    inputs, targets = [], []
+    skipped = 0
+    with open(path) as file:
+        for row in csv.DictReader(file):
+            row = csv_player.convert_field_types(row)
+            sub_data = ThroughputSubscriptionData("imsi-benchmark")
+            sub_data.pending_gmlc_data = (row["latitude"], row["longitude"], row["movingSpeed"],
+                                          row["compassDirection"])
+            sub_data.pending_ran_data = (row["lte_rsrp"], row["nr_ssRsrp"])
+            input_array = sub_data.to_input_array()
+            if None in input_array[0] or row.get(ground_truth) in (None, ""):
+                skipped += 1
+                continue
+            inputs.append(input_array.astype(np.float32))
+            targets.append(float(row[ground_truth]))
+    return np.concatenate(inputs), np.array(targets, dtype=np.float32).reshape(-1, 1), skipped
+
+
+def load_backends(model_dir: Path, backends: list[str], work_dir: Path) -> dict:
+    import keras
+
+    model = keras.models.load_model(model_dir / ModelVariant.FLOAT32.model_file)
+    runners = {}
+    for backend in backends:
+        if backend == KERAS_PREDICT:
+            runners[backend] = KerasPredictRunner(model_dir, ModelVariant.FLOAT32)
+            continue
+
+        variant = ModelVariant(backend)
+        variant_dir = work_dir / variant
+        try:
+            ThroughputModelOptimizer.export(model, model_dir, variant_dir, variant)
+            runners[backend] = ThroughputModelRunner(variant_dir, variant)
+        except Exception as e:
+            print(f"Skipping the {backend} backend: {e}", file=sys.stderr)
+    return runners
+
+
+def measure_accuracy(runner: ThroughputModelRunner, inputs: np.ndarray, targets: np.ndarray) -> dict:
+    # Accuracy does not depend on the batch size, large batches are used for speed
+    predictions = np.concatenate([runner.predict(inputs[i:i + 4096]) for i in range(0, len(inputs), 4096)])
+    errors = predictions - targets
+    return {"mae": float(np.mean(np.abs(errors))),
+            "rmse": float(np.sqrt(np.mean(errors ** 2)))}
+
+
+def measure_speed(runner: ThroughputModelRunner, inputs: np.ndarray, batch_size: int, max_samples: int) -> dict:
+    # Speed is measured on at most max_samples inputs, after a warm-up batch
+    timed = inputs[:max_samples]
+    runner.predict(timed[:batch_size])
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(timed), batch_size):
+        batch_start = time.perf_counter()
+        runner.predict(timed[i:i + batch_size])
+        latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+
+    return {"batch_size": batch_size,
+            "predictions_per_second": len(timed) / elapsed,
+            "p50_latency": float(np.percentile(latencies, 50)),
+            "p99_latency": float(np.percentile(latencies, 99))}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the accuracy and speed of the throughput model")
+    parser.add_argument("--csv", type=Path, default=ROOT / "nf-stubs" / "csv_file_player" / "csv" / "Lumos5G-v1.0.csv")
+    parser.add_argument("--ground-truth", default="Throughput", help="Column of the measured throughput")
+    parser.add_argument("--model-dir", type=Path, default=ROOT / "services" / "thr-anlf" / "models")
+    parser.add_argument("--backends", nargs="+", default=[KERAS_PREDICT] + list(ModelVariant),
+                        choices=[KERAS_PREDICT] + list(ModelVariant))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512])
+    parser.add_argument("--max-samples", type=int, default=5000, help="Number of inputs timed per run")
+    parser.add_argument("--output", type=Path, help="Path of the JSON results")
+    args = parser.parse_args()
+
+    inputs, targets, skipped = load_trace(args.csv, args.ground_truth)
+    print(f"Loaded {len(inputs)} samples from '{args.csv}' ({skipped} skipped)")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        runners = load_backends(args.model_dir, args.backends, Path(work_dir))
+        for backend, runner in runners.items():
+            accuracy = measure_accuracy(runner, inputs, targets)
+            for batch_size in args.batch_sizes:
+                result = {"backend": backend} | accuracy | measure_speed(runner, inputs, batch_size, args.max_samples)
+                print(f"{backend:>13} batch_size={batch_size:>4}: MAE={result['mae']:.3f}, "
+                      f"RMSE={result['rmse']:.3f}, {result['predictions_per_second']:>10.0f} predictions/s, "
+                      f"p50={result['p50_latency'] * 1e3:.3f}ms, p99={result['p99_latency'] * 1e3:.3f}ms")
+                results.append(result)
+
+    report = {"commit": git_commit(), "trace": args.csv.name, "samples": len(inputs), "skipped": skipped,
+              "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
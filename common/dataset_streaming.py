@@ -0,0 +1,76 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+# Kafka topics of the streaming dataset retrieval
+DATASET_STREAM_REQUEST_TOPIC = "Control.DatasetRetrievalStream"
+DATASET_STREAM_DELIVERY_TOPIC = "Data.DatasetRetrievalStream"
+
+
+class SampleKey(BaseModel):
+    """
+    Position of a sample in the order of a stream, which is total: timestamp, SUPI, NF type, then document ID.
+    """
+    timestamp: datetime
+    supi: str
+    nf_type: str
+    id: str
+
+
+class DatasetStreamRequest(BaseModel):
+    """
+    Request for the streaming retrieval of the samples of a dataset within a time window.
+
+    Attributes:
+        stream_id: The ID of the stream, used as Kafka key of all its messages.
+        dataset_id: The ID of the dataset.
+        start_time: The start of the time window (inclusive).
+        stop_time: The end of the time window (exclusive).
+        chunk_size: The maximum number of samples per chunk.
+        resume_offset: The index of the first sample to deliver, used to number the samples of a resumed stream.
+        resume_after: The key of the last sample received, an interrupted stream resuming right after it. Unlike an
+            offset, it is not shifted by samples inserted or compacted since the interruption.
+        resolution: The coarsest acceptable time resolution (in seconds) of the samples. Samples are downsampled to
+            the coarsest available resolution not exceeding it, raw samples are delivered if None.
+    """
+    stream_id: str
+    dataset_id: str
+    start_time: datetime
+    stop_time: datetime
+    chunk_size: int = 1000
+    resume_offset: int = 0
+    resume_after: Optional[SampleKey] = None
+    resolution: Optional[float] = None
+
+
+class DatasetChunk(BaseModel):
+    """
+    Ordered, bounded-size chunk of a dataset stream.
+
+    Attributes:
+        stream_id: The ID of the stream.
+        sequence_number: The position of the chunk in the stream, starting at 0 for each (re)started stream.
+        offset: The index of the chunk's first sample in the whole retrieval, to be used as `resume_offset`.
+        samples: The samples, ordered by timestamp. Downsampled samples carry the number of raw samples they
+            summarize (`count`).
+        last_key: The key of the chunk's last sample, to be used as `resume_after`.
+        end_of_stream: Whether this is the last chunk of the stream.
+    """
+    stream_id: str
+    sequence_number: int
+    offset: int
+    samples: list[dict[str, Any]]
+    last_key: Optional[SampleKey] = None
+    end_of_stream: bool = False
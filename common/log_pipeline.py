@@ -0,0 +1,225 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate limits and samples the records below WARNING, per call site.
+
+    Each call site (file and line) is a message type with its own token bucket of `rate_limit` records per second, the
+    records in excess being dropped. The bucket holds at least one token, so that a rate limit below 1 keeps one record
+    every `1 / rate_limit` seconds. The remaining records are then kept with a probability of `sample_rate`. The next
+    record kept for a call site carries the number of its records dropped since the previous one (`suppressed`).
+    """
+
+    def __init__(self, rate_limit: float = 0.0, sample_rate: float = 1.0):
+        """
+        Initializes the filter.
+
+        Args:
+            rate_limit (float): The maximum number of records per second of each call site, unlimited if 0.
+            sample_rate (float): The fraction of the records kept after rate limiting.
+        """
+        super().__init__()
+        self.rate_limit = rate_limit
+        self.sample_rate = sample_rate
+        # Burst of each call site, a bucket capped below one token never allowing a record
+        self._capacity = max(1.0, rate_limit)
+        self._lock = threading.Lock()
+        # Tokens, time of the last refill and number of dropped records of each call site
+        self._buckets: dict[tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or (not self.rate_limit and self.sample_rate >= 1.0):
+            return True
+
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self._capacity, record.created, 0]
+            if self.rate_limit:
+                bucket[0] = min(self._capacity, bucket[0] + (record.created - bucket[1]) * self.rate_limit)
+                bucket[1] = record.created
+                if bucket[0] < 1.0:
+                    bucket[2] += 1
+                    return False
+                bucket[0] -= 1.0
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                bucket[2] += 1
+                return False
+            record.suppressed, bucket[2] = bucket[2], 0
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler leaving the formatting of the records to the background writer.
+
+    Unlike the base handler, the message is not merged with its arguments before being enqueued, so that the records
+    logged with `%`-style arguments are only formatted in the writer thread. The records are dropped when the queue is
+    full, rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Tracebacks reference the frames of the caller, they are rendered before leaving its thread
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formatter of the default text output, mentioning the records dropped by the sampling filter.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{message} ({suppressed} similar message(s) suppressed)" if suppressed else message
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter of the structured output: one JSON object per line.
+    """
+
+    def __init__(self, service_name: str):
+        super().__init__()
+        self.service_name = service_name
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+                 "level": record.levelname,
+                 "service": self.service_name,
+                 "logger": record.name,
+                 "location": f"{record.module}:{record.lineno}",
+                 "message": record.getMessage()}
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogPipeline:
+    """
+    Asynchronous logging shared by the services.
+
+    Records are filtered, then enqueued by the logging thread without being formatted, and a background writer
+    formats and writes them, so that the event loop never waits for the output.
+    """
+
+    def __init__(self, service_name: str, level: int = logging.INFO, json_output: bool = False,
+                 rate_limit: float = 0.0, sample_rate: float = 1.0, queue_size: int = 10000):
+        """
+        Initializes the pipeline.
+
+        Args:
+            service_name (str): The name of the service, included in the structured output.
+            level (int): The level of the root logger.
+            json_output (bool): Whether records are written as JSON objects rather than text.
+            rate_limit (float): The maximum number of records per second of each call site below WARNING, unlimited
+                if 0.
+            sample_rate (float): The fraction of the records below WARNING kept after rate limiting.
+            queue_size (int): The maximum number of records waiting to be written, the next ones being dropped.
+        """
+        self.level = level
+        self.handler = DeferredQueueHandler(queue.Queue(maxsize=queue_size))
+        self.handler.addFilter(SamplingFilter(rate_limit, sample_rate))
+
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter(service_name) if json_output else TextFormatter(TEXT_FORMAT))
+        self.listener = QueueListener(self.handler.queue, output, respect_handler_level=True)
+        self._running = False
+
+    def install(self):
+        """
+        Replaces the handlers of the root logger with the queue handler and starts the background writer, which is
+        flushed at exit.
+        """
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Writes the pending records and stops the background writer.
+        """
+        if not self._running:
+            return
+        self._running = False
+        self.listener.stop()
+        if self.handler.dropped:
+            # The writer is stopped, the warning is written directly
+            output = self.listener.handlers[0]
+            output.handle(logging.makeLogRecord({"levelno": logging.WARNING, "levelname": "WARNING",
+                                                 "created": time.time(),
+                                                 "msg": f"{self.handler.dropped} log record(s) dropped by the full "
+                                                        f"log queue"}))
+
+
+def configure_logging(service_name: str, log_level: str = "INFO") -> LogPipeline:
+    """
+    Configures the logging of a service, in place of `logging.basicConfig`.
+
+    The pipeline is configured through the following environment variables:
+
+    * `LOG_FORMAT`: 'text' (default) or 'json'
+    * `LOG_RATE_LIMIT`: The maximum number of records per second of each call site below WARNING, unlimited if 0
+      (default: 0)
+    * `LOG_SAMPLE_RATE`: The fraction of the records below WARNING kept after rate limiting (default: 1)
+    * `LOG_QUEUE_SIZE`: The maximum number of records waiting to be written (default: 10000)
+
+    Args:
+        service_name (str): The name of the service.
+        log_level (str): The name of the level of the root logger.
+
+    Returns:
+        LogPipeline: The installed pipeline.
+    """
+    pipeline = LogPipeline(service_name,
+                           getattr(logging, log_level.upper()),
+                           os.getenv('LOG_FORMAT', 'text').lower() == 'json',
+                           float(os.getenv('LOG_RATE_LIMIT', '0')),
+                           float(os.getenv('LOG_SAMPLE_RATE', '1')),
+                           int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    pipeline.install()
+    return pipeline
@@ -0,0 +1,102 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from pydantic import BaseModel
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ModelManifest(BaseModel):
+    """
+    Description of a model bundle (the model and its scalers) stored in a content-addressed artifact store.
+
+    Attributes:
+        hash: The hash of the bundle, computed from the names and checksums of its files.
+        version: The version of the model.
+        files: The SHA-256 checksum of each file of the bundle, by file name.
+        metadata: Free-form metadata about the model (training window, loss, etc.).
+    """
+    hash: str
+    version: str
+    files: dict[str, str]
+    metadata: dict[str, Any] = {}
+
+
+class ModelReference(BaseModel):
+    """
+    Reference to a model bundle, as provided in ML model provision notifications.
+
+    Attributes:
+        base_url: The URL of the artifact store.
+        hash: The hash of the bundle, which is also its checksum.
+        version: The version of the model.
+        variant: The variant of the model the bundle holds (e.g., 'float32', 'int8').
+    """
+    base_url: str
+    hash: str
+    version: str
+    variant: str = "float32"
+
+    def to_url(self) -> str:
+        return f"{self.base_url}/artifacts/{self.hash}?{urlencode({'version': self.version, 'variant': self.variant})}"
+
+    @staticmethod
+    def from_url(url: str) -> Optional["ModelReference"]:
+        """
+        Parses the URL of a model bundle.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            Optional[ModelReference]: The reference, or None if the URL does not designate a bundle of an artifact
+                store (e.g., a local directory).
+        """
+        parsed = urlparse(url)
+        path = parsed.path.rstrip("/").split("/")
+        if parsed.scheme not in ("http", "https") or len(path) < 2 or path[-2] != "artifacts":
+            return None
+        base_path = "/".join(path[:-2])
+        query = parse_qs(parsed.query)
+        return ModelReference(base_url=f"{parsed.scheme}://{parsed.netloc}{base_path}", hash=path[-1],
+                              version=query.get("version", [""])[0], variant=query.get("variant", ["float32"])[0])
+
+
+def file_sha256(path: Path) -> str:
+    """
+    Computes the SHA-256 checksum of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bundle_hash(files: dict[str, str]) -> str:
+    """
+    Computes the hash of a bundle from the names and checksums of its files.
+
+    Args:
+        files (dict[str, str]): The SHA-256 checksum of each file, by file name.
+
+    Returns:
+        str: The hash of the bundle.
+    """
+    digest = hashlib.sha256()
+    for name, checksum in sorted(files.items()):
+        digest.update(f"{name}\0{checksum}\n".encode())
+    return digest.hexdigest()
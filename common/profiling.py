@@ -0,0 +1,306 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+
+class _RecordingEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """
+    Event loop policy keeping a reference to the last event loop created by the service.
+    """
+
+    def __init__(self, profiler: "Profiler"):
+        super().__init__()
+        self._profiler = profiler
+
+    def new_event_loop(self):
+        loop = super().new_event_loop()
+        self._profiler.event_loop = loop
+        return loop
+
+
+class Profiler:
+    """
+    On-demand profiling surface shared by the services.
+
+    Once installed, the profiler can be controlled through signals or through a small HTTP endpoint:
+
+    * SIGUSR1 or `GET /profile?seconds=N`: runs a sampling profiler for N seconds and writes the sampled stacks in the
+      collapsed format used by flamegraph tools (`.folded`).
+    * SIGUSR2 or `GET /tasks`: dumps the stacks of all the asyncio tasks of the service's event loop.
+    * `GET /loop-lag`: returns the event loop lag measured since the last call.
+    * `GET /tracemalloc`: takes a tracemalloc snapshot and writes its difference with the previous one. Memory
+      allocations are only traced after the first call (`GET /tracemalloc?stop=1` stops tracing).
+
+    All the outputs are written in the output directory, typically a mounted volume.
+    """
+
+    def __init__(self, service_name: str, output_dir: str, port: int, default_duration: float = 30.0,
+                 sampling_interval: float = 0.01, loop_lag_interval: float = 1.0):
+        self.service_name = service_name
+        self.output_dir = Path(output_dir)
+        self.port = port
+        self.default_duration = default_duration
+        self.sampling_interval = sampling_interval
+        self.loop_lag_interval = loop_lag_interval
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._profiling_lock = threading.Lock()
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._loop_lags: list[float] = []
+
+    def install(self):
+        """
+        Registers the signal handlers, the event loop policy and the background threads of the profiler.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        asyncio.set_event_loop_policy(_RecordingEventLoopPolicy(self))
+
+        signal.signal(signal.SIGUSR1, lambda _signum, _frame: self.start_profile(self.default_duration))
+        signal.signal(signal.SIGUSR2, lambda _signum, _frame: threading.Thread(target=self.dump_tasks,
+                                                                               daemon=True).start())
+
+        threading.Thread(target=self._monitor_loop_lag, name="profiler-loop-lag", daemon=True).start()
+        if self.port:
+            server = ThreadingHTTPServer(("0.0.0.0", self.port), self._make_request_handler())
+            threading.Thread(target=server.serve_forever, name="profiler-http", daemon=True).start()
+
+        logging.info(f"Profiling hooks enabled for '{self.service_name}': OUTPUT_DIR={self.output_dir}, "
+                     f"PORT={self.port}")
+
+    def start_profile(self, duration: float) -> bool:
+        """
+        Starts the sampling profiler in a background thread.
+
+        Args:
+            duration (float): The profiling duration, in seconds.
+
+        Returns:
+            bool: False if a profiling session is already running.
+        """
+        if not self._profiling_lock.acquire(blocking=False):
+            logging.warning("A profiling session is already running")
+            return False
+
+        threading.Thread(target=self._run_profile, args=(duration,), name="profiler-sampler", daemon=True).start()
+        return True
+
+    def _run_profile(self, duration: float):
+        try:
+            logging.info(f"Starting a {duration:.0f}s sampling profile")
+            sampler_id = threading.get_ident()
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = Counter()
+
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == sampler_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                        frame = frame.f_back
+                    stack.append(thread_names.get(thread_id, str(thread_id)))
+                    stacks[";".join(reversed(stack))] += 1
+                time.sleep(self.sampling_interval)
+
+            path = self._output_path("profile", "folded")
+            with open(path, "w") as file:
+                for stack, count in stacks.items():
+                    file.write(f"{stack} {count}\n")
+            logging.info(f"Wrote {sum(stacks.values())} samples to '{path}'")
+        finally:
+            self._profiling_lock.release()
+
+    def dump_tasks(self, timeout: float = 5.0) -> Path:
+        """
+        Writes the stacks of all the asyncio tasks of the service's event loop. If the loop does not answer in time,
+        the stack of every thread is written instead, which shows what is blocking the loop.
+
+        Args:
+            timeout (float): The time to wait for the event loop, in seconds.
+
+        Returns:
+            Path: The path of the dump.
+        """
+        lines = []
+        result = Future()
+        if self.event_loop is not None and self.event_loop.is_running():
+            self.event_loop.call_soon_threadsafe(lambda: result.set_result(self._format_tasks()))
+            try:
+                lines = result.result(timeout=timeout)
+            except TimeoutError:
+                lines = [f"Event loop did not answer within {timeout}s, thread stacks:"]
+                for thread_id, frame in sys._current_frames().items():
+                    lines.append(f"\nThread {thread_id}:")
+                    lines.extend(traceback.format_stack(frame))
+        else:
+            lines = ["No running event loop"]
+
+        path = self._output_path("tasks", "txt")
+        path.write_text("\n".join(lines))
+        logging.info(f"Wrote asyncio tasks dump to '{path}'")
+        return path
+
+    def _format_tasks(self) -> list[str]:
+        lines = []
+        for task in asyncio.all_tasks(self.event_loop):
+            lines.append(f"{task.get_name()} ({'done' if task.done() else 'pending'}): {task.get_coro()!r}")
+            for frame in task.get_stack():
+                lines.append(f"    {frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        return lines
+
+    def _monitor_loop_lag(self):
+        while True:
+            time.sleep(self.loop_lag_interval)
+            loop = self.event_loop
+            if loop is None or not loop.is_running():
+                continue
+            scheduled = time.monotonic()
+            done = threading.Event()
+            loop.call_soon_threadsafe(done.set)
+            done.wait(timeout=60.0)
+            self._loop_lags.append(time.monotonic() - scheduled)
+            del self._loop_lags[:-3600]
+
+    def loop_lag_stats(self) -> dict:
+        """
+        Returns statistics about the event loop lag measured since the last call.
+        """
+        lags, self._loop_lags = sorted(self._loop_lags), []
+        if not lags:
+            return {"samples": 0}
+        return {"samples": len(lags),
+                "mean": sum(lags) / len(lags),
+                "p50": lags[len(lags) // 2],
+                "p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+                "max": lags[-1]}
+
+    def tracemalloc_snapshot(self, top: int = 50) -> Optional[Path]:
+        """
+        Takes a tracemalloc snapshot and writes its difference with the previous one. Tracing is started by the first
+        call, which therefore does not produce any output.
+
+        Args:
+            top (int): The number of allocation sites to write.
+
+        Returns:
+            Optional[Path]: The path of the output, if any.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self._previous_snapshot = tracemalloc.take_snapshot()
+            logging.info("Started tracing memory allocations")
+            return None
+
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self._previous_snapshot, "lineno")
+        self._previous_snapshot = snapshot
+
+        path = self._output_path("tracemalloc", "txt")
+        current, peak = tracemalloc.get_traced_memory()
+        path.write_text("\n".join([f"Traced memory: current={current} B, peak={peak} B"] +
+                                  [str(stat) for stat in stats[:top]]))
+        logging.info(f"Wrote tracemalloc diff to '{path}'")
+        return path
+
+    def stop_tracemalloc(self):
+        tracemalloc.stop()
+        self._previous_snapshot = None
+        logging.info("Stopped tracing memory allocations")
+
+    def _output_path(self, kind: str, extension: str) -> Path:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        return self.output_dir / f"{self.service_name}-{kind}-{timestamp}.{extension}"
+
+    def _make_request_handler(self):
+        profiler = self
+
+        class ProfilerRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                match url.path:
+                    case "/profile":
+                        duration = float(query.get("seconds", [profiler.default_duration])[0])
+                        started = profiler.start_profile(duration)
+                        self._reply(200 if started else 409, {"started": started, "seconds": duration})
+                    case "/tasks":
+                        self._reply(200, {"path": str(profiler.dump_tasks())})
+                    case "/loop-lag":
+                        self._reply(200, profiler.loop_lag_stats())
+                    case "/tracemalloc":
+                        if "stop" in query:
+                            profiler.stop_tracemalloc()
+                            self._reply(200, {"tracing": False})
+                        else:
+                            path = profiler.tracemalloc_snapshot()
+                            self._reply(200, {"tracing": True, "path": str(path) if path else None})
+                    case _:
+                        self._reply(404, {"error": f"Unknown endpoint '{url.path}'"})
+
+            def _reply(self, status_code: int, body: dict):
+                content = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Profiler endpoint: {format % args}")
+
+        return ProfilerRequestHandler
+
+
+def install_profiling(service_name: str) -> Optional[Profiler]:
+    """
+    Installs the profiling hooks if `PROFILING_ENABLED` is set. Nothing is installed otherwise.
+
+    The hooks are configured through the following environment variables:
+
+    * `PROFILING_OUTPUT_DIR`: The directory where outputs are written (default: '/profiling')
+    * `PROFILING_PORT`: The port of the control endpoint, disabled if 0 (default: 6060)
+    * `PROFILING_DURATION`: The default duration of a sampling profile, in seconds (default: 30)
+
+    Args:
+        service_name (str): The name of the service, used to name the outputs.
+
+    Returns:
+        Optional[Profiler]: The installed profiler, if any.
+    """
+    if os.getenv('PROFILING_ENABLED', '0').lower() not in ('1', 'true', 'yes'):
+        return None
+
+    profiler = Profiler(service_name,
+                        os.getenv('PROFILING_OUTPUT_DIR', '/profiling'),
+                        int(os.getenv('PROFILING_PORT', '6060')),
+                        float(os.getenv('PROFILING_DURATION', '30')))
+    profiler.install()
+    return profiler
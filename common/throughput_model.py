@@ -0,0 +1,125 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+from enum import StrEnum
+from pathlib import Path
+
+import numpy as np
+
+MODEL_FILE = "lstm_model.keras"
+TFLITE_MODEL_FILE = "model.tflite"
+NUMPY_MODEL_FILE = "weights.npz"
+X_SCALER_FILE = "x_scaler.save"
+Y_SCALER_FILE = "y_scaler.save"
+
+
+class ModelVariant(StrEnum):
+    """
+    Variants of the throughput model exported by the MTLF.
+    """
+    FLOAT32 = "float32",  # The Keras model as trained
+    FLOAT16 = "float16",  # TensorFlow Lite model with float16 weights
+    INT8 = "int8",  # TensorFlow Lite model with int8 weights (dynamic range quantization)
+    NUMPY = "numpy",  # LSTM and dense weights evaluated with NumPy, without any TensorFlow runtime
+
+    @property
+    def model_file(self) -> str:
+        match self:
+            case ModelVariant.FLOAT32:
+                return MODEL_FILE
+            case ModelVariant.FLOAT16 | ModelVariant.INT8:
+                return TFLITE_MODEL_FILE
+            case ModelVariant.NUMPY:
+                return NUMPY_MODEL_FILE
+
+
+class ThroughputModelRunner:
+    """
+    Runs a variant of the throughput model on batches of AnLF input arrays: the inputs are scaled, shaped as sequences
+    of a single time step, and the predictions are unscaled, like the AnLF does with the Keras model.
+
+    TensorFlow is only imported by the variants that need it.
+    """
+
+    def __init__(self, bundle_dir: Path, variant: ModelVariant = ModelVariant.FLOAT32):
+        """
+        Loads a model bundle.
+
+        Args:
+            bundle_dir (Path): The directory holding the model file of the variant and the scalers.
+            variant (ModelVariant): The variant of the model.
+        """
+        import joblib
+
+        self.variant = variant
+        self._x_scaler = joblib.load(bundle_dir / X_SCALER_FILE)
+        self._y_scaler = joblib.load(bundle_dir / Y_SCALER_FILE)
+
+        model_path = bundle_dir / variant.model_file
+        match variant:
+            case ModelVariant.FLOAT32:
+                import keras
+                self._model = keras.models.load_model(model_path)
+                self._run = self._run_keras
+            case ModelVariant.FLOAT16 | ModelVariant.INT8:
+                import tensorflow as tf
+                self._interpreter = tf.lite.Interpreter(model_path=str(model_path))
+                self._input_index = self._interpreter.get_input_details()[0]["index"]
+                self._output_index = self._interpreter.get_output_details()[0]["index"]
+                self._batch_size = 0
+                self._run = self._run_tflite
+            case ModelVariant.NUMPY:
+                weights = np.load(model_path)
+                self._kernel, self._recurrent_kernel, self._bias = weights["kernel"], weights["recurrent_kernel"], \
+                    weights["bias"]
+                self._dense_kernel, self._dense_bias = weights["dense_kernel"], weights["dense_bias"]
+                self._relu = str(weights["activation"]) == "relu"
+                self._run = self._run_numpy
+
+    def predict(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Predicts the throughput of a batch of inputs.
+
+        Args:
+            inputs (np.ndarray): The inputs, of shape (n, 6), in the order of `ThroughputSubscriptionData`.
+
+        Returns:
+            np.ndarray: The predictions, of shape (n, 1).
+        """
+        x = self._x_scaler.transform(inputs).astype(np.float32).reshape(-1, 1, inputs.shape[1])
+        return self._y_scaler.inverse_transform(self._run(x))
+
+    def _run_keras(self, x: np.ndarray) -> np.ndarray:
+        return self._model(x, training=False).numpy()
+
+    def _run_tflite(self, x: np.ndarray) -> np.ndarray:
+        if x.shape[0] != self._batch_size:
+            self._interpreter.resize_tensor_input(self._input_index, x.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = x.shape[0]
+        self._interpreter.set_tensor(self._input_index, x)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output_index)
+
+    def _run_numpy(self, x: np.ndarray) -> np.ndarray:
+        units = self._recurrent_kernel.shape[0]
+        h = np.zeros((x.shape[0], units), dtype=np.float32)
+        c = np.zeros((x.shape[0], units), dtype=np.float32)
+        activation = (lambda v: np.maximum(v, 0.0)) if self._relu else np.tanh
+        # Keras' gate order: input, forget, cell, output
+        for step in range(x.shape[1]):
+            z = x[:, step] @ self._kernel + h @ self._recurrent_kernel + self._bias
+            i = 1.0 / (1.0 + np.exp(-z[:, :units]))
+            f = 1.0 / (1.0 + np.exp(-z[:, units:2 * units]))
+            o = 1.0 / (1.0 + np.exp(-z[:, 3 * units:]))
+            c = f * c + i * activation(z[:, 2 * units:3 * units])
+            h = o * activation(c)
+        return h @ self._dense_kernel + self._dense_bias
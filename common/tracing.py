@@ -0,0 +1,274 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+TRACEPARENT_HEADER = "traceparent"
+
+
+class SpanContext:
+    """
+    Identity of a span, propagated across services in the W3C `traceparent` format.
+    """
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str | bytes]) -> Optional["SpanContext"]:
+        """
+        Parses a `traceparent` header.
+
+        Returns:
+            Optional[SpanContext]: The context, or None if the header is missing or invalid.
+        """
+        if isinstance(value, bytes):
+            value = value.decode(errors="replace")
+        parts = value.split("-") if value else []
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        return cls(parts[1], parts[2], parts[3] == "01")
+
+    @classmethod
+    def from_kafka_headers(cls, headers: Optional[list[tuple[str, bytes]]]) -> Optional["SpanContext"]:
+        for key, value in headers or ():
+            if key == TRACEPARENT_HEADER:
+                return cls.from_traceparent(value)
+        return None
+
+
+class Span:
+    """
+    A timed operation of a trace, exported when ended.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, context: SpanContext, parent_id: Optional[str],
+                 start_time: Optional[float] = None, attributes: Optional[dict] = None):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.start_time = time.time() if start_time is None else start_time
+        self.attributes = attributes or {}
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, end_time: Optional[float] = None):
+        self.tracer.export(self, time.time() if end_time is None else end_time)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc_value, _traceback):
+        if exc_value is not None:
+            self.attributes["error"] = repr(exc_value)
+        self.end()
+
+
+class _NoopSpan:
+    """
+    Span of the unsampled traces, on which every operation is a no-op.
+    """
+    context = None
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def end(self, end_time: Optional[float] = None):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, _traceback):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileSpanExporter:
+    """
+    Local exporter writing the ended spans as JSON lines, from a background thread.
+    """
+
+    def __init__(self, path: str, max_pending_spans: int = 10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending_spans)
+        self.dropped: int = 0
+        self._thread = threading.Thread(target=self._write, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def export(self, span: dict):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        try:
+            self._queue.put(None, timeout=5.0)
+        except queue.Full:
+            return
+        self._thread.join(timeout=5.0)
+
+    def _write(self):
+        with open(self.path, "a") as file:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    return
+                file.write(json.dumps(span, default=str) + "\n")
+                if self._queue.empty():
+                    file.flush()
+
+
+class Tracer:
+    """
+    Lightweight tracer shared by the services.
+
+    A trace is sampled as a whole: the decision is taken from its ID, so that every service sampling at the same rate
+    takes the same decision, even for a trace whose context could not be propagated. When the sample rate is 0, no
+    span is created and the only cost of an instrumented operation is a test of `enabled`.
+    """
+
+    def __init__(self):
+        self.service_name: str = ""
+        self.sample_rate: float = 0.0
+        self._exporter: Optional[FileSpanExporter] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0.0
+
+    def configure(self, service_name: str, sample_rate: float, exporter: FileSpanExporter):
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self._exporter = exporter
+
+    def is_sampled(self, trace_id: str) -> bool:
+        return int(trace_id[:16], 16) < self.sample_rate * 2 ** 64
+
+    def derive_context(self, *keys) -> Optional[SpanContext]:
+        """
+        Derives the root context of a trace from the identifiers of a message, for the hops through which headers are
+        not propagated: each side of the hop derives the same context from the body of the message.
+
+        Args:
+            *keys: The identifiers of the message (e.g., its correlation ID, SUPI and timestamp).
+
+        Returns:
+            Optional[SpanContext]: The context, or None if tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        digest = hashlib.blake2b("|".join(str(key) for key in keys).encode(), digest_size=24).hexdigest()
+        return SpanContext(digest[:32], digest[32:], self.is_sampled(digest[:32]))
+
+    def start_span(self, name: str, parent: Optional[SpanContext] = None, context: Optional[SpanContext] = None,
+                   start_time: Optional[float] = None, **attributes) -> Span | _NoopSpan:
+        """
+        Starts a span, to be ended with `end()` or used as a context manager.
+
+        Args:
+            name (str): The name of the operation.
+            parent (Optional[SpanContext]): The context of the parent span, a new trace is started if None.
+            context (Optional[SpanContext]): The context of the span itself, for a root span whose context has been
+                derived. A new span ID is generated if None.
+            start_time (Optional[float]): The POSIX start time, now if None.
+            **attributes: The attributes of the span.
+
+        Returns:
+            Span | _NoopSpan: The span, which is a no-op if the trace is not sampled.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if context is None:
+            if parent is None:
+                trace_id = secrets.token_hex(16)
+                context = SpanContext(trace_id, secrets.token_hex(8), self.is_sampled(trace_id))
+            else:
+                context = SpanContext(parent.trace_id, secrets.token_hex(8), parent.sampled)
+        if not context.sampled:
+            return NOOP_SPAN
+        return Span(self, name, context, parent.span_id if parent is not None else None, start_time, attributes)
+
+    def export(self, span: Span, end_time: float):
+        self._exporter.export({"traceId": span.context.trace_id,
+                               "spanId": span.context.span_id,
+                               "parentSpanId": span.parent_id,
+                               "name": span.name,
+                               "service": self.service_name,
+                               "start": span.start_time,
+                               "durationMs": (end_time - span.start_time) * 1000.0,
+                               "attributes": span.attributes})
+
+
+tracer = Tracer()
+
+
+def location_trace_context(ldr_reference: str, supi: str, timestamp: float) -> Optional[SpanContext]:
+    """
+    Derives the root context of the trace of a GMLC location notification, from its LDR reference, SUPI and location
+    estimate timestamp (POSIX).
+    """
+    return tracer.derive_context("GMLC", ldr_reference, supi, f"{timestamp:.6f}")
+
+
+def rsrp_trace_context(correlation_id: str, timestamp: float) -> Optional[SpanContext]:
+    """
+    Derives the root context of the trace of a RAN RSRP notification, from its correlation ID and timestamp (POSIX).
+    """
+    return tracer.derive_context("RAN", correlation_id, f"{timestamp:.6f}")
+
+
+def install_tracing(service_name: str) -> Tracer:
+    """
+    Configures the shared tracer if `TRACE_SAMPLE_RATE` is above 0. Tracing is disabled otherwise.
+
+    The tracer is configured through the following environment variables:
+
+    * `TRACE_SAMPLE_RATE`: The fraction of the traces that are recorded (default: 0)
+    * `TRACE_OUTPUT_DIR`: The directory where the spans are written, one JSON lines file per service
+      (default: '/traces')
+
+    Args:
+        service_name (str): The name of the service, used to name the output.
+
+    Returns:
+        Tracer: The shared tracer.
+    """
+    sample_rate = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    if sample_rate > 0.0:
+        path = Path(os.getenv('TRACE_OUTPUT_DIR', '/traces')) / f"{service_name}.jsonl"
+        tracer.configure(service_name, min(sample_rate, 1.0), FileSpanExporter(str(path)))
+        logging.info(f"Tracing enabled for '{service_name}': SAMPLE_RATE={sample_rate}, OUTPUT={path}")
+    return tracer
@@ -21,11 +21,14 @@ logging.getLogger('httpx').setLevel(logging.WARNING)
 import uvicorn
 from fastapi import FastAPI, BackgroundTasks
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+
 app = FastAPI()
 
 # Log level
 log_level = os.getenv('CSv_FP_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('CSV_FP_SERVICE_NAME', 'csv-file-player'), log_level)
 
 # List of endpoints to send data
 gmlc_service_name = os.getenv('GMLC_SERVICE_NAME')
@@ -40,6 +43,9 @@ endpoints = [
 # CSV file player service port
 service_port = int(os.getenv('CSV_FP_SERVICE_PORT'))
 
+# Opt-in profiling hooks
+install_profiling(os.getenv('CSV_FP_SERVICE_NAME', 'csv-file-player'))
+
 FIELDS_CONVERSION = {
     "latitude": float,
     "longitude": float,
@@ -27,7 +27,7 @@ import uvicorn
 
 logging.getLogger("uvicorn").setLevel(logging.WARNING)
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from nwdaf_api.models.event_notify_data_ext import EventNotifyDataExt
 from nwdaf_api.models.event_notify_data_type import EventNotifyDataType
 from nwdaf_api.models.geographical_coordinates import GeographicalCoordinates
@@ -40,16 +40,35 @@ from nwdaf_api.models.supported_gad_shapes import SupportedGADShapes
 from pydantic import BaseModel
 from starlette import status
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+from common.tracing import TRACEPARENT_HEADER, install_tracing, location_trace_context, tracer
+
 # Log level
 log_level = os.getenv('GMLC_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('GMLC_SERVICE_NAME', 'gmlc'), log_level)
 
 # Service port
 service_port = int(os.getenv('GMLC_SERVICE_PORT'))
 
+# Opt-in profiling hooks
+install_profiling(os.getenv('GMLC_SERVICE_NAME', 'gmlc'))
+
+# Opt-in tracing of the location notifications
+install_tracing(os.getenv('GMLC_SERVICE_NAME', 'gmlc'))
+
+
+# Client shared by the notifications, whose keep-alive connections to the API Gateway are reused
+http_client: Optional[httpx.AsyncClient] = None
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    global http_client
+    http_client = httpx.AsyncClient(timeout=5.0,
+                                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20,
+                                                        keepalive_expiry=30.0))
+
     # Start background task when app starts
     notification_task = asyncio.create_task(send_notifications())
 
@@ -58,6 +77,7 @@ async def lifespan(_app: FastAPI):
 
     # Cancel the notification task when app shuts down
     notification_task.cancel()
+    await http_client.aclose()
 
 
 @dataclass
@@ -85,9 +105,31 @@ class GmlcData(BaseModel):
     compassDirection: Optional[int]
 
 
+class CancelLocData(BaseModel):
+    # Subset of the 3GPP CancelLocData identifying the location requests to cancel, all those of the LDR reference if
+    # no SUPI is provided
+    ldrReference: str
+    supi: Optional[str] = None
+
+
 next_data: Optional[GmlcData] = None
 
 
+def remove_location_requests(ldr_reference: str, supi: Optional[str]) -> int:
+    """
+    Removes the location requests of an LDR reference, and of a UE if provided.
+
+    Returns:
+        int: The number of removed requests.
+    """
+    subscription_ids = [subscription_id for subscription_id, subscription_data in location_subscriptions.items()
+                        if subscription_data.input_data.ldr_reference == ldr_reference
+                        and (supi is None or subscription_data.input_data.supi == supi)]
+    for subscription_id in subscription_ids:
+        del location_subscriptions[subscription_id]
+    return len(subscription_ids)
+
+
 @app.post("/ngmlc-loc/v1/provide-location", status_code=status.HTTP_200_OK)
 async def provide_location_sub(input_data: InputData):
     periodic_event_info = input_data.periodic_event_info
@@ -95,6 +137,8 @@ async def provide_location_sub(input_data: InputData):
     logging.info(
         f"Received periodic location request for UE '{input_data.supi}' (every {periodic_event_info.reporting_interval} seconds, {reporting_amount})")
     logging.debug(f"Received GMLC input data: {input_data.model_dump_json(exclude_unset=True)}")
+    # A request sent again for the same UE and LDR reference replaces the previous one
+    remove_location_requests(input_data.ldr_reference, input_data.supi)
     subscription_id = str(uuid4())
     notification_interval = timedelta(
         seconds=periodic_event_info.reporting_interval
@@ -105,6 +149,21 @@ async def provide_location_sub(input_data: InputData):
     return
 
 
+@app.post("/ngmlc-loc/v1/cancel-location")
+async def cancel_location_sub(cancel_loc_data: CancelLocData):
+    if not remove_location_requests(cancel_loc_data.ldrReference, cancel_loc_data.supi):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    logging.info(f"Cancelled periodic location request for UE '{cancel_loc_data.supi}', "
+                 f"LDR_REFERENCE='{cancel_loc_data.ldrReference}'")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
 @app.post("/data")
 async def receive_data(gmlc_data: GmlcData):
     global next_data
@@ -149,8 +208,10 @@ async def send_notifications():
         await asyncio.sleep(0.3)
 
 
-async def notify(subscription_id: str, input_data: InputData):
-    logging.debug("Generating GMLC location notification with random data")
+def build_notification(input_data: InputData) -> EventNotifyDataExt:
+    """
+    Crafts a location notification for a subscription, from the last received data or from random data.
+    """
     # Generate random UE location data
     latitude = next_data.latitude if next_data and next_data.latitude is not None else random.uniform(44.9732550,
                                                                                                       44.97696380)
@@ -161,31 +222,45 @@ async def notify(subscription_id: str, input_data: InputData):
     location_estimate = GeographicArea(anyof_schema_1_validator=point)
 
     # Generate random UE velocity data
-    speed = next_data.speed if next_data and next_data.speed is not None else random.uniform(0.00010015551, 9.9988235)
-    compass_direction = next_data.compass_direction if next_data and next_data.compass_direction is not None else random.randint(
+    speed = next_data.movingSpeed if next_data and next_data.movingSpeed is not None else random.uniform(0.00010015551,
+                                                                                                         9.9988235)
+    compass_direction = next_data.compassDirection if next_data and next_data.compassDirection is not None else random.randint(
         0, 360)
     horizontal_velocity = HorizontalVelocity(h_speed=speed, bearing=compass_direction)
     velocity_estimate = VelocityEstimate(anyof_schema_1_validator=horizontal_velocity)
 
-    notification = EventNotifyDataExt(ldr_reference=input_data.ldr_reference,
-                                      event_notify_data_type=EventNotifyDataType.PERIODIC,
-                                      supi=input_data.supi,
-                                      timestamp_of_location_estimate=datetime.now(),
-                                      location_estimate=location_estimate,
-                                      velocity_estimate=velocity_estimate)
+    return EventNotifyDataExt(ldr_reference=input_data.ldr_reference,
+                              event_notify_data_type=EventNotifyDataType.PERIODIC,
+                              supi=input_data.supi,
+                              timestamp_of_location_estimate=datetime.now(),
+                              location_estimate=location_estimate,
+                              velocity_estimate=velocity_estimate)
+
+
+async def notify(subscription_id: str, input_data: InputData):
+    logging.debug("Generating GMLC location notification")
+    notification = build_notification(input_data)
+    body = notification.model_dump_json(exclude_unset=True)
+
+    # The trace starts with the notification, the AnLF derives the same context from its body
+    trace_context = location_trace_context(input_data.ldr_reference, input_data.supi,
+                                           notification.timestamp_of_location_estimate.timestamp())
+    span = tracer.start_span("gmlc.notify", context=trace_context, supi=input_data.supi,
+                             correlationId=input_data.ldr_reference)
+    headers = {TRACEPARENT_HEADER: span.context.traceparent} if span.context is not None else None
 
     response = None
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            logging.info(f"Sending new location data for UE '{input_data.supi}'...")
-            logging.debug(
-                f"Location notification to '{input_data.hgmlc_call_back_uri}' for subscription id '{subscription_id}': {notification.model_dump_json(exclude_unset=True)}")
-            response = await client.post(input_data.hgmlc_call_back_uri,
-                                         data=notification.model_dump_json(exclude_unset=True),
-                                         timeout=5.0)
-            response.raise_for_status()
-            logging.debug(
-                f"Sent notification to {input_data.hgmlc_call_back_uri} (status code: {response.status_code})")
+        # Arguments are only formatted by the log writer, if the record is not sampled out
+        logging.info("Sending new location data for UE '%s'...", input_data.supi)
+        logging.debug("Location notification to '%s' for subscription id '%s': %s",
+                      input_data.hgmlc_call_back_uri, subscription_id, body)
+        response = await http_client.post(input_data.hgmlc_call_back_uri,
+                                          data=body,
+                                          headers=headers)
+        response.raise_for_status()
+        logging.debug(
+            f"Sent notification to {input_data.hgmlc_call_back_uri} (status code: {response.status_code})")
 
     except httpx.HTTPError as e:
         logging.error(f"Failed to send notification for subscription {subscription_id}: {str(e)}")
@@ -193,6 +268,9 @@ async def notify(subscription_id: str, input_data: InputData):
             logging.error(f"Response '{response.text}' (status code: {response.status_code})")
         else:
             logging.error("No response received.")
+        span.set_attribute("error", str(e))
+    finally:
+        span.end()
 
 
 if __name__ == '__main__':
@@ -12,21 +12,32 @@
 import logging
 import os
 import signal
+from typing import Optional
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from nwdaf_api.models.nnwdaf_events_subscription_notification import NnwdafEventsSubscriptionNotification
 from starlette import status
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Gauge
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+from common.tracing import NOOP_SPAN, SpanContext, install_tracing, tracer
+
 # Log level
 log_level = os.getenv('NOTIF_CLIENT_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('NOTIF_CLIENT_SERVICE_NAME', 'notification-client'), log_level)
 
 # Service port
 service_port = int(os.getenv('NOTIF_CLIENT_SERVICE_PORT'))
 
+# Opt-in profiling hooks
+install_profiling(os.getenv('NOTIF_CLIENT_SERVICE_NAME', 'notification-client'))
+
+# Opt-in tracing of the analytics notifications
+install_tracing(os.getenv('NOTIF_CLIENT_SERVICE_NAME', 'notification-client'))
+
 app = FastAPI()
 
 instrumentator = Instrumentator()
@@ -40,8 +51,13 @@ predicted_throughput_gauge = Gauge(
 
 
 @app.post("/analytics-notification", status_code=status.HTTP_204_NO_CONTENT)
-async def analytic_notif(notif: NnwdafEventsSubscriptionNotification):
-    logging.debug(f"Received an analytics notification: {notif.model_dump_json(exclude_unset=True)}")
+async def analytic_notif(notif: NnwdafEventsSubscriptionNotification,
+                         traceparent: Optional[str] = Header(default=None)):
+    # Only the notifications whose trace context has been propagated are traced
+    parent = SpanContext.from_traceparent(traceparent) if tracer.enabled else None
+    span = tracer.start_span("client.notification", parent=parent) if parent is not None else NOOP_SPAN
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Received an analytics notification: %s", notif.model_dump_json(exclude_unset=True))
 
     # Update the Prometheus gauge
     for event in notif.event_notifications:
@@ -50,7 +66,8 @@ async def analytic_notif(notif: NnwdafEventsSubscriptionNotification):
                 supi = info.supi
                 throughput_value = float(info.throughput.replace(" Mbps", "").strip())
                 predicted_throughput_gauge.labels(supi=supi).set(throughput_value)
-                logging.info(f"Updated predicted throughput for {supi}: {throughput_value} Mbps")
+                logging.info("Updated predicted throughput for %s: %s Mbps", supi, throughput_value)
+    span.end()
 
     return
 
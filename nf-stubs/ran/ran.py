@@ -39,9 +39,13 @@ from nwdaf_api.models import (
 from pydantic import BaseModel, ValidationError
 from starlette import status
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+from common.tracing import TRACEPARENT_HEADER, install_tracing, rsrp_trace_context, tracer
+
 # Log level
 log_level = os.getenv('RAN_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('RAN_SERVICE_NAME', 'ran'), log_level)
 
 # Service name
 service_name = os.getenv('RAN_SERVICE_NAME')
@@ -49,9 +53,24 @@ service_name = os.getenv('RAN_SERVICE_NAME')
 # Service port
 service_port = int(os.getenv('RAN_SERVICE_PORT'))
 
+# Opt-in profiling hooks
+install_profiling(service_name)
+
+# Opt-in tracing of the RSRP notifications
+install_tracing(service_name)
+
+
+# Client shared by the notifications, whose keep-alive connections to the API Gateway are reused
+http_client: Optional[httpx.AsyncClient] = None
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    global http_client
+    http_client = httpx.AsyncClient(timeout=5.0,
+                                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20,
+                                                        keepalive_expiry=30.0))
+
     # Start background task when app starts
     notification_task = asyncio.create_task(send_notifications())
 
@@ -60,6 +79,7 @@ async def lifespan(_app: FastAPI):
 
     # Cancel the notification task when app shuts down
     notification_task.cancel()
+    await http_client.aclose()
 
 
 @dataclass
@@ -90,7 +110,7 @@ BaseModel.Config = type('Config', (), {
 @app.post("/ran-event-exposure/v1/subscriptions")
 async def ran_ee_subscription_handler(ran_sub: RanEventSubscription):
     logging.info(
-        f"Received periodic RSRP info subscription for UE '{ran_sub.ue_ids[0]}': PERIODICITY={ran_sub.periodicity}s, "
+        f"Received periodic RSRP info subscription for {len(ran_sub.ue_ids)} UE(s): PERIODICITY={ran_sub.periodicity}s, "
         f"CORRELATION_ID='{ran_sub.correlation_id}'")
     subscription_id = str(uuid4())
     notification_interval = timedelta(seconds=ran_sub.periodicity)
@@ -104,6 +124,36 @@ async def ran_ee_subscription_handler(ran_sub: RanEventSubscription):
                         "Location": f"http://{service_name}:{service_port}/ran-event-exposure/v1/subscriptions/{subscription_id}"})
 
 
+@app.put("/ran-event-exposure/v1/subscriptions/{subscription_id}")
+async def ran_ee_subscription_update_handler(subscription_id: str, ran_sub: RanEventSubscription):
+    subscription_data = rsrp_subscriptions.get(subscription_id)
+    if subscription_data is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    logging.info(
+        f"Updated periodic RSRP info subscription '{subscription_id}': {len(ran_sub.ue_ids)} UE(s), "
+        f"PERIODICITY={ran_sub.periodicity}s, CORRELATION_ID='{ran_sub.correlation_id}'")
+    subscription_data.ran_sub = ran_sub
+
+    return Response(status_code=status.HTTP_200_OK,
+                    content=ran_sub.model_dump_json(exclude_unset=True),
+                    media_type="application/json")
+
+
+@app.delete("/ran-event-exposure/v1/subscriptions/{subscription_id}")
+async def ran_ee_subscription_delete_handler(subscription_id: str):
+    if rsrp_subscriptions.pop(subscription_id, None) is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    logging.info(f"Deleted periodic RSRP info subscription '{subscription_id}'")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
 @app.post("/data")
 async def receive_data(ran_data: RanData):
     global next_data
@@ -142,48 +192,66 @@ async def send_notifications():
         await asyncio.sleep(0.3)
 
 
-async def notify(subscription_id: str, ran_sub: RanEventSubscription):
-    global next_data
-    for ue_id in ran_sub.ue_ids:
-        logging.debug("Generating RSRP info notification with random data")
+def build_notification(correlation_id: str, ran_sub: RanEventSubscription) -> RanEventExposureNotification:
+    """
+    Crafts an RSRP info notification for a subscription, from the last received data or from random data.
 
+    Raises:
+        ValidationError: If the notification is invalid.
+    """
+    # A single notification carries the RSRP information of all the UEs targeted by the subscription
+    rsrp_infos = []
+    for ue_id in ran_sub.ue_ids:
         lte_rsrp = random.randint(-140, -44) if next_data is None or next_data.lte_rsrp is None else next_data.lte_rsrp
         nr_ssRsrp = random.uniform(-139.0,
                                    -68.0) if next_data is None or next_data.nr_ssRsrp is None else next_data.nr_ssRsrp
+        rsrp_infos.append(RsrpInfo(ue_id=ue_id, nr_ss_rsrp=nr_ssRsrp, lte_rsrp=lte_rsrp))
 
-        notification = None
-        try:
-            notification = RanEventExposureNotification(event=RanEvent.RSRP_INFO,
-                                                        time_stamp=datetime.now(),
-                                                        correlation_id=subscription_id,
-                                                        rsrp_infos=[RsrpInfo(ue_id=ue_id,
-                                                                             nr_ss_rsrp=nr_ssRsrp,
-                                                                             lte_rsrp=lte_rsrp)])
-            logging.debug(
-                f"Crafted RAN event exposure notification: {notification.model_dump_json(exclude_unset=True)}")
-        except ValidationError as err:
-            error_messages = "\n".join([f"{e['loc']}: {e['msg']}" for e in err.errors()])
-            logging.error(f"Validation error creating RanEventExposureNotification: {error_messages}")
-
-        response = None
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                logging.info(f"Sending RSRP information for UE '{ue_id}'...")
-                logging.debug(
-                    f"Sending RSRP info notification to '{ran_sub.notif_uri}' for subscription id '{subscription_id}': {notification.model_dump_json(exclude_unset=True)}")
-                response = await client.post(ran_sub.notif_uri,
-                                             data=notification.model_dump_json(exclude_unset=True),
-                                             timeout=5.0)
-                response.raise_for_status()
-                logging.debug(
-                    f"Sent notification to {ran_sub.notif_uri} (status code: {response.status_code})")
-
-        except httpx.HTTPError as e:
-            logging.error(f"Failed to send notification for subscription {subscription_id}: {str(e)}")
-            if response is not None:
-                logging.error(f"Response '{response.text}' (status code: {response.status_code})")
-            else:
-                logging.error("No response received.")
+    return RanEventExposureNotification(event=RanEvent.RSRP_INFO,
+                                        time_stamp=datetime.now(),
+                                        correlation_id=correlation_id,
+                                        rsrp_infos=rsrp_infos)
+
+
+async def notify(subscription_id: str, ran_sub: RanEventSubscription):
+    logging.debug("Generating RSRP info notification")
+
+    try:
+        notification = build_notification(subscription_id, ran_sub)
+        body = notification.model_dump_json(exclude_unset=True)
+        logging.debug("Crafted RAN event exposure notification: %s", body)
+    except ValidationError as err:
+        error_messages = "\n".join([f"{e['loc']}: {e['msg']}" for e in err.errors()])
+        logging.error(f"Validation error creating RanEventExposureNotification: {error_messages}")
+        return
+
+    # The trace starts with the notification, the AnLF derives the same context from its body
+    span = tracer.start_span("ran.notify",
+                             context=rsrp_trace_context(subscription_id, notification.time_stamp.timestamp()),
+                             correlationId=subscription_id, ues=len(notification.rsrp_infos))
+    headers = {TRACEPARENT_HEADER: span.context.traceparent} if span.context is not None else None
+
+    response = None
+    try:
+        logging.info("Sending RSRP information for %d UE(s)...", len(notification.rsrp_infos))
+        logging.debug("Sending RSRP info notification to '%s' for subscription id '%s'",
+                      ran_sub.notif_uri, subscription_id)
+        response = await http_client.post(ran_sub.notif_uri,
+                                          data=body,
+                                          headers=headers)
+        response.raise_for_status()
+        logging.debug(
+            f"Sent notification to {ran_sub.notif_uri} (status code: {response.status_code})")
+
+    except httpx.HTTPError as e:
+        logging.error(f"Failed to send notification for subscription {subscription_id}: {str(e)}")
+        if response is not None:
+            logging.error(f"Response '{response.text}' (status code: {response.status_code})")
+        else:
+            logging.error("No response received.")
+        span.set_attribute("error", str(e))
+    finally:
+        span.end()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,213 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import ASCENDING
+
+import AdrfMetrics
+from AdrfSampleStore import AdrfSampleStore, ensure_time_series_collection
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Features holding an angle in degrees, whose mean is the direction of the sum of their unit vectors
+CIRCULAR_FEATURES = ["compassDirection"]
+
+
+class RollupTier:
+    """
+    Downsampled series of the samples, stored in its own time-series collection.
+
+    Each document holds the mean of every feature of a UE over a bucket of `resolution` seconds, and the number of
+    raw samples it has been computed from (`count`). Angles (`CIRCULAR_FEATURES`) are averaged as unit vectors, so that
+    the mean of 350° and 10° is 0° rather than 180°. Buckets of the coarser tiers being computed from those of the
+    finer ones, their angles are the weighted circular mean of the finer buckets' means.
+    """
+
+    def __init__(self, resolution: int, retention: Optional[int] = None):
+        """
+        Initializes the tier.
+
+        Args:
+            resolution (int): The duration (in seconds) of the buckets.
+            retention (Optional[int]): The time (in seconds) after which buckets are deleted, kept forever if None.
+        """
+        self.resolution = resolution
+        self.retention = retention
+        self.collection_name = f"samples_{resolution}s"
+
+    @property
+    def granularity(self) -> str:
+        if self.resolution < 60:
+            return "seconds"
+        if self.resolution < 3600:
+            return "minutes"
+        return "hours"
+
+    @staticmethod
+    def parse(tiers: str) -> list["RollupTier"]:
+        """
+        Parses a comma-separated list of `resolution:retention` pairs (in seconds), e.g. '1:604800,60:31536000'. A
+        retention of 0 keeps the buckets forever.
+
+        Args:
+            tiers (str): The list of tiers.
+
+        Returns:
+            list[RollupTier]: The tiers.
+        """
+        parsed = []
+        for tier in filter(None, (tier.strip() for tier in tiers.split(","))):
+            resolution, _, retention = tier.partition(":")
+            parsed.append(RollupTier(int(resolution), int(retention) or None if retention else None))
+        return parsed
+
+
+class AdrfCompactor:
+    """
+    Background compaction of the samples into downsampled series.
+
+    Tiers are ordered from the finest to the coarsest: the first tier is rolled up from the raw samples, and each next
+    tier from the previous one, so that a compaction run only reads the samples written since the previous run. The
+    progress of each tier is tracked by a watermark: all the buckets before it have been written. Raw samples and
+    buckets are deleted by MongoDB once their retention has expired.
+    """
+
+    def __init__(self, sample_store: AdrfSampleStore, tiers: list[RollupTier], interval: float = 60.0,
+                 delay: float = 30.0, max_window: float = 3600.0):
+        """
+        Initializes the compactor.
+
+        Args:
+            sample_store (AdrfSampleStore): The store holding the raw samples.
+            tiers (list[RollupTier]): The tiers, each resolution being a multiple of the previous one.
+            interval (float): The time (in seconds) between two compaction runs.
+            delay (float): The age (in seconds) a raw sample must have to be compacted, so that late samples are not
+                missed.
+            max_window (float): The maximum time window (in seconds) compacted by a run, per tier.
+
+        Raises:
+            ValueError: If a tier's resolution is not a multiple of the previous one.
+        """
+        self._sample_store = sample_store
+        self.tiers = sorted(tiers, key=lambda tier: tier.resolution)
+        for finer, coarser in zip(self.tiers, self.tiers[1:]):
+            if coarser.resolution % finer.resolution:
+                raise ValueError(f"Resolution {coarser.resolution}s is not a multiple of {finer.resolution}s")
+        self._interval = interval
+        self._delay = delay
+        self._max_window = max_window
+        self._state = sample_store.database["compaction_state"]
+
+    def ensure_collections(self):
+        """
+        Creates the collections of the tiers if they do not exist yet.
+        """
+        for tier in self.tiers:
+            ensure_time_series_collection(self._sample_store.database, tier.collection_name, tier.granularity,
+                                          tier.retention)
+
+    def get_watermark(self, tier: RollupTier) -> Optional[datetime]:
+        """
+        Returns the time before which all the buckets of a tier have been written, if any.
+        """
+        state = self._state.find_one({"_id": tier.collection_name})
+        return state["watermark"] if state else None
+
+    async def compaction_loop(self):
+        """
+        Periodically compacts the samples. Compaction runs are performed in a worker thread so that they do not block
+        the event loop.
+        """
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                logging.error(f"Compaction failed: {e}")
+
+    def compact(self):
+        """
+        Rolls up the samples written since the previous run into every tier.
+        """
+        source = self._sample_store.collection
+        source_watermark = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self._delay)
+        for tier in self.tiers:
+            self._compact_tier(source, source_watermark, tier)
+            source = self._sample_store.database[tier.collection_name]
+            source_watermark = self.get_watermark(tier)
+            if source_watermark is None:
+                break
+
+    def _compact_tier(self, source, source_watermark: datetime, tier: RollupTier):
+        watermark = self.get_watermark(tier)
+        if watermark is None:
+            first_sample = source.find_one({}, {"timestamp": True}, sort=[("timestamp", ASCENDING)])
+            if first_sample is None:
+                return
+            watermark = self._align(first_sample["timestamp"], tier.resolution)
+
+        stop = self._align(min(source_watermark, watermark + timedelta(seconds=self._max_window)), tier.resolution)
+        if stop <= watermark:
+            return
+
+        start = time.perf_counter()
+        target = self._sample_store.database[tier.collection_name]
+        # Buckets written by an interrupted run would otherwise be duplicated
+        target.delete_many({"timestamp": {"$gte": watermark, "$lt": stop}})
+        buckets = list(source.aggregate(self._rollup_pipeline(watermark, stop, tier.resolution), allowDiskUse=True))
+        if buckets:
+            target.insert_many(buckets, ordered=False)
+        self._state.update_one({"_id": tier.collection_name}, {"$set": {"watermark": stop}}, upsert=True)
+
+        AdrfMetrics.compaction_latency.labels(tier=tier.collection_name).observe(time.perf_counter() - start)
+        AdrfMetrics.compacted_buckets.labels(tier=tier.collection_name).inc(len(buckets))
+        logging.debug(f"Compacted {len(buckets)} buckets into '{tier.collection_name}': START={watermark}, STOP={stop}")
+
+    @staticmethod
+    def _rollup_pipeline(start: datetime, stop: datetime, resolution: int) -> list[dict]:
+        bucket_size = resolution * 1000
+        return [
+            {"$match": {"timestamp": {"$gte": start, "$lt": stop}}},
+            # Raw samples weigh 1, buckets of the previous tier weigh the number of samples they summarize
+            {"$project": {"_id": False, "meta": True,
+                          "count": {"$ifNull": ["$count", 1]},
+                          "bucket": {"$toDate": {"$subtract": [{"$toLong": "$timestamp"},
+                                                               {"$mod": [{"$toLong": "$timestamp"}, bucket_size]}]}},
+                          "data": {"$objectToArray": "$data"}}},
+            {"$unwind": "$data"},
+            {"$match": {"data.v": {"$type": "number"}}},
+            {"$set": {"circular": {"$in": ["$data.k", CIRCULAR_FEATURES]},
+                      "radians": {"$degreesToRadians": "$data.v"}}},
+            {"$group": {"_id": {"meta": "$meta", "bucket": "$bucket", "feature": "$data.k"},
+                        "sum": {"$sum": {"$multiply": ["$data.v", "$count"]}},
+                        "sin": {"$sum": {"$cond": ["$circular", {"$multiply": [{"$sin": "$radians"}, "$count"]}, 0]}},
+                        "cos": {"$sum": {"$cond": ["$circular", {"$multiply": [{"$cos": "$radians"}, "$count"]}, 0]}},
+                        "count": {"$sum": "$count"}}},
+            {"$group": {"_id": {"meta": "$_id.meta", "bucket": "$_id.bucket"},
+                        "data": {"$push": {"k": "$_id.feature",
+                                           "v": {"$cond": [{"$in": ["$_id.feature", CIRCULAR_FEATURES]},
+                                                           {"$mod": [{"$add": [{"$radiansToDegrees": {
+                                                               "$atan2": ["$sin", "$cos"]}}, 360]}, 360]},
+                                                           {"$divide": ["$sum", "$count"]}]}}},
+                        "count": {"$max": "$count"}}},
+            {"$project": {"_id": False, "timestamp": "$_id.bucket", "meta": "$_id.meta",
+                          "data": {"$arrayToObject": "$data"}, "count": True}}
+        ]
+
+    @staticmethod
+    def _align(timestamp: datetime, resolution: int) -> datetime:
+        seconds = (timestamp - _EPOCH) // timedelta(seconds=resolution) * resolution
+        return _EPOCH + timedelta(seconds=seconds)
@@ -0,0 +1,43 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+samples_ingested = Counter("adrf_samples_ingested", "Number of samples written to the data store", ["nf_type"])
+
+samples_failed = Counter("adrf_samples_failed", "Number of samples rejected by the data store, or dropped after failed "
+                         "bulk writes", ["nf_type"])
+
+flush_failures = Counter("adrf_flush_failures", "Number of bulk writes that failed, their samples being buffered again")
+
+flush_latency = Histogram("adrf_flush_latency_seconds", "Duration of a bulk write of buffered samples",
+                          buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5))
+
+flush_batch_size = Histogram("adrf_flush_batch_size", "Number of samples written by a bulk write",
+                             buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+
+compaction_latency = Histogram("adrf_compaction_latency_seconds", "Duration of the compaction of a tier", ["tier"],
+                               buckets=(.01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+compacted_buckets = Counter("adrf_compacted_buckets", "Number of buckets written by the compaction", ["tier"])
+
+
+def start_server(port: int):
+    """
+    Publishes the metrics on an HTTP endpoint served by a background thread.
+
+    Args:
+        port (int): The port of the endpoint.
+    """
+    start_http_server(port)
+    logging.info(f"Serving Prometheus metrics on port {port}")
@@ -0,0 +1,201 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from confluent_kafka import Consumer, Producer
+from pydantic import ValidationError
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from AdrfCompactor import AdrfCompactor
+from AdrfSampleStore import AdrfSampleStore
+from common.dataset_streaming import (
+    DATASET_STREAM_REQUEST_TOPIC,
+    DATASET_STREAM_DELIVERY_TOPIC,
+    DatasetStreamRequest,
+    DatasetChunk,
+    SampleKey
+)
+
+# Total order of the samples of a stream, from which an interrupted stream is resumed
+SORT_ORDER = [("timestamp", ASCENDING), ("meta.supi", ASCENDING), ("meta.nfType", ASCENDING), ("_id", ASCENDING)]
+
+
+class AdrfRetrievalStreamer:
+    """
+    Serves streaming dataset retrievals.
+
+    Each request is answered with ordered chunks of at most `chunk_size` samples, read from a MongoDB cursor so that
+    neither side has to hold the whole dataset in memory. The last chunk carries the end-of-stream marker.
+
+    When the request allows it, samples are read from the coarsest downsampled tier satisfying the requested
+    resolution, up to the tier's watermark. The rest of the time window is read from the finer tiers, and ultimately
+    from the raw samples.
+    """
+
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, sample_store: AdrfSampleStore,
+                 compactor: Optional[AdrfCompactor] = None, max_chunk_size: int = 2000):
+        """
+        Initializes the streamer.
+
+        Args:
+            service_name (str): The name of the service, used as Kafka consumer group.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            sample_store (AdrfSampleStore): The store holding the samples.
+            compactor (Optional[AdrfCompactor]): The compactor maintaining the downsampled tiers, if any.
+            max_chunk_size (int): The maximum number of samples per chunk, whatever the requested size. It keeps chunks
+                below Kafka's default maximum message size.
+        """
+        self._sample_store = sample_store
+        self._compactor = compactor
+        self._max_chunk_size = max_chunk_size
+        self._consumer = Consumer({"bootstrap.servers": kafka_bootstrap_server,
+                                   "group.id": f"{service_name}-dataset-stream",
+                                   "auto.offset.reset": "latest"})
+        self._producer = Producer({"bootstrap.servers": kafka_bootstrap_server,
+                                   "linger.ms": 5})
+        self._streams: set[asyncio.Task] = set()
+
+    async def serve(self):
+        """
+        Consumes streaming retrieval requests, each of them being served in a worker thread.
+        """
+        self._consumer.subscribe([DATASET_STREAM_REQUEST_TOPIC])
+        try:
+            while True:
+                message = await asyncio.to_thread(self._consumer.poll, 0.5)
+                if message is None:
+                    continue
+                if message.error():
+                    logging.error(f"Dataset stream request consumer error: {message.error()}")
+                    continue
+
+                try:
+                    request = DatasetStreamRequest.model_validate_json(message.value())
+                except ValidationError as e:
+                    logging.error(f"Invalid dataset stream request: {e}")
+                    continue
+                stream_task = asyncio.create_task(asyncio.to_thread(self.stream, request))
+                self._streams.add(stream_task)
+                stream_task.add_done_callback(self._streams.discard)
+        finally:
+            self._consumer.close()
+
+    def stream(self, request: DatasetStreamRequest):
+        """
+        Streams the samples matching a request as chunks.
+
+        Args:
+            request (DatasetStreamRequest): The request.
+        """
+        chunk_size = max(1, min(request.chunk_size, self._max_chunk_size))
+        logging.info(f"Streaming dataset '{request.dataset_id}' from offset {request.resume_offset}: "
+                     f"STREAM_ID={request.stream_id}, CHUNK_SIZE={chunk_size}, RESUME_AFTER={request.resume_after}")
+
+        sequence_number = 0
+        offset = request.resume_offset
+        samples = []
+        last_document = None
+        for document in self._read(request, chunk_size):
+            sample = {"timestamp": document["timestamp"],
+                      "supi": document["meta"]["supi"],
+                      "nfType": document["meta"]["nfType"],
+                      "data": document["data"]}
+            if "count" in document:
+                sample["count"] = document["count"]
+            samples.append(sample)
+            last_document = document
+            if len(samples) == chunk_size:
+                self._send_chunk(DatasetChunk(stream_id=request.stream_id, sequence_number=sequence_number,
+                                              offset=offset, samples=samples, last_key=self._key(last_document)))
+                sequence_number += 1
+                offset += len(samples)
+                samples = []
+
+        self._send_chunk(DatasetChunk(stream_id=request.stream_id, sequence_number=sequence_number, offset=offset,
+                                      samples=samples, last_key=self._key(last_document), end_of_stream=True))
+        self._producer.flush()
+        logging.info(f"Streamed {offset + len(samples) - request.resume_offset} samples in {sequence_number + 1} "
+                     f"chunk(s): STREAM_ID={request.stream_id}")
+
+    def _read(self, request: DatasetStreamRequest, batch_size: int):
+        after = request.resume_after
+        after_time = self._to_naive_utc(after.timestamp) if after is not None else None
+        for collection, start_time, stop_time in self._plan(request):
+            if after_time is not None and after_time >= stop_time:
+                continue
+            query = {"meta.dataSetId": request.dataset_id, "timestamp": {"$gte": start_time, "$lt": stop_time}}
+            if after is not None:
+                query = {"$and": [query, self._after(after, after_time)]}
+            yield from collection.find(query).sort(SORT_ORDER).batch_size(batch_size)
+
+    @staticmethod
+    def _key(document: Optional[dict]) -> Optional[SampleKey]:
+        if document is None:
+            return None
+        return SampleKey(timestamp=document["timestamp"], supi=document["meta"]["supi"],
+                         nf_type=document["meta"]["nfType"], id=str(document["_id"]))
+
+    @staticmethod
+    def _after(key: SampleKey, timestamp: datetime) -> dict:
+        """
+        Returns the filter of the samples following a key in the order of a stream.
+        """
+        return {"$or": [{"timestamp": {"$gt": timestamp}},
+                        {"timestamp": timestamp, "meta.supi": {"$gt": key.supi}},
+                        {"timestamp": timestamp, "meta.supi": key.supi, "meta.nfType": {"$gt": key.nf_type}},
+                        {"timestamp": timestamp, "meta.supi": key.supi, "meta.nfType": key.nf_type,
+                         "_id": {"$gt": ObjectId(key.id)}}]}
+
+    def _plan(self, request: DatasetStreamRequest) -> list[tuple]:
+        """
+        Splits the time window of a request into consecutive segments, each of them read from a collection.
+        """
+        segments = []
+        start_time, request_stop_time = self._to_naive_utc(request.start_time), self._to_naive_utc(request.stop_time)
+        if self._compactor is not None and request.resolution is not None:
+            database = self._sample_store.database
+            for tier in reversed(self._compactor.tiers):
+                if tier.resolution > request.resolution:
+                    continue
+                watermark = self._compactor.get_watermark(tier)
+                if watermark is None or watermark <= start_time:
+                    continue
+                stop_time = min(watermark, request_stop_time)
+                segments.append((database[tier.collection_name], start_time, stop_time))
+                start_time = stop_time
+                if start_time >= request_stop_time:
+                    return segments
+
+        segments.append((self._sample_store.collection, start_time, request_stop_time))
+        return segments
+
+    @staticmethod
+    def _to_naive_utc(timestamp: datetime) -> datetime:
+        # Watermarks are read back from MongoDB as naive UTC datetimes
+        if timestamp.tzinfo is None:
+            return timestamp
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def _send_chunk(self, chunk: DatasetChunk):
+        while True:
+            try:
+                self._producer.produce(DATASET_STREAM_DELIVERY_TOPIC, key=chunk.stream_id,
+                                       value=chunk.model_dump_json())
+                break
+            except BufferError:
+                # Wait for the producer's queue to drain, bounding the memory used by a stream
+                self._producer.poll(0.5)
+        self._producer.poll(0)
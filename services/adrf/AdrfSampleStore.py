@@ -0,0 +1,202 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from pymongo import ASCENDING
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, CollectionInvalid, PyMongoError
+
+import AdrfMetrics
+
+
+def ensure_time_series_collection(database: Database, collection_name: str, granularity: str = "seconds",
+                                  retention: Optional[int] = None):
+    """
+    Creates a time-series collection of samples and its compound index if they do not exist yet, and applies its
+    retention.
+
+    Args:
+        database (Database): The MongoDB database.
+        collection_name (str): The name of the collection.
+        granularity (str): The granularity of the collection ('seconds', 'minutes' or 'hours').
+        retention (Optional[int]): The time (in seconds) after which samples are deleted, kept forever if None.
+    """
+    options = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": granularity}}
+    if retention:
+        options["expireAfterSeconds"] = retention
+    try:
+        database.create_collection(collection_name, **options)
+        logging.info(f"Created time-series collection '{collection_name}': RETENTION={retention}")
+    except CollectionInvalid:
+        # The retention of an existing collection may have been reconfigured
+        database.command("collMod", collection_name, expireAfterSeconds=retention if retention else "off")
+        logging.debug(f"Time-series collection '{collection_name}' already exists: RETENTION={retention}")
+
+    database[collection_name].create_index([("meta.dataSetId", ASCENDING), ("timestamp", ASCENDING),
+                                            ("meta.supi", ASCENDING)], name="dataSetId_timestamp_supi")
+
+
+class AdrfSampleStore:
+    """
+    Buffered writer of dataset samples into a MongoDB time-series collection.
+
+    Samples are appended to an in-memory buffer and written with a single bulk `insert_many`, either when the buffer
+    reaches `max_batch_size` samples or every `max_flush_interval` seconds. The samples of a bulk write that failed as
+    a whole (e.g., the server is unreachable) are buffered again, up to `max_buffered_samples` samples, the oldest ones
+    being dropped beyond. Samples rejected individually by the server are dropped. Each sample is a document with the
+    following fields:
+
+    * `timestamp`: The time at which the data has been generated by the NF (time field of the collection).
+    * `meta`: The `dataSetId`, `supi` and `nfType` of the sample (meta field of the collection).
+    * `data`: The sample's features.
+    """
+
+    def __init__(self, database: Database, collection_name: str = "samples", max_batch_size: int = 1000,
+                 max_flush_interval: float = 1.0, retention: Optional[int] = None,
+                 max_buffered_samples: Optional[int] = None):
+        """
+        Initializes the store.
+
+        Args:
+            database (Database): The MongoDB database.
+            collection_name (str): The name of the time-series collection.
+            max_batch_size (int): The number of buffered samples triggering a flush.
+            max_flush_interval (float): The maximum time (in seconds) a sample stays in the buffer.
+            retention (Optional[int]): The time (in seconds) after which raw samples are deleted, kept forever if None.
+            max_buffered_samples (Optional[int]): The maximum number of samples kept buffered while bulk writes fail,
+                100 batches if None.
+        """
+        self._database = database
+        self._collection_name = collection_name
+        self._max_batch_size = max_batch_size
+        self._max_flush_interval = max_flush_interval
+        self._retention = retention
+        self._max_buffered_samples = max_buffered_samples or 100 * max_batch_size
+        self._buffer: list[dict] = []
+        self._flush_requested = asyncio.Event()
+
+    @property
+    def database(self) -> Database:
+        return self._database
+
+    @property
+    def collection(self):
+        return self._database[self._collection_name]
+
+    def ensure_collection(self):
+        """
+        Creates the time-series collection and its compound index if they do not exist yet.
+        """
+        ensure_time_series_collection(self._database, self._collection_name, retention=self._retention)
+
+    def add(self, dataset_id: str, supi: str, nf_type: str, timestamp: datetime, data: dict):
+        """
+        Buffers a sample.
+
+        Args:
+            dataset_id (str): The ID of the dataset the sample belongs to.
+            supi (str): The SUPI of the UE.
+            nf_type (str): The type of NF the sample comes from.
+            timestamp (datetime): The time at which the data has been generated by the NF.
+            data (dict): The sample's features.
+        """
+        self._buffer.append({"timestamp": timestamp,
+                             "meta": {"dataSetId": dataset_id, "supi": supi, "nfType": nf_type},
+                             "data": data})
+        if len(self._buffer) >= self._max_batch_size:
+            self._flush_requested.set()
+
+    def flush(self) -> int:
+        """
+        Writes all the buffered samples with a single bulk write, e.g., at shutdown. The samples are dropped if the
+        bulk write fails.
+
+        Returns:
+            int: The number of written samples.
+        """
+        samples, self._buffer = self._buffer, []
+        try:
+            return self._write(samples)
+        except PyMongoError as e:
+            logging.error(f"Failed to write {len(samples)} samples, dropping them: {e!r}")
+            self._count_failed(samples)
+            return 0
+
+    @staticmethod
+    def _count_failed(samples: list[dict]):
+        for nf_type, count in Counter(sample["meta"]["nfType"] for sample in samples).items():
+            AdrfMetrics.samples_failed.labels(nf_type=nf_type).inc(count)
+
+    def _write(self, samples: list[dict]) -> int:
+        """
+        Writes samples with a single bulk write, counting those rejected by the server as failed.
+
+        Returns:
+            int: The number of samples actually inserted.
+
+        Raises:
+            PyMongoError: If the bulk write failed as a whole.
+        """
+        if not samples:
+            return 0
+
+        start = time.perf_counter()
+        rejected = set()
+        try:
+            self.collection.insert_many(samples, ordered=False)
+        except BulkWriteError as e:
+            rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+            logging.error(f"Failed to write {len(rejected)} of {len(samples)} samples")
+        AdrfMetrics.flush_latency.observe(time.perf_counter() - start)
+        AdrfMetrics.flush_batch_size.observe(len(samples))
+        if rejected:
+            self._count_failed([samples[index] for index in rejected])
+        for nf_type, count in Counter(sample["meta"]["nfType"] for index, sample in enumerate(samples)
+                                      if index not in rejected).items():
+            AdrfMetrics.samples_ingested.labels(nf_type=nf_type).inc(count)
+
+        return len(samples) - len(rejected)
+
+    def _requeue(self, samples: list[dict]):
+        # The failed samples are older than those buffered meanwhile, the oldest ones being dropped beyond the limit
+        self._buffer = samples + self._buffer
+        excess = len(self._buffer) - self._max_buffered_samples
+        if excess > 0:
+            logging.error(f"Dropping the {excess} oldest buffered samples: BUFFERED={len(self._buffer)}")
+            self._count_failed(self._buffer[:excess])
+            self._buffer = self._buffer[excess:]
+
+    async def flush_loop(self):
+        """
+        Flushes the buffer when it is full, or periodically. Bulk writes are performed in a worker thread so that they
+        do not block the event loop.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._max_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            # The buffer is swapped in the event loop, only the write itself is performed in the worker thread
+            samples, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write, samples)
+            except PyMongoError as e:
+                logging.error(f"Failed to write {len(samples)} samples, buffering them again: {e!r}")
+                AdrfMetrics.flush_failures.inc()
+                self._requeue(samples)
@@ -0,0 +1,104 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import logging
+from enum import Enum
+from typing import Optional, override
+
+from nwdaf_api.models import (
+    NFType,
+    EventNotifyDataExt,
+    RanEventExposureNotification
+)
+from nwdaf_libcommon.AdrfService import AdrfService
+from pydantic import BaseModel
+from pymongo import MongoClient
+
+from AdrfCompactor import AdrfCompactor, RollupTier
+from AdrfRetrievalStreamer import AdrfRetrievalStreamer
+from AdrfSampleStore import AdrfSampleStore
+
+
+class BufferedAdrfService(AdrfService):
+    """
+    An ADRF service storing the collected event exposure data as time-series samples, written in bulk, and serving
+    streaming retrievals of these samples.
+    """
+
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, mongo_uri: str, database_name: str,
+                 max_batch_size: int = 1000, max_flush_interval: float = 1.0, raw_retention: Optional[int] = None,
+                 rollup_tiers: Optional[list[RollupTier]] = None, compaction_interval: float = 60.0,
+                 compaction_delay: float = 30.0):
+        """
+        Initializes the service.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            mongo_uri (str): The URI of the MongoDB server.
+            database_name (str): The name of the MongoDB database.
+            max_batch_size (int): The number of buffered samples triggering a bulk write.
+            max_flush_interval (float): The maximum time (in seconds) a sample stays buffered.
+            raw_retention (Optional[int]): The time (in seconds) after which raw samples are deleted, kept forever if
+                None.
+            rollup_tiers (Optional[list[RollupTier]]): The downsampled tiers maintained by the compaction, if any.
+            compaction_interval (float): The time (in seconds) between two compaction runs.
+            compaction_delay (float): The age (in seconds) a raw sample must have to be compacted.
+        """
+        super().__init__(service_name, kafka_bootstrap_server, mongo_uri, database_name)
+        self.sample_store = AdrfSampleStore(MongoClient(mongo_uri)[database_name],
+                                            max_batch_size=max_batch_size,
+                                            max_flush_interval=max_flush_interval,
+                                            retention=raw_retention)
+        self.compactor = AdrfCompactor(self.sample_store, rollup_tiers, compaction_interval,
+                                       compaction_delay) if rollup_tiers else None
+        self.retrieval_streamer = AdrfRetrievalStreamer(service_name, kafka_bootstrap_server, self.sample_store,
+                                                        self.compactor)
+
+    @override
+    def on_event_exposure_data(self, nf_type: NFType, event_type: Enum, data: BaseModel):
+        """
+        Buffers the samples contained in an event exposure notification. The dataset ID is the correlation ID of the
+        data collection subscription.
+        """
+        if isinstance(data, EventNotifyDataExt):
+            location_estimate = data.location_estimate.anyof_schema_1_validator
+            velocity_estimate = data.velocity_estimate.anyof_schema_1_validator
+            self.sample_store.add(data.ldr_reference, data.supi, nf_type.value, data.timestamp_of_location_estimate,
+                                  {"latitude": location_estimate.point.lat,
+                                   "longitude": location_estimate.point.lon,
+                                   "movingSpeed": velocity_estimate.h_speed,
+                                   "compassDirection": velocity_estimate.bearing})
+        elif isinstance(data, RanEventExposureNotification):
+            for rsrp_info in data.rsrp_infos:
+                self.sample_store.add(data.correlation_id, rsrp_info.ue_id, nf_type.value, data.time_stamp,
+                                      {"lte_rsrp": rsrp_info.lte_rsrp,
+                                       "nr_ssRsrp": rsrp_info.nr_ss_rsrp})
+        else:
+            logging.warning(
+                f"This ADRF cannot store this type of notification: {data.model_dump_json(exclude_unset=True)}")
+
+    @override
+    async def start(self):
+        self.sample_store.ensure_collection()
+        self._tasks.append(asyncio.create_task(self.sample_store.flush_loop()))
+        if self.compactor is not None:
+            self.compactor.ensure_collections()
+            self._tasks.append(asyncio.create_task(self.compactor.compaction_loop()))
+        self._tasks.append(asyncio.create_task(self.retrieval_streamer.serve()))
+        await super().start()
+
+    @override
+    def stop(self):
+        # Do not lose the buffered samples
+        self.sample_store.flush()
+        super().stop()
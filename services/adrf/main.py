@@ -14,11 +14,15 @@ import os
 import signal
 import sys
 
-from nwdaf_libcommon.AdrfService import AdrfService
+import AdrfMetrics
+from AdrfCompactor import RollupTier
+from BufferedAdrfService import BufferedAdrfService
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
 
 # Log level
 log_level = os.getenv('ADRF_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('ADRF_SERVICE_NAME', 'adrf'), log_level)
 
 # Kafka boostrap server
 kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
@@ -26,9 +30,28 @@ kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
 # Service name
 service_name = os.getenv('ADRF_SERVICE_NAME')
 
+# Opt-in profiling hooks
+install_profiling(service_name)
+
 # Mongo URI
 mongo_uri = os.getenv('MONGO_URI')
 
+# Prometheus metrics port
+metrics_port = int(os.getenv('ADRF_METRICS_PORT', '0'))
+
+# Bulk write parameters
+max_batch_size = int(os.getenv('ADRF_MAX_BATCH_SIZE', '1000'))
+max_flush_interval = float(os.getenv('ADRF_MAX_FLUSH_INTERVAL', '1.0'))
+
+# Retention and compaction parameters
+raw_retention = int(os.getenv('ADRF_RAW_RETENTION', '0')) or None
+rollup_tiers = RollupTier.parse(os.getenv('ADRF_ROLLUP_TIERS', ''))
+compaction_interval = float(os.getenv('ADRF_COMPACTION_INTERVAL', '60'))
+compaction_delay = float(os.getenv('ADRF_COMPACTION_DELAY', '30'))
+
+service = BufferedAdrfService("adrf", kafka_bootstrap_server, mongo_uri, "adrf", max_batch_size, max_flush_interval,
+                              raw_retention, rollup_tiers, compaction_interval, compaction_delay)
+
 
 def handle_signal(sig, _frame):
     if sig == signal.SIGINT:
@@ -36,7 +59,7 @@ def handle_signal(sig, _frame):
     elif sig == signal.SIGTERM:
         logging.info("Received SIGTERM, shutting down gracefully...")
 
-    # service.stop()
+    service.stop()
     sys.exit(0)
 
 
@@ -47,7 +70,8 @@ if __name__ == '__main__':
     try:
         logging.info("Starting ADRF service...")
 
-        service = AdrfService("adrf", kafka_bootstrap_server, mongo_uri, "adrf")
+        if metrics_port:
+            AdrfMetrics.start_server(metrics_port)
         service.run()
 
     except Exception as e:
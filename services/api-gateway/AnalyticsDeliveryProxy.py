@@ -0,0 +1,230 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+
+SUBSCRIPTIONS_PATH = "/nnwdaf-eventssubscription/v1/subscriptions"
+DELIVERY_PATH = "/analytics-delivery"
+
+# Request headers forwarded to the gateway and to the consumers, and response headers returned to their clients
+FORWARDED_REQUEST_HEADERS = ("content-type", "traceparent")
+FORWARDED_RESPONSE_HEADERS = ("content-type",)
+
+
+def _origin(uri: str) -> str:
+    parts = urlsplit(uri)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class AnalyticsDeliveryProxy:
+    """
+    HTTP front of the analytics subscription API of the API Gateway, delivering the analytics notifications to the
+    consumers over pooled keep-alive connections.
+
+    Subscriptions are forwarded to the gateway with their notification URI replaced by a delivery resource of the
+    proxy, so that the gateway only posts its notifications over the loopback. Each notification is then forwarded to
+    the notification URI of the consumer, over a pool of keep-alive connections per consumer (i.e., per scheme, host
+    and port): a slow consumer only holds its own connections.
+    """
+
+    def __init__(self, gateway_url: str, delivery_url: str, timeout: float = 5.0, max_connections: int = 20,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initializes the proxy.
+
+        Args:
+            gateway_url (str): The base URL of the gateway's subscription API.
+            delivery_url (str): The base URL of the proxy, as reached by the gateway.
+            timeout (float): The timeout (in seconds) of the requests to the gateway and to the consumers.
+            max_connections (int): The maximum number of connections to each consumer.
+            transport (Optional[httpx.AsyncBaseTransport]): The transport of the connections, HTTP if not provided.
+        """
+        self.gateway_url = gateway_url.rstrip("/")
+        self.delivery_url = delivery_url.rstrip("/")
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._transport = transport
+        self._gateway: Optional[httpx.AsyncClient] = None
+        self._consumers: dict[str, httpx.AsyncClient] = {}
+        # Notification URI of each delivery resource, and the other way around
+        self.notification_uris: dict[str, str] = {}
+        self._delivery_ids: dict[str, str] = {}
+        # Notification URI of each subscription
+        self.subscriptions: dict[str, str] = {}
+
+    def _client(self, base_url: str, max_connections: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=base_url, timeout=self._timeout, transport=self._transport,
+                                 limits=httpx.Limits(max_connections=max_connections,
+                                                     max_keepalive_connections=max_connections,
+                                                     keepalive_expiry=30.0))
+
+    def open(self):
+        """
+        Creates the connection pool to the gateway, in the event loop of the server.
+        """
+        self._gateway = self._client(self.gateway_url, 100)
+
+    async def close(self):
+        clients = [self._gateway, *self._consumers.values()] if self._gateway is not None else []
+        self._gateway = None
+        self._consumers.clear()
+        for client in clients:
+            await client.aclose()
+
+    def _consumer(self, uri: str) -> httpx.AsyncClient:
+        origin = _origin(uri)
+        client = self._consumers.get(origin)
+        if client is None:
+            client = self._consumers[origin] = self._client(origin, self._max_connections)
+        return client
+
+    def _delivery_uri(self, notification_uri: str) -> str:
+        # Subscriptions of the same consumer URI share their delivery resource
+        delivery_id = self._delivery_ids.get(notification_uri)
+        if delivery_id is None:
+            delivery_id = str(uuid4())
+            self._delivery_ids[notification_uri] = delivery_id
+            self.notification_uris[delivery_id] = notification_uri
+        return f"{self.delivery_url}{DELIVERY_PATH}/{delivery_id}"
+
+    async def release(self, subscription_id: str):
+        """
+        Removes the notification URI of a deleted subscription, along with its delivery resource and the connection
+        pool of its consumer once no other subscription uses them.
+
+        Args:
+            subscription_id (str): The ID of the subscription.
+        """
+        notification_uri = self.subscriptions.pop(subscription_id, None)
+        if notification_uri is not None:
+            await self._forget(notification_uri)
+
+    async def _forget(self, notification_uri: str):
+        if notification_uri in self.subscriptions.values() or notification_uri not in self._delivery_ids:
+            return
+        del self.notification_uris[self._delivery_ids.pop(notification_uri)]
+        origin = _origin(notification_uri)
+        if all(_origin(uri) != origin for uri in self.notification_uris.values()) and origin in self._consumers:
+            await self._consumers.pop(origin).aclose()
+
+    async def deliver(self, delivery_id: str, body: bytes, headers: dict) -> Response:
+        """
+        Forwards an analytics notification of the gateway to its consumer.
+
+        Args:
+            delivery_id (str): The ID of the delivery resource of the notification.
+            body (bytes): The body of the notification.
+            headers (dict): The headers of the notification.
+
+        Returns:
+            Response: The response of the consumer, or HTTP 502/504 if it is not available.
+        """
+        notification_uri = self.notification_uris.get(delivery_id)
+        if notification_uri is None:
+            raise HTTPException(status_code=404, detail="Unknown delivery resource")
+        try:
+            response = await self._consumer(notification_uri).post(notification_uri, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            logging.warning(f"Failed to deliver an analytics notification to '{notification_uri}': {e!r}")
+            raise HTTPException(status_code=504 if isinstance(e, httpx.TimeoutException) else 502,
+                                detail="The consumer is not available")
+        return Response(content=response.content, status_code=response.status_code,
+                        headers={key: response.headers[key] for key in FORWARDED_RESPONSE_HEADERS
+                                 if key in response.headers})
+
+    def create_app(self) -> FastAPI:
+        """
+        Creates the application of the proxy, which holds the connection pools while running.
+
+        Returns:
+            FastAPI: The application.
+        """
+
+        @asynccontextmanager
+        async def lifespan(_app: FastAPI):
+            # The connection pools are bound to the event loop of the server
+            self.open()
+            yield
+            await self.close()
+
+        app = FastAPI(lifespan=lifespan)
+
+        @app.post(f"{DELIVERY_PATH}/{{delivery_id}}")
+        async def deliver(delivery_id: str, request: Request):
+            headers = {key: request.headers[key] for key in FORWARDED_REQUEST_HEADERS if key in request.headers}
+            return await self.deliver(delivery_id, await request.body(), headers)
+
+        @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+        async def route(path: str, request: Request):
+            body = await request.body()
+            headers = {key: request.headers[key] for key in FORWARDED_REQUEST_HEADERS if key in request.headers}
+            path = f"/{path.rstrip('/')}"
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = None
+
+            notification_uri = data.get("notificationURI") if isinstance(data, dict) else None
+            delivery_uri = None
+            if request.method in ("POST", "PUT") and isinstance(notification_uri, str) \
+                    and path.startswith(SUBSCRIPTIONS_PATH):
+                delivery_uri = self._delivery_uri(notification_uri)
+                body = json.dumps({**data, "notificationURI": delivery_uri}).encode()
+
+            try:
+                response = await self._gateway.request(request.method, path, content=body, headers=headers)
+            except httpx.HTTPError as e:
+                logging.warning(f"Failed to forward a request to the gateway: {e!r}")
+                raise HTTPException(status_code=504 if isinstance(e, httpx.TimeoutException) else 502,
+                                    detail="The gateway is not available")
+
+            content = response.content
+            response_headers = {key: response.headers[key] for key in FORWARDED_RESPONSE_HEADERS
+                                if key in response.headers}
+            if "location" in response.headers:
+                response_headers["location"] = response.headers["location"].replace(self.gateway_url,
+                                                                                    str(request.base_url).rstrip("/"))
+            if delivery_uri is not None and response.status_code >= 300:
+                await self._forget(notification_uri)
+            elif delivery_uri is not None:
+                # The consumer gets its own notification URI back
+                content = content.replace(delivery_uri.encode(), notification_uri.encode())
+                subscription_id = response.headers.get("location", path).rstrip("/").rsplit("/", 1)[-1]
+                if self.subscriptions.get(subscription_id, notification_uri) != notification_uri:
+                    await self.release(subscription_id)
+                self.subscriptions[subscription_id] = notification_uri
+            elif request.method == "DELETE" and path.startswith(f"{SUBSCRIPTIONS_PATH}/") \
+                    and response.status_code < 300:
+                await self.release(path.rsplit("/", 1)[-1])
+            return Response(content=content, status_code=response.status_code, headers=response_headers)
+
+        return app
+
+    def create_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server of the proxy.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+        return uvicorn.Server(uvicorn.Config(self.create_app(), host="0.0.0.0", port=port, log_level="warning"))
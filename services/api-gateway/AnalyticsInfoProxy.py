@@ -0,0 +1,135 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from nwdaf_api.models.nwdaf_event import NwdafEvent
+
+from common.tracing import TRACEPARENT_HEADER, SpanContext, tracer
+
+ANALYTICS_INFO_PATH = "/nnwdaf-analyticsinfo/v1/analytics"
+
+
+class AnalyticsInfoProxy:
+    """
+    Request/response analytics path of the API Gateway, answered from the prediction cache and the throughput map of
+    the AnLFs.
+
+    Queries are forwarded over pooled keep-alive connections, and no data collection is triggered: UEs that have not
+    been predicted yet, and tiles without prediction, are omitted from the answer.
+    """
+
+    def __init__(self, anlf_urls: dict[NwdafEvent, str], timeout: float = 1.0):
+        """
+        Initializes the proxy.
+
+        Args:
+            anlf_urls (dict[NwdafEvent, str]): The base URL of the analytics info server of the AnLF of each event.
+            timeout (float): The timeout (in seconds) of the queries to the AnLFs.
+        """
+        self._anlf_urls = anlf_urls
+        self._timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def query(self, event: NwdafEvent, path: str, params: dict,
+                    trace_context: Optional[SpanContext] = None) -> dict:
+        """
+        Queries the analytics info server of the AnLF of an event.
+
+        Args:
+            event (NwdafEvent): The analytics event.
+            path (str): The path of the query ('/predictions' or '/throughput-map').
+            params (dict): The parameters of the query.
+            trace_context (Optional[SpanContext]): The context of the span of the query, propagated to the AnLF.
+
+        Returns:
+            dict: The answer of the AnLF.
+        """
+        if self._client is None:
+            # The client is bound to the event loop of the server
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+        headers = {TRACEPARENT_HEADER: trace_context.traceparent} if trace_context is not None else None
+        response = await self._client.get(f"{self._anlf_urls[event]}{path}", params=params, headers=headers)
+        if response.status_code == 400:
+            raise HTTPException(status_code=400, detail=response.json().get("detail"))
+        response.raise_for_status()
+        return response.json()
+
+    def create_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server of the analytics info path:
+
+        * `GET /nnwdaf-analyticsinfo/v1/analytics?event-id=UE_LOC_THROUGHPUT&tgt-ue={"supis":[...]}`: The latest
+          predictions of the target UEs, along with percentiles (`percentiles`, e.g., '5,50,95') over their recent
+          history. 204 is returned if none of the UEs has been predicted yet.
+        * `GET /nnwdaf-analyticsinfo/v1/analytics?event-id=UE_LOC_THROUGHPUT&area=minLat,minLon,maxLat,maxLon`: The
+          predicted throughput statistics of the tiles of an area. 204 is returned if none of them has been predicted.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+
+        @asynccontextmanager
+        async def lifespan(_app: FastAPI):
+            yield
+            if self._client is not None:
+                await self._client.aclose()
+
+        app = FastAPI(lifespan=lifespan)
+
+        @app.get(ANALYTICS_INFO_PATH)
+        async def get_analytics(event_id: str = Query(alias="event-id"),
+                                tgt_ue: Optional[str] = Query(default=None, alias="tgt-ue"),
+                                area: Optional[str] = None, percentiles: Optional[str] = None,
+                                traceparent: Optional[str] = Header(default=None)):
+            try:
+                event = NwdafEvent(event_id)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid event-id '{event_id}'")
+            if event not in self._anlf_urls:
+                raise HTTPException(status_code=400, detail=f"Unsupported event '{event_id}'")
+            if (tgt_ue is None) == (area is None):
+                raise HTTPException(status_code=400, detail="Either tgt-ue or area must be provided")
+
+            if tgt_ue is not None:
+                try:
+                    params = {"supi": json.loads(tgt_ue)["supis"]}
+                except (ValueError, KeyError, TypeError):
+                    raise HTTPException(status_code=400, detail=f"Invalid tgt-ue '{tgt_ue}'")
+                if percentiles is not None:
+                    params["percentiles"] = percentiles
+                path, field = "/predictions", "predictedThroughputInfos"
+            else:
+                params = {"area": area}
+                path, field = "/throughput-map", "throughputMap"
+
+            parent = SpanContext.from_traceparent(traceparent) if tracer.enabled else None
+            with tracer.start_span("gateway.analytics_info", parent=parent, event=event_id, path=path) as span:
+                try:
+                    answer = await self.query(event, path, params, span.context)
+                except httpx.HTTPError as e:
+                    logging.warning(f"Failed to query the analytics of the AnLF: EVENT={event_id}, ERROR={e!r}")
+                    raise HTTPException(status_code=504, detail="Analytics are not available")
+            if not answer[field]:
+                return Response(status_code=204)
+            return {"timeStampGen": datetime.now(timezone.utc).isoformat(), **answer}
+
+        return uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning"))
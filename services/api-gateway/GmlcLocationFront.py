@@ -0,0 +1,187 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+
+PROVIDE_LOCATION_PATH = "/ngmlc-loc/v1/provide-location"
+CANCEL_LOCATION_PATH = "/ngmlc-loc/v1/cancel-location"
+
+# Request headers forwarded to the GMLC, and response headers returned to the gateway
+FORWARDED_REQUEST_HEADERS = ("content-type", "traceparent")
+FORWARDED_RESPONSE_HEADERS = ("content-type",)
+
+
+def _location_request_key(data) -> Optional[tuple[str, str]]:
+    # LDR reference and SUPI of a location request, serialized with the field names or the aliases
+    if not isinstance(data, dict):
+        return None
+    ldr_reference = data.get("ldrReference", data.get("ldr_reference"))
+    supi = data.get("supi")
+    return (ldr_reference, supi) if ldr_reference and supi else None
+
+
+class GmlcLocationFront:
+    """
+    HTTP front of the GMLC, registered in the NF registry of the API Gateway in place of the GMLC (or of its load
+    balancer).
+
+    The GMLC has no location request resource: requests are created on `provide-location`, and cancelled with their
+    LDR reference and SUPI on `cancel-location`. The front gives each location request a resource, returned in the
+    `Location` header, so that the event exposure deletions of the gateway (`DELETE` on this resource, or on
+    `provide-location` with the location request as body) are mapped to a `cancel-location` request. The other requests
+    are forwarded unchanged, over pooled keep-alive connections.
+    """
+
+    def __init__(self, upstream: str, timeout: float = 5.0, max_connections: int = 100):
+        """
+        Initializes the front.
+
+        Args:
+            upstream (str): The base URL of the GMLC, or of its load balancer.
+            timeout (float): The timeout (in seconds) of the requests to the GMLC.
+            max_connections (int): The maximum number of connections to the GMLC.
+        """
+        self.upstream = upstream.rstrip("/")
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        # LDR reference and SUPI of the running location requests, by resource ID
+        self.location_requests: dict[str, tuple[str, str]] = {}
+
+    def open(self):
+        """
+        Creates the connection pool, in the event loop of the server.
+        """
+        self._client = httpx.AsyncClient(base_url=self.upstream, timeout=self._timeout,
+                                         limits=httpx.Limits(max_connections=self._max_connections,
+                                                             max_keepalive_connections=self._max_connections,
+                                                             keepalive_expiry=30.0))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _unavailable(self, e: httpx.HTTPError) -> HTTPException:
+        logging.warning(f"Failed to forward a request to the GMLC at '{self.upstream}': {e!r}")
+        return HTTPException(status_code=504 if isinstance(e, httpx.TimeoutException) else 502,
+                             detail="The GMLC is not available")
+
+    async def forward(self, method: str, path: str, body: bytes, headers: dict) -> httpx.Response:
+        try:
+            return await self._client.request(method, path, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise self._unavailable(e)
+
+    def forget(self, key: tuple[str, str]):
+        """
+        Removes the resources of a location request.
+        """
+        for resource_id in [resource_id for resource_id, value in self.location_requests.items() if value == key]:
+            del self.location_requests[resource_id]
+
+    async def cancel(self, key: tuple[str, str], headers: dict) -> Response:
+        """
+        Cancels a location request on the GMLC. A location request the GMLC does not know is considered cancelled.
+
+        Args:
+            key (tuple[str, str]): The LDR reference and SUPI of the location request.
+            headers (dict): The headers of the request.
+
+        Returns:
+            Response: HTTP 204, or the error of the GMLC.
+        """
+        ldr_reference, supi = key
+        try:
+            response = await self._client.post(CANCEL_LOCATION_PATH,
+                                               json={"ldrReference": ldr_reference, "supi": supi},
+                                               headers={name: value for name, value in headers.items()
+                                                        if name != "content-type"})
+        except httpx.HTTPError as e:
+            raise self._unavailable(e)
+        if response.status_code >= 400 and response.status_code != 404:
+            logging.warning(f"Failed to cancel the location request of UE '{supi}', LDR_REFERENCE='{ldr_reference}' "
+                            f"(status code: {response.status_code})")
+            return Response(content=response.content, status_code=response.status_code)
+        logging.info(f"Cancelled the location request of UE '{supi}', LDR_REFERENCE='{ldr_reference}'")
+        return Response(status_code=204)
+
+    def create_app(self) -> FastAPI:
+        """
+        Creates the application of the front, which holds the connection pool while running.
+
+        Returns:
+            FastAPI: The application.
+        """
+
+        @asynccontextmanager
+        async def lifespan(_app: FastAPI):
+            # The connection pool is bound to the event loop of the server
+            self.open()
+            yield
+            await self.close()
+
+        app = FastAPI(lifespan=lifespan)
+
+        @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+        async def route(path: str, request: Request):
+            body = await request.body()
+            headers = {key: request.headers[key] for key in FORWARDED_REQUEST_HEADERS if key in request.headers}
+            path = f"/{path.rstrip('/')}"
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = None
+
+            if request.method == "DELETE" and path.startswith(f"{PROVIDE_LOCATION_PATH}/"):
+                key = self.location_requests.pop(path.rsplit("/", 1)[-1], None)
+                if key is None:
+                    raise HTTPException(status_code=404, detail="Unknown location request")
+                return await self.cancel(key, headers)
+
+            key = _location_request_key(data)
+            if request.method == "DELETE" and path == PROVIDE_LOCATION_PATH and key is not None:
+                self.forget(key)
+                return await self.cancel(key, headers)
+
+            response = await self.forward(request.method, path, body, headers)
+            response_headers = {key: response.headers[key] for key in FORWARDED_RESPONSE_HEADERS
+                                if key in response.headers}
+            if request.method == "POST" and path == PROVIDE_LOCATION_PATH and key is not None \
+                    and response.status_code < 300:
+                # The GMLC replaces a location request sent again, and so does the front
+                self.forget(key)
+                resource_id = str(uuid4())
+                self.location_requests[resource_id] = key
+                response_headers["location"] = f"{str(request.base_url).rstrip('/')}{path}/{resource_id}"
+            return Response(content=response.content, status_code=response.status_code, headers=response_headers)
+
+        return app
+
+    def create_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server of the front.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+        return uvicorn.Server(uvicorn.Config(self.create_app(), host="0.0.0.0", port=port, log_level="warning"))
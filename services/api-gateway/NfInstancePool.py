@@ -0,0 +1,177 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import time
+from typing import Optional
+
+import httpx
+from nwdaf_api.models.nf_type import NFType
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def parse_instances(value: str) -> list[tuple[str, int]]:
+    """
+    Parses a list of NF instances, e.g., 'gmlc-1:10006,gmlc-2:10006'.
+
+    Raises:
+        ValueError: If an instance has no valid port.
+    """
+    instances = []
+    for instance in value.split(","):
+        if instance.strip():
+            host, _, port = instance.strip().rpartition(":")
+            instances.append((host, int(port)))
+    return instances
+
+
+class NfInstance:
+    """
+    An instance of an NF, with its own pool of keep-alive connections.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.name = f"{host}:{port}"
+        self.url = f"http://{host}:{port}"
+        self.client: Optional[httpx.AsyncClient] = None
+        self.failures: int = 0
+        # Monotonic time until which the instance receives no new UE, None if healthy
+        self.ejected_until: Optional[float] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until is None
+
+
+class NfInstancePool:
+    """
+    Instances of an NF type, between which the UEs are spread by consistent hashing of their SUPI.
+
+    Each instance is placed at `virtual_nodes` points of a hash ring, and a UE is owned by the first instance following
+    the hash of its SUPI, so that adding or removing an instance only moves the UEs it owns. An instance failing
+    `max_failures` consecutive requests or health checks is ejected for `ejection_time` seconds: its UEs are owned by
+    the next instances of the ring meanwhile, and come back to it once it has passed a health check again.
+    """
+
+    def __init__(self, nf_type: NFType, instances: list[tuple[str, int]], virtual_nodes: int = 100,
+                 max_failures: int = 3, ejection_time: float = 30.0, health_interval: float = 5.0,
+                 timeout: float = 5.0, max_connections: int = 100):
+        """
+        Initializes the pool.
+
+        Args:
+            nf_type (NFType): The type of NF of the instances.
+            instances (list[tuple[str, int]]): The host and port of each instance.
+            virtual_nodes (int): The number of points of each instance on the hash ring.
+            max_failures (int): The number of consecutive failures after which an instance is ejected.
+            ejection_time (float): The minimum time (in seconds) an ejected instance receives no new UE.
+            health_interval (float): The time (in seconds) between two health checks of each instance.
+            timeout (float): The timeout (in seconds) of the requests to the instances.
+            max_connections (int): The maximum number of connections to each instance.
+
+        Raises:
+            ValueError: If no instance is provided.
+        """
+        if not instances:
+            raise ValueError(f"No {nf_type.value} instance")
+        self.nf_type = nf_type
+        self.instances = {instance.name: instance for instance in (NfInstance(host, port) for host, port in instances)}
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.health_interval = health_interval
+        self._timeout = timeout
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+        ring = sorted((_hash(f"{name}#{node}"), name) for name in self.instances for node in range(virtual_nodes))
+        self._ring_hashes = [point for point, _ in ring]
+        self._ring_names = [name for _, name in ring]
+
+    def open(self):
+        """
+        Creates the connection pools, which are bound to the running event loop.
+        """
+        for instance in self.instances.values():
+            instance.client = httpx.AsyncClient(base_url=instance.url, timeout=self._timeout, limits=self._limits)
+
+    async def close(self):
+        for instance in self.instances.values():
+            if instance.client is not None:
+                await instance.client.aclose()
+
+    def lookup(self, supi: str) -> NfInstance:
+        """
+        Returns the instance owning a UE: the first healthy instance following its SUPI on the hash ring, or its
+        ejected owner if no instance is healthy.
+        """
+        start = bisect.bisect(self._ring_hashes, _hash(supi))
+        for offset in range(len(self._ring_names)):
+            instance = self.instances[self._ring_names[(start + offset) % len(self._ring_names)]]
+            if instance.healthy:
+                return instance
+        return self.instances[self._ring_names[start % len(self._ring_names)]]
+
+    def record_success(self, instance: NfInstance):
+        instance.failures = 0
+        if instance.ejected_until is not None and time.monotonic() >= instance.ejected_until:
+            instance.ejected_until = None
+            logging.info(f"{self.nf_type.value} instance '{instance.name}' is healthy again")
+
+    def record_failure(self, instance: NfInstance, error: str):
+        instance.failures += 1
+        if instance.failures >= self.max_failures:
+            if instance.ejected_until is None:
+                logging.warning(f"Ejecting {self.nf_type.value} instance '{instance.name}' after {instance.failures} "
+                                f"consecutive failure(s): {error}")
+            instance.ejected_until = time.monotonic() + self.ejection_time
+
+    async def request(self, instance: NfInstance, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request to an instance, counting connection errors, timeouts and server errors as failures.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        try:
+            response = await instance.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            self.record_failure(instance, repr(e))
+            raise
+        if response.status_code >= 500:
+            self.record_failure(instance, f"HTTP {response.status_code}")
+        else:
+            self.record_success(instance)
+        return response
+
+    async def health_check_loop(self, path: str = "/health"):
+        """
+        Periodically checks each instance until cancelled. An instance is alive if it answers the health check path
+        with a success (2xx) status code.
+        """
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._check(instance, path) for instance in self.instances.values()))
+
+    async def _check(self, instance: NfInstance, path: str):
+        try:
+            response = await instance.client.get(path)
+        except httpx.HTTPError as e:
+            self.record_failure(instance, f"Health check: {e!r}")
+            return
+        if response.is_success:
+            self.record_success(instance)
+        else:
+            self.record_failure(instance, f"Health check: HTTP {response.status_code}")
@@ -0,0 +1,222 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from NfInstancePool import NfInstancePool, NfInstance
+
+# Request headers forwarded to the instances, and response headers returned to the gateway
+FORWARDED_REQUEST_HEADERS = ("content-type", "traceparent")
+FORWARDED_RESPONSE_HEADERS = ("content-type", "location")
+
+
+def _ue_field(data) -> Optional[str]:
+    # Subscriptions targeting a list of UEs (e.g., RAN event exposure), serialized with the field name or the alias
+    if isinstance(data, dict):
+        for field in ("ueIds", "ue_ids"):
+            if isinstance(data.get(field), list):
+                return field
+    return None
+
+
+def _resource_id(response: httpx.Response) -> Optional[str]:
+    location = response.headers.get("location")
+    return location.rstrip("/").rsplit("/", 1)[-1] if location else None
+
+
+class ShardedSubscription:
+    """
+    A subscription targeting a list of UEs, split into one subscription per instance owning some of the UEs.
+    """
+
+    def __init__(self, path: str):
+        # Path of the collection the subscription has been created in
+        self.path = path
+        # ID of the subscription created on each instance, by instance name
+        self.parts: dict[str, str] = {}
+
+
+class NfLoadBalancer:
+    """
+    HTTP front of the instances of an NF type, registered in the NF registry of the API Gateway in place of a single
+    instance.
+
+    Requests are forwarded to the instance owning their UE (`supi` of the body), so that the event exposure
+    subscriptions of a UE, and the notifications behind them, always land on the same instance. Subscriptions
+    targeting a list of UEs (`ueIds`) are split into one subscription per owning instance, and updated or deleted as a
+    whole through the ID returned by the balancer. Each instance has its own pool of keep-alive connections, so that a
+    slow instance only holds its own connections.
+    """
+
+    def __init__(self, pool: NfInstancePool, health_check_path: str = "/health"):
+        """
+        Initializes the balancer.
+
+        Args:
+            pool (NfInstancePool): The instances of the NF type.
+            health_check_path (str): The path requested to check that an instance is alive, which must answer
+                with a success (2xx) status code.
+        """
+        self.pool = pool
+        self._health_check_path = health_check_path
+        self._subscriptions: dict[str, ShardedSubscription] = {}
+
+    @staticmethod
+    def _unavailable(instance: NfInstance, e: httpx.HTTPError) -> HTTPException:
+        logging.warning(f"Failed to forward a request to NF instance '{instance.name}': {e!r}")
+        return HTTPException(status_code=504 if isinstance(e, httpx.TimeoutException) else 502,
+                             detail=f"NF instance '{instance.name}' is not available")
+
+    async def forward(self, instance: NfInstance, method: str, path: str, body: bytes, headers: dict) -> Response:
+        try:
+            response = await self.pool.request(instance, method, f"/{path}", content=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise self._unavailable(instance, e)
+        return Response(content=response.content, status_code=response.status_code,
+                        headers={key: response.headers[key] for key in FORWARDED_RESPONSE_HEADERS
+                                 if key in response.headers})
+
+    def split(self, supis: list[str]) -> dict[str, list[str]]:
+        """
+        Groups the UEs of a subscription by owning instance.
+        """
+        groups: dict[str, list[str]] = {}
+        for supi in supis:
+            groups.setdefault(self.pool.lookup(supi).name, []).append(supi)
+        return groups
+
+    async def _send_part(self, name: str, method: str, path: str, data: Optional[dict], headers: dict) -> Optional[str]:
+        # Returns the ID of the subscription created on the instance, if any
+        instance = self.pool.instances[name]
+        response = await self.pool.request(instance, method, path, json=data, headers=headers)
+        if response.status_code >= 400 and not (method == "DELETE" and response.status_code == 404):
+            raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+        return _resource_id(response) if method == "POST" else None
+
+    async def update_parts(self, subscription: ShardedSubscription, data: Optional[dict], field: Optional[str],
+                           headers: dict) -> list[str]:
+        """
+        Creates, updates or deletes the subscription of each instance, so that each one targets the UEs it owns.
+
+        Args:
+            subscription (ShardedSubscription): The subscription, whose parts are updated.
+            data (Optional[dict]): The body of the subscription, None to delete all the parts.
+            field (Optional[str]): The field of the body holding the UEs.
+            headers (dict): The headers of the requests.
+
+        Returns:
+            list[str]: The errors of the instances whose part could not be sent.
+        """
+        groups = self.split(data[field]) if data is not None else {}
+        operations = {}
+        for name in subscription.parts.keys() | groups.keys():
+            part_path = f"{subscription.path}/{subscription.parts[name]}" if name in subscription.parts else None
+            if name not in groups:
+                operations[name] = self._send_part(name, "DELETE", part_path, None, headers)
+            elif part_path is None:
+                operations[name] = self._send_part(name, "POST", subscription.path, {**data, field: groups[name]},
+                                                   headers)
+            else:
+                operations[name] = self._send_part(name, "PUT", part_path, {**data, field: groups[name]}, headers)
+
+        errors = []
+        for name, result in zip(operations, await asyncio.gather(*operations.values(), return_exceptions=True)):
+            if isinstance(result, Exception):
+                errors.append(f"{name}: {result!r}")
+            elif name not in groups:
+                del subscription.parts[name]
+            elif result is not None:
+                subscription.parts[name] = result
+            elif name not in subscription.parts:
+                errors.append(f"{name}: no subscription ID returned")
+        return errors
+
+    def create_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server of the balancer, which checks the health of the instances while running.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+
+        @asynccontextmanager
+        async def lifespan(_app: FastAPI):
+            # The connection pools are bound to the event loop of the server
+            self.pool.open()
+            health_check_task = asyncio.create_task(self.pool.health_check_loop(self._health_check_path))
+            yield
+            health_check_task.cancel()
+            await self.pool.close()
+
+        app = FastAPI(lifespan=lifespan)
+
+        @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+        async def route(path: str, request: Request):
+            body = await request.body()
+            headers = {key: request.headers[key] for key in FORWARDED_REQUEST_HEADERS if key in request.headers}
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = None
+
+            field = _ue_field(data)
+            subscription_id = path.rstrip("/").rsplit("/", 1)[-1]
+            subscription = self._subscriptions.get(subscription_id)
+
+            if request.method == "POST" and field is not None:
+                subscription = ShardedSubscription(f"/{path.rstrip('/')}")
+                errors = await self.update_parts(subscription, data, field, headers)
+                if errors:
+                    # The subscription is created on all the owning instances, or on none
+                    await self.update_parts(subscription, None, None, headers)
+                    logging.warning(f"Failed to create a {self.pool.nf_type.value} subscription: {errors}")
+                    raise HTTPException(status_code=502, detail="NF instances are not available")
+                subscription_id = str(uuid4())
+                self._subscriptions[subscription_id] = subscription
+                logging.info(f"Created {self.pool.nf_type.value} subscription '{subscription_id}' for "
+                             f"{len(data[field])} UE(s) on {len(subscription.parts)} instance(s)")
+                return Response(status_code=201, content=body, media_type="application/json",
+                                headers={"Location": f"{str(request.base_url).rstrip('/')}{subscription.path}/"
+                                                     f"{subscription_id}"})
+
+            if subscription is not None and request.method in ("PUT", "DELETE"):
+                if request.method == "PUT" and field is None:
+                    raise HTTPException(status_code=400, detail="The subscription has no list of UEs")
+                errors = await self.update_parts(subscription, data if request.method == "PUT" else None, field,
+                                                 headers)
+                if request.method == "DELETE":
+                    del self._subscriptions[subscription_id]
+                if errors:
+                    logging.warning(f"Failed to {request.method} {self.pool.nf_type.value} subscription "
+                                    f"'{subscription_id}' on some instances: {errors}")
+                    if request.method == "PUT":
+                        raise HTTPException(status_code=502, detail="NF instances are not available")
+                if request.method == "DELETE":
+                    return Response(status_code=204)
+                return Response(status_code=200, content=body, media_type="application/json")
+
+            # Requests of a single UE go to its owner, the others are spread by path
+            key = data.get("supi") if isinstance(data, dict) else None
+            return await self.forward(self.pool.lookup(key or path), request.method, path, body, headers)
+
+        return uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning"))
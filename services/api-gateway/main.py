@@ -13,13 +13,24 @@ import logging
 import os
 import signal
 import sys
+import threading
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+from common.tracing import install_tracing
 from nwdaf_api.models.nf_type import NFType
+from nwdaf_api.models.nwdaf_event import NwdafEvent
 from nwdaf_libcommon.ApiGatewayService import ApiGatewayService
 
+from AnalyticsDeliveryProxy import AnalyticsDeliveryProxy
+from AnalyticsInfoProxy import AnalyticsInfoProxy
+from GmlcLocationFront import GmlcLocationFront
+from NfInstancePool import NfInstancePool, parse_instances
+from NfLoadBalancer import NfLoadBalancer
+
 # Log level
 log_level = os.getenv('API_GW_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('API_GW_SERVICE_NAME', 'api-gateway'), log_level)
 
 # Kafka bootstrap server
 kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
@@ -28,10 +39,60 @@ kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
 service_name = os.getenv('API_GW_SERVICE_NAME')
 service_port = int(os.getenv('API_GW_SERVICE_PORT'))
 
+# Opt-in profiling hooks
+install_profiling(service_name)
+
+# Opt-in tracing
+install_tracing(service_name)
+
+# NF instances (e.g., GMLC_INSTANCES=gmlc-1:10006,gmlc-2:10006), registered through a load balancer when an NF type
+# has several ones
+nf_endpoints = []
+nf_balancers: list[tuple[NfLoadBalancer, int]] = []
+for nf_type, prefix in ((NFType.GMLC, 'GMLC'), (NFType.RAN, 'RAN')):
+    instances = parse_instances(os.getenv(f'{prefix}_INSTANCES', '')) or \
+        [(os.getenv(f'{prefix}_SERVICE_NAME'), int(os.getenv(f'{prefix}_SERVICE_PORT')))]
+    if len(instances) == 1:
+        nf_endpoints.append((nf_type, *instances[0]))
+        continue
+    balancer_port = int(os.getenv(f'API_GW_{prefix}_BALANCER_PORT'))
+    pool = NfInstancePool(nf_type, instances,
+                          max_failures=int(os.getenv('API_GW_NF_MAX_FAILURES', '3')),
+                          ejection_time=float(os.getenv('API_GW_NF_EJECTION_TIME', '30')),
+                          health_interval=float(os.getenv('API_GW_NF_HEALTH_INTERVAL', '5')),
+                          timeout=float(os.getenv('API_GW_NF_TIMEOUT', '5.0')),
+                          max_connections=int(os.getenv('API_GW_NF_MAX_CONNECTIONS', '100')))
+    nf_balancers.append((NfLoadBalancer(pool), balancer_port))
+    nf_endpoints.append((nf_type, service_name, balancer_port))
+    logging.info(f"Load balancing {len(instances)} {nf_type.value} instances on port {balancer_port}")
+
+# The GMLC (or its load balancer) is registered through a front mapping the deletions of location requests to
+# cancellations
+gmlc_front_port = int(os.getenv('API_GW_GMLC_FRONT_PORT'))
+gmlc_endpoint = next(endpoint for endpoint in nf_endpoints if endpoint[0] == NFType.GMLC)
+gmlc_host = 'localhost' if gmlc_endpoint[1] == service_name else gmlc_endpoint[1]
+gmlc_front = GmlcLocationFront(f"http://{gmlc_host}:{gmlc_endpoint[2]}",
+                               timeout=float(os.getenv('API_GW_NF_TIMEOUT', '5.0')),
+                               max_connections=int(os.getenv('API_GW_NF_MAX_CONNECTIONS', '100')))
+nf_endpoints[nf_endpoints.index(gmlc_endpoint)] = (NFType.GMLC, service_name, gmlc_front_port)
+
+# The subscription API is served on the service port by a proxy delivering the analytics notifications to the
+# consumers, in front of the gateway's own server on the internal port
+internal_port = int(os.getenv('API_GW_INTERNAL_PORT'))
+delivery_proxy = AnalyticsDeliveryProxy(f"http://localhost:{internal_port}", f"http://localhost:{service_port}",
+                                        timeout=float(os.getenv('API_GW_DELIVERY_TIMEOUT', '5.0')),
+                                        max_connections=int(os.getenv('API_GW_DELIVERY_MAX_CONNECTIONS', '20')))
+
 # Initialize service and NF registry from env variables
-service = ApiGatewayService(service_name, service_port, kafka_bootstrap_server, {NFType.GMLC, NFType.RAN})
-service.init_nf_registry([(NFType.GMLC, os.getenv('GMLC_SERVICE_NAME'), int(os.getenv('GMLC_SERVICE_PORT'))),
-                          (NFType.RAN, os.getenv('RAN_SERVICE_NAME'), int(os.getenv('RAN_SERVICE_PORT')))])
+service = ApiGatewayService(service_name, internal_port, kafka_bootstrap_server, {NFType.GMLC, NFType.RAN})
+service.init_nf_registry(nf_endpoints)
+
+# Analytics info path, answered from the prediction cache of the AnLFs (disabled if 0)
+analytics_info_port = int(os.getenv('API_GW_ANALYTICS_INFO_PORT', '0'))
+analytics_info_proxy = AnalyticsInfoProxy(
+    {NwdafEvent.UE_LOC_THROUGHPUT: f"http://{os.getenv('THR_ANLF_SERVICE_NAME')}:"
+                                   f"{os.getenv('THR_ANLF_ANALYTICS_INFO_PORT')}"},
+    float(os.getenv('API_GW_ANALYTICS_INFO_TIMEOUT', '1.0')))
 
 
 def handle_signal(sig, _frame):
@@ -49,6 +110,13 @@ signal.signal(signal.SIGTERM, handle_signal)
 
 if __name__ == '__main__':
     try:
+        if analytics_info_port:
+            # The gateway's own server runs in the main thread
+            threading.Thread(target=analytics_info_proxy.create_server(analytics_info_port).run, daemon=True).start()
+        for balancer, port in nf_balancers:
+            threading.Thread(target=balancer.create_server(port).run, daemon=True).start()
+        threading.Thread(target=gmlc_front.create_server(gmlc_front_port).run, daemon=True).start()
+        threading.Thread(target=delivery_proxy.create_server(service_port).run, daemon=True).start()
         service.run()
     except Exception as e:
         logging.error(f"An error occurred: {e}")
@@ -17,6 +17,9 @@ from enum import Enum
 from typing import Type
 import logging
 
+from common.dataset_streaming import DATASET_STREAM_REQUEST_TOPIC, DATASET_STREAM_DELIVERY_TOPIC
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
 from confluent_kafka import KafkaError, KafkaException
 from confluent_kafka.admin import AdminClient, NewTopic
 
@@ -33,11 +36,14 @@ from nwdaf_api import (
 
 # Log level
 log_level = os.getenv('TOPICS_INIT_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('TOPICS_INIT_SERVICE_NAME', 'kafka-topics-init'), log_level)
 
 # Kafka boostrap server
 kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
 
+# Opt-in profiling hooks
+install_profiling(os.getenv('TOPICS_INIT_SERVICE_NAME', 'kafka-topics-init'))
+
 shutdown_flag = False
 
 
@@ -134,6 +140,8 @@ def main():
         topic_list.append("Control.DatasetCollectionSubscription")
         topic_list.append("Control.DatasetRetrievalSubscription")
         topic_list.append("Data.DatasetRetrievalDelivery")
+        topic_list.append(DATASET_STREAM_REQUEST_TOPIC)
+        topic_list.append(DATASET_STREAM_DELIVERY_TOPIC)
 
         logging.info("Creating all the relevant Kafka topics...")
         for topic_name in topic_list:
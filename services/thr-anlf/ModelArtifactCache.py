@@ -0,0 +1,126 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+import os
+import shutil
+import urllib.request
+import uuid
+from pathlib import Path
+
+from common.model_artifacts import MANIFEST_FILE, ModelManifest, ModelReference, bundle_hash, file_sha256
+
+
+class ModelArtifactCache:
+    """
+    Local on-disk cache of the model bundles provisioned by the MTLF.
+
+    Files are stored once, named after their checksum, and each bundle is a directory of links to these files. A
+    bundle already in the cache is reused without any transfer, and only the files missing from the cache are
+    downloaded for a new bundle. Every downloaded file is checked against the manifest of its bundle.
+    """
+
+    def __init__(self, cache_dir: str, max_bundles: int = 3, timeout: float = 30.0):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str): The directory of the cache, typically a persistent volume.
+            max_bundles (int): The number of most recently used bundles kept in the cache.
+            timeout (float): The timeout (in seconds) of each download.
+        """
+        self._blobs = Path(cache_dir) / "blobs"
+        self._bundles = Path(cache_dir) / "bundles"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._bundles.mkdir(parents=True, exist_ok=True)
+        self._max_bundles = max_bundles
+        self._timeout = timeout
+
+    def resolve(self, reference: ModelReference) -> Path:
+        """
+        Returns the local directory of a bundle, downloading the missing files if needed. Downloads are blocking.
+
+        Args:
+            reference (ModelReference): The reference of the bundle.
+
+        Returns:
+            Path: The directory of the bundle.
+
+        Raises:
+            ValueError: If the bundle or one of its files does not match its checksum.
+        """
+        bundle_dir = self._bundles / reference.hash
+        if (bundle_dir / MANIFEST_FILE).is_file():
+            logging.info(f"Model bundle found in cache: HASH={reference.hash}, VERSION={reference.version}")
+            bundle_dir.touch()
+            return bundle_dir
+
+        manifest = ModelManifest.model_validate_json(self._download(f"{reference.base_url}/artifacts/{reference.hash}"))
+        if manifest.hash != reference.hash or bundle_hash(manifest.files) != reference.hash:
+            raise ValueError(f"Manifest of model bundle '{reference.hash}' does not match its hash")
+
+        downloaded = 0
+        for name, checksum in manifest.files.items():
+            blob = self._blobs / checksum
+            if blob.is_file():
+                continue
+            staging = self._blobs / f".{uuid.uuid4()}"
+            staging.write_bytes(self._download(f"{reference.base_url}/artifacts/{reference.hash}/files/{name}"))
+            if file_sha256(staging) != checksum:
+                staging.unlink()
+                raise ValueError(f"File '{name}' of model bundle '{reference.hash}' does not match its checksum")
+            staging.rename(blob)
+            downloaded += 1
+
+        # The bundle is assembled in a temporary directory, so that a partial bundle is never loaded
+        staging = self._bundles / f".{reference.hash}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        for name, checksum in manifest.files.items():
+            try:
+                os.link(self._blobs / checksum, staging / name)
+            except OSError:
+                shutil.copyfile(self._blobs / checksum, staging / name)
+        (staging / MANIFEST_FILE).write_text(manifest.model_dump_json())
+        staging.rename(bundle_dir)
+
+        logging.info(f"Model bundle added to cache: HASH={reference.hash}, VERSION={reference.version}, "
+                     f"DOWNLOADED_FILES={downloaded}/{len(manifest.files)}")
+        self.prune()
+        return bundle_dir
+
+    def prune(self):
+        """
+        Removes the least recently used bundles beyond `max_bundles`, and the files they were the only ones to use.
+        """
+        bundles = sorted((path for path in self._bundles.iterdir() if not path.name.startswith(".")),
+                         key=lambda path: path.stat().st_mtime, reverse=True)
+        for bundle_dir in bundles[self._max_bundles:]:
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+            logging.debug(f"Removed model bundle from cache: HASH={bundle_dir.name}")
+
+        # Bundle files are hard links to the blobs, or copies where links are not supported: the files in use are
+        # those listed in the manifests of the remaining bundles
+        used = set()
+        for bundle_dir in bundles[:self._max_bundles]:
+            try:
+                used.update(ModelManifest.model_validate_json((bundle_dir / MANIFEST_FILE).read_text()).files.values())
+            except (OSError, ValueError) as e:
+                logging.warning(f"Failed to read the manifest of cached model bundle '{bundle_dir.name}', "
+                                f"no file removed: {e!r}")
+                return
+        for blob in self._blobs.iterdir():
+            if blob.name.startswith(".") or blob.name not in used:
+                blob.unlink(missing_ok=True)
+
+    def _download(self, url: str) -> bytes:
+        with urllib.request.urlopen(url, timeout=self._timeout) as response:
+            return response.read()
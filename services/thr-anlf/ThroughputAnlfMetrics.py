@@ -0,0 +1,217 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server, REGISTRY
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from prometheus_client.registry import Collector
+
+from ThroughputMap import ThroughputMap
+from ThroughputNotificationAggregator import ThroughputNotificationAggregator
+from ThroughputNotificationController import ThroughputNotificationController, SuppressionReason
+from ThroughputOverloadController import ThroughputOverloadController, HealthStatus
+from ThroughputPredictionCache import ThroughputPredictionCache
+from ThroughputSamplingController import ThroughputSamplingController
+from ThroughputSubscriptionFSM import States
+from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+
+
+class ThroughputStateCollector(Collector):
+    """
+    Prometheus collector reporting the state of the AnLF's pipelines and controllers.
+
+    Values are only computed when the metrics endpoint is scraped.
+    """
+
+    def __init__(self, registry: ThroughputSubscriptionRegistry, overload_controller: ThroughputOverloadController,
+                 sampling_controller: ThroughputSamplingController,
+                 notification_controller: ThroughputNotificationController,
+                 prediction_cache: ThroughputPredictionCache, throughput_map: ThroughputMap,
+                 notification_aggregator: ThroughputNotificationAggregator):
+        self._registry = registry
+        self._overload_controller = overload_controller
+        self._sampling_controller = sampling_controller
+        self._notification_controller = notification_controller
+        self._prediction_cache = prediction_cache
+        self._throughput_map = throughput_map
+        self._notification_aggregator = notification_aggregator
+
+    def collect(self):
+        state_counts = self._registry.count_by_state()
+        subscriptions = GaugeMetricFamily("thr_anlf_subscriptions", "Number of UE pipelines per FSM state",
+                                          labels=["state"])
+        for state in States:
+            subscriptions.add_metric([state.value], state_counts.get(state, 0))
+        yield subscriptions
+
+        health = GaugeMetricFamily("thr_anlf_health", "Health status of the AnLF (1 for the current status)",
+                                   labels=["status"])
+        for status in HealthStatus:
+            health.add_metric([status.value], 1 if self._overload_controller.health == status else 0)
+        yield health
+
+        yield GaugeMetricFamily("thr_anlf_inference_lag_seconds",
+                                "Smoothed time between the reception of all the inputs of a UE and its prediction",
+                                value=self._overload_controller.inference_lag)
+        yield GaugeMetricFamily("thr_anlf_pending_predictions", "Number of UE pipelines waiting for a prediction",
+                                value=self._overload_controller.pending_predictions)
+        yield CounterMetricFamily("thr_anlf_coalesced_inputs", "Number of inputs superseded before being predicted",
+                                  value=self._overload_controller.coalesced_inputs)
+        yield CounterMetricFamily("thr_anlf_shed_predictions", "Number of predictions shed by the overload controller",
+                                  value=self._overload_controller.shed_predictions)
+        yield CounterMetricFamily("thr_anlf_downsampled_predictions",
+                                  "Number of predictions skipped by the downsampling of low-priority pipelines",
+                                  value=self._overload_controller.downsampled_predictions)
+
+        period_counts = self._registry.count_by_reporting_period()
+        reporting_periods = GaugeMetricFamily("thr_anlf_reporting_periods",
+                                              "Number of UE pipelines per reporting period (in seconds)",
+                                              labels=["period"])
+        for period in self._sampling_controller.periods:
+            reporting_periods.add_metric([str(period)], period_counts.get(period, 0))
+        yield reporting_periods
+        yield CounterMetricFamily("thr_anlf_shortened_reporting_periods",
+                                  "Number of reporting periods shortened by the sampling controller",
+                                  value=self._sampling_controller.shortened_periods)
+        yield CounterMetricFamily("thr_anlf_lengthened_reporting_periods",
+                                  "Number of reporting periods lengthened by the sampling controller",
+                                  value=self._sampling_controller.lengthened_periods)
+
+        yield CounterMetricFamily("thr_anlf_sent_analytics_notifications",
+                                  "Number of analytics notifications sent to a subscription",
+                                  value=self._notification_controller.sent_notifications)
+        suppressed = CounterMetricFamily("thr_anlf_suppressed_analytics_notifications",
+                                         "Number of analytics notifications suppressed per reason", labels=["reason"])
+        for reason in SuppressionReason:
+            suppressed.add_metric([reason.value], self._notification_controller.suppressed_notifications.get(reason, 0))
+        yield suppressed
+        yield GaugeMetricFamily("thr_anlf_pending_analytics_notifications",
+                                "Number of consolidated analytics notifications waiting for their window to close",
+                                value=len(self._notification_aggregator))
+        yield CounterMetricFamily("thr_anlf_consolidated_predictions",
+                                  "Number of predictions superseded by a newer one of the same UE within a window",
+                                  value=self._notification_aggregator.consolidated_predictions)
+
+        yield GaugeMetricFamily("thr_anlf_prediction_cache_ues", "Number of UEs in the prediction cache",
+                                value=len(self._prediction_cache))
+        cache_lookups = CounterMetricFamily("thr_anlf_prediction_cache_lookups",
+                                            "Number of analytics queries of a UE per result", labels=["result"])
+        cache_lookups.add_metric(["hit"], self._prediction_cache.hits)
+        cache_lookups.add_metric(["miss"], self._prediction_cache.misses)
+        yield cache_lookups
+        yield CounterMetricFamily("thr_anlf_prediction_cache_evictions",
+                                  "Number of UEs evicted from the prediction cache",
+                                  value=self._prediction_cache.evictions)
+
+        yield GaugeMetricFamily("thr_anlf_throughput_map_tiles", "Number of tiles in the throughput map",
+                                value=len(self._throughput_map))
+        yield CounterMetricFamily("thr_anlf_throughput_map_evictions",
+                                  "Number of tiles evicted from the throughput map",
+                                  value=self._throughput_map.evictions)
+        yield CounterMetricFamily("thr_anlf_fallback_estimates",
+                                  "Number of shed predictions replaced with an estimate of the throughput map",
+                                  value=self._throughput_map.fallback_estimates)
+
+
+class ThroughputAnlfMetrics:
+    """
+    Prometheus metrics of the Throughput AnLF.
+
+    The metrics are registered in the given collector registry, so that several AnLF services of the same process (e.g.,
+    in benchmarks) each register their own.
+    """
+
+    def __init__(self, registry: ThroughputSubscriptionRegistry, overload_controller: ThroughputOverloadController,
+                 sampling_controller: ThroughputSamplingController,
+                 notification_controller: ThroughputNotificationController,
+                 prediction_cache: ThroughputPredictionCache, throughput_map: ThroughputMap,
+                 notification_aggregator: ThroughputNotificationAggregator,
+                 collector_registry: CollectorRegistry = REGISTRY):
+        self.tick_duration = Histogram("thr_anlf_fsm_tick_duration_seconds",
+                                       "Duration of an iteration of the FSM loop",
+                                       buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5),
+                                       registry=collector_registry)
+        self.inference_batch_size = Histogram("thr_anlf_inference_batch_size",
+                                              "Number of predictions performed during an iteration of the FSM loop",
+                                              buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+                                              registry=collector_registry)
+        self.inference_latency = Histogram("thr_anlf_inference_latency_seconds", "Duration of a prediction",
+                                           buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25),
+                                           registry=collector_registry)
+        self.messages_received = Counter("thr_anlf_messages_received", "Number of event exposure messages received",
+                                         ["nf_type"], registry=collector_registry)
+        self.kafka_consumer_lag = Histogram("thr_anlf_kafka_consumer_lag_seconds",
+                                            "Time between the generation of event exposure data and its consumption",
+                                            ["nf_type"],
+                                            buckets=(.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0),
+                                            registry=collector_registry)
+        self.kafka_produce_latency = Histogram("thr_anlf_kafka_produce_latency_seconds",
+                                               "Duration of the production of a Kafka message", ["message_type"],
+                                               buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .1),
+                                               registry=collector_registry)
+        self.event_exposure_batch_size = Histogram("thr_anlf_event_exposure_batch_size",
+                                                   "Number of event exposure messages consumed in a batch",
+                                                   buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000),
+                                                   registry=collector_registry)
+        self.analytics_notification_size = Histogram("thr_anlf_analytics_notification_ues",
+                                                     "Number of UEs of a consolidated analytics notification",
+                                                     buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+                                                     registry=collector_registry)
+
+        collector_registry.register(ThroughputStateCollector(registry, overload_controller, sampling_controller,
+                                                             notification_controller, prediction_cache,
+                                                             throughput_map, notification_aggregator))
+
+    def record_message_received(self, nf_type: str, timestamp: datetime):
+        """
+        Records the reception of an event exposure message.
+
+        Args:
+            nf_type (str): The type of NF the message comes from.
+            timestamp (datetime): The time at which the data has been generated by the NF.
+        """
+        self.messages_received.labels(nf_type=nf_type).inc()
+        if timestamp is not None:
+            now = datetime.now(timezone.utc) if timestamp.tzinfo else datetime.now()
+            self.kafka_consumer_lag.labels(nf_type=nf_type).observe(max(0.0, (now - timestamp).total_seconds()))
+
+    def record_batch_received(self, nf_type: str, timestamps: np.ndarray):
+        """
+        Records the reception of a batch of event exposure messages from the same type of NF.
+
+        Args:
+            nf_type (str): The type of NF the messages come from.
+            timestamps (np.ndarray): The POSIX timestamps at which the data has been generated by the NF, NaN if
+                unknown.
+        """
+        if not len(timestamps):
+            return
+        self.messages_received.labels(nf_type=nf_type).inc(len(timestamps))
+        consumer_lag = self.kafka_consumer_lag.labels(nf_type=nf_type)
+        for lag in np.maximum(time.time() - timestamps[~np.isnan(timestamps)], 0.0).tolist():
+            consumer_lag.observe(lag)
+
+    @staticmethod
+    def start_server(port: int, collector_registry: CollectorRegistry = REGISTRY):
+        """
+        Publishes the metrics on an HTTP endpoint served by a background thread.
+
+        Args:
+            port (int): The port of the endpoint.
+            collector_registry (CollectorRegistry): The registry of the published metrics.
+        """
+        start_http_server(port, registry=collector_registry)
+        logging.info(f"Serving Prometheus metrics on port {port}")
@@ -11,8 +11,13 @@
 
 import asyncio
 import logging
+import math
+import sys
+import time
 from enum import Enum
+from pathlib import Path
 from typing import override, Optional
+from uuid import uuid4
 
 from nwdaf_api.models import (
     NFType,
@@ -31,14 +36,33 @@ from nwdaf_api.models import (
     RanEventExposureNotification,
     MLEventNotif
 )
+import uvicorn
+from fastapi import FastAPI
 from nwdaf_libcommon.AnlfService import AnlfService
 from nwdaf_libcommon.ControlOperationType import ControlOperationType
 from nwdaf_libcommon.KafkaPayload import KafkaPayload
+from prometheus_client import CollectorRegistry, REGISTRY
 from pydantic import BaseModel
 
+from ModelArtifactCache import ModelArtifactCache
+from ThroughputAnlfMetrics import ThroughputAnlfMetrics
+from ThroughputEventExposureConsumer import ThroughputEventExposureConsumer, GmlcBatch, RanBatch
+from ThroughputNotificationAggregator import ThroughputNotificationAggregator
+from ThroughputNotificationController import ThroughputNotificationController
+from ThroughputMap import ThroughputMap
+from ThroughputOverloadController import ThroughputOverloadController
+from ThroughputPredictionCache import ThroughputPredictionCache
+from ThroughputSamplingController import ThroughputSamplingController
+from ThroughputSnapshotStore import ThroughputSnapshotStore
 from ThroughputSubscriptionFSM import ThroughputSubscriptionFSM, States, Transitions
 from ThroughputSubscriptionData import ThroughputSubscriptionData
 from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+from common.model_artifacts import ModelReference
+from common.tracing import NOOP_SPAN, SpanContext, location_trace_context, rsrp_trace_context, tracer
+from common.throughput_model import ModelVariant, ThroughputModelRunner
+
+# Minimum time (in seconds) between two logs of the prediction failures
+PREDICTION_FAILURE_LOG_INTERVAL = 10.0
 
 
 class ThroughputAnlfService(AnlfService):
@@ -46,23 +70,141 @@ class ThroughputAnlfService(AnlfService):
     An AnLF service for handling UE_LOC_THROUGHPUT analytics.
     """
 
-    def __init__(self, service_name: str, kafka_botstrap_server: str):
+    def __init__(self, service_name: str, kafka_botstrap_server: str, max_batch_size: int = 1000,
+                 overload_controller: Optional[ThroughputOverloadController] = None,
+                 model_cache: Optional[ModelArtifactCache] = None, reporting_period: int = 10,
+                 sampling_controller: Optional[ThroughputSamplingController] = None,
+                 notification_controller: Optional[ThroughputNotificationController] = None,
+                 prediction_cache: Optional[ThroughputPredictionCache] = None, analytics_info_port: int = 0,
+                 throughput_map: Optional[ThroughputMap] = None, map_fallback: bool = False,
+                 snapshot_store: Optional[ThroughputSnapshotStore] = None,
+                 event_exposure_consumer: Optional[ThroughputEventExposureConsumer] = None,
+                 notification_aggregator: Optional[ThroughputNotificationAggregator] = None,
+                 metrics_registry: Optional[CollectorRegistry] = None):
         """
         Initializes the service.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_botstrap_server (str): The Kafka bootstrap server.
+            max_batch_size (int): The maximum number of UEs targeted by a single RAN event exposure subscription.
+            overload_controller (Optional[ThroughputOverloadController]): The controller bounding the work performed
+                at each tick. A controller with default thresholds is used if not provided.
+            model_cache (Optional[ModelArtifactCache]): The local cache of the model bundles provisioned by the MTLF.
+                A cache in the 'models/cache' directory is used if not provided.
+            reporting_period (int): The initial period (in seconds) of the GMLC and RAN event exposure notifications.
+            sampling_controller (Optional[ThroughputSamplingController]): The controller adapting the reporting period
+                of each UE. A controller with default thresholds around `reporting_period` is used if not provided.
+            notification_controller (Optional[ThroughputNotificationController]): The controller suppressing the
+                analytics notifications of unchanged predictions. A controller with the default policy is used if not
+                provided.
+            prediction_cache (Optional[ThroughputPredictionCache]): The store of the latest predictions of each UE. A
+                cache with default bounds is used if not provided.
+            analytics_info_port (int): The port of the HTTP server answering analytics queries from the prediction
+                cache and the throughput map, not served if 0.
+            throughput_map (Optional[ThroughputMap]): The grid of the predicted throughput statistics. A map with
+                default bounds is used if not provided.
+            map_fallback (bool): Whether the throughput of the pipelines shed by the overload controller is estimated
+                from the throughput map.
+            snapshot_store (Optional[ThroughputSnapshotStore]): The store of the snapshots of the pipelines, from which
+                the service resumes at startup. Pipelines are not persisted if not provided.
+            event_exposure_consumer (Optional[ThroughputEventExposureConsumer]): The batched consumer of the GMLC and
+                RAN notifications, the base service then consuming none of them. Notifications are handled one by one,
+                as delivered by the base service, if not provided.
+            notification_aggregator (Optional[ThroughputNotificationAggregator]): The aggregator consolidating the
+                predictions notified to each subscription. The predictions of a tick are consolidated if not provided.
+            metrics_registry (Optional[CollectorRegistry]): The Prometheus registry of the service's metrics, the
+                global one if not provided. Each service of a process must have its own.
         """
+        # With the batched consumer, the base service does not subscribe to the notification topics, so that they are
+        # neither consumed nor validated twice
         super().__init__(service_name,
                          kafka_botstrap_server,
                          NwdafEvent.UE_LOC_THROUGHPUT,
+                         set() if event_exposure_consumer is not None else
                          {(NFType.GMLC, EventNotifyDataType.PERIODIC), (NFType.RAN, RanEvent.RSRP_INFO)})
 
         self.subscription_registry = ThroughputSubscriptionRegistry()
-        self.current_subs: set[str] = set()
+        self._max_batch_size = max_batch_size
+        self.overload_controller = overload_controller or ThroughputOverloadController()
+        self.sampling_controller = sampling_controller or ThroughputSamplingController(reporting_period)
+        self.notification_controller = notification_controller or ThroughputNotificationController()
+        self.notification_aggregator = notification_aggregator or ThroughputNotificationAggregator(window=0.0)
+        self.prediction_cache = prediction_cache or ThroughputPredictionCache()
+        self._analytics_info_port = analytics_info_port
+        self.throughput_map = throughput_map or ThroughputMap()
+        self._map_fallback = map_fallback
+        # Reporting period of each RAN event exposure subscription, and the last one created for each period
+        self._batch_periods: dict[str, int] = {}
+        self._open_batches: dict[int, str] = {}
+        self.metrics = ThroughputAnlfMetrics(self.subscription_registry, self.overload_controller,
+                                             self.sampling_controller, self.notification_controller,
+                                             self.prediction_cache, self.throughput_map,
+                                             self.notification_aggregator, metrics_registry or REGISTRY)
+        self.model_cache = model_cache or ModelArtifactCache("models/cache")
+        self._model_hash: Optional[str] = None
+        self._model_runner: Optional[ThroughputModelRunner] = None
+        self._model_bundle_dir: Optional[Path] = None
+        # Prediction failures since the last one was logged, which is at most once every PREDICTION_FAILURE_LOG_INTERVAL
+        self._prediction_failures = 0
+        self._prediction_failure_logged_at = -math.inf
+        self._model_provisioning: Optional[asyncio.Task] = None
+        # Event loop and main task of the service, on which the service is stopped
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._main_task: Optional[asyncio.Task] = None
+
+        self.event_exposure_consumer = event_exposure_consumer
+        self.snapshot_store = snapshot_store
+        if self.snapshot_store is not None:
+            restored = self.snapshot_store.load(self.subscription_registry, self.notification_controller)
+            if restored is not None:
+                self._batch_periods, self._open_batches = restored
         logging.info(f"AnLF service '{self._service_name}' is ready")
 
     @override
     def on_ml_model_provision_data(self, notification: MLEventNotif):
         logging.info(f"Received ML Model provision data: {notification.model_dump_json(exclude_unset=True)}")
-        self.initialize_ml_model(notification.m_l_file_addr.m_l_model_url)
+        model_url = notification.m_l_file_addr.m_l_model_url
+        reference = ModelReference.from_url(model_url)
+        if reference is None:
+            # Model available locally
+            self._model_hash = None
+            self._model_runner = None
+            self._model_bundle_dir = None
+            self.initialize_ml_model(model_url)
+            self.throughput_map.clear()
+        elif reference.hash == self._model_hash:
+            logging.info(f"ML Model already loaded: HASH={reference.hash}, VERSION={reference.version}")
+        else:
+            # Downloads must not block the event loop
+            self._model_provisioning = asyncio.create_task(self.provision_ml_model(reference))
+
+    async def provision_ml_model(self, reference: ModelReference):
+        """
+        Loads a model bundle of the MTLF's artifact store, downloading its missing files into the local cache.
+
+        The float32 variant is loaded by the library; optimized variants are run by a `ThroughputModelRunner`, the
+        float32 model of their bundle being the fallback if they fail.
+
+        Args:
+            reference (ModelReference): The reference of the bundle.
+        """
+        try:
+            bundle_dir = await asyncio.to_thread(self.model_cache.resolve, reference)
+            variant = ModelVariant(reference.variant)
+            if variant == ModelVariant.FLOAT32:
+                self.initialize_ml_model(str(bundle_dir))
+                self._model_runner = None
+            else:
+                self._model_runner = await asyncio.to_thread(ThroughputModelRunner, bundle_dir, variant)
+        except Exception as e:
+            logging.error(f"Failed to load ML Model bundle '{reference.hash}': {e}")
+            return
+        self._model_hash = reference.hash
+        self._model_bundle_dir = bundle_dir
+        # The statistics of the map were predicted by the previous model
+        self.throughput_map.clear()
+        logging.info(f"Loaded ML Model: HASH={reference.hash}, VERSION={reference.version}, VARIANT={variant}")
 
     @override
     def on_analytics_subscription_created(self, sub_id: str, sub: NnwdafEventsSubscription):
@@ -73,6 +215,11 @@ class ThroughputAnlfService(AnlfService):
             sub_id (str): The subscription ID.
             sub (NnwdafEventsSubscription): The subscription.
         """
+        # A reporting period requested by the consumer bounds the time between two notifications of a UE
+        if sub.evt_req is not None and sub.evt_req.rep_period is not None:
+            policy = self.notification_controller.default_policy.copy(max_interval=float(sub.evt_req.rep_period))
+            self.notification_controller.set_policy(sub_id, policy)
+
         for event_sub in sub.event_subscriptions:
             if event_sub.event != NwdafEvent.UE_LOC_THROUGHPUT:
                 continue
@@ -81,12 +228,14 @@ class ThroughputAnlfService(AnlfService):
             logging.info(
                 f"Created a new analytics subscription for '{event_sub_dict['event'].value}': SUPIs={event_sub_dict['tgt_ue']['supis']}")
 
-            # Create an FSM for each subscription
+            # Attach the subscription to the pipeline of each UE, creating the missing ones
             for supi in event_sub.tgt_ue.supis:
-                self.subscription_registry.add_subscription(ThroughputSubscriptionData(sub_id, supi),
-                                                            ThroughputSubscriptionFSM())
-
-            self.current_subs.add(sub_id)
+                sub_data = self.subscription_registry.add_consumer(sub_id, supi)
+                if sub_data is None:
+                    self.create_pipeline(supi, {sub_id})
+                else:
+                    logging.info(f"Reusing the existing pipeline for UE '{supi}', now shared by "
+                                 f"{len(sub_data.sub_ids)} subscriptions")
 
     @override
     def on_analytics_subscription_deleted(self, sub_id: str, sub: NnwdafEventsSubscription):
@@ -97,41 +246,180 @@ class ThroughputAnlfService(AnlfService):
             sub_id (str): The subscription ID.
             sub (NnwdafEventsSubscription): The subscription.
         """
+        self.notification_controller.remove_policy(sub_id)
+        self.notification_aggregator.remove(sub_id)
         for event_sub in sub.event_subscriptions:
             if event_sub.event != NwdafEvent.UE_LOC_THROUGHPUT:
                 continue
 
             for supi in event_sub.tgt_ue.supis:
-                self.subscription_registry.mark_for_deletion(sub_id, supi)
-
-    def initialize_subscription(self, sub_id: str, supi: str):
-        # Send GMLC and RAN event exposure subscriptions
-        logging.info(
-            f"Sending a periodic location request to the GMLC for UE '{supi}', CORRELATION_ID={sub_id}")
-        self.send_event_exposure_subscription(NFType.GMLC, EventNotifyDataType.PERIODIC,
-                                              KafkaPayload(resource_id=ControlOperationType.CREATE,
-                                                           resource_data=InputData(supi=supi,
-                                                                                   ldrReference=sub_id,
-                                                                                   externalClientType=ExternalClientType.VALUE_ADDED_SERVICES,
-                                                                                   periodicEventInfo=PeriodicEventInfo(
-                                                                                       reportingAmount=1,
-                                                                                       reportingInterval=10,
-                                                                                       reportingInfiniteInd=True),
-                                                                                   locationTypeRequested=LocationTypeRequested.CURRENT_LOCATION)))
-        logging.info(f"Sending a RSRP info subscription to the RAN for UE '{supi}', CORRELATION_ID={sub_id}")
-        self.send_event_exposure_subscription(NFType.RAN, RanEvent.RSRP_INFO,
-                                              KafkaPayload(resource_id=ControlOperationType.CREATE,
-                                                           resource_data=RanEventSubscription(event=RanEvent.RSRP_INFO,
-                                                                                              correlationId=sub_id,
-                                                                                              notifUri="myUri",
-                                                                                              ueIds=[supi],
-                                                                                              periodicity=10)))
+                self.subscription_registry.remove_consumer(sub_id, supi)
+
+    def create_pipeline(self, supi: str, sub_ids: set[str]):
+        """
+        Creates the data collection and inference pipeline of a UE.
+
+        Args:
+            supi (str): The SUPI of the UE.
+            sub_ids (set[str]): The IDs of the analytics subscriptions consuming the pipeline's predictions.
+        """
+        sub_data = ThroughputSubscriptionData(supi)
+        sub_data.sub_ids.update(sub_ids)
+        self.subscription_registry.add_subscription(sub_data, ThroughputSubscriptionFSM())
+
+    def initialize_subscriptions(self, pending_sub_data: list[ThroughputSubscriptionData]):
+        """
+        Sends the event exposure subscriptions of all the pipelines initialized during a tick, in batches sharing a
+        single correlation ID.
+
+        Args:
+            pending_sub_data (list[ThroughputSubscriptionData]): The pipelines to initialize.
+        """
+        period = self.sampling_controller.default_period
+        for i in range(0, len(pending_sub_data), self._max_batch_size):
+            batch = pending_sub_data[i:i + self._max_batch_size]
+            correlation_id = str(uuid4())
+            supis = [sub_data.supi for sub_data in batch]
+            logging.info(f"Initializing event exposure subscriptions for {len(supis)} UE(s), "
+                         f"CORRELATION_ID={correlation_id}")
+
+            for sub_data in batch:
+                self.subscription_registry.set_correlation_id(sub_data, correlation_id)
+                # GMLC location requests can only target a single UE
+                self.send_gmlc_location_request(sub_data.supi, correlation_id, period, ControlOperationType.CREATE)
+                sub_data.event_exposure_subscribed = True
+                sub_data.reporting_period = period
+            self.send_ran_rsrp_subscription(supis, correlation_id, period, ControlOperationType.CREATE)
+            self._batch_periods[correlation_id] = period
+            self._open_batches[period] = correlation_id
+
+    def terminate_subscriptions(self, pending_sub_data: list[ThroughputSubscriptionData]):
+        """
+        Tears down the event exposure subscriptions of all the pipelines deleted during a tick. A RAN subscription
+        still shared by other pipelines is updated with its remaining UEs instead of being deleted. GMLC location
+        requests are cancelled through the GMLC front of the API Gateway.
+
+        Args:
+            pending_sub_data (list[ThroughputSubscriptionData]): The pipelines to terminate.
+        """
+        batches: dict[str, list[str]] = {}
+        for sub_data in pending_sub_data:
+            if not sub_data.event_exposure_subscribed:
+                continue
+            self.send_gmlc_location_request(sub_data.supi, sub_data.correlation_id, sub_data.reporting_period,
+                                            ControlOperationType.DELETE)
+            sub_data.event_exposure_subscribed = False
+            batches.setdefault(sub_data.correlation_id, []).append(sub_data.supi)
+
+        for correlation_id, supis in batches.items():
+            self.leave_batch(correlation_id, supis)
+
+    def reschedule_subscriptions(self, pending_changes: list[tuple[ThroughputSubscriptionData, int]]):
+        """
+        Moves the pipelines whose reporting period has been changed by the sampling controller to a RAN event exposure
+        subscription with this period. As the GMLC does not support updates, their GMLC location requests are
+        cancelled and created again under the correlation ID of their new batch.
+
+        Args:
+            pending_changes (list[tuple[ThroughputSubscriptionData, int]]): The pipelines and their new period.
+        """
+        leaving: dict[str, list[str]] = {}
+        joining: dict[int, list[ThroughputSubscriptionData]] = {}
+        for sub_data, period in pending_changes:
+            if sub_data.deletion_requested or not sub_data.event_exposure_subscribed:
+                continue
+            self.send_gmlc_location_request(sub_data.supi, sub_data.correlation_id, sub_data.reporting_period,
+                                            ControlOperationType.DELETE)
+            leaving.setdefault(sub_data.correlation_id, []).append(sub_data.supi)
+            joining.setdefault(period, []).append(sub_data)
+
+        for correlation_id, supis in leaving.items():
+            self.leave_batch(correlation_id, supis)
+
+        for period, pending_sub_data in joining.items():
+            logging.info(f"Changing the reporting period of {len(pending_sub_data)} UE(s) to {period}s")
+            # The last batch of this period is filled up before creating new ones
+            correlation_id = self._open_batches.get(period)
+            while pending_sub_data:
+                member_count = len(self.subscription_registry.get_correlation_members(correlation_id))
+                if 0 < member_count < self._max_batch_size:
+                    operation = ControlOperationType.UPDATE
+                else:
+                    correlation_id = str(uuid4())
+                    operation = ControlOperationType.CREATE
+                    member_count = 0
+                room = self._max_batch_size - member_count
+                batch, pending_sub_data = pending_sub_data[:room], pending_sub_data[room:]
+
+                for sub_data in batch:
+                    self.subscription_registry.set_correlation_id(sub_data, correlation_id)
+                    self.send_gmlc_location_request(sub_data.supi, correlation_id, period, ControlOperationType.CREATE)
+                    sub_data.reporting_period = period
+                supis = sorted(self.subscription_registry.get_correlation_members(correlation_id))
+                self.send_ran_rsrp_subscription(supis, correlation_id, period, operation)
+                self._batch_periods[correlation_id] = period
+                self._open_batches[period] = correlation_id
+
+    def leave_batch(self, correlation_id: str, supis: list[str]):
+        """
+        Removes UEs from a RAN event exposure subscription, which is updated with its remaining UEs or deleted if none
+        remain. The pipelines of the UEs must still be bound to the correlation ID.
+
+        Args:
+            correlation_id (str): The correlation ID of the subscription.
+            supis (list[str]): The SUPIs of the leaving UEs.
+        """
+        period = self._batch_periods.get(correlation_id, self.sampling_controller.default_period)
+        remaining_supis = self.subscription_registry.get_correlation_members(correlation_id).difference(supis)
+        if remaining_supis:
+            self.send_ran_rsrp_subscription(sorted(remaining_supis), correlation_id, period,
+                                            ControlOperationType.UPDATE)
+        else:
+            self.send_ran_rsrp_subscription(supis, correlation_id, period, ControlOperationType.DELETE)
+            self._batch_periods.pop(correlation_id, None)
+            if self._open_batches.get(period) == correlation_id:
+                del self._open_batches[period]
+
+    def send_gmlc_location_request(self, supi: str, correlation_id: str, period: int,
+                                   operation: ControlOperationType):
+        logging.debug(
+            f"Sending a periodic location request ({operation.name}) to the GMLC for UE '{supi}', "
+            f"CORRELATION_ID={correlation_id}")
+        with self.metrics.kafka_produce_latency.labels(message_type="gmlc_subscription").time():
+            self.send_event_exposure_subscription(NFType.GMLC, EventNotifyDataType.PERIODIC,
+                                                  KafkaPayload(resource_id=operation,
+                                                               resource_data=InputData(supi=supi,
+                                                                                       ldrReference=correlation_id,
+                                                                                       externalClientType=ExternalClientType.VALUE_ADDED_SERVICES,
+                                                                                       periodicEventInfo=PeriodicEventInfo(
+                                                                                           reportingAmount=1,
+                                                                                           reportingInterval=period,
+                                                                                           reportingInfiniteInd=True),
+                                                                                       locationTypeRequested=LocationTypeRequested.CURRENT_LOCATION)))
+
+    def send_ran_rsrp_subscription(self, supis: list[str], correlation_id: str, period: int,
+                                   operation: ControlOperationType):
+        logging.info(f"Sending a RSRP info subscription ({operation.name}) to the RAN for {len(supis)} UE(s), "
+                     f"CORRELATION_ID={correlation_id}")
+        with self.metrics.kafka_produce_latency.labels(message_type="ran_subscription").time():
+            self.send_event_exposure_subscription(NFType.RAN, RanEvent.RSRP_INFO,
+                                                  KafkaPayload(resource_id=operation,
+                                                               resource_data=RanEventSubscription(event=RanEvent.RSRP_INFO,
+                                                                                                  correlationId=correlation_id,
+                                                                                                  notifUri="myUri",
+                                                                                                  ueIds=supis,
+                                                                                                  periodicity=period)))
 
     @override
     def on_event_exposure_data(self, nf_type: NFType, event_type: Enum, data: BaseModel):
+        if self.event_exposure_consumer is not None:
+            # Not subscribed to with the batched consumer, in case the base service delivers them anyway
+            return
         if isinstance(data, EventNotifyDataExt):
+            self.metrics.record_message_received(nf_type.value, data.timestamp_of_location_estimate)
             self.on_ue_location_received(EventNotifyDataExt.model_validate(data))
         elif isinstance(data, RanEventExposureNotification):
+            self.metrics.record_message_received(nf_type.value, data.time_stamp)
             self.on_ran_rsrp_info_received(RanEventExposureNotification.model_validate(data))
         else:
             logging.warning(
@@ -144,18 +432,13 @@ class ThroughputAnlfService(AnlfService):
         Args:
             ue_location_notification (EventNotifyDataExt): The UE location notification.
         """
-        if ue_location_notification.ldr_reference not in self.current_subs:
+        sub_data = self.subscription_registry.get_subscription_data_by_correlation(
+            ue_location_notification.ldr_reference, ue_location_notification.supi)
+        if sub_data is None:
+            logging.debug(f"Ignoring UE location data for an unknown pipeline: "
+                          f"CORRELATION_ID={ue_location_notification.ldr_reference}")
             return
 
-        notif_dict = ue_location_notification.model_dump(exclude_unset=True)
-        log_message = (f"Received new UE location data from GMLC: SUPI='{notif_dict['supi']}', "
-                       f"Location (Lat, Lon)={notif_dict['location_estimate']['anyof_schema_1_validator']['point']['lat']}, "
-                       f"{notif_dict['location_estimate']['anyof_schema_1_validator']['point']['lon']}, "
-                       f"Speed={notif_dict['velocity_estimate']['anyof_schema_1_validator']['h_speed']:.2f} m/s, "
-                       f"Bearing={notif_dict['velocity_estimate']['anyof_schema_1_validator']['bearing']}°, "
-                       f"CORRELATION_ID={ue_location_notification.ldr_reference}"
-                       )
-        logging.info(log_message)
         location_estimate = ue_location_notification.location_estimate.anyof_schema_1_validator
         velocity_estimate = ue_location_notification.velocity_estimate.anyof_schema_1_validator
 
@@ -164,32 +447,121 @@ class ThroughputAnlfService(AnlfService):
         longitude = location_estimate.point.lon
         moving_speed = velocity_estimate.h_speed
         compass_direction = velocity_estimate.bearing
+        # Per-message logs are formatted by the log writer, only if they are not sampled out
+        logging.info("Received new UE location data from GMLC: SUPI='%s', Location (Lat, Lon)=%s, %s, "
+                     "Speed=%.2f m/s, Bearing=%s°, CORRELATION_ID=%s", ue_location_notification.supi, latitude,
+                     longitude, moving_speed, compass_direction, ue_location_notification.ldr_reference)
+
+        if sub_data.pending_gmlc_data is not None:
+            self.overload_controller.record_coalesced_input()
+        sub_data.pending_gmlc_data = (latitude, longitude, moving_speed, compass_direction)
+        if tracer.enabled and ue_location_notification.timestamp_of_location_estimate is not None:
+            self.trace_input(sub_data, location_trace_context(
+                ue_location_notification.ldr_reference, ue_location_notification.supi,
+                ue_location_notification.timestamp_of_location_estimate.timestamp()), True)
+        self.on_input_received(sub_data)
+
+    def on_ran_rsrp_info_received(self, ran_notification: RanEventExposureNotification):
+        for rsrp_info in ran_notification.rsrp_infos:
+            sub_data = self.subscription_registry.get_subscription_data_by_correlation(
+                ran_notification.correlation_id, rsrp_info.ue_id)
+            if sub_data is None:
+                logging.debug(f"Ignoring RSRP information for an unknown pipeline: UE_ID='{rsrp_info.ue_id}', "
+                              f"CORRELATION_ID={ran_notification.correlation_id}")
+                continue
+
+            # Unreported values are None, they are imputed when predicting
+            logging.info("Received new RSRP information from the RAN: UE_ID='%s', LTE_RSRP=%s dB, "
+                         "NR_SS_RSRP=%s dB, CORRELATION_ID=%s", rsrp_info.ue_id, rsrp_info.lte_rsrp,
+                         rsrp_info.nr_ss_rsrp, ran_notification.correlation_id)
+
+            if sub_data.pending_ran_data is not None:
+                self.overload_controller.record_coalesced_input()
+            sub_data.pending_ran_data = (rsrp_info.lte_rsrp, rsrp_info.nr_ss_rsrp)
+            if tracer.enabled and ran_notification.time_stamp is not None:
+                self.trace_input(sub_data, rsrp_trace_context(ran_notification.correlation_id,
+                                                              ran_notification.time_stamp.timestamp()), False)
+            self.on_input_received(sub_data)
+
+    def on_event_exposure_batch(self, gmlc_batch: GmlcBatch, ran_batch: RanBatch):
+        """
+        Handles a batch of GMLC and RAN notifications in a single pass over the affected pipelines, without per-message
+        logging. Inputs superseded within the batch are coalesced like inputs superseded between two ticks.
 
-        sub_id = ue_location_notification.ldr_reference
-        supi = ue_location_notification.supi
-        sub_data = self.subscription_registry.get_subscription_data(sub_id, supi)
-        if sub_data is not None:
-            sub_data.pending_gmlc_data = (latitude, longitude, moving_speed, compass_direction)
+        Args:
+            gmlc_batch (GmlcBatch): The UE locations of the batch.
+            ran_batch (RanBatch): The RSRP information of the batch.
+        """
+        self.metrics.record_batch_received(NFType.GMLC.value, gmlc_batch.timestamps)
+        self.metrics.record_batch_received(NFType.RAN.value, ran_batch.timestamps)
+        self.metrics.event_exposure_batch_size.observe(len(gmlc_batch.timestamps) + len(ran_batch.timestamps))
+
+        get_sub_data = self.subscription_registry.get_subscription_data_by_correlation
+        coalesced_inputs = 0
+        unknown_inputs = 0
+        for row, (correlation_id, supi, (latitude, longitude, moving_speed, compass_direction)) in enumerate(zip(
+                gmlc_batch.correlation_ids, gmlc_batch.supis, gmlc_batch.features.tolist())):
+            sub_data = get_sub_data(correlation_id, supi)
+            if sub_data is None:
+                unknown_inputs += 1
+                continue
+            if sub_data.pending_gmlc_data is not None:
+                coalesced_inputs += 1
+            sub_data.pending_gmlc_data = (latitude, longitude, moving_speed, int(compass_direction))
+            if gmlc_batch.trace_contexts:
+                self.trace_input(sub_data, gmlc_batch.trace_contexts[row], True)
+            self.on_input_received(sub_data)
+
+        for row, (correlation_id, ue_id, (lte_rsrp, nr_ss_rsrp)) in enumerate(zip(
+                ran_batch.correlation_ids, ran_batch.ue_ids, ran_batch.rsrp.tolist())):
+            sub_data = get_sub_data(correlation_id, ue_id)
+            if sub_data is None:
+                unknown_inputs += 1
+                continue
+            if sub_data.pending_ran_data is not None:
+                coalesced_inputs += 1
+            # Unreported values are NaN in the batch, and None in the pipeline until they are imputed when predicting
+            sub_data.pending_ran_data = (None if math.isnan(lte_rsrp) else lte_rsrp,
+                                         None if math.isnan(nr_ss_rsrp) else nr_ss_rsrp)
+            if ran_batch.trace_contexts:
+                self.trace_input(sub_data, ran_batch.trace_contexts[row], False)
+            self.on_input_received(sub_data)
+
+        if coalesced_inputs:
+            self.overload_controller.record_coalesced_input(coalesced_inputs)
+        logging.debug(f"Handled a batch of event exposure data: GMLC={len(gmlc_batch)}, RAN={len(ran_batch)}, "
+                      f"UNKNOWN={unknown_inputs}, COALESCED={coalesced_inputs}")
+
+    @staticmethod
+    def trace_input(sub_data: ThroughputSubscriptionData, trace_context: Optional[SpanContext], location: bool):
+        """
+        Records the trace of an input of a pipeline, superseding the one of the previous input of the same kind. The
+        trace of the location input is continued by the spans of the pipeline, the RSRP one is linked to them.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE.
+            trace_context (Optional[SpanContext]): The root context of the trace of the input.
+            location (bool): Whether the input is a location (GMLC) rather than RSRP information (RAN).
+        """
+        sampled = trace_context is not None and trace_context.sampled
+        if location:
+            sub_data.trace_context = trace_context if sampled else None
+            sub_data.trace_start = time.time()
         else:
-            logging.error(f"Could not find subscription data for ID '{sub_id}' and SUPI '{supi}'")
+            sub_data.ran_trace_id = trace_context.trace_id if sampled else None
 
-    def on_ran_rsrp_info_received(self, ran_notification: RanEventExposureNotification):
-        if ran_notification.correlation_id not in self.current_subs:
-            return
+    @staticmethod
+    def start_pipeline_span(name: str, sub_data: ThroughputSubscriptionData, **attributes):
+        # Only the pipelines whose location input is traced create spans
+        if sub_data.trace_context is None:
+            return NOOP_SPAN
+        return tracer.start_span(name, parent=sub_data.trace_context, supi=sub_data.supi, **attributes)
 
-        for rsrp_info in ran_notification.rsrp_infos:
-            logging.info(f"Received new RSRP information from the RAN: UE_ID='{rsrp_info.ue_id}', "
-                         f"LTE_RSRP={rsrp_info.lte_rsrp:.2f} dB, "
-                         f"NR_SS_RSRP={rsrp_info.nr_ss_rsrp:.2f} dB, "
-                         f"CORRELATION_ID={ran_notification.correlation_id}")
-
-            sub_id = ran_notification.correlation_id
-            supi = rsrp_info.ue_id
-            sub_data = self.subscription_registry.get_subscription_data(sub_id, supi)
-            if sub_data is not None:
-                sub_data.pending_ran_data = (rsrp_info.lte_rsrp, rsrp_info.nr_ss_rsrp)
-            else:
-                logging.error(f"Could not find subscription data for ID '{sub_id}' and SUPI '{supi}'")
+    @staticmethod
+    def on_input_received(sub_data: ThroughputSubscriptionData):
+        # Superseded inputs are coalesced, the inference lag is measured from the first time all inputs are available
+        if sub_data.inputs_ready_since is None and sub_data.pending_gmlc_data and sub_data.pending_ran_data:
+            sub_data.inputs_ready_since = time.monotonic()
 
     async def ml_model_provision_sub(self):
         while not self._is_ready:
@@ -201,11 +573,124 @@ class ThroughputAnlfService(AnlfService):
         input_data = sub_data.to_input_array()
 
         logging.debug(f"About to perform a prediction with the following inputs: {input_data.flatten()}")
-        prediction = self.perform_ml_model_prediction(input_data, (1, 1, 6))
+        try:
+            with self.metrics.inference_latency.time():
+                if self._model_runner is not None:
+                    prediction = self._model_runner.predict(input_data)
+                else:
+                    prediction = self.perform_ml_model_prediction(input_data, (1, 1, 6))
+        except Exception as e:
+            # The pipeline goes back to waiting for inputs, as when no model is loaded
+            self.record_prediction_failure(sub_data, e)
+            return None
         return None if prediction is None else abs(float(prediction[0, 0]))
 
+    def record_prediction_failure(self, sub_data: ThroughputSubscriptionData, error: Exception):
+        """
+        Handles a prediction that raised. A failing optimized variant is replaced with the float32 model of its bundle,
+        and failures are logged at most once every `PREDICTION_FAILURE_LOG_INTERVAL` seconds, with their count.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline whose prediction failed.
+            error (Exception): The error raised by the model.
+        """
+        self._prediction_failures += 1
+        now = time.monotonic()
+        variant = self._model_runner.variant if self._model_runner is not None else ModelVariant.FLOAT32
+        if now - self._prediction_failure_logged_at >= PREDICTION_FAILURE_LOG_INTERVAL:
+            logging.error("Failed to predict the throughput of %d UE(s), last UE '%s': VARIANT=%s, ERROR=%r",
+                          self._prediction_failures, sub_data.supi, variant, error)
+            self._prediction_failures = 0
+            self._prediction_failure_logged_at = now
+
+        if variant != ModelVariant.FLOAT32 and self._model_bundle_dir is not None:
+            self._model_runner = None
+            try:
+                self.initialize_ml_model(str(self._model_bundle_dir))
+            except Exception as e:
+                logging.error(f"Failed to fall back to the float32 variant of ML Model '{self._model_hash}': {e}")
+                return
+            logging.warning(f"Fell back to the float32 variant of ML Model '{self._model_hash}' after a failure of "
+                            f"the {variant} variant")
+
+    def estimate_from_map(self, sub_data: ThroughputSubscriptionData) -> bool:
+        """
+        Replaces the prediction of a pipeline shed by the overload controller with the mean throughput previously
+        predicted in the same tile of the throughput map. Estimates are notified like predictions, but are neither
+        cached nor added to the map.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The shed pipeline, with its pending inputs.
+
+        Returns:
+            bool: Whether an estimate is available, in which case the pipeline moves on to the notification.
+        """
+        estimate = self.throughput_map.estimate(sub_data)
+        if estimate is None:
+            return False
+        self.throughput_map.fallback_estimates += 1
+        sub_data.pending_throughput_prediction = estimate
+        sub_data.pending_gmlc_data = None
+        sub_data.pending_ran_data = None
+        sub_data.inputs_ready_since = None
+        subscription_fsm = self.subscription_registry.get_fsm(sub_data)
+        subscription_fsm.transition(Transitions.ALL_NOTIFS_RECEIVED)
+        subscription_fsm.transition(Transitions.PREDICTION_DONE)
+        return True
+
+    def create_analytics_info_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server from which the API Gateway queries the prediction cache and the throughput map.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+        app = FastAPI()
+        self.prediction_cache.add_routes(app)
+        self.throughput_map.add_routes(app)
+        return uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning"))
+
+    @staticmethod
+    def end_join_wait(sub_data: ThroughputSubscriptionData, admitted: bool):
+        """
+        Records the time a traced pipeline has waited for its inputs to be joined and admitted by the overload
+        controller, from the reception of its location input.
+        """
+        if sub_data.trace_context is not None:
+            tracer.start_span("anlf.join_wait", parent=sub_data.trace_context, start_time=sub_data.trace_start,
+                              supi=sub_data.supi, admitted=admitted, ranTraceId=sub_data.ran_trace_id).end()
+
+    def send_consolidated_notifications(self, now: float, flush: bool = False):
+        """
+        Sends the consolidated analytics notifications whose window has closed, one per subscription.
+
+        Args:
+            now (float): The current monotonic time.
+            flush (bool): Whether all the pending notifications are sent, regardless of their window.
+        """
+        for sub_id, pending in self.notification_aggregator.pop_due(now, flush):
+            notification = EventNotification(event=NwdafEvent.UE_LOC_THROUGHPUT,
+                                             predictedThroughputInfos=list(pending.infos.values()))
+            with self.metrics.kafka_produce_latency.labels(message_type="analytics").time():
+                self.send_analytics_notification(sub_id, notification)
+            self.metrics.analytics_notification_size.observe(len(pending.infos))
+            # The produce span of a traced pipeline includes the time its prediction has waited for the window
+            for trace_context, queued_at in pending.traces:
+                tracer.start_span("anlf.produce", parent=trace_context, start_time=queued_at, subId=sub_id,
+                                  ues=len(pending.infos)).end()
+
     async def fsm_loop(self, tick_duration: float = 0.3):
         while True:
+            tick_start = time.perf_counter()
+            prediction_count = 0
+            pending_initializations: list[ThroughputSubscriptionData] = []
+            pending_deletions: list[ThroughputSubscriptionData] = []
+            ready_sub_data: list[ThroughputSubscriptionData] = []
+            pending_period_changes: list[tuple[ThroughputSubscriptionData, int]] = []
+
             for sub_data in self.subscription_registry.get_all_subscriptions():
                 subscription_fsm = self.subscription_registry.get_fsm(sub_data)
                 match subscription_fsm.current_state:
@@ -214,14 +699,13 @@ class ThroughputAnlfService(AnlfService):
                         if sub_data.deletion_requested:
                             subscription_fsm.transition(Transitions.DELETION_REQUESTED)
                         else:
-                            self.initialize_subscription(sub_data.sub_id, sub_data.supi)
-                            subscription_fsm.transition(Transitions.INITIALIZATION_DONE)
+                            pending_initializations.append(sub_data)
 
                     case States.WAITING_FOR_GMLC_NOTIF | States.WAITING_FOR_RAN_NOTIF:
                         if sub_data.deletion_requested:
                             subscription_fsm.transition(Transitions.DELETION_REQUESTED)
                         elif sub_data.pending_ran_data and sub_data.pending_gmlc_data:
-                            subscription_fsm.transition(Transitions.ALL_NOTIFS_RECEIVED)
+                            ready_sub_data.append(sub_data)
                         else:
                             subscription_fsm.transition(Transitions.WAITING_FOR_NOTIFS)
                             continue
@@ -230,33 +714,155 @@ class ThroughputAnlfService(AnlfService):
                         if sub_data.deletion_requested:
                             subscription_fsm.transition(Transitions.DELETION_REQUESTED)
                         else:
-                            predicted_throughput = self.predict_throughput(sub_data)
-                            if predicted_throughput is not None:
+                            with self.start_pipeline_span("anlf.inference", sub_data):
+                                predicted_throughput = self.predict_throughput(sub_data)
+                            prediction_count += 1
+                            if predicted_throughput is None:
+                                # The inputs are dropped, the next ones are predicted again
+                                sub_data.trace_context = None
+                                sub_data.pending_gmlc_data = None
+                                sub_data.pending_ran_data = None
+                                sub_data.inputs_ready_since = None
+                                subscription_fsm.transition(Transitions.PREDICTION_FAILED)
+                            else:
                                 sub_data.pending_throughput_prediction = predicted_throughput
+                                self.prediction_cache.record(sub_data.supi, predicted_throughput, time.time())
+                                self.throughput_map.record(sub_data, predicted_throughput)
+                                self.sampling_controller.record_prediction(sub_data, predicted_throughput)
+                                reporting_period = self.sampling_controller.next_period(sub_data)
+                                if reporting_period is not None:
+                                    pending_period_changes.append((sub_data, reporting_period))
                                 sub_data.pending_gmlc_data = None
                                 sub_data.pending_ran_data = None
+                                if sub_data.inputs_ready_since is not None:
+                                    self.overload_controller.record_inference_lag(
+                                        time.monotonic() - sub_data.inputs_ready_since)
+                                    sub_data.inputs_ready_since = None
                                 subscription_fsm.transition(Transitions.PREDICTION_DONE)
 
                     case States.SENDING_ANALYTICS_NOTIF:
                         if sub_data.deletion_requested:
                             subscription_fsm.transition(Transitions.DELETION_REQUESTED)
-                        self.send_analytics_notification(sub_data.sub_id,
-                                                         EventNotification(event=NwdafEvent.UE_LOC_THROUGHPUT,
-                                                                           predictedThroughputInfos=[
-                                                                               PredictedThroughputInfo(
-                                                                                   supi=sub_data.supi,
-                                                                                   throughput=f"{sub_data.pending_throughput_prediction:.2f} Mbps")]))
-                        sub_data.pending_throughput_prediction = None
-                        subscription_fsm.transition(Transitions.ANALYTICS_NOTIF_SENT)
+                        else:
+                            # Fan out the prediction to every subscription consuming this pipeline, unless it has not
+                            # changed enough since the previous notification sent to the subscription. Predictions are
+                            # consolidated into a single notification per subscription, sent at the end of the tick
+                            # once its window has closed
+                            now = time.monotonic()
+                            info = None
+                            for sub_id in sub_data.sub_ids:
+                                if not self.notification_controller.should_notify(
+                                        sub_data, sub_id, sub_data.pending_throughput_prediction, now):
+                                    continue
+                                if info is None:
+                                    info = PredictedThroughputInfo(
+                                        supi=sub_data.supi,
+                                        throughput=f"{sub_data.pending_throughput_prediction:.2f} Mbps")
+                                self.notification_aggregator.add(sub_id, info, now, sub_data.trace_context)
+                            sub_data.trace_context = None
+                            sub_data.pending_throughput_prediction = None
+                            subscription_fsm.transition(Transitions.ANALYTICS_NOTIF_SENT)
 
                     case States.DELETING:
-                        # Delete stuff
-                        self.subscription_registry.remove_subscription(sub_data.sub_id, sub_data.supi)
+                        pending_deletions.append(sub_data)
+
+            # Only admitted pipelines move on to the prediction, the inputs of the others are dropped
+            admitted_sub_data, shed_sub_data = self.overload_controller.admit(ready_sub_data)
+            for sub_data in admitted_sub_data:
+                self.subscription_registry.get_fsm(sub_data).transition(Transitions.ALL_NOTIFS_RECEIVED)
+                self.end_join_wait(sub_data, admitted=True)
+            for sub_data in shed_sub_data:
+                self.end_join_wait(sub_data, admitted=False)
+                if self._map_fallback and self.estimate_from_map(sub_data):
+                    continue
+                sub_data.trace_context = None
+                sub_data.pending_gmlc_data = None
+                sub_data.pending_ran_data = None
+                sub_data.inputs_ready_since = None
+                self.subscription_registry.get_fsm(sub_data).transition(Transitions.WAITING_FOR_NOTIFS)
+
+            # Event exposure subscriptions are grouped per tick
+            if pending_initializations:
+                self.initialize_subscriptions(pending_initializations)
+                for sub_data in pending_initializations:
+                    self.subscription_registry.get_fsm(sub_data).transition(Transitions.INITIALIZATION_DONE)
+
+            if pending_deletions:
+                self.terminate_subscriptions(pending_deletions)
+                for sub_data in pending_deletions:
+                    self.subscription_registry.remove_subscription(sub_data.supi)
+                    self.prediction_cache.remove(sub_data.supi)
+                    if sub_data.sub_ids:
+                        # Consumers attached while the pipeline was being torn down, start over
+                        self.create_pipeline(sub_data.supi, sub_data.sub_ids)
+
+            if pending_period_changes:
+                self.reschedule_subscriptions(pending_period_changes)
+
+            self.send_consolidated_notifications(time.monotonic())
+
+            if prediction_count:
+                self.metrics.inference_batch_size.observe(prediction_count)
+            self.metrics.tick_duration.observe(time.perf_counter() - tick_start)
 
             await asyncio.sleep(tick_duration)
 
+    async def snapshot_loop(self):
+        """
+        Periodically saves a snapshot of the pipelines. The snapshot is encoded in the event loop, between two ticks,
+        and written in a worker thread.
+        """
+        while True:
+            await asyncio.sleep(self.snapshot_store.interval)
+            try:
+                snapshot = self.snapshot_store.encode(self.subscription_registry, self._batch_periods,
+                                                      self._open_batches, self.notification_controller.policies)
+                await asyncio.to_thread(self.snapshot_store.write, snapshot)
+            except Exception as e:
+                logging.error(f"Failed to save a snapshot: {e}")
+
     @override
     async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
         self._tasks.append(asyncio.create_task(self.fsm_loop()))
         self._tasks.append(asyncio.create_task(self.ml_model_provision_sub()))
+        if self._analytics_info_port:
+            server = self.create_analytics_info_server(self._analytics_info_port)
+            self._tasks.append(asyncio.create_task(server.serve()))
+        if self.snapshot_store is not None:
+            self._tasks.append(asyncio.create_task(self.snapshot_loop()))
+        if self.event_exposure_consumer is not None:
+            self._tasks.append(asyncio.create_task(self.event_exposure_consumer.run(self.on_event_exposure_batch)))
         await super().start()
+
+    def request_stop(self):
+        """
+        Stops the service, from a signal handler. The service is stopped from the event loop, once the interrupted step
+        of the pipelines has completed, so that the final snapshot is consistent, and `run()` then ends with the
+        cancellation of the main task.
+        """
+        if self._loop is None or not self._loop.is_running():
+            self.stop()
+            sys.exit(0)
+        self._loop.call_soon_threadsafe(self._stop_and_cancel)
+
+    def _stop_and_cancel(self):
+        self.stop()
+        if self._main_task is not None:
+            self._main_task.cancel()
+
+    @override
+    def stop(self):
+        try:
+            self.send_consolidated_notifications(time.monotonic(), flush=True)
+        except Exception as e:
+            logging.error(f"Failed to send the pending analytics notifications: {e}")
+        # Resume from the latest state after a restart, without sending the event exposure subscriptions again
+        if self.snapshot_store is not None:
+            try:
+                self.snapshot_store.save(self.subscription_registry, self._batch_periods, self._open_batches,
+                                         self.notification_controller.policies)
+            except Exception as e:
+                logging.error(f"Failed to save a snapshot: {e}")
+        super().stop()
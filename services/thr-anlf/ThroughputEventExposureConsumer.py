@@ -0,0 +1,258 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+from confluent_kafka import Consumer, TopicPartition
+from nwdaf_api.models import NFType, EventNotifyDataType, RanEvent
+
+from common.tracing import SpanContext, location_trace_context, rsrp_trace_context, tracer
+
+GMLC_TOPIC = f"Data.EventExposureDelivery.{NFType.GMLC.value}.{EventNotifyDataType.PERIODIC.value}"
+RAN_TOPIC = f"Data.EventExposureDelivery.{NFType.RAN.value}.{RanEvent.RSRP_INFO.value}"
+
+
+def _field(data: dict, name: str, alias: str):
+    # Notification bodies are serialized either with the field names or with the aliases of the models
+    value = data.get(name)
+    return data.get(alias) if value is None else value
+
+
+def _unwrap(data: dict) -> dict:
+    # Unwraps the anyOf containers (GeographicArea, VelocityEstimate) serialized with their field name
+    return data.get("anyof_schema_1_validator") or data
+
+
+def _timestamp(value: Optional[str]) -> float:
+    return math.nan if value is None else datetime.fromisoformat(value).timestamp()
+
+
+def _rsrp(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+class GmlcBatch:
+    """
+    UE locations of a batch of GMLC notifications, one row per notification.
+
+    Attributes:
+        correlation_ids (list[str]): The LDR reference of each notification.
+        supis (list[str]): The SUPI of each notification.
+        features (np.ndarray): The latitude, longitude, speed and bearing of each notification.
+        timestamps (np.ndarray): The POSIX timestamp of each location estimate, NaN if unknown.
+        trace_contexts (list[Optional[SpanContext]]): The trace context of each notification, only filled when
+            tracing is enabled.
+    """
+
+    def __init__(self, size: int):
+        self.correlation_ids: list[str] = []
+        self.supis: list[str] = []
+        self.features = np.empty((size, 4), dtype=np.float64)
+        self.timestamps = np.empty(size, dtype=np.float64)
+        self.trace_contexts: list[Optional[SpanContext]] = []
+
+    def __len__(self) -> int:
+        return len(self.supis)
+
+    def append(self, notification: dict, trace_context: Optional[SpanContext] = None):
+        """
+        Decodes a GMLC notification into the next row of the batch.
+
+        Args:
+            notification (dict): The body of the notification.
+            trace_context (Optional[SpanContext]): The trace context propagated in the headers of the message, derived
+                from the notification if None.
+
+        Raises:
+            KeyError, TypeError, ValueError: If the notification is invalid.
+        """
+        correlation_id = _field(notification, "ldr_reference", "ldrReference")
+        supi = notification["supi"]
+        location = _unwrap(_field(notification, "location_estimate", "locationEstimate"))["point"]
+        velocity = _unwrap(_field(notification, "velocity_estimate", "velocityEstimate"))
+        # The row is only counted once the whole notification has been decoded
+        row = len(self.supis)
+        self.features[row] = (location["lat"], location["lon"], _field(velocity, "h_speed", "hSpeed"),
+                              velocity["bearing"])
+        self.timestamps[row] = _timestamp(_field(notification, "timestamp_of_location_estimate",
+                                                 "timestampOfLocationEstimate"))
+        self.correlation_ids.append(correlation_id)
+        self.supis.append(supi)
+        if tracer.enabled:
+            self.trace_contexts.append(trace_context or location_trace_context(correlation_id, supi,
+                                                                               self.timestamps[row]))
+
+    def trim(self):
+        # Drops the rows preallocated for the messages of the batch that are not GMLC notifications
+        self.features = self.features[:len(self.supis)]
+        self.timestamps = self.timestamps[:len(self.supis)]
+
+
+class RanBatch:
+    """
+    RSRP information of a batch of RAN notifications, one row per UE of each notification.
+
+    Attributes:
+        correlation_ids (list[str]): The correlation ID of the notification of each row.
+        ue_ids (list[str]): The UE of each row.
+        rsrp (np.ndarray): The LTE RSRP and NR SS-RSRP of each row, NaN if not reported.
+        timestamps (np.ndarray): The POSIX timestamp of each notification, NaN if unknown.
+        trace_contexts (list[Optional[SpanContext]]): The trace context of the notification of each row, only
+            filled when tracing is enabled.
+    """
+
+    def __init__(self, size: int):
+        self.correlation_ids: list[str] = []
+        self.ue_ids: list[str] = []
+        self._rsrp: list[tuple[float, float]] = []
+        self.timestamps = np.empty(size, dtype=np.float64)
+        self.trace_contexts: list[Optional[SpanContext]] = []
+        self.notifications = 0
+
+    def __len__(self) -> int:
+        return len(self.ue_ids)
+
+    @property
+    def rsrp(self) -> np.ndarray:
+        return np.array(self._rsrp, dtype=np.float64).reshape(-1, 2)
+
+    def append(self, notification: dict, trace_context: Optional[SpanContext] = None):
+        """
+        Decodes the RSRP information of all the UEs of a RAN notification into the next rows of the batch.
+
+        Args:
+            notification (dict): The body of the notification.
+            trace_context (Optional[SpanContext]): The trace context propagated in the headers of the message, derived
+                from the notification if None.
+
+        Raises:
+            KeyError, TypeError, ValueError: If the notification is invalid.
+        """
+        correlation_id = _field(notification, "correlation_id", "correlationId")
+        rsrp_infos = _field(notification, "rsrp_infos", "rsrpInfos") or []
+        # The notification is decoded entirely before being added, so that an invalid one leaves the batch unchanged
+        rows = [(_field(info, "ue_id", "ueId"),
+                 (_rsrp(_field(info, "lte_rsrp", "lteRsrp")), _rsrp(_field(info, "nr_ss_rsrp", "nrSsRsrp"))))
+                for info in rsrp_infos]
+        self.timestamps[self.notifications] = _timestamp(_field(notification, "time_stamp", "timeStamp"))
+        if tracer.enabled:
+            trace_context = trace_context or rsrp_trace_context(correlation_id, self.timestamps[self.notifications])
+            self.trace_contexts.extend([trace_context] * len(rows))
+        for ue_id, rsrp in rows:
+            self.correlation_ids.append(correlation_id)
+            self.ue_ids.append(ue_id)
+            self._rsrp.append(rsrp)
+        self.notifications += 1
+
+    def trim(self):
+        self.timestamps = self.timestamps[:self.notifications]
+
+
+class ThroughputEventExposureConsumer:
+    """
+    Batched consumer of the GMLC location and RAN RSRP notifications.
+
+    Up to `batch_size` messages are consumed at once, or less if `batch_timeout` elapses first. The notifications are
+    decoded straight from their JSON bodies into arrays, without building the API models, and the whole batch is
+    dispatched to a single handler. Offsets are committed once the batch has been handled, so that a restarted AnLF
+    resumes after the last handled batch.
+    """
+
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, batch_size: int = 500,
+                 batch_timeout: float = 0.05):
+        """
+        Initializes the consumer.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            batch_size (int): The maximum number of messages of a batch.
+            batch_timeout (float): The maximum time (in seconds) waited for a batch to be filled.
+        """
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self._consumer = Consumer({"bootstrap.servers": kafka_bootstrap_server,
+                                   "group.id": f"{service_name}-event-exposure",
+                                   "auto.offset.reset": "latest",
+                                   "enable.auto.commit": False})
+
+    async def run(self, on_batch: Callable[[GmlcBatch, RanBatch], None]):
+        """
+        Consumes the notifications until cancelled.
+
+        Args:
+            on_batch (Callable[[GmlcBatch, RanBatch], None]): The handler of each batch, called from the event loop.
+        """
+        self._consumer.subscribe([GMLC_TOPIC, RAN_TOPIC])
+        try:
+            while True:
+                messages = await asyncio.to_thread(self._consumer.consume, self.batch_size, self.batch_timeout)
+                if not messages:
+                    continue
+
+                gmlc_batch, ran_batch = self.decode(messages)
+                try:
+                    on_batch(gmlc_batch, ran_batch)
+                except Exception as e:
+                    logging.error(f"Failed to handle a batch of event exposure data: SIZE={len(messages)}, ERROR={e}")
+                offsets = self.next_offsets(messages)
+                if offsets:
+                    self._consumer.commit(offsets=offsets, asynchronous=True)
+        finally:
+            self._consumer.close()
+
+    @staticmethod
+    def next_offsets(messages: list) -> list[TopicPartition]:
+        """
+        Returns the offsets to commit after a batch: the one following its last message, for each partition.
+        """
+        offsets = {}
+        for message in messages:
+            if not message.error():
+                offsets[(message.topic(), message.partition())] = message.offset() + 1
+        return [TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()]
+
+    @staticmethod
+    def decode(messages: list) -> tuple[GmlcBatch, RanBatch]:
+        """
+        Decodes a batch of messages, skipping the invalid ones.
+
+        Args:
+            messages (list): The consumed Kafka messages.
+
+        Returns:
+            tuple[GmlcBatch, RanBatch]: The GMLC and RAN notifications of the batch.
+        """
+        gmlc_batch = GmlcBatch(len(messages))
+        ran_batch = RanBatch(len(messages))
+        for message in messages:
+            if message.error():
+                logging.error(f"Event exposure consumer error: {message.error()}")
+                continue
+            try:
+                notification = json.loads(message.value())
+                # A trace context propagated by the API Gateway takes precedence over the derived one
+                trace_context = SpanContext.from_kafka_headers(message.headers()) if tracer.enabled else None
+                if message.topic() == GMLC_TOPIC:
+                    gmlc_batch.append(notification, trace_context)
+                else:
+                    ran_batch.append(notification, trace_context)
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(f"Ignoring an invalid event exposure message: TOPIC={message.topic()}, ERROR={e!r}")
+        gmlc_batch.trim()
+        ran_batch.trim()
+        return gmlc_batch, ran_batch
@@ -0,0 +1,230 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+METERS_PER_DEGREE = 111_320.0
+
+
+class TileStatistics:
+    """
+    Running statistics (Welford) of the predictions of a tile, or of a context (RSRP band, heading bucket) of a tile.
+    """
+
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = 0.0
+        self._m2: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class ThroughputTile:
+    """
+    A cell of the throughput map, with the statistics of all its predictions and of each of their contexts.
+    """
+
+    def __init__(self):
+        self.total = TileStatistics()
+        self.contexts: dict[tuple[int, int], TileStatistics] = {}
+
+
+class ThroughputMap:
+    """
+    Grid of the predicted throughput statistics, incrementally updated from the predictions of the AnLF.
+
+    The map is split in square tiles of `cell_size` meters, indexed by their row and column, and the statistics of
+    each tile are further split by RSRP band and heading bucket. Lookups are O(1), and at most `max_tiles` tiles are
+    kept, the least recently updated one being evicted.
+    """
+
+    def __init__(self, cell_size: float = 20.0, max_tiles: int = 10000, rsrp_band: float = 10.0,
+                 heading_buckets: int = 8, min_samples: int = 3):
+        """
+        Initializes the map.
+
+        Args:
+            cell_size (float): The size (in meters) of a tile.
+            max_tiles (int): The maximum number of tiles.
+            rsrp_band (float): The width (in dB) of an RSRP band.
+            heading_buckets (int): The number of heading buckets.
+            min_samples (int): The number of predictions from which the statistics of a tile or context are used as
+                an estimate.
+        """
+        self.cell_size = cell_size
+        self.max_tiles = max_tiles
+        self.rsrp_band = rsrp_band
+        self.heading_buckets = heading_buckets
+        self.min_samples = min_samples
+        self._lat_step = cell_size / METERS_PER_DEGREE
+        self._tiles: OrderedDict[tuple[int, int], ThroughputTile] = OrderedDict()
+
+        self.evictions: int = 0
+        self.fallback_estimates: int = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def clear(self):
+        self._tiles.clear()
+
+    def tile_index(self, latitude: float, longitude: float) -> tuple[int, int]:
+        row = math.floor(latitude / self._lat_step)
+        # The width of the columns (in degrees) is set per row, so that tiles are about square at any latitude
+        lon_step = self._lat_step / max(math.cos(math.radians((row + 0.5) * self._lat_step)), 1e-6)
+        return row, math.floor(longitude / lon_step)
+
+    def tile_bounds(self, row: int, column: int) -> tuple[float, float, float, float]:
+        lon_step = self._lat_step / max(math.cos(math.radians((row + 0.5) * self._lat_step)), 1e-6)
+        return row * self._lat_step, column * lon_step, (row + 1) * self._lat_step, (column + 1) * lon_step
+
+    def context(self, rsrp: float, bearing: float) -> tuple[int, int]:
+        return math.floor(rsrp / self.rsrp_band), int(bearing % 360.0 * self.heading_buckets / 360.0)
+
+    @staticmethod
+    def inputs(sub_data: ThroughputSubscriptionData) -> tuple[float, float, float, float]:
+        """
+        Returns the latitude, longitude, RSRP and bearing of the pending inputs of a pipeline, the NR RSRP being used
+        when available, then the LTE RSRP, then the imputed NR RSRP.
+        """
+        latitude, longitude, _, bearing = sub_data.pending_gmlc_data
+        lte_rsrp, nr_ss_rsrp = sub_data.pending_ran_data
+        if nr_ss_rsrp is not None:
+            return latitude, longitude, nr_ss_rsrp, bearing
+        return latitude, longitude, lte_rsrp if lte_rsrp is not None else sub_data.rsrp_inputs()[1], bearing
+
+    def record(self, sub_data: ThroughputSubscriptionData, prediction: float):
+        """
+        Adds a prediction to the statistics of the tile of its inputs.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE, whose inputs have not been cleared yet.
+            prediction (float): The predicted throughput.
+        """
+        latitude, longitude, rsrp, bearing = self.inputs(sub_data)
+        index = self.tile_index(latitude, longitude)
+        tile = self._tiles.get(index)
+        if tile is None:
+            if len(self._tiles) >= self.max_tiles:
+                self._tiles.popitem(last=False)
+                self.evictions += 1
+            tile = self._tiles[index] = ThroughputTile()
+        else:
+            self._tiles.move_to_end(index)
+
+        tile.total.add(prediction)
+        context = self.context(rsrp, bearing)
+        statistics = tile.contexts.get(context)
+        if statistics is None:
+            statistics = tile.contexts[context] = TileStatistics()
+        statistics.add(prediction)
+
+    def estimate(self, sub_data: ThroughputSubscriptionData) -> Optional[float]:
+        """
+        Estimates the throughput of a UE from the predictions previously performed in the same tile, in the same
+        context if enough of them are available.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE, with its pending inputs.
+
+        Returns:
+            Optional[float]: The estimated throughput, or None if the tile has not enough predictions.
+        """
+        latitude, longitude, rsrp, bearing = self.inputs(sub_data)
+        tile = self._tiles.get(self.tile_index(latitude, longitude))
+        if tile is None:
+            return None
+        statistics = tile.contexts.get(self.context(rsrp, bearing))
+        if statistics is not None and statistics.count >= self.min_samples:
+            return statistics.mean
+        if tile.total.count >= self.min_samples:
+            return tile.total.mean
+        return None
+
+    def area(self, min_latitude: float, min_longitude: float, max_latitude: float,
+             max_longitude: float) -> list[dict]:
+        """
+        Returns the statistics of the tiles of an area.
+
+        The tiles of the area are looked up one by one, unless the area has more tiles than the map, in which case the
+        tiles of the map are filtered instead.
+        """
+        min_row, _ = self.tile_index(min_latitude, min_longitude)
+        max_row, _ = self.tile_index(max_latitude, max_longitude)
+
+        def columns(row: int) -> tuple[int, int]:
+            center_latitude = (row + 0.5) * self._lat_step
+            return (self.tile_index(center_latitude, min_longitude)[1],
+                    self.tile_index(center_latitude, max_longitude)[1])
+
+        rows = [] if max_row - min_row >= len(self._tiles) else \
+            [(row, *columns(row)) for row in range(min_row, max_row + 1)]
+        if not rows or sum(max_column - min_column + 1 for _, min_column, max_column in rows) > len(self._tiles):
+            selected = [(row, column) for row, column in self._tiles
+                        if min_row <= row <= max_row and columns(row)[0] <= column <= columns(row)[1]]
+        else:
+            selected = [(row, column) for row, min_column, max_column in rows
+                        for column in range(min_column, max_column + 1) if (row, column) in self._tiles]
+        return [self._tile_info(index) for index in selected]
+
+    def _tile_info(self, index: tuple[int, int]) -> dict:
+        tile = self._tiles[index]
+        min_latitude, min_longitude, max_latitude, max_longitude = self.tile_bounds(*index)
+        return {"area": {"minLat": min_latitude, "minLon": min_longitude, "maxLat": max_latitude,
+                         "maxLon": max_longitude},
+                "samples": tile.total.count,
+                "throughput": f"{tile.total.mean:.2f} Mbps",
+                "throughputStd": f"{tile.total.std:.2f} Mbps",
+                "contexts": [{"rsrpBand": [band * self.rsrp_band, (band + 1) * self.rsrp_band],
+                              "headingBucket": [bucket * 360.0 / self.heading_buckets,
+                                                (bucket + 1) * 360.0 / self.heading_buckets],
+                              "samples": statistics.count,
+                              "throughput": f"{statistics.mean:.2f} Mbps"}
+                             for (band, bucket), statistics in tile.contexts.items()]}
+
+    def add_routes(self, app: FastAPI, max_area_tiles: int = 10000):
+        """
+        Adds the route of the area-level queries to the analytics info server of the AnLF:
+
+        * `GET /throughput-map?area=minLat,minLon,maxLat,maxLon`: The statistics of the tiles of an area.
+
+        Args:
+            app (FastAPI): The application of the server.
+            max_area_tiles (int): The maximum number of tiles of an answer.
+        """
+
+        @app.get("/throughput-map")
+        async def get_throughput_map(area: str):
+            try:
+                min_latitude, min_longitude, max_latitude, max_longitude = (float(value) for value in area.split(","))
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid area '{area}'")
+            if min_latitude > max_latitude or min_longitude > max_longitude:
+                raise HTTPException(status_code=400, detail=f"Invalid area '{area}'")
+
+            tiles = self.area(min_latitude, min_longitude, max_latitude, max_longitude)
+            if len(tiles) > max_area_tiles:
+                raise HTTPException(status_code=400, detail=f"The area has more than {max_area_tiles} tiles")
+            return {"cellSize": self.cell_size, "throughputMap": tiles}
@@ -0,0 +1,105 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import time
+from typing import Optional
+
+from nwdaf_api.models import PredictedThroughputInfo
+
+from common.tracing import SpanContext
+
+
+class PendingNotification:
+    """
+    Predictions waiting to be notified to an analytics subscription, in a single notification.
+    """
+
+    def __init__(self, opened: float):
+        self.opened: float = opened
+        # Latest prediction of each UE, a newer one superseding the previous one within the window
+        self.infos: dict[str, PredictedThroughputInfo] = {}
+        # Traced pipelines, with the POSIX time at which their prediction has been added
+        self.traces: list[tuple[SpanContext, float]] = []
+
+
+class ThroughputNotificationAggregator:
+    """
+    Consolidates the predictions notified to each analytics subscription.
+
+    The first prediction notified to a subscription opens a window of `window` seconds, during which the next ones are
+    added to the same notification. The notification is sent when the window closes, or as soon as it carries
+    `max_ues` UEs, the next predictions opening a new one, so that no notification carries more UEs. With a window of
+    0, the predictions of a tick of the FSM loop are sent in a single notification (or more, if it has too many UEs).
+    """
+
+    def __init__(self, window: float = 1.0, max_ues: int = 1000):
+        """
+        Initializes the aggregator.
+
+        Args:
+            window (float): The time (in seconds) during which the predictions notified to a subscription are
+                consolidated.
+            max_ues (int): The maximum number of UEs of a notification.
+        """
+        self.window = window
+        self.max_ues = max_ues
+        self._pending: dict[str, PendingNotification] = {}
+        # Notifications closed because they reached max_ues, in order
+        self._full: list[tuple[str, PendingNotification]] = []
+
+        self.consolidated_predictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._full)
+
+    def add(self, sub_id: str, info: PredictedThroughputInfo, now: float,
+            trace_context: Optional[SpanContext] = None):
+        """
+        Adds a prediction to the pending notification of a subscription, closing it if it reaches `max_ues` UEs.
+
+        Args:
+            sub_id (str): The ID of the analytics subscription.
+            info (PredictedThroughputInfo): The prediction.
+            now (float): The current monotonic time.
+            trace_context (Optional[SpanContext]): The trace of the pipeline of the prediction, if traced.
+        """
+        pending = self._pending.get(sub_id)
+        if pending is None:
+            pending = self._pending[sub_id] = PendingNotification(now)
+        if info.supi in pending.infos:
+            self.consolidated_predictions += 1
+        pending.infos[info.supi] = info
+        if trace_context is not None:
+            pending.traces.append((trace_context, time.time()))
+        if len(pending.infos) >= self.max_ues:
+            self._full.append((sub_id, self._pending.pop(sub_id)))
+
+    def remove(self, sub_id: str):
+        self._pending.pop(sub_id, None)
+        if self._full:
+            self._full = [(full_sub_id, pending) for full_sub_id, pending in self._full if full_sub_id != sub_id]
+
+    def pop_due(self, now: float, flush: bool = False) -> list[tuple[str, PendingNotification]]:
+        """
+        Removes the notifications which are full, and the pending ones whose window has closed.
+
+        Args:
+            now (float): The current monotonic time.
+            flush (bool): Whether all the pending notifications are removed, e.g., at shutdown.
+
+        Returns:
+            list[tuple[str, PendingNotification]]: The notifications to send, with the ID of their subscription.
+        """
+        due, self._full = self._full, []
+        for sub_id in [sub_id for sub_id, pending in self._pending.items()
+                       if flush or now - pending.opened >= self.window]:
+            due.append((sub_id, self._pending.pop(sub_id)))
+        return due
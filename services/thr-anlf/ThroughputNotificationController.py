@@ -0,0 +1,150 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+from collections import Counter
+from enum import StrEnum
+from typing import Optional
+
+from ThroughputSubscriptionData import ThroughputSubscriptionData, NotificationState
+
+
+class SuppressionReason(StrEnum):
+    """
+    Enumeration of the reasons why an analytics notification is suppressed.
+
+    Attributes:
+        MIN_INTERVAL: The previous notification has been sent less than the minimum interval ago.
+        BELOW_THRESHOLD: The prediction has not changed enough since the previous notification.
+    """
+    MIN_INTERVAL = "MIN_INTERVAL",
+    BELOW_THRESHOLD = "BELOW_THRESHOLD"
+
+
+class NotificationPolicy:
+    """
+    Suppression policy of the analytics notifications of a subscription.
+
+    A prediction is notified when it differs from the last notified one by at least `min_absolute_change` and by at
+    least `min_relative_change` of the last notified value. A change in the opposite direction of the last notified
+    one must be `1 + hysteresis` times larger, so that predictions oscillating around a value are not all notified.
+    """
+
+    def __init__(self, min_relative_change: float = 0.05, min_absolute_change: float = 0.1, min_interval: float = 0.0,
+                 max_interval: Optional[float] = 60.0, hysteresis: float = 0.5):
+        """
+        Initializes the policy.
+
+        Args:
+            min_relative_change (float): The minimum change, relative to the last notified prediction.
+            min_absolute_change (float): The minimum change (in Mbps).
+            min_interval (float): The minimum time (in seconds) between two notifications of a UE.
+            max_interval (Optional[float]): The time (in seconds) after which a prediction is notified even if it has
+                not changed. Unchanged predictions are never notified if None.
+            hysteresis (float): The additional fraction of the minimum change required when the direction of the change
+                reverses.
+        """
+        self.min_relative_change = min_relative_change
+        self.min_absolute_change = min_absolute_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.hysteresis = hysteresis
+
+    def copy(self, **overrides) -> "NotificationPolicy":
+        return NotificationPolicy(**{**vars(self), **overrides})
+
+
+class ThroughputNotificationController:
+    """
+    Suppresses the analytics notifications whose prediction has not changed enough since the previous notification
+    sent to the same subscription, for the same UE.
+
+    Each analytics subscription has its own policy, the default one being used unless the subscription requests a
+    reporting period, which is then used as maximum interval.
+    """
+
+    def __init__(self, default_policy: Optional[NotificationPolicy] = None):
+        """
+        Initializes the controller.
+
+        Args:
+            default_policy (Optional[NotificationPolicy]): The policy of the subscriptions without specific one. A
+                policy with default thresholds is used if not provided.
+        """
+        self.default_policy = default_policy or NotificationPolicy()
+        self._policies: dict[str, NotificationPolicy] = {}
+
+        self.sent_notifications: int = 0
+        self.suppressed_notifications: Counter = Counter()
+
+    @property
+    def policies(self) -> dict[str, NotificationPolicy]:
+        """
+        The policies of the subscriptions with a specific one, by subscription ID.
+        """
+        return self._policies
+
+    def set_policy(self, sub_id: str, policy: NotificationPolicy):
+        self._policies[sub_id] = policy
+
+    def remove_policy(self, sub_id: str):
+        self._policies.pop(sub_id, None)
+
+    def get_policy(self, sub_id: str) -> NotificationPolicy:
+        return self._policies.get(sub_id, self.default_policy)
+
+    def should_notify(self, sub_data: ThroughputSubscriptionData, sub_id: str, prediction: float, now: float) -> bool:
+        """
+        Decides whether a prediction must be notified to a subscription, and records it as notified if so.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE.
+            sub_id (str): The ID of the analytics subscription.
+            prediction (float): The predicted throughput.
+            now (float): The current monotonic time.
+
+        Returns:
+            bool: Whether the notification must be sent.
+        """
+        state = sub_data.notification_states.get(sub_id)
+        if state is None:
+            sub_data.notification_states[sub_id] = NotificationState(prediction, now)
+            self.sent_notifications += 1
+            return True
+
+        reason = self._suppression_reason(self.get_policy(sub_id), state, prediction, now)
+        if reason is not None:
+            self.suppressed_notifications[reason] += 1
+            return False
+
+        change = prediction - state.value
+        if change:
+            state.direction = 1 if change > 0 else -1
+        state.value = prediction
+        state.time = now
+        self.sent_notifications += 1
+        return True
+
+    @staticmethod
+    def _suppression_reason(policy: NotificationPolicy, state: NotificationState, prediction: float,
+                            now: float) -> Optional[SuppressionReason]:
+        elapsed = now - state.time
+        if elapsed < policy.min_interval:
+            return SuppressionReason.MIN_INTERVAL
+        if policy.max_interval is not None and elapsed >= policy.max_interval:
+            return None
+
+        change = prediction - state.value
+        threshold = max(policy.min_absolute_change, policy.min_relative_change * abs(state.value))
+        if state.direction * change < 0:
+            threshold *= 1.0 + policy.hysteresis
+        if change == 0 or abs(change) < threshold:
+            return SuppressionReason.BELOW_THRESHOLD
+        return None
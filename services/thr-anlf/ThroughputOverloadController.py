@@ -0,0 +1,148 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+from enum import StrEnum
+
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+
+class HealthStatus(StrEnum):
+    """
+    Enumeration of the health statuses reported by the overload controller.
+
+    Attributes:
+        HEALTHY: Every pipeline with complete inputs is predicted, within the per-tick budget.
+        DEGRADED: Low-priority pipelines are downsampled.
+        OVERLOADED: Low-priority pipelines are downsampled, and the per-tick budget is halved.
+    """
+    HEALTHY = "HEALTHY",
+    DEGRADED = "DEGRADED",
+    OVERLOADED = "OVERLOADED"
+
+
+class ThroughputOverloadController:
+    """
+    Bounds the amount of work performed by the AnLF at each tick of its FSM loop.
+
+    The controller tracks the inference lag (time between the reception of the complete inputs of a pipeline and the
+    corresponding prediction) and the number of pipelines waiting for a prediction. Past
+    the configured thresholds, low-priority pipelines are downsampled then shed, their inputs being dropped. The
+    priority of a pipeline is the number of analytics subscriptions consuming it.
+    """
+
+    def __init__(self, max_inference_lag: float = 2.0, max_pending_predictions: int = 1000,
+                 max_predictions_per_tick: int = 500, downsampling_factor: int = 4, lag_smoothing: float = 0.2):
+        """
+        Initializes the controller.
+
+        Args:
+            max_inference_lag (float): The inference lag (in seconds) above which the AnLF is overloaded. It is
+                degraded above half of this value.
+            max_pending_predictions (int): The number of pipelines waiting for a prediction above which the AnLF is
+                overloaded. It is degraded above half of this value.
+            max_predictions_per_tick (int): The maximum number of predictions admitted at each tick. Pipelines beyond
+                this budget are shed, the lowest-priority ones first.
+            downsampling_factor (int): When degraded, low-priority pipelines are only predicted once every
+                `downsampling_factor` cycles.
+            lag_smoothing (float): The smoothing factor of the inference lag's exponential moving average.
+        """
+        self.max_inference_lag = max_inference_lag
+        self.max_pending_predictions = max_pending_predictions
+        self.max_predictions_per_tick = max_predictions_per_tick
+        self.downsampling_factor = downsampling_factor
+        self._lag_smoothing = lag_smoothing
+
+        self.health: HealthStatus = HealthStatus.HEALTHY
+        self.inference_lag: float = 0.0
+        self.pending_predictions: int = 0
+        self.coalesced_inputs: int = 0
+        self.shed_predictions: int = 0
+        self.downsampled_predictions: int = 0
+
+    def record_coalesced_input(self, count: int = 1):
+        """
+        Records that inputs have been superseded by newer ones before being used for a prediction.
+
+        Args:
+            count (int): The number of superseded inputs.
+        """
+        self.coalesced_inputs += count
+
+    def record_inference_lag(self, lag: float):
+        """
+        Records the inference lag of a pipeline whose prediction has just been performed.
+
+        Args:
+            lag (float): The inference lag, in seconds.
+        """
+        self.inference_lag += self._lag_smoothing * (lag - self.inference_lag)
+
+    def admit(self, ready_sub_data: list[ThroughputSubscriptionData]) -> tuple[list[ThroughputSubscriptionData],
+                                                                                list[ThroughputSubscriptionData]]:
+        """
+        Selects the pipelines that will be predicted during the current tick, and updates the health status.
+
+        Args:
+            ready_sub_data (list[ThroughputSubscriptionData]): The pipelines whose inputs are complete.
+
+        Returns:
+            tuple[list[ThroughputSubscriptionData], list[ThroughputSubscriptionData]]: The admitted pipelines, and
+                the pipelines whose inputs must be dropped.
+        """
+        self.pending_predictions = len(ready_sub_data)
+        self._update_health()
+
+        budget = self.max_predictions_per_tick
+        if self.health == HealthStatus.OVERLOADED:
+            budget = max(1, budget // 2)
+
+        if self.health == HealthStatus.HEALTHY and len(ready_sub_data) <= budget:
+            return ready_sub_data, []
+
+        # Highest-priority pipelines first
+        candidates = sorted(ready_sub_data, key=lambda sub_data: len(sub_data.sub_ids), reverse=True)
+        admitted, shed = [], []
+        for sub_data in candidates:
+            if len(admitted) >= budget:
+                shed.append(sub_data)
+            elif self.health != HealthStatus.HEALTHY and len(sub_data.sub_ids) <= 1 and self._downsample(sub_data):
+                shed.append(sub_data)
+            else:
+                admitted.append(sub_data)
+
+        self.shed_predictions += len(shed)
+        return admitted, shed
+
+    def _downsample(self, sub_data: ThroughputSubscriptionData) -> bool:
+        sub_data.skipped_cycles += 1
+        if sub_data.skipped_cycles < self.downsampling_factor:
+            self.downsampled_predictions += 1
+            return True
+
+        sub_data.skipped_cycles = 0
+        return False
+
+    def _update_health(self):
+        if (self.inference_lag > self.max_inference_lag
+                or self.pending_predictions > self.max_pending_predictions):
+            health = HealthStatus.OVERLOADED
+        elif (self.inference_lag > self.max_inference_lag / 2
+              or self.pending_predictions > self.max_pending_predictions / 2):
+            health = HealthStatus.DEGRADED
+        else:
+            health = HealthStatus.HEALTHY
+
+        if health != self.health:
+            logging.warning(f"AnLF health changed from {self.health} to {health}: "
+                            f"INFERENCE_LAG={self.inference_lag:.3f}s, PENDING={self.pending_predictions}, "
+                            f"SHED={self.shed_predictions}, COALESCED={self.coalesced_inputs}")
+            self.health = health
@@ -0,0 +1,136 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query
+
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+
+
+class ThroughputPredictionCache:
+    """
+    Bounded in-memory store of the latest predictions of each UE, answering analytics queries without any data
+    collection.
+
+    The history of each UE is a ring buffer of the last `history_size` predictions, stored as a row of a single
+    preallocated array. When `max_ues` UEs are cached, the least recently predicted one is evicted.
+    """
+
+    def __init__(self, max_ues: int = 10000, history_size: int = 32):
+        """
+        Initializes the cache.
+
+        Args:
+            max_ues (int): The maximum number of cached UEs.
+            history_size (int): The number of predictions kept per UE.
+        """
+        self.max_ues = max_ues
+        self.history_size = history_size
+        self._history = np.zeros((max_ues, history_size), dtype=np.float32)
+        self._timestamps = np.zeros(max_ues, dtype=np.float64)
+        self._counts = np.zeros(max_ues, dtype=np.int64)
+        # Row of each cached UE, from the least to the most recently predicted
+        self._rows: OrderedDict[str, int] = OrderedDict()
+        self._free_rows: list[int] = list(range(max_ues - 1, -1, -1))
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def record(self, supi: str, prediction: float, timestamp: float):
+        """
+        Records the latest prediction of a UE.
+
+        Args:
+            supi (str): The SUPI of the UE.
+            prediction (float): The predicted throughput (in Mbps).
+            timestamp (float): The time of the prediction (as a POSIX timestamp).
+        """
+        row = self._rows.get(supi)
+        if row is None:
+            if not self._free_rows:
+                _, evicted_row = self._rows.popitem(last=False)
+                self._free_rows.append(evicted_row)
+                self.evictions += 1
+            row = self._free_rows.pop()
+            self._counts[row] = 0
+            self._rows[supi] = row
+        else:
+            self._rows.move_to_end(supi)
+
+        self._history[row, self._counts[row] % self.history_size] = prediction
+        self._timestamps[row] = timestamp
+        self._counts[row] += 1
+
+    def remove(self, supi: str):
+        row = self._rows.pop(supi, None)
+        if row is not None:
+            self._free_rows.append(row)
+
+    def get(self, supi: str, percentiles: tuple[float, ...] = DEFAULT_PERCENTILES) -> Optional[dict]:
+        """
+        Returns the latest prediction of a UE, along with percentiles over its recent history.
+
+        Args:
+            supi (str): The SUPI of the UE.
+            percentiles (tuple[float, ...]): The percentiles (between 0 and 100) to compute.
+
+        Returns:
+            Optional[dict]: The predicted throughput info of the UE, or None if it has not been predicted yet.
+        """
+        row = self._rows.get(supi)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        count = int(self._counts[row])
+        window = self._history[row, :min(count, self.history_size)]
+        latest = float(self._history[row, (count - 1) % self.history_size])
+        values = np.percentile(window, percentiles) if percentiles else []
+        return {"supi": supi,
+                "throughput": f"{latest:.2f} Mbps",
+                "timeStamp": datetime.fromtimestamp(self._timestamps[row], timezone.utc).isoformat(),
+                "samples": len(window),
+                "percentiles": {f"p{percentile:g}": f"{value:.2f} Mbps"
+                                for percentile, value in zip(percentiles, values)}}
+
+    def add_routes(self, app: FastAPI):
+        """
+        Adds the route from which the API Gateway queries the cached predictions to the analytics info server of the
+        AnLF:
+
+        * `GET /predictions?supi=...&percentiles=5,50,95`: The predicted throughput infos of the given UEs, those not
+          predicted yet being omitted.
+
+        Args:
+            app (FastAPI): The application of the server.
+        """
+
+        @app.get("/predictions")
+        async def get_predictions(supi: list[str] = Query(), percentiles: Optional[str] = None):
+            try:
+                requested = DEFAULT_PERCENTILES if percentiles is None else \
+                    tuple(float(percentile) for percentile in percentiles.split(",") if percentile)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid percentiles '{percentiles}'")
+            if any(not 0.0 <= percentile <= 100.0 for percentile in requested):
+                raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100")
+
+            infos = [info for info in (self.get(ue, requested) for ue in supi) if info is not None]
+            return {"predictedThroughputInfos": infos}
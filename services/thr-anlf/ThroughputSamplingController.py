@@ -0,0 +1,132 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+from typing import Optional
+
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+
+class ThroughputSamplingController:
+    """
+    Adapts the reporting period of the GMLC and RAN event exposure subscriptions of each UE.
+
+    After each prediction, the controller updates the moving speed, RSRP variance and prediction volatility of the UE.
+    The period is shortened by one level when any of them exceeds its threshold, and lengthened by one level when all
+    of them are below `calm_ratio` times their threshold. A new period is only decided after `min_samples`
+    predictions at the current one.
+
+    Periods are taken from a small set of levels, obtained by halving and doubling the default period within the
+    configured bounds, so that UEs sharing a period can share a RAN event exposure subscription.
+    """
+
+    def __init__(self, default_period: int = 10, min_period: int = 2, max_period: int = 40,
+                 speed_threshold: float = 5.0, rsrp_std_threshold: float = 3.0, volatility_threshold: float = 0.2,
+                 calm_ratio: float = 0.5, min_samples: int = 3, smoothing: float = 0.3):
+        """
+        Initializes the controller.
+
+        Args:
+            default_period (int): The reporting period (in seconds) of new pipelines.
+            min_period (int): The shortest reporting period (in seconds).
+            max_period (int): The longest reporting period (in seconds).
+            speed_threshold (float): The moving speed (in m/s) above which the period is shortened.
+            rsrp_std_threshold (float): The standard deviation of the RSRP (in dB) above which the period is shortened.
+            volatility_threshold (float): The relative standard deviation of the predictions above which the period is
+                shortened.
+            calm_ratio (float): The fraction of the thresholds below which the period is lengthened.
+            min_samples (int): The number of predictions between two changes of the period of a UE.
+            smoothing (float): The smoothing factor of the moving statistics.
+        """
+        self.default_period = min(max(default_period, min_period), max_period)
+        self.speed_threshold = speed_threshold
+        self.rsrp_std_threshold = rsrp_std_threshold
+        self.volatility_threshold = volatility_threshold
+        self.calm_ratio = calm_ratio
+        self.min_samples = min_samples
+        self._smoothing = smoothing
+
+        self.periods: list[int] = [self.default_period]
+        while self.periods[0] // 2 >= max(min_period, 1):
+            self.periods.insert(0, self.periods[0] // 2)
+        while self.periods[-1] * 2 <= max_period:
+            self.periods.append(self.periods[-1] * 2)
+
+        self.shortened_periods: int = 0
+        self.lengthened_periods: int = 0
+
+    def record_prediction(self, sub_data: ThroughputSubscriptionData, prediction: float):
+        """
+        Updates the statistics of a UE with the inputs and the result of its latest prediction.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE, whose inputs have not been cleared yet.
+            prediction (float): The predicted throughput.
+        """
+        stats = sub_data.sampling_statistics
+        speed = sub_data.pending_gmlc_data[2]
+        lte_rsrp, nr_ss_rsrp = sub_data.pending_ran_data
+
+        # Each RAT only updates its own statistics, so that a UE whose NR coverage comes and goes is not seen as volatile
+        if lte_rsrp is not None:
+            stats.lte_rsrp_mean, stats.lte_rsrp_variance = self._update(stats.lte_rsrp_mean, stats.lte_rsrp_variance,
+                                                                        lte_rsrp)
+        if nr_ss_rsrp is not None:
+            stats.nr_rsrp_mean, stats.nr_rsrp_variance = self._update(stats.nr_rsrp_mean, stats.nr_rsrp_variance,
+                                                                      nr_ss_rsrp)
+        if stats.samples == 0:
+            stats.speed = speed
+            stats.prediction_mean = prediction
+        else:
+            stats.speed += self._smoothing * (speed - stats.speed)
+            stats.prediction_mean, stats.prediction_variance = self._update(stats.prediction_mean,
+                                                                            stats.prediction_variance, prediction)
+        stats.samples += 1
+        stats.samples_since_change += 1
+
+    def next_period(self, sub_data: ThroughputSubscriptionData) -> Optional[int]:
+        """
+        Decides whether the reporting period of a UE must change.
+
+        Args:
+            sub_data (ThroughputSubscriptionData): The pipeline of the UE.
+
+        Returns:
+            Optional[int]: The new reporting period, or None if it is unchanged.
+        """
+        stats = sub_data.sampling_statistics
+        if stats.samples_since_change < self.min_samples:
+            return None
+
+        ratios = (stats.speed / self.speed_threshold, stats.rsrp_std / self.rsrp_std_threshold,
+                  stats.prediction_volatility / self.volatility_threshold)
+        level = self.periods.index(sub_data.reporting_period) if sub_data.reporting_period in self.periods \
+            else self.periods.index(self.default_period)
+        if max(ratios) > 1.0 and level > 0:
+            self.shortened_periods += 1
+            level -= 1
+        elif max(ratios) < self.calm_ratio and level < len(self.periods) - 1:
+            self.lengthened_periods += 1
+            level += 1
+        else:
+            return None
+
+        # The statistics are kept, but the effect of the new period is observed before any other change
+        stats.samples_since_change = 0
+        return self.periods[level]
+
+    def _update(self, mean: float, variance: float, value: float) -> tuple[float, float]:
+        # Exponentially weighted mean and variance, starting from the first value if the mean is NaN
+        if math.isnan(mean):
+            return value, 0.0
+        difference = value - mean
+        increment = self._smoothing * difference
+        return mean + increment, (1.0 - self._smoothing) * (variance + difference * increment)
@@ -0,0 +1,257 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import json
+import logging
+import math
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from ThroughputNotificationController import NotificationPolicy, ThroughputNotificationController
+from ThroughputSubscriptionData import ThroughputSubscriptionData, NotificationState
+from ThroughputSubscriptionFSM import ThroughputSubscriptionFSM, States, Transitions
+from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+
+MAGIC = b"THRSNAP1"
+# Magic, length of the JSON header
+PREAMBLE = struct.Struct("<8sQ")
+# Records are aligned so that they can be memory-mapped
+ALIGNMENT = 64
+
+STATES = list(States)
+
+# Bits of the `flags` field of a record
+SUBSCRIBED = 1
+HAS_GMLC_DATA = 2
+HAS_RAN_DATA = 4
+HAS_PREDICTION = 8
+
+RECORD_DTYPE = np.dtype([
+    ("state", np.uint8),
+    ("flags", np.uint8),
+    ("correlation", np.int32),
+    ("reporting_period", np.int32),
+    ("skipped_cycles", np.int32),
+    ("gmlc_data", np.float64, 4),
+    ("ran_data", np.float64, 2),
+    ("prediction", np.float64),
+    ("inputs_ready_age", np.float64),
+    ("samples", np.int32),
+    ("samples_since_change", np.int32),
+    ("sampling", np.float64, 7),
+])
+
+# Transitions replayed from INITIALIZING to restore a subscribed pipeline in each state. Pipelines that were predicting
+# are restored as waiting, their complete inputs being admitted again at the next tick.
+RESTORE_TRANSITIONS = {
+    States.INITIALIZING: [],
+    States.WAITING_FOR_GMLC_NOTIF: [Transitions.INITIALIZATION_DONE],
+    States.WAITING_FOR_RAN_NOTIF: [Transitions.INITIALIZATION_DONE, Transitions.WAITING_FOR_NOTIFS],
+    States.PREDICTING_THROUGHPUT: [Transitions.INITIALIZATION_DONE],
+    States.SENDING_ANALYTICS_NOTIF: [Transitions.INITIALIZATION_DONE, Transitions.ALL_NOTIFS_RECEIVED,
+                                     Transitions.PREDICTION_DONE],
+    States.DELETING: [Transitions.INITIALIZATION_DONE, Transitions.DELETION_REQUESTED],
+}
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+class ThroughputSnapshotStore:
+    """
+    On-disk snapshots of the AnLF's pipelines, from which it resumes after a restart without sending its event exposure
+    subscriptions again.
+
+    A snapshot is a single file: a JSON header holding the strings (SUPIs, correlation IDs, consumers), the batches of
+    the event exposure subscriptions and the notification policies of the subscriptions, followed by an aligned array
+    of fixed-size records holding the FSM state, pending inputs and statistics of each pipeline, which is memory-mapped
+    when loaded. Snapshots are written to a temporary file which then replaces the previous one, so that a partial
+    snapshot is never loaded.
+    """
+
+    def __init__(self, path: str, interval: float = 30.0, max_age: float = 600.0):
+        """
+        Initializes the store.
+
+        Args:
+            path (str): The path of the snapshot file, typically on a persistent volume.
+            interval (float): The time (in seconds) between two periodic snapshots.
+            max_age (float): The age (in seconds) beyond which a snapshot is not loaded, as the event exposure
+                subscriptions it refers to may have been cleaned up.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.max_age = max_age
+
+    def encode(self, registry: ThroughputSubscriptionRegistry, batch_periods: dict[str, int],
+               open_batches: dict[int, str], policies: dict[str, NotificationPolicy]) -> bytes:
+        """
+        Encodes the state of the pipelines. This must be called from the event loop, so that the state is consistent.
+
+        Args:
+            registry (ThroughputSubscriptionRegistry): The registry of the pipelines.
+            batch_periods (dict[str, int]): The reporting period of each RAN event exposure subscription.
+            open_batches (dict[int, str]): The last RAN event exposure subscription created for each period.
+            policies (dict[str, NotificationPolicy]): The notification policy of each subscription with a specific one.
+
+        Returns:
+            bytes: The snapshot.
+        """
+        now = time.monotonic()
+        pipelines = registry.get_all_subscriptions()
+        correlation_ids = list(batch_periods.keys() | {sub_data.correlation_id for sub_data in pipelines
+                                                       if sub_data.correlation_id is not None})
+        correlation_indexes = {correlation_id: index for index, correlation_id in enumerate(correlation_ids)}
+
+        records = np.zeros(len(pipelines), dtype=RECORD_DTYPE)
+        for record, sub_data in zip(records, pipelines):
+            record["state"] = STATES.index(registry.get_fsm(sub_data).current_state)
+            record["flags"] = ((SUBSCRIBED if sub_data.event_exposure_subscribed else 0) |
+                               (HAS_GMLC_DATA if sub_data.pending_gmlc_data is not None else 0) |
+                               (HAS_RAN_DATA if sub_data.pending_ran_data is not None else 0) |
+                               (HAS_PREDICTION if sub_data.pending_throughput_prediction is not None else 0))
+            record["correlation"] = correlation_indexes.get(sub_data.correlation_id, -1)
+            record["reporting_period"] = sub_data.reporting_period or 0
+            record["skipped_cycles"] = sub_data.skipped_cycles
+            if sub_data.pending_gmlc_data is not None:
+                record["gmlc_data"] = sub_data.pending_gmlc_data
+            if sub_data.pending_ran_data is not None:
+                record["ran_data"] = [math.nan if value is None else value for value in sub_data.pending_ran_data]
+            record["prediction"] = sub_data.pending_throughput_prediction or 0.0
+            # Monotonic times do not survive restarts, ages are stored instead
+            record["inputs_ready_age"] = math.nan if sub_data.inputs_ready_since is None \
+                else now - sub_data.inputs_ready_since
+            stats = sub_data.sampling_statistics
+            record["samples"] = stats.samples
+            record["samples_since_change"] = stats.samples_since_change
+            record["sampling"] = (stats.speed, stats.lte_rsrp_mean, stats.lte_rsrp_variance, stats.nr_rsrp_mean,
+                                  stats.nr_rsrp_variance, stats.prediction_mean, stats.prediction_variance)
+
+        header = json.dumps({
+            "created": time.time(),
+            "supis": [sub_data.supi for sub_data in pipelines],
+            "sub_ids": [sorted(sub_data.sub_ids) for sub_data in pipelines],
+            "notification_states": [{sub_id: [state.value, now - state.time, state.direction]
+                                     for sub_id, state in sub_data.notification_states.items()}
+                                    for sub_data in pipelines],
+            "correlation_ids": correlation_ids,
+            "batch_periods": batch_periods,
+            "open_batches": {str(period): correlation_id for period, correlation_id in open_batches.items()},
+            "policies": {sub_id: vars(policy) for sub_id, policy in policies.items()},
+        }, separators=(",", ":")).encode()
+        padding = -(PREAMBLE.size + len(header)) % ALIGNMENT
+        return PREAMBLE.pack(MAGIC, len(header) + padding) + header + b" " * padding + records.tobytes()
+
+    def write(self, snapshot: bytes):
+        """
+        Replaces the snapshot file. Writes are blocking.
+        """
+        staging = self.path.with_name(f".{self.path.name}.tmp")
+        with open(staging, "wb") as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(staging, self.path)
+
+    def save(self, registry: ThroughputSubscriptionRegistry, batch_periods: dict[str, int],
+             open_batches: dict[int, str], policies: dict[str, NotificationPolicy]):
+        start = time.perf_counter()
+        snapshot = self.encode(registry, batch_periods, open_batches, policies)
+        self.write(snapshot)
+        logging.info(f"Saved a snapshot of {len(registry.get_all_subscriptions())} pipeline(s): "
+                     f"SIZE={len(snapshot)}B, DURATION={time.perf_counter() - start:.3f}s")
+
+    def load(self, registry: ThroughputSubscriptionRegistry,
+             notification_controller: ThroughputNotificationController) -> Optional[tuple[dict[str, int],
+                                                                                          dict[int, str]]]:
+        """
+        Restores the pipelines of the snapshot into an empty registry, and the notification policies of their
+        subscriptions.
+
+        Args:
+            registry (ThroughputSubscriptionRegistry): The registry of the pipelines.
+            notification_controller (ThroughputNotificationController): The controller the policies are restored into.
+
+        Returns:
+            Optional[tuple[dict[str, int], dict[int, str]]]: The reporting period of each RAN event exposure
+                subscription and the last one created for each period, or None if there is no valid snapshot.
+        """
+        if not self.path.is_file():
+            return None
+        try:
+            with open(self.path, "rb") as file:
+                magic, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+                if magic != MAGIC:
+                    raise ValueError("not a snapshot file")
+                header = json.loads(file.read(header_length))
+            age = time.time() - header["created"]
+            if age > self.max_age:
+                logging.warning(f"Ignoring a stale snapshot: AGE={age:.0f}s")
+                return None
+            supis = header["supis"]
+            records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=PREAMBLE.size + header_length,
+                                shape=(len(supis),)) if supis else np.zeros(0, dtype=RECORD_DTYPE)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logging.warning(f"Ignoring an invalid snapshot '{self.path}': {e}")
+            return None
+
+        now = time.monotonic()
+        correlation_ids = header["correlation_ids"]
+        for supi, sub_ids, notification_states, record in zip(supis, header["sub_ids"],
+                                                              header["notification_states"], records):
+            sub_data = ThroughputSubscriptionData(supi)
+            sub_data.sub_ids.update(sub_ids)
+            flags = int(record["flags"])
+            sub_data.event_exposure_subscribed = bool(flags & SUBSCRIBED)
+            if record["correlation"] >= 0:
+                sub_data.correlation_id = correlation_ids[record["correlation"]]
+            sub_data.reporting_period = int(record["reporting_period"]) or None
+            sub_data.skipped_cycles = int(record["skipped_cycles"])
+            if flags & HAS_GMLC_DATA:
+                latitude, longitude, speed, bearing = record["gmlc_data"].tolist()
+                sub_data.pending_gmlc_data = (latitude, longitude, speed, int(bearing))
+            if flags & HAS_RAN_DATA:
+                sub_data.pending_ran_data = tuple(_optional(value) for value in record["ran_data"])
+            if flags & HAS_PREDICTION:
+                sub_data.pending_throughput_prediction = float(record["prediction"])
+            if not math.isnan(record["inputs_ready_age"]):
+                sub_data.inputs_ready_since = now - float(record["inputs_ready_age"])
+            stats = sub_data.sampling_statistics
+            stats.samples = int(record["samples"])
+            stats.samples_since_change = int(record["samples_since_change"])
+            (stats.speed, stats.lte_rsrp_mean, stats.lte_rsrp_variance, stats.nr_rsrp_mean, stats.nr_rsrp_variance,
+             stats.prediction_mean, stats.prediction_variance) = record["sampling"].tolist()
+            for sub_id, (value, state_age, direction) in notification_states.items():
+                state = sub_data.notification_states[sub_id] = NotificationState(value, now - state_age)
+                state.direction = direction
+
+            # Pipelines whose event exposure subscriptions have not been sent yet are initialized again
+            state = STATES[record["state"]] if sub_data.event_exposure_subscribed else States.INITIALIZING
+            if state == States.SENDING_ANALYTICS_NOTIF and sub_data.pending_throughput_prediction is None:
+                state = States.WAITING_FOR_GMLC_NOTIF
+            fsm = ThroughputSubscriptionFSM()
+            for transition in RESTORE_TRANSITIONS[state]:
+                fsm.transition(transition)
+            registry.add_subscription(sub_data, fsm)
+
+        for sub_id, policy in header.get("policies", {}).items():
+            notification_controller.set_policy(sub_id, NotificationPolicy(**policy))
+
+        logging.info(f"Restored {len(supis)} pipeline(s) from a snapshot: AGE={age:.0f}s")
+        return header["batch_periods"], {int(period): correlation_id
+                                         for period, correlation_id in header["open_batches"].items()}
@@ -9,28 +9,114 @@
 # See the GNU Lesser General Public License for more details.
 # You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
 
+import math
 from typing import Optional
 import numpy as np
 
+from common.tracing import SpanContext
+
+# Lowest reportable LTE RSRP and NR SS-RSRP (in dBm), standing for an RAT that has never been reported for a UE
+MIN_LTE_RSRP = -140.0
+MIN_NR_SS_RSRP = -156.0
+
+
+class SamplingStatistics:
+    """
+    Exponential moving statistics of the recent inputs and predictions of a UE.
+    """
+
+    def __init__(self):
+        self.samples: int = 0
+        self.samples_since_change: int = 0
+        self.speed: float = 0.0
+        # The LTE RSRP and NR SS-RSRP are on different scales, their statistics are kept apart (NaN until reported)
+        self.lte_rsrp_mean: float = math.nan
+        self.lte_rsrp_variance: float = 0.0
+        self.nr_rsrp_mean: float = math.nan
+        self.nr_rsrp_variance: float = 0.0
+        self.prediction_mean: float = 0.0
+        self.prediction_variance: float = 0.0
+
+    @property
+    def rsrp_std(self) -> float:
+        return math.sqrt(max(self.lte_rsrp_variance, self.nr_rsrp_variance))
+
+    @property
+    def prediction_volatility(self) -> float:
+        """
+        The standard deviation of the predictions, relative to their mean.
+        """
+        return math.sqrt(self.prediction_variance) / max(abs(self.prediction_mean), 1e-6)
+
+
+class NotificationState:
+    """
+    The last prediction of a UE notified to an analytics subscription.
+    """
+
+    def __init__(self, value: float, time: float):
+        self.value: float = value
+        self.time: float = time
+        # Sign of the last notified change, 0 until the prediction has changed
+        self.direction: int = 0
+
 
 class ThroughputSubscriptionData:
-    def __init__(self, sub_id: str, supi: str):
-        self.sub_id: str = sub_id
+    """
+    Data collection and inference pipeline for a single UE.
+
+    The pipeline is shared by every analytics subscription targeting the same SUPI: each of them is a consumer
+    referenced in `sub_ids`, and every prediction is fanned out to all of them. Upstream event exposure subscriptions
+    are identified by `correlation_id`, which is shared by all the pipelines of a batch reporting every
+    `reporting_period` seconds, and are torn down once the last consumer is gone.
+    """
+
+    def __init__(self, supi: str):
         self.supi: str = supi
+        self.correlation_id: Optional[str] = None
+        self.sub_ids: set[str] = set()
         self.pending_gmlc_data: Optional[tuple[float, float, float, int]] = None
         self.pending_ran_data: Optional[tuple[float, float]] = None
         self.pending_throughput_prediction: Optional[float] = None
-        self.deletion_requested: bool = False
+        self.event_exposure_subscribed: bool = False
+        self.inputs_ready_since: Optional[float] = None
+        self.skipped_cycles: int = 0
+        self.reporting_period: Optional[int] = None
+        self.sampling_statistics: SamplingStatistics = SamplingStatistics()
+        self.notification_states: dict[str, NotificationState] = {}
+        # Sampled trace of the pending location input, continued up to the analytics notification, and the one of
+        # the pending RSRP input
+        self.trace_context: Optional[SpanContext] = None
+        self.trace_start: float = 0.0
+        self.ran_trace_id: Optional[str] = None
+
+    @property
+    def deletion_requested(self) -> bool:
+        return not self.sub_ids
 
     def __hash__(self):
-        return hash((self.sub_id, self.supi))
+        return hash(self.supi)
 
     def __eq__(self, other):
         if isinstance(other, ThroughputSubscriptionData):
-            return self.sub_id == other.sub_id and self.supi == other.supi
+            return self.supi == other.supi
         return False
 
+    def rsrp_inputs(self) -> tuple[float, float]:
+        """
+        Returns the LTE RSRP and NR SS-RSRP of the pending RAN data. The model needs both: a value the RAN did not
+        report is replaced with the moving mean of its RAT for the UE, or with the lowest reportable value if the RAT
+        has never been reported.
+        """
+        lte_rsrp, nr_ss_rsrp = self.pending_ran_data
+        stats = self.sampling_statistics
+        if lte_rsrp is None:
+            lte_rsrp = MIN_LTE_RSRP if math.isnan(stats.lte_rsrp_mean) else stats.lte_rsrp_mean
+        if nr_ss_rsrp is None:
+            nr_ss_rsrp = MIN_NR_SS_RSRP if math.isnan(stats.nr_rsrp_mean) else stats.nr_rsrp_mean
+        return lte_rsrp, nr_ss_rsrp
+
     def to_input_array(self) -> np.ndarray:
-        return np.array([[self.pending_gmlc_data[0], self.pending_gmlc_data[1],
-                          self.pending_ran_data[0], self.pending_ran_data[1],
-                          self.pending_gmlc_data[2], self.pending_gmlc_data[3]]])
+        lte_rsrp, nr_ss_rsrp = self.rsrp_inputs()
+        return np.array([[self.pending_gmlc_data[0], self.pending_gmlc_data[1], lte_rsrp, nr_ss_rsrp,
+                          self.pending_gmlc_data[2], self.pending_gmlc_data[3]]], dtype=np.float64)
@@ -41,12 +41,14 @@ class Transitions(StrEnum):
         ALL_NOTIFS_RECEIVED: Transition indicating that all required notifications have been received.
         WAITING_FOR_NOTIFS: Transition indicating that the FSM is waiting for additional notifications.
         PREDICTION_DONE: Transition indicating that throughput prediction is complete.
+        PREDICTION_FAILED: Transition indicating that no prediction could be made from the inputs.
         ANALYTICS_NOTIF_SENT: Transition indicating that the analytics notification has been sent.
     """
     INITIALIZATION_DONE = "INITIALIZATION_DONE",
     ALL_NOTIFS_RECEIVED = "ALL_NOTIFS_RECEIVED",
     WAITING_FOR_NOTIFS = "WAITING_FOR_NOTIFS",
     PREDICTION_DONE = "PREDICTION_DONE",
+    PREDICTION_FAILED = "PREDICTION_FAILED",
     ANALYTICS_NOTIF_SENT = "ANALYTICS_NOTIF_SENT",
     DELETION_REQUESTED = "DELETION_REQUESTED"
 
@@ -73,6 +75,7 @@ class ThroughputSubscriptionFSM(FiniteStateMachine):
         - Transitions.ALL_NOTIFS_RECEIVED: Moves the FSM to the predicting state after all notifications are received.
         - Transitions.WAITING_FOR_NOTIFS: Allows the FSM to wait for additional notifications if needed.
         - Transitions.PREDICTION_DONE: Transitions the FSM to the sending notifications state once the prediction is done.
+        - Transitions.PREDICTION_FAILED: Returns the FSM to WAITING_FOR_GMLC_NOTIF when no prediction could be made.
         - Transitions.ANALYTICS_NOTIF_SENT: Returns the FSM to the WAITING_FOR_GMLC_NOTIF state after sending analytics notifications.
         - Transitions.DELETION_REQUESTED: Transitions the FSM to the DELETING state when a deletion is requested.
     """
@@ -96,6 +99,7 @@ class ThroughputSubscriptionFSM(FiniteStateMachine):
                 },
                 States.PREDICTING_THROUGHPUT: {
                     Transitions.PREDICTION_DONE: States.SENDING_ANALYTICS_NOTIF,
+                    Transitions.PREDICTION_FAILED: States.WAITING_FOR_GMLC_NOTIF,
                     Transitions.DELETION_REQUESTED: States.DELETING
                 },
                 States.SENDING_ANALYTICS_NOTIF: {
@@ -9,6 +9,7 @@
 # See the GNU Lesser General Public License for more details.
 # You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
 
+from collections import Counter
 from typing import Optional
 
 from ThroughputSubscriptionData import ThroughputSubscriptionData
@@ -16,30 +17,98 @@ from ThroughputSubscriptionFSM import ThroughputSubscriptionFSM
 
 
 class ThroughputSubscriptionRegistry:
+    """
+    Registry of the per-SUPI pipelines, along with their FSM and their reference-counted consumers.
+    """
+
     def __init__(self):
-        self._subscription_fsms = {}
-        self._subscription_data_lookup = {}
+        self._subscription_fsms: dict[ThroughputSubscriptionData, ThroughputSubscriptionFSM] = {}
+        self._subscription_data_lookup: dict[str, ThroughputSubscriptionData] = {}
+        self._correlation_lookup: dict[tuple[str, str], ThroughputSubscriptionData] = {}
+        self._correlation_members: dict[str, set[str]] = {}
 
     def add_subscription(self, sub_data: ThroughputSubscriptionData, fsm: ThroughputSubscriptionFSM):
         self._subscription_fsms[sub_data] = fsm
-        self._subscription_data_lookup[(sub_data.sub_id, sub_data.supi)] = sub_data
+        self._subscription_data_lookup[sub_data.supi] = sub_data
+        if sub_data.correlation_id is not None:
+            self.set_correlation_id(sub_data, sub_data.correlation_id)
 
     def get_fsm(self, sub_data: ThroughputSubscriptionData) -> Optional[ThroughputSubscriptionFSM]:
         return self._subscription_fsms.get(sub_data)
 
-    def get_subscription_data(self, sub_id: str, supi: str) -> Optional[ThroughputSubscriptionData]:
-        return self._subscription_data_lookup.get((sub_id, supi))
+    def get_subscription_data(self, supi: str) -> Optional[ThroughputSubscriptionData]:
+        return self._subscription_data_lookup.get(supi)
+
+    def get_subscription_data_by_correlation(self, correlation_id: str,
+                                             supi: str) -> Optional[ThroughputSubscriptionData]:
+        return self._correlation_lookup.get((correlation_id, supi))
+
+    def set_correlation_id(self, sub_data: ThroughputSubscriptionData, correlation_id: str):
+        """
+        Binds a pipeline to the correlation ID of its event exposure subscriptions, unbinding it from the previous one.
+        """
+        if sub_data.correlation_id is not None and sub_data.correlation_id != correlation_id:
+            self._unbind_correlation_id(sub_data)
+        sub_data.correlation_id = correlation_id
+        self._correlation_lookup[(correlation_id, sub_data.supi)] = sub_data
+        self._correlation_members.setdefault(correlation_id, set()).add(sub_data.supi)
+
+    def get_correlation_members(self, correlation_id: str) -> set[str]:
+        """
+        Returns the SUPIs of the pipelines sharing the given correlation ID.
+        """
+        return self._correlation_members.get(correlation_id, set())
+
+    def add_consumer(self, sub_id: str, supi: str) -> Optional[ThroughputSubscriptionData]:
+        """
+        References an analytics subscription as a consumer of the pipeline of a UE.
 
-    def mark_for_deletion(self, sub_id: str, supi: str):
-        sub_data = self.get_subscription_data(sub_id, supi)
+        Returns:
+            Optional[ThroughputSubscriptionData]: The pipeline, or None if no pipeline exists yet for this SUPI.
+        """
+        sub_data = self.get_subscription_data(supi)
         if sub_data:
-            sub_data.deletion_requested = True
+            sub_data.sub_ids.add(sub_id)
+        return sub_data
 
-    def remove_subscription(self, sub_id: str, supi: str):
-        sub_data = self.get_subscription_data(sub_id, supi)
+    def remove_consumer(self, sub_id: str, supi: str):
+        """
+        Dereferences an analytics subscription from the pipeline of a UE. The pipeline is requested for deletion once
+        its last consumer is gone.
+        """
+        sub_data = self.get_subscription_data(supi)
+        if sub_data:
+            sub_data.sub_ids.discard(sub_id)
+            sub_data.notification_states.pop(sub_id, None)
+
+    def remove_subscription(self, supi: str):
+        sub_data = self.get_subscription_data(supi)
         if sub_data:
             self._subscription_fsms.pop(sub_data, None)
-            self._subscription_data_lookup.pop((sub_id, supi), None)
+            self._subscription_data_lookup.pop(supi, None)
+            if sub_data.correlation_id is not None:
+                self._unbind_correlation_id(sub_data)
+
+    def _unbind_correlation_id(self, sub_data: ThroughputSubscriptionData):
+        self._correlation_lookup.pop((sub_data.correlation_id, sub_data.supi), None)
+        members = self._correlation_members.get(sub_data.correlation_id)
+        if members is not None:
+            members.discard(sub_data.supi)
+            if not members:
+                del self._correlation_members[sub_data.correlation_id]
+
+    def count_by_state(self) -> Counter:
+        """
+        Returns the number of pipelines in each FSM state.
+        """
+        return Counter(fsm.current_state for fsm in self._subscription_fsms.values())
+
+    def count_by_reporting_period(self) -> Counter:
+        """
+        Returns the number of pipelines with each reporting period.
+        """
+        return Counter(sub_data.reporting_period for sub_data in self._subscription_fsms
+                       if sub_data.reporting_period is not None)
 
     def get_all_subscriptions(self) -> list[ThroughputSubscriptionData]:
         return list(self._subscription_fsms.keys())
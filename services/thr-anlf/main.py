@@ -9,16 +9,30 @@
 # See the GNU Lesser General Public License for more details.
 # You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
 
+import asyncio
 import logging
 import os
 import signal
 import sys
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
+from common.tracing import install_tracing
+from ModelArtifactCache import ModelArtifactCache
+from ThroughputAnlfMetrics import ThroughputAnlfMetrics
 from ThroughputAnlfService import ThroughputAnlfService
+from ThroughputEventExposureConsumer import ThroughputEventExposureConsumer
+from ThroughputMap import ThroughputMap
+from ThroughputNotificationAggregator import ThroughputNotificationAggregator
+from ThroughputNotificationController import ThroughputNotificationController, NotificationPolicy
+from ThroughputOverloadController import ThroughputOverloadController
+from ThroughputPredictionCache import ThroughputPredictionCache
+from ThroughputSamplingController import ThroughputSamplingController
+from ThroughputSnapshotStore import ThroughputSnapshotStore
 
 # Log level
 log_level = os.getenv('THR_ANLF_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('THR_ANLF_SERVICE_NAME', 'thr-anlf'), log_level)
 
 # Kafka boostrap server
 kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
@@ -26,7 +40,85 @@ kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
 # Service name
 service_name = os.getenv('THR_ANLF_SERVICE_NAME')
 
-service = ThroughputAnlfService(service_name, kafka_bootstrap_server)
+# Opt-in profiling hooks
+install_profiling(service_name)
+
+# Opt-in tracing
+install_tracing(service_name)
+
+# Prometheus metrics port
+metrics_port = int(os.getenv('THR_ANLF_METRICS_PORT', '0'))
+
+# Maximum number of UEs per RAN event exposure subscription
+ee_batch_size = int(os.getenv('THR_ANLF_EE_BATCH_SIZE', '1000'))
+
+# Initial period of the GMLC and RAN event exposure notifications
+reporting_period = int(os.getenv('THR_ANLF_REPORTING_PERIOD', '10'))
+
+# Bounds and thresholds of the adaptive reporting periods
+sampling_controller = ThroughputSamplingController(
+    default_period=reporting_period,
+    min_period=int(os.getenv('THR_ANLF_MIN_REPORTING_PERIOD', '2')),
+    max_period=int(os.getenv('THR_ANLF_MAX_REPORTING_PERIOD', '40')),
+    speed_threshold=float(os.getenv('THR_ANLF_SPEED_THRESHOLD', '5.0')),
+    rsrp_std_threshold=float(os.getenv('THR_ANLF_RSRP_STD_THRESHOLD', '3.0')),
+    volatility_threshold=float(os.getenv('THR_ANLF_VOLATILITY_THRESHOLD', '0.2')))
+
+# Default suppression policy of the analytics notifications (no maximum interval if 0)
+notif_max_interval = float(os.getenv('THR_ANLF_NOTIF_MAX_INTERVAL', '60'))
+notification_controller = ThroughputNotificationController(NotificationPolicy(
+    min_relative_change=float(os.getenv('THR_ANLF_NOTIF_MIN_RELATIVE_CHANGE', '0.05')),
+    min_absolute_change=float(os.getenv('THR_ANLF_NOTIF_MIN_ABSOLUTE_CHANGE', '0.1')),
+    min_interval=float(os.getenv('THR_ANLF_NOTIF_MIN_INTERVAL', '0')),
+    max_interval=notif_max_interval or None,
+    hysteresis=float(os.getenv('THR_ANLF_NOTIF_HYSTERESIS', '0.5'))))
+
+# Consolidation of the predictions notified to each subscription (predictions of a tick only if no window)
+notification_aggregator = ThroughputNotificationAggregator(window=float(os.getenv('THR_ANLF_NOTIF_WINDOW', '1.0')),
+                                                           max_ues=int(os.getenv('THR_ANLF_NOTIF_MAX_UES', '1000')))
+
+# Overload control thresholds
+overload_controller = ThroughputOverloadController(
+    max_inference_lag=float(os.getenv('THR_ANLF_MAX_INFERENCE_LAG', '2.0')),
+    max_pending_predictions=int(os.getenv('THR_ANLF_MAX_PENDING_PREDICTIONS', '1000')),
+    max_predictions_per_tick=int(os.getenv('THR_ANLF_MAX_PREDICTIONS_PER_TICK', '500')),
+    downsampling_factor=int(os.getenv('THR_ANLF_DOWNSAMPLING_FACTOR', '4')))
+
+# Local cache of the provisioned ML models
+model_cache = ModelArtifactCache(os.getenv('THR_ANLF_MODEL_CACHE_DIR', '/models/cache'),
+                                 int(os.getenv('THR_ANLF_MODEL_CACHE_SIZE', '3')))
+
+# Store of the latest predictions, queried by the API Gateway
+prediction_cache = ThroughputPredictionCache(int(os.getenv('THR_ANLF_PREDICTION_CACHE_SIZE', '10000')),
+                                             int(os.getenv('THR_ANLF_PREDICTION_HISTORY_SIZE', '32')))
+analytics_info_port = int(os.getenv('THR_ANLF_ANALYTICS_INFO_PORT', '0'))
+
+# Grid of the predicted throughput statistics, optionally used instead of shed predictions
+throughput_map = ThroughputMap(cell_size=float(os.getenv('THR_ANLF_MAP_CELL_SIZE', '20')),
+                               max_tiles=int(os.getenv('THR_ANLF_MAP_MAX_TILES', '10000')),
+                               rsrp_band=float(os.getenv('THR_ANLF_MAP_RSRP_BAND', '10')),
+                               heading_buckets=int(os.getenv('THR_ANLF_MAP_HEADING_BUCKETS', '8')),
+                               min_samples=int(os.getenv('THR_ANLF_MAP_MIN_SAMPLES', '3')))
+map_fallback = os.getenv('THR_ANLF_MAP_FALLBACK', '0').lower() in ('1', 'true', 'yes')
+
+# Snapshots of the pipelines, from which the AnLF resumes after a restart (disabled if no path)
+snapshot_path = os.getenv('THR_ANLF_SNAPSHOT_PATH', '')
+snapshot_store = None
+if snapshot_path:
+    snapshot_store = ThroughputSnapshotStore(snapshot_path, float(os.getenv('THR_ANLF_SNAPSHOT_INTERVAL', '30')),
+                                             float(os.getenv('THR_ANLF_SNAPSHOT_MAX_AGE', '600')))
+
+# Batched consumption of the GMLC and RAN notifications, instead of one callback per message
+event_exposure_consumer = None
+if os.getenv('THR_ANLF_EE_BATCH_CONSUMER', '0').lower() in ('1', 'true', 'yes'):
+    event_exposure_consumer = ThroughputEventExposureConsumer(
+        service_name, kafka_bootstrap_server, int(os.getenv('THR_ANLF_EE_CONSUME_BATCH_SIZE', '500')),
+        float(os.getenv('THR_ANLF_EE_CONSUME_TIMEOUT_MS', '50')) / 1000)
+
+service = ThroughputAnlfService(service_name, kafka_bootstrap_server, ee_batch_size, overload_controller, model_cache,
+                                reporting_period, sampling_controller, notification_controller, prediction_cache,
+                                analytics_info_port, throughput_map, map_fallback, snapshot_store,
+                                event_exposure_consumer, notification_aggregator)
 
 
 def handle_signal(sig, _frame):
@@ -35,8 +127,8 @@ def handle_signal(sig, _frame):
     elif sig == signal.SIGTERM:
         logging.info("Received SIGTERM, shutting down gracefully...")
 
-    service.stop()
-    sys.exit(0)
+    # The service is stopped from its event loop, and run() returns once the final snapshot is saved
+    service.request_stop()
 
 
 signal.signal(signal.SIGINT, handle_signal)
@@ -44,7 +136,12 @@ signal.signal(signal.SIGTERM, handle_signal)
 
 if __name__ == '__main__':
     try:
+        if metrics_port:
+            ThroughputAnlfMetrics.start_server(metrics_port)
         service.run()
+    except asyncio.CancelledError:
+        # The main task of the service is cancelled once the service has stopped on a signal
+        logging.info("Service stopped")
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         sys.exit(1)
@@ -0,0 +1,149 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from confluent_kafka import Consumer, Producer
+from pydantic import ValidationError
+
+from common.dataset_streaming import (
+    DATASET_STREAM_REQUEST_TOPIC,
+    DATASET_STREAM_DELIVERY_TOPIC,
+    DatasetStreamRequest,
+    DatasetChunk
+)
+
+
+class DatasetStreamClient:
+    """
+    Client of the ADRF's streaming dataset retrieval.
+
+    Chunks are yielded in order as soon as they are received. If a chunk is missing or the stream stalls, the
+    retrieval is resumed right after the key of the last received sample.
+    """
+
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, inactivity_timeout: float = 30.0,
+                 max_resumes: int = 3, max_pending_chunks: int = 16):
+        """
+        Initializes the client.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            inactivity_timeout (float): The time (in seconds) without any chunk after which a stream is resumed.
+            max_resumes (int): The maximum number of times a stream is resumed before giving up.
+            max_pending_chunks (int): The maximum number of received chunks waiting to be consumed, per stream.
+        """
+        self._inactivity_timeout = inactivity_timeout
+        self._max_resumes = max_resumes
+        self._max_pending_chunks = max_pending_chunks
+        # Each instance reads every chunk, the ones belonging to other instances' streams are ignored
+        self._consumer = Consumer({"bootstrap.servers": kafka_bootstrap_server,
+                                   "group.id": f"{service_name}-dataset-stream-{uuid.uuid4()}",
+                                   "auto.offset.reset": "latest"})
+        self._producer = Producer({"bootstrap.servers": kafka_bootstrap_server})
+        self._assigned = threading.Event()
+        self._streams: dict[str, asyncio.Queue] = {}
+        self._consume_task: Optional[asyncio.Task] = None
+
+    async def retrieve(self, dataset_id: str, start_time: datetime, stop_time: datetime,
+                       chunk_size: int = 1000, resolution: Optional[float] = None) -> AsyncIterator[DatasetChunk]:
+        """
+        Retrieves the samples of a dataset within a time window, chunk by chunk.
+
+        Args:
+            dataset_id (str): The ID of the dataset.
+            start_time (datetime): The start of the time window (inclusive).
+            stop_time (datetime): The end of the time window (exclusive).
+            chunk_size (int): The maximum number of samples per chunk.
+            resolution (Optional[float]): The coarsest acceptable time resolution (in seconds) of the samples, raw
+                samples are retrieved if None.
+
+        Yields:
+            DatasetChunk: The chunks of the dataset, the last one carrying the end-of-stream marker.
+
+        Raises:
+            TimeoutError: If the stream cannot be completed after `max_resumes` resumptions.
+        """
+        await self._ensure_consuming()
+
+        offset = 0
+        last_key = None
+        resumes = 0
+        while True:
+            # A resumed stream gets a new ID, so that late chunks of the interrupted one are ignored
+            request = DatasetStreamRequest(stream_id=str(uuid.uuid4()), dataset_id=dataset_id, start_time=start_time,
+                                           stop_time=stop_time, chunk_size=chunk_size, resume_offset=offset,
+                                           resume_after=last_key, resolution=resolution)
+            queue = self._streams[request.stream_id] = asyncio.Queue(maxsize=self._max_pending_chunks)
+            self._producer.produce(DATASET_STREAM_REQUEST_TOPIC, key=request.stream_id,
+                                   value=request.model_dump_json())
+            self._producer.poll(0)
+
+            try:
+                expected_sequence_number = 0
+                while True:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=self._inactivity_timeout)
+                    if chunk.sequence_number != expected_sequence_number or chunk.offset != offset:
+                        raise LookupError(f"expected chunk {expected_sequence_number} at offset {offset}, "
+                                          f"got chunk {chunk.sequence_number} at offset {chunk.offset}")
+                    expected_sequence_number += 1
+                    offset += len(chunk.samples)
+                    last_key = chunk.last_key or last_key
+                    yield chunk
+                    if chunk.end_of_stream:
+                        return
+            except (asyncio.TimeoutError, LookupError) as e:
+                resumes += 1
+                if resumes > self._max_resumes:
+                    raise TimeoutError(f"Dataset stream of '{dataset_id}' interrupted at offset {offset}") from e
+                logging.warning(f"Resuming dataset stream of '{dataset_id}' from offset {offset}: "
+                                f"STREAM_ID={request.stream_id}, REASON={str(e) or 'inactivity'}")
+            finally:
+                del self._streams[request.stream_id]
+                # Unblock the consumer if it is waiting to enqueue a chunk of this stream
+                while not queue.empty():
+                    queue.get_nowait()
+
+    async def _ensure_consuming(self):
+        if self._consume_task is None:
+            self._consumer.subscribe([DATASET_STREAM_DELIVERY_TOPIC], on_assign=lambda *_: self._assigned.set())
+            self._consume_task = asyncio.create_task(self._consume())
+        # Requests sent before the partitions are assigned could be answered before the consumer starts reading
+        await asyncio.to_thread(self._assigned.wait, self._inactivity_timeout)
+
+    async def _consume(self):
+        try:
+            while True:
+                message = await asyncio.to_thread(self._consumer.poll, 0.5)
+                if message is None:
+                    continue
+                if message.error():
+                    logging.error(f"Dataset stream consumer error: {message.error()}")
+                    continue
+
+                queue = self._streams.get(message.key().decode())
+                if queue is None:
+                    continue
+                try:
+                    chunk = DatasetChunk.model_validate_json(message.value())
+                except ValidationError as e:
+                    logging.error(f"Invalid dataset chunk: {e}")
+                    continue
+                # Waiting for the consumer of the stream bounds the memory used by the received chunks
+                await queue.put(chunk)
+        finally:
+            self._consumer.close()
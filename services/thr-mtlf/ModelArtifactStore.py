@@ -0,0 +1,116 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse
+
+from common.model_artifacts import MANIFEST_FILE, ModelManifest, bundle_hash, file_sha256
+
+
+class ModelArtifactStore:
+    """
+    Content-addressed store of model bundles.
+
+    Each bundle is stored in a directory named after its hash, along with its manifest. Publishing a bundle whose hash
+    is already known is a no-op, so that unchanged models are never stored nor transferred twice.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Initializes the store.
+
+        Args:
+            root_dir (str): The directory of the store.
+        """
+        self._root = Path(root_dir)
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    def publish(self, file_paths: list[Path], version: str, metadata: dict) -> ModelManifest:
+        """
+        Adds a bundle to the store, if not already present.
+
+        Args:
+            file_paths (list[Path]): The files of the bundle, stored under their names, which must be distinct.
+            version (str): The version of the model.
+            metadata (dict): Free-form metadata about the model.
+
+        Returns:
+            ModelManifest: The manifest of the bundle.
+        """
+        files = {path.name: file_sha256(path) for path in file_paths}
+        manifest = ModelManifest(hash=bundle_hash(files), version=version, files=files, metadata=metadata)
+
+        existing = self.get_manifest(manifest.hash)
+        if existing is not None:
+            logging.debug(f"Model bundle already stored: HASH={manifest.hash}, VERSION={existing.version}")
+            return existing
+
+        # The bundle is written in a temporary directory, so that a partial bundle is never served
+        staging = self._root / f".{manifest.hash}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        for path in file_paths:
+            shutil.copyfile(path, staging / path.name)
+        (staging / MANIFEST_FILE).write_text(manifest.model_dump_json())
+        staging.rename(self._root / manifest.hash)
+
+        logging.info(f"Stored model bundle: HASH={manifest.hash}, VERSION={version}")
+        return manifest
+
+    def get_manifest(self, bundle_hash: str) -> Optional[ModelManifest]:
+        path = self._root / bundle_hash / MANIFEST_FILE
+        if bundle_hash.startswith(".") or "/" in bundle_hash or not path.is_file():
+            return None
+        return ModelManifest.model_validate_json(path.read_text())
+
+    def get_file(self, bundle_hash: str, name: str) -> Optional[Path]:
+        manifest = self.get_manifest(bundle_hash)
+        # Only the files listed in the manifest are served
+        if manifest is None or name not in manifest.files:
+            return None
+        return self._root / bundle_hash / name
+
+    def create_server(self, port: int) -> uvicorn.Server:
+        """
+        Creates the HTTP server from which AnLFs download the bundles:
+
+        * `GET /artifacts/{hash}`: The manifest of a bundle.
+        * `GET /artifacts/{hash}/files/{name}`: A file of a bundle.
+
+        Args:
+            port (int): The port of the server.
+
+        Returns:
+            uvicorn.Server: The server, to be started with `serve()`.
+        """
+        app = FastAPI()
+
+        @app.get("/artifacts/{bundle_hash}")
+        async def get_manifest(bundle_hash: str) -> ModelManifest:
+            manifest = self.get_manifest(bundle_hash)
+            if manifest is None:
+                raise HTTPException(status_code=404, detail=f"Unknown model bundle '{bundle_hash}'")
+            return manifest
+
+        @app.get("/artifacts/{bundle_hash}/files/{name}")
+        async def get_file(bundle_hash: str, name: str):
+            path = self.get_file(bundle_hash, name)
+            if path is None:
+                raise HTTPException(status_code=404, detail=f"Unknown file '{name}' in model bundle '{bundle_hash}'")
+            return FileResponse(path)
+
+        return uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, log_level="warning"))
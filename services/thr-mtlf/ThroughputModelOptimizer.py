@@ -0,0 +1,155 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from common.throughput_model import (
+    MODEL_FILE,
+    X_SCALER_FILE,
+    Y_SCALER_FILE,
+    ModelVariant,
+    ThroughputModelRunner
+)
+
+VARIANTS_DIR = "variants"
+
+
+class ThroughputModelOptimizer:
+    """
+    Post-training stage exporting optimized variants of a checkpoint's model, and selecting the one to provision.
+
+    Each variant is validated against a holdout set: its mean absolute error is compared with the float32 model's, and
+    its latency is measured on single predictions, like the AnLF performs them. The selected variant is the fastest
+    one whose error does not exceed the float32 model's by more than the accuracy budget, preferably under the
+    latency budget.
+    """
+
+    def __init__(self, latency_budget: float = 0.005, accuracy_budget: float = 0.05, latency_runs: int = 200):
+        """
+        Initializes the optimizer.
+
+        Args:
+            latency_budget (float): The maximum median latency (in seconds) of a single prediction.
+            accuracy_budget (float): The maximum relative increase of the mean absolute error.
+            latency_runs (int): The number of single predictions timed per variant.
+        """
+        self._latency_budget = latency_budget
+        self._accuracy_budget = accuracy_budget
+        self._latency_runs = latency_runs
+
+    def optimize(self, checkpoint: Path, model, holdout_x: np.ndarray, holdout_y: np.ndarray) -> dict:
+        """
+        Exports and validates the variants of a checkpoint's model, each one in its own directory of the checkpoint.
+
+        Args:
+            checkpoint (Path): The checkpoint, holding the model and the scalers.
+            model: The Keras model of the checkpoint.
+            holdout_x (np.ndarray): The inputs of the holdout set, of shape (n, 6).
+            holdout_y (np.ndarray): The targets of the holdout set, of shape (n, 1).
+
+        Returns:
+            dict: The `selected_variant` and the validation results of each variant (`variants`).
+        """
+        results = {}
+        for variant in ModelVariant:
+            variant_dir = checkpoint / VARIANTS_DIR / variant
+            try:
+                self.export(model, checkpoint, variant_dir, variant)
+                results[variant] = self._validate(variant_dir, variant, holdout_x, holdout_y)
+            except Exception as e:
+                logging.warning(f"Failed to export the {variant} variant: {e}")
+                shutil.rmtree(variant_dir, ignore_errors=True)
+                continue
+            logging.info(f"Validated the {variant} variant: MAE={results[variant]['mae']:.4f}, "
+                         f"P50_LATENCY={results[variant]['p50_latency'] * 1e3:.3f}ms, "
+                         f"SIZE={results[variant]['size']}B")
+
+        selected = self._select(results)
+        logging.info(f"Selected the {selected} variant")
+        return {"selected_variant": selected, "variants": results}
+
+    def _select(self, results: dict) -> Optional[str]:
+        baseline = results.get(ModelVariant.FLOAT32)
+        if baseline is None:
+            return None
+
+        max_mae = baseline["mae"] * (1.0 + self._accuracy_budget)
+        accurate = [variant for variant, result in results.items() if result["mae"] <= max_mae]
+        fastest = min(accurate, key=lambda variant: results[variant]["p50_latency"])
+        if results[fastest]["p50_latency"] > self._latency_budget:
+            logging.warning(f"No variant meets the latency budget of {self._latency_budget * 1e3:.3f}ms")
+        return fastest
+
+    @staticmethod
+    def export(model, checkpoint: Path, variant_dir: Path, variant: ModelVariant):
+        """
+        Exports a variant of a model.
+
+        Args:
+            model: The Keras model.
+            checkpoint (Path): The directory holding the model file and the scalers.
+            variant_dir (Path): The directory of the variant.
+            variant (ModelVariant): The variant.
+        """
+        variant_dir.mkdir(parents=True, exist_ok=True)
+        for scaler_file in (X_SCALER_FILE, Y_SCALER_FILE):
+            shutil.copyfile(checkpoint / scaler_file, variant_dir / scaler_file)
+
+        match variant:
+            case ModelVariant.FLOAT32:
+                shutil.copyfile(checkpoint / MODEL_FILE, variant_dir / MODEL_FILE)
+            case ModelVariant.FLOAT16 | ModelVariant.INT8:
+                import tensorflow as tf
+
+                # Batches of single time step sequences, as fed by the AnLF
+                run = tf.function(lambda x: model(x, training=False),
+                                  input_signature=[tf.TensorSpec([None, 1, 6], tf.float32)])
+                converter = tf.lite.TFLiteConverter.from_concrete_functions([run.get_concrete_function()], model)
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                if variant == ModelVariant.FLOAT16:
+                    converter.target_spec.supported_types = [tf.float16]
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+                (variant_dir / variant.model_file).write_bytes(converter.convert())
+            case ModelVariant.NUMPY:
+                import keras
+
+                lstm = next(layer for layer in model.layers if isinstance(layer, keras.layers.LSTM))
+                dense = next(layer for layer in model.layers if isinstance(layer, keras.layers.Dense))
+                kernel, recurrent_kernel, bias = lstm.get_weights()
+                dense_kernel, dense_bias = dense.get_weights()
+                np.savez(variant_dir / variant.model_file, kernel=kernel, recurrent_kernel=recurrent_kernel,
+                         bias=bias, dense_kernel=dense_kernel, dense_bias=dense_bias,
+                         activation=np.array(lstm.activation.__name__))
+
+    def _validate(self, variant_dir: Path, variant: ModelVariant, holdout_x: np.ndarray,
+                  holdout_y: np.ndarray) -> dict:
+        runner = ThroughputModelRunner(variant_dir, variant)
+        mae = float(np.mean(np.abs(runner.predict(holdout_x) - holdout_y)))
+
+        latencies = []
+        for i in range(self._latency_runs + 10):
+            sample = holdout_x[i % len(holdout_x)][np.newaxis]
+            start = time.perf_counter()
+            runner.predict(sample)
+            latencies.append(time.perf_counter() - start)
+        # The first runs warm the variant up
+        latencies = np.array(latencies[10:])
+
+        return {"mae": mae,
+                "p50_latency": float(np.percentile(latencies, 50)),
+                "p99_latency": float(np.percentile(latencies, 99)),
+                "size": sum(path.stat().st_size for path in variant_dir.iterdir())}
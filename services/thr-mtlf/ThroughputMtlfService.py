@@ -1,7 +1,12 @@
 # Copyright 2025 Mitsubishi Electric R&D Centre Europe
 # Author: Vincent Artur
+import asyncio
 import logging
-from datetime import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
 
 from nwdaf_api.models import (
     NwdafEvent,
@@ -15,13 +20,17 @@ from nwdaf_api.models import (
     ExternalClientType,
     PeriodicEventInfo,
     LocationTypeRequested,
-    NadrfDataRetrievalSubscription,
-    NadrfDataRetrievalNotification,
-    TimeWindow
+    NadrfDataRetrievalNotification
 )
 from nwdaf_libcommon.MtlfService import MtlfService
 from typing_extensions import override
 
+from ModelArtifactStore import ModelArtifactStore
+from ThroughputModelOptimizer import VARIANTS_DIR
+from ThroughputTrainer import TrainingJob, latest_checkpoint, read_metadata, run_training
+from common.model_artifacts import ModelReference
+from common.throughput_model import MODEL_FILE, X_SCALER_FILE, Y_SCALER_FILE, ModelVariant
+
 
 # This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
 # Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
@@ -33,21 +42,154 @@ from typing_extensions import override
 
 class ThroughputMtlfService(MtlfService):
 
-    def __init__(self, service_name: str, kafka_bootstrap_server: str):
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, checkpoint_dir: str = "/models/throughput",
+                 dataset_id: str = "throughput_dataset", training_interval: float = 3600.0,
+                 training_batch_size: int = 256, training_resolution: Optional[float] = None,
+                 latency_budget: float = 0.005, accuracy_budget: float = 0.05,
+                 artifact_dir: str = "/models/artifacts", artifact_base_url: str = "http://thr-mtlf:8090",
+                 artifact_port: int = 8090, training_overlap: float = 31.0, base_model_dir: Optional[str] = None):
+        """
+        Initializes the service.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            checkpoint_dir (str): The directory of the model checkpoints.
+            dataset_id (str): The ID of the training dataset in the ADRF.
+            training_interval (float): The time (in seconds) between two incremental training runs.
+            training_batch_size (int): The number of training samples per batch.
+            training_resolution (Optional[float]): The coarsest acceptable time resolution (in seconds) of the
+                training samples, raw samples are used if None.
+            latency_budget (float): The maximum median latency (in seconds) of a single prediction of the provisioned
+                model variant.
+            accuracy_budget (float): The maximum relative increase of the mean absolute error of the provisioned
+                model variant, compared with the float32 model.
+            artifact_dir (str): The directory of the model artifact store.
+            artifact_base_url (str): The URL of the artifact store, as reachable by the AnLFs.
+            artifact_port (int): The port of the artifact store's HTTP server.
+            training_overlap (float): The time (in seconds) by which a training window overlaps the previous one, so
+                that the samples still buffered by the ADRF, or late, at the end of the previous window are not missed.
+            base_model_dir (Optional[str]): The directory of the model fine-tuned by the first training run, the one
+                the AnLFs are bundled with.
+        """
         super().__init__(service_name, kafka_bootstrap_server, NwdafEvent.UE_LOC_THROUGHPUT)
+        self._kafka_bootstrap_server = kafka_bootstrap_server
+        self._checkpoint_dir = checkpoint_dir
+        self._dataset_id = dataset_id
+        self._training_interval = training_interval
+        self._training_batch_size = training_batch_size
+        self._training_resolution = training_resolution
+        self._latency_budget = latency_budget
+        self._accuracy_budget = accuracy_budget
+        self._training_overlap = timedelta(seconds=training_overlap)
+        self._base_model_dir = base_model_dir
+        self._provision_sub_ids: set[str] = set()
+        self.artifact_store = ModelArtifactStore(artifact_dir)
+        self._artifact_base_url = artifact_base_url
+        self._artifact_port = artifact_port
+        self._published_checkpoints: dict[str, ModelReference] = {}
+
+        # Training runs in a separate process, so that it does not block the Kafka consumer. Processes are spawned
+        # rather than forked, the parent's Kafka clients not being fork-safe.
+        self._training_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    @property
+    def model_url(self) -> str:
+        """
+        The URL of the last model in the artifact store, the model bundled with the AnLF if none has been trained yet.
+        """
+        checkpoint = latest_checkpoint(self._checkpoint_dir)
+        return self.publish_checkpoint(checkpoint).to_url() if checkpoint is not None else "models"
+
+    def publish_checkpoint(self, checkpoint: Path) -> ModelReference:
+        """
+        Adds the bundle of a checkpoint to the artifact store, if not already present.
+
+        Args:
+            checkpoint (Path): The checkpoint.
+
+        Returns:
+            ModelReference: The reference of the bundle, provided to the AnLFs.
+        """
+        if checkpoint.name not in self._published_checkpoints:
+            metadata = read_metadata(checkpoint)
+            # Checkpoints without any validated variant are provisioned as trained
+            selected_variant = metadata.get("selected_variant")
+            variant = ModelVariant(selected_variant) if selected_variant else ModelVariant.FLOAT32
+            bundle_dir = checkpoint / VARIANTS_DIR / variant if selected_variant else checkpoint
+            file_paths = [bundle_dir / name for name in (variant.model_file, X_SCALER_FILE, Y_SCALER_FILE)]
+            # Bundles of an optimized variant also hold the model as trained, which the AnLFs fall back to if the
+            # variant fails
+            if variant != ModelVariant.FLOAT32:
+                file_paths.append(checkpoint / MODEL_FILE)
+            manifest = self.artifact_store.publish(file_paths, metadata["version"], metadata)
+            self._published_checkpoints[checkpoint.name] = ModelReference(base_url=self._artifact_base_url,
+                                                                          hash=manifest.hash,
+                                                                          version=manifest.version,
+                                                                          variant=variant)
+        return self._published_checkpoints[checkpoint.name]
 
     @override
     def on_ml_provision_subscription_created(self, sub_id: str, sub: MLEventSubscription):
         # Send the ML model info back to the AnLF
+        self._provision_sub_ids.add(sub_id)
+        self.send_model_info(sub_id, self.model_url)
+
+    def send_model_info(self, sub_id: str, model_url: str):
         notif = MLEventNotif(event=self._handled_analytic_type,
-                             mLFileAddr=MLModelAddr(mLModelUrl="models"))
+                             mLFileAddr=MLModelAddr(mLModelUrl=model_url))
         logging.info(f"Sending ML Model info to AnLF: {notif.model_dump_json(exclude_unset=True)}")
         self.send_ml_model_provision_notif(sub_id, notif)
 
-        # ADRF tests
-        dataSetId = "throughput_dataset"
-        #self.test_dataset_collection(dataSetId)
-        self.test_dataset_retrieval(dataSetId)
+    async def training_loop(self):
+        """
+        Periodically fine-tunes the model on the samples collected since the last checkpoint, and provisions the new
+        model to the subscribed AnLFs.
+        """
+        while True:
+            await asyncio.sleep(self._training_interval)
+            try:
+                metadata = await self.train()
+            except Exception as e:
+                logging.error(f"Training failed: {e}")
+                continue
+
+            if metadata is not None:
+                model_url = self.model_url
+                for sub_id in self._provision_sub_ids:
+                    self.send_model_info(sub_id, model_url)
+
+    async def train(self) -> Optional[dict]:
+        """
+        Runs an incremental training in the training process.
+
+        Returns:
+            Optional[dict]: The metadata of the new checkpoint, or None if there was no training sample.
+        """
+        checkpoint = latest_checkpoint(self._checkpoint_dir)
+        # Samples written after the previous run with an earlier timestamp are covered by the overlap, at the cost of
+        # training again on the other samples of the overlap
+        start_time = datetime.fromisoformat(read_metadata(checkpoint)["trained_until"]) - self._training_overlap \
+            if checkpoint is not None else datetime(1970, 1, 1, tzinfo=timezone.utc)
+        job = TrainingJob(self._service_name, self._kafka_bootstrap_server, self._checkpoint_dir, self._dataset_id,
+                          start_time, datetime.now(timezone.utc), self._training_batch_size,
+                          self._training_resolution, latency_budget=self._latency_budget,
+                          accuracy_budget=self._accuracy_budget, base_model_dir=self._base_model_dir,
+                          log_level=logging.getLogger().level)
+
+        logging.info(f"Starting an incremental training: START={job.start_time}, STOP={job.stop_time}")
+        return await asyncio.get_running_loop().run_in_executor(self._training_executor, run_training, job)
+
+    @override
+    async def start(self):
+        self._tasks.append(asyncio.create_task(self.artifact_store.create_server(self._artifact_port).serve()))
+        self._tasks.append(asyncio.create_task(self.training_loop()))
+        await super().start()
+
+    @override
+    def stop(self):
+        self._training_executor.shutdown(wait=False, cancel_futures=True)
+        super().stop()
 
     def test_dataset_collection(self, dataset_id: str):
         dataset_sub = NadrfDataStoreSubscription(dataSetTag=DataSetTag(dataSetId=dataset_id),
@@ -61,15 +203,7 @@ class ThroughputMtlfService(MtlfService):
                                                                                                 locationTypeRequested=LocationTypeRequested.CURRENT_LOCATION)))
         self.send_dataset_collection_subscription(dataset_id, dataset_sub)
 
-    def test_dataset_retrieval(self, dataset_id: str):
-        logging.info(f"Sending a retrieval subscription for dataset '{dataset_id}'")
-        dataset_retrieval_sub = NadrfDataRetrievalSubscription(dataSetId=dataset_id, notifCorrId="dummy",
-                                                               notificationURI="dummy",
-                                                               timePeriod=TimeWindow(startTime=datetime(1970, 1, 1),
-                                                                                     stopTime=datetime.max))
-        self.send_dataset_retrieval_subscription(dataset_id, dataset_retrieval_sub)
-
     @override
     def on_dataset_retrieval_delivery(self, retrieval_notification: NadrfDataRetrievalNotification):
-        logging.info(
-            f"Received a new dataset retrieval notification: {retrieval_notification.model_dump(exclude_unset=True)}")
+        # The training samples are streamed by the DatasetStreamClient of the training process
+        logging.debug("Ignoring a dataset retrieval notification")
@@ -0,0 +1,203 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import json
+import logging
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from common.throughput_model import MODEL_FILE, X_SCALER_FILE, Y_SCALER_FILE
+
+METADATA_FILE = "metadata.json"
+
+
+class TrainingJob:
+    """
+    Parameters of an incremental training run. Jobs are sent to the training process, hence only hold plain values.
+    """
+
+    def __init__(self, service_name: str, kafka_bootstrap_server: str, checkpoint_dir: str, dataset_id: str,
+                 start_time: datetime, stop_time: datetime, batch_size: int = 256, resolution: Optional[float] = None,
+                 holdout_ratio: int = 10, max_holdout_size: int = 20000, latency_budget: float = 0.005,
+                 accuracy_budget: float = 0.05, base_model_dir: Optional[str] = None, log_level: int = logging.INFO):
+        """
+        Initializes the job.
+
+        Args:
+            service_name (str): The name of the service.
+            kafka_bootstrap_server (str): The Kafka bootstrap server.
+            checkpoint_dir (str): The directory holding one sub-directory per checkpoint.
+            dataset_id (str): The ID of the training dataset.
+            start_time (datetime): The start of the time window of the training samples (inclusive).
+            stop_time (datetime): The end of the time window of the training samples (exclusive).
+            batch_size (int): The number of training samples per batch.
+            resolution (Optional[float]): The coarsest acceptable time resolution (in seconds) of the samples.
+            holdout_ratio (int): One batch out of `holdout_ratio` is kept out of training to validate the model
+                variants.
+            max_holdout_size (int): The maximum number of samples of the holdout set.
+            latency_budget (float): The maximum median latency (in seconds) of a single prediction of the provisioned
+                variant.
+            accuracy_budget (float): The maximum relative increase of the mean absolute error of the provisioned
+                variant, compared with the float32 model.
+            base_model_dir (Optional[str]): The directory of the model and scalers fine-tuned when there is no
+                checkpoint yet, a new model being trained if None or missing.
+            log_level (int): The logging level of the training process.
+        """
+        self.service_name = service_name
+        self.kafka_bootstrap_server = kafka_bootstrap_server
+        self.checkpoint_dir = checkpoint_dir
+        self.dataset_id = dataset_id
+        self.start_time = start_time
+        self.stop_time = stop_time
+        self.batch_size = batch_size
+        self.resolution = resolution
+        self.holdout_ratio = holdout_ratio
+        self.max_holdout_size = max_holdout_size
+        self.latency_budget = latency_budget
+        self.accuracy_budget = accuracy_budget
+        self.base_model_dir = base_model_dir
+        self.log_level = log_level
+
+
+def latest_checkpoint(checkpoint_dir: str) -> Optional[Path]:
+    """
+    Returns the most recent complete checkpoint, if any. Checkpoints are named after their version, which sorts
+    chronologically.
+
+    Args:
+        checkpoint_dir (str): The directory holding one sub-directory per checkpoint.
+
+    Returns:
+        Optional[Path]: The path of the checkpoint.
+    """
+    root = Path(checkpoint_dir)
+    if not root.is_dir():
+        return None
+    # Checkpoints being written are hidden
+    checkpoints = sorted(path for path in root.iterdir()
+                         if not path.name.startswith(".") and (path / METADATA_FILE).is_file())
+    return checkpoints[-1] if checkpoints else None
+
+
+def read_metadata(checkpoint: Path) -> dict:
+    return json.loads((checkpoint / METADATA_FILE).read_text())
+
+
+def run_training(job: TrainingJob) -> Optional[dict]:
+    """
+    Entry point of the training process: fine-tunes the model of the last checkpoint (or the base model, or a new one)
+    on the samples of the job's time window, exports its optimized variants, and writes the result as a new checkpoint.
+
+    Args:
+        job (TrainingJob): The job.
+
+    Returns:
+        Optional[dict]: The metadata of the new checkpoint, or None if there was no training sample.
+    """
+    logging.basicConfig(level=job.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    return asyncio.run(_train(job))
+
+
+async def _train(job: TrainingJob) -> Optional[dict]:
+    # Heavy dependencies are only imported by the training process
+    import joblib
+    import keras
+    import numpy as np
+    from sklearn.preprocessing import MinMaxScaler
+
+    from DatasetStreamClient import DatasetStreamClient
+    from ThroughputModelOptimizer import ThroughputModelOptimizer
+    from ThroughputTrainingData import stream_training_batches
+
+    client = DatasetStreamClient(f"{job.service_name}-trainer", job.kafka_bootstrap_server)
+
+    def batches():
+        return stream_training_batches(client, job.dataset_id, job.start_time, job.stop_time, job.batch_size,
+                                       job.resolution)
+
+    checkpoint = latest_checkpoint(job.checkpoint_dir)
+    base_model_dir = Path(job.base_model_dir) if job.base_model_dir else None
+    if checkpoint is not None or (base_model_dir is not None and (base_model_dir / MODEL_FILE).is_file()):
+        # The first checkpoint is seeded from the base model, the one the AnLFs are bundled with
+        model_dir = checkpoint if checkpoint is not None else base_model_dir
+        logging.info(f"Fine-tuning checkpoint '{checkpoint.name}'" if checkpoint is not None
+                     else f"No checkpoint, fine-tuning the base model of '{base_model_dir}'")
+        model = keras.models.load_model(model_dir / MODEL_FILE)
+        # The scalers are kept as is, the model's weights depending on them
+        x_scaler = joblib.load(model_dir / X_SCALER_FILE)
+        y_scaler = joblib.load(model_dir / Y_SCALER_FILE)
+    else:
+        logging.info("No checkpoint, training a new model")
+        model = keras.Sequential([keras.Input(shape=(None, 6)),
+                                  keras.layers.LSTM(50, activation="relu"),
+                                  keras.layers.Dense(1)])
+        model.compile(optimizer="adam", loss="mse")
+        # A first pass over the stream fits the scalers without loading the dataset in memory
+        x_scaler, y_scaler = MinMaxScaler(), MinMaxScaler()
+        async for x, y in batches():
+            x_scaler.partial_fit(x)
+            y_scaler.partial_fit(y)
+        if not hasattr(x_scaler, "n_samples_seen_"):
+            logging.info("No training sample")
+            return None
+
+    sample_count = 0
+    loss_sum = 0.0
+    holdout_x, holdout_y = [], []
+    holdout_size = 0
+    batch_index = 0
+    async for x, y in batches():
+        batch_index += 1
+        if batch_index % job.holdout_ratio == 0 and holdout_size < job.max_holdout_size:
+            holdout_x.append(x)
+            holdout_y.append(y)
+            holdout_size += len(x)
+            continue
+
+        x_scaled = x_scaler.transform(x).reshape(-1, 1, 6)
+        loss = model.train_on_batch(x_scaled, y_scaler.transform(y))
+        loss_sum += float(loss) * len(x)
+        sample_count += len(x)
+    if not sample_count:
+        logging.info("No training sample")
+        return None
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    metadata = {"version": version,
+                "parent": checkpoint.name if checkpoint is not None else None,
+                "dataset_id": job.dataset_id,
+                "trained_until": job.stop_time.isoformat(),
+                "samples": sample_count,
+                "loss": loss_sum / sample_count}
+
+    # The checkpoint is written in a temporary directory, so that a partial checkpoint is never loaded
+    staging = Path(job.checkpoint_dir) / f".{version}"
+    staging.mkdir(parents=True)
+    model.save(staging / MODEL_FILE)
+    joblib.dump(x_scaler, staging / X_SCALER_FILE)
+    joblib.dump(y_scaler, staging / Y_SCALER_FILE)
+    if holdout_size:
+        optimizer = ThroughputModelOptimizer(job.latency_budget, job.accuracy_budget)
+        metadata |= optimizer.optimize(staging, model, np.concatenate(holdout_x), np.concatenate(holdout_y))
+    else:
+        logging.info("No holdout sample, the model variants are not exported")
+    (staging / METADATA_FILE).write_text(json.dumps(metadata))
+    try:
+        staging.rename(Path(job.checkpoint_dir) / version)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logging.info(f"Trained checkpoint '{version}': SAMPLES={sample_count}, LOSS={metadata['loss']:.6f}")
+    return metadata
@@ -0,0 +1,123 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from DatasetStreamClient import DatasetStreamClient
+
+# Features of the model's input, in the order expected by the AnLF
+GMLC_FEATURES = ("latitude", "longitude")
+RAN_FEATURES = ("lte_rsrp", "nr_ssRsrp")
+MOTION_FEATURES = ("movingSpeed", "compassDirection")
+GROUND_TRUTH = "throughput"
+
+
+class TrainingSampleJoiner:
+    """
+    Joins the GMLC, RAN and ground truth samples of a dataset into training samples.
+
+    Samples must be fed in timestamp order. Each ground truth sample (a sample holding a `throughput` feature) is joined
+    with the last GMLC and RAN samples of the same UE, in the same way the AnLF joins its inputs before a prediction.
+    Training samples are accumulated into preallocated batches.
+    """
+
+    def __init__(self, batch_size: int):
+        """
+        Initializes the joiner.
+
+        Args:
+            batch_size (int): The number of training samples per batch.
+        """
+        self._batch_size = batch_size
+        self._gmlc_data: dict[str, dict] = {}
+        self._ran_data: dict[str, dict] = {}
+        self._x = np.empty((batch_size, 6), dtype=np.float32)
+        self._y = np.empty((batch_size, 1), dtype=np.float32)
+        self._size = 0
+
+    def add(self, sample: dict) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Adds a sample of the dataset.
+
+        Args:
+            sample (dict): The sample, as delivered by the ADRF.
+
+        Returns:
+            Optional[tuple[np.ndarray, np.ndarray]]: The inputs and targets of a full batch, if any.
+        """
+        supi, data = sample["supi"], sample["data"]
+        if GROUND_TRUTH in data:
+            return self._join(supi, data[GROUND_TRUTH])
+        if GMLC_FEATURES[0] in data:
+            self._gmlc_data[supi] = data
+        elif RAN_FEATURES[0] in data:
+            self._ran_data[supi] = data
+        return None
+
+    def _join(self, supi: str, throughput: Optional[float]) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        gmlc_data, ran_data = self._gmlc_data.get(supi), self._ran_data.get(supi)
+        if throughput is None or gmlc_data is None or ran_data is None:
+            return None
+
+        features = (gmlc_data[GMLC_FEATURES[0]], gmlc_data[GMLC_FEATURES[1]],
+                    ran_data[RAN_FEATURES[0]], ran_data[RAN_FEATURES[1]],
+                    gmlc_data[MOTION_FEATURES[0]], gmlc_data[MOTION_FEATURES[1]])
+        if None in features:
+            return None
+
+        self._x[self._size] = features
+        self._y[self._size] = throughput
+        self._size += 1
+        if self._size == self._batch_size:
+            return self.drain()
+        return None
+
+    def drain(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the inputs and targets of the current batch, even if it is not full.
+        """
+        if not self._size:
+            return None
+        batch = self._x[:self._size].copy(), self._y[:self._size].copy()
+        self._size = 0
+        return batch
+
+
+async def stream_training_batches(client: DatasetStreamClient, dataset_id: str, start_time: datetime,
+                                  stop_time: datetime, batch_size: int,
+                                  resolution: Optional[float] = None) -> AsyncIterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Streams a dataset from the ADRF as batches of training samples. Only the current chunk and batch are held in memory.
+
+    Args:
+        client (DatasetStreamClient): The client of the ADRF's streaming retrieval.
+        dataset_id (str): The ID of the dataset.
+        start_time (datetime): The start of the time window (inclusive).
+        stop_time (datetime): The end of the time window (exclusive).
+        batch_size (int): The number of training samples per batch.
+        resolution (Optional[float]): The coarsest acceptable time resolution (in seconds) of the samples.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray]: The inputs (shape (n, 6)) and targets (shape (n, 1)) of each batch.
+    """
+    joiner = TrainingSampleJoiner(batch_size)
+    async for chunk in client.retrieve(dataset_id, start_time, stop_time, resolution=resolution):
+        for sample in chunk.samples:
+            batch = joiner.add(sample)
+            if batch is not None:
+                yield batch
+
+    batch = joiner.drain()
+    if batch is not None:
+        yield batch
@@ -14,11 +14,13 @@ import os
 import signal
 import sys
 
+from common.log_pipeline import configure_logging
+from common.profiling import install_profiling
 from ThroughputMtlfService import ThroughputMtlfService
 
 # Log level
 log_level = os.getenv('THR_MTLF_LOG_LEVEL', 'INFO').upper()
-logging.basicConfig(level=getattr(logging, log_level), format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging(os.getenv('THR_MTLF_SERVICE_NAME', 'thr-mtlf'), log_level)
 
 # Kafka boostrap server
 kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
@@ -26,7 +28,34 @@ kafka_bootstrap_server = os.getenv('KAFKA_BOOTSTRAP_SERVER')
 # Service name
 service_name = os.getenv('THR_MTLF_SERVICE_NAME')
 
-service = ThroughputMtlfService(service_name, kafka_bootstrap_server)
+# Opt-in profiling hooks
+install_profiling(service_name)
+
+# Incremental training parameters
+checkpoint_dir = os.getenv('THR_MTLF_CHECKPOINT_DIR', '/models/throughput')
+dataset_id = os.getenv('THR_MTLF_DATASET_ID', 'throughput_dataset')
+training_interval = float(os.getenv('THR_MTLF_TRAINING_INTERVAL', '3600'))
+training_batch_size = int(os.getenv('THR_MTLF_TRAINING_BATCH_SIZE', '256'))
+training_resolution = float(os.getenv('THR_MTLF_TRAINING_RESOLUTION', '0')) or None
+
+# Budgets of the provisioned model variant
+latency_budget = float(os.getenv('THR_MTLF_LATENCY_BUDGET', '0.005'))
+accuracy_budget = float(os.getenv('THR_MTLF_ACCURACY_BUDGET', '0.05'))
+
+# Model artifact store parameters
+artifact_dir = os.getenv('THR_MTLF_ARTIFACT_DIR', '/models/artifacts')
+artifact_port = int(os.getenv('THR_MTLF_ARTIFACT_PORT', '8090'))
+artifact_base_url = os.getenv('THR_MTLF_ARTIFACT_URL', f"http://{service_name}:{artifact_port}")
+
+# Training windows overlap by the maximum time a sample stays buffered in the ADRF, plus a margin for late samples
+training_overlap = (float(os.getenv('ADRF_MAX_FLUSH_INTERVAL', '1.0'))
+                    + float(os.getenv('THR_MTLF_LATENESS_MARGIN', '30')))
+# Model fine-tuned by the first training run, the one the AnLFs are bundled with
+base_model_dir = os.getenv('THR_MTLF_BASE_MODEL_DIR', '/app/base_model')
+
+service = ThroughputMtlfService(service_name, kafka_bootstrap_server, checkpoint_dir, dataset_id, training_interval,
+                                training_batch_size, training_resolution, latency_budget, accuracy_budget,
+                                artifact_dir, artifact_base_url, artifact_port, training_overlap, base_model_dir)
 
 
 def handle_signal(sig, _frame):
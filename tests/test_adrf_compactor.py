@@ -0,0 +1,162 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("prometheus_client")
+
+from AdrfCompactor import AdrfCompactor, RollupTier
+
+EPOCH = datetime(1970, 1, 1)
+START = datetime(2025, 1, 1)
+META = {"supi": "imsi-208930000000001", "nfType": "GMLC", "dataSetId": "dataset"}
+
+# Aggregation operators of the rollup pipeline, evaluated as MongoDB does
+OPERATORS = {
+    "$ifNull": lambda args: args[0] if args[0] is not None else args[1],
+    "$toLong": lambda value: (value - EPOCH) // timedelta(milliseconds=1) if isinstance(value, datetime) \
+    else int(value),
+    "$toDate": lambda value: EPOCH + timedelta(milliseconds=value),
+    "$subtract": lambda args: args[0] - args[1],
+    "$mod": lambda args: math.fmod(args[0], args[1]),
+    "$add": sum,
+    "$multiply": math.prod,
+    "$divide": lambda args: args[0] / args[1],
+    "$objectToArray": lambda value: [{"k": key, "v": item} for key, item in value.items()],
+    "$arrayToObject": lambda value: {item["k"]: item["v"] for item in value},
+    "$in": lambda args: args[0] in args[1],
+    "$cond": lambda args: args[1] if args[0] else args[2],
+    "$degreesToRadians": math.radians,
+    "$radiansToDegrees": math.degrees,
+    "$sin": math.sin,
+    "$cos": math.cos,
+    "$atan2": lambda args: math.atan2(args[0], args[1]),
+}
+ACCUMULATORS = {"$sum": sum, "$max": max, "$push": list}
+
+
+def evaluate(expression, document):
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = document
+        for key in expression[1:].split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+    if isinstance(expression, list):
+        return [evaluate(item, document) for item in expression]
+    if isinstance(expression, dict) and len(expression) == 1 and next(iter(expression)).startswith("$"):
+        operator, operand = next(iter(expression.items()))
+        return OPERATORS[operator](evaluate(operand, document))
+    if isinstance(expression, dict):
+        return {key: evaluate(value, document) for key, value in expression.items()}
+    return expression
+
+
+def matches(document, query: dict) -> bool:
+    for field, conditions in query.items():
+        value = evaluate(f"${field}", document)
+        for operator, argument in conditions.items():
+            if operator == "$gte" and not value >= argument or operator == "$lt" and not value < argument:
+                return False
+            if operator == "$type" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return False
+    return True
+
+
+def aggregate(documents: list[dict], pipeline: list[dict]) -> list[dict]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            documents = [document for document in documents if matches(document, spec)]
+        elif name == "$project":
+            documents = [{key: document[key] if value is True else evaluate(value, document)
+                          for key, value in spec.items()
+                          if value is not False and (value is not True or key in document)} for document in documents]
+        elif name == "$set":
+            documents = [document | evaluate(spec, document) for document in documents]
+        elif name == "$unwind":
+            documents = [document | {spec[1:]: item} for document in documents for item in document[spec[1:]]]
+        elif name == "$group":
+            groups: dict[str, dict] = {}
+            for document in documents:
+                key = evaluate(spec["_id"], document)
+                group = groups.setdefault(repr(key), {"_id": key, **{field: [] for field in spec if field != "_id"}})
+                for field, accumulator in spec.items():
+                    if field != "_id":
+                        (_, expression), = accumulator.items()
+                        group[field].append(evaluate(expression, document))
+            documents = [{field: value if field == "_id" else ACCUMULATORS[next(iter(spec[field]))](value)
+                          for field, value in group.items()} for group in groups.values()]
+    return documents
+
+
+def rollup(documents: list[dict], resolution: int) -> list[dict]:
+    pipeline = AdrfCompactor._rollup_pipeline(START, START + timedelta(hours=1), resolution)
+    return sorted(aggregate(documents, pipeline), key=lambda bucket: bucket["timestamp"])
+
+
+def sample(seconds: float, **data) -> dict:
+    return {"_id": object(), "timestamp": START + timedelta(seconds=seconds), "meta": META, "data": data}
+
+
+def angle_difference(first: float, second: float) -> float:
+    difference = abs(first - second) % 360
+    return min(difference, 360 - difference)
+
+
+def test_samples_are_averaged_per_bucket():
+    buckets = rollup([sample(0, latitude=44.0, movingSpeed=2.0), sample(30, latitude=46.0, movingSpeed=4.0),
+                      sample(60, latitude=45.0, movingSpeed=8.0), sample(3600, latitude=0.0)], 60)
+
+    assert [bucket["timestamp"] for bucket in buckets] == [START, START + timedelta(seconds=60)]
+    assert [bucket["meta"] for bucket in buckets] == [META, META]
+    assert buckets[0]["count"] == 2 and buckets[0]["data"] == {"latitude": 45.0, "movingSpeed": 3.0}
+    assert buckets[1]["count"] == 1 and buckets[1]["data"] == {"latitude": 45.0, "movingSpeed": 8.0}
+
+
+def test_non_numeric_features_are_left_out():
+    buckets = rollup([sample(0, latitude=44.0, cellId="cell-1", valid=None)], 60)
+
+    assert buckets[0]["data"] == {"latitude": 44.0}
+
+
+def test_compass_direction_is_averaged_as_an_angle():
+    buckets = rollup([sample(0, compassDirection=350.0), sample(10, compassDirection=10.0),
+                      sample(60, compassDirection=90.0), sample(70, compassDirection=180.0)], 60)
+
+    assert angle_difference(buckets[0]["data"]["compassDirection"], 0.0) == pytest.approx(0.0, abs=1e-9)
+    assert buckets[1]["data"]["compassDirection"] == pytest.approx(135.0)
+    assert all(0.0 <= bucket["data"]["compassDirection"] < 360.0 for bucket in buckets)
+
+
+def test_buckets_of_a_finer_tier_are_weighted_by_their_count():
+    finer = [sample(0, compassDirection=350.0, movingSpeed=1.0) | {"count": 3},
+             sample(60, compassDirection=20.0, movingSpeed=5.0) | {"count": 1}]
+
+    bucket, = rollup(finer, 3600)
+
+    expected = math.degrees(math.atan2(3 * math.sin(math.radians(350)) + math.sin(math.radians(20)),
+                                       3 * math.cos(math.radians(350)) + math.cos(math.radians(20)))) % 360
+    assert bucket["count"] == 4
+    assert bucket["data"]["movingSpeed"] == pytest.approx(2.0)
+    assert angle_difference(bucket["data"]["compassDirection"], expected) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_tiers_are_parsed_with_their_retention():
+    tiers = RollupTier.parse(" 1:604800, 60:0,3600 ,")
+
+    assert [(tier.resolution, tier.retention) for tier in tiers] == [(1, 604800), (60, None), (3600, None)]
+    assert [tier.collection_name for tier in tiers] == ["samples_1s", "samples_60s", "samples_3600s"]
+    assert [tier.granularity for tier in tiers] == ["seconds", "minutes", "hours"]
+    assert RollupTier.parse("") == []
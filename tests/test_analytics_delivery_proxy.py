@@ -0,0 +1,131 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from AnalyticsDeliveryProxy import AnalyticsDeliveryProxy, SUBSCRIPTIONS_PATH
+
+GATEWAY_URL = "http://gateway:5005"
+NOTIFICATION_URI = "http://consumer:8181/analytics-notification"
+
+
+class Upstreams:
+    """
+    The gateway, which keeps the subscriptions it receives, and the consumers, which keep their notifications.
+    """
+
+    def __init__(self):
+        self.subscriptions: dict[str, dict] = {}
+        self.notifications: list[tuple[str, dict]] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host != "gateway":
+            self.notifications.append((str(request.url), json.loads(request.content)))
+            return httpx.Response(204)
+        if request.method == "POST":
+            subscription_id = str(len(self.subscriptions) + 1)
+            self.subscriptions[subscription_id] = json.loads(request.content)
+            return httpx.Response(201, json=self.subscriptions[subscription_id],
+                                  headers={"location": f"{GATEWAY_URL}{SUBSCRIPTIONS_PATH}/{subscription_id}"})
+        subscription_id = request.url.path.rsplit("/", 1)[-1]
+        if subscription_id not in self.subscriptions:
+            return httpx.Response(404)
+        if request.method == "PUT":
+            self.subscriptions[subscription_id] = json.loads(request.content)
+            return httpx.Response(200, json=self.subscriptions[subscription_id])
+        del self.subscriptions[subscription_id]
+        return httpx.Response(204)
+
+
+def subscription(notification_uri: str) -> dict:
+    return {"eventSubscriptions": [{"event": "UE_LOC_THROUGHPUT", "tgtUe": {"supis": ["imsi-208930000000001"]}}],
+            "notificationURI": notification_uri, "notifCorrId": "test"}
+
+
+def run_through_proxy(scenario):
+    upstreams = Upstreams()
+
+    async def run():
+        proxy = AnalyticsDeliveryProxy(GATEWAY_URL, "http://api-gateway:5000",
+                                       transport=httpx.MockTransport(upstreams.handle))
+        proxy.open()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=proxy.create_app()),
+                                     base_url="http://api-gateway:5000") as client:
+            try:
+                await scenario(proxy, upstreams, client)
+            finally:
+                await proxy.close()
+
+    asyncio.run(run())
+
+
+def test_notifications_are_delivered_to_the_consumer_of_the_subscription():
+    async def scenario(proxy, upstreams, client):
+        response = await client.post(SUBSCRIPTIONS_PATH, json=subscription(NOTIFICATION_URI))
+        assert response.status_code == 201
+        assert response.json()["notificationURI"] == NOTIFICATION_URI
+        assert response.headers["location"] == f"http://api-gateway:5000{SUBSCRIPTIONS_PATH}/1"
+
+        # The gateway notifies the delivery resource of the proxy
+        delivery_uri = upstreams.subscriptions["1"]["notificationURI"]
+        assert delivery_uri.startswith("http://api-gateway:5000/analytics-delivery/")
+        response = await client.post(delivery_uri, json={"notifCorrId": "test"})
+        assert response.status_code == 204
+        assert upstreams.notifications == [(NOTIFICATION_URI, {"notifCorrId": "test"})]
+
+    run_through_proxy(scenario)
+
+
+def test_subscriptions_of_a_consumer_share_its_delivery_resource_and_connection_pool():
+    async def scenario(proxy, upstreams, client):
+        await client.post(SUBSCRIPTIONS_PATH, json=subscription(NOTIFICATION_URI))
+        await client.post(SUBSCRIPTIONS_PATH, json=subscription(NOTIFICATION_URI))
+        await client.post(SUBSCRIPTIONS_PATH, json=subscription("http://consumer:8181/other-notification"))
+        assert upstreams.subscriptions["1"]["notificationURI"] == upstreams.subscriptions["2"]["notificationURI"]
+        assert len(proxy.notification_uris) == 2
+
+        for subscription_id in upstreams.subscriptions:
+            await client.post(upstreams.subscriptions[subscription_id]["notificationURI"], json={})
+        assert list(proxy._consumers) == ["http://consumer:8181"]
+
+        # The delivery resource and the pool are kept until the last subscription of the consumer is deleted
+        delivery_uri = upstreams.subscriptions["1"]["notificationURI"]
+        assert (await client.delete(f"{SUBSCRIPTIONS_PATH}/1")).status_code == 204
+        assert (await client.post(delivery_uri, json={})).status_code == 204
+        await client.delete(f"{SUBSCRIPTIONS_PATH}/2")
+        assert (await client.post(delivery_uri, json={})).status_code == 404
+        assert list(proxy._consumers) == ["http://consumer:8181"]
+        await client.delete(f"{SUBSCRIPTIONS_PATH}/3")
+        assert proxy.notification_uris == {} and proxy._consumers == {}
+
+    run_through_proxy(scenario)
+
+
+def test_updated_notification_uri_replaces_the_delivery_resource():
+    async def scenario(proxy, upstreams, client):
+        await client.post(SUBSCRIPTIONS_PATH, json=subscription(NOTIFICATION_URI))
+        response = await client.put(f"{SUBSCRIPTIONS_PATH}/1", json=subscription("http://other:8181/notification"))
+        assert response.status_code == 200
+        assert response.json()["notificationURI"] == "http://other:8181/notification"
+        assert list(proxy.notification_uris.values()) == ["http://other:8181/notification"]
+
+        # A rejected update leaves no delivery resource behind
+        response = await client.put(f"{SUBSCRIPTIONS_PATH}/2", json=subscription(NOTIFICATION_URI))
+        assert response.status_code == 404
+        assert list(proxy.notification_uris.values()) == ["http://other:8181/notification"]
+
+    run_through_proxy(scenario)
@@ -0,0 +1,112 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("confluent_kafka")
+pytest.importorskip("fastapi")
+pytest.importorskip("nwdaf_api")
+
+from nwdaf_api.models import (
+    EventNotifyDataExt,
+    ExternalClientType,
+    InputData,
+    LocationTypeRequested,
+    PeriodicEventInfo,
+    RanEvent,
+    RanEventExposureNotification,
+    RsrpInfo
+)
+
+from ThroughputEventExposureConsumer import GMLC_TOPIC, RAN_TOPIC, ThroughputEventExposureConsumer
+from nf_stubs import load_gmlc
+
+SUPI = "imsi-208930000000001"
+CORRELATION_ID = "correlation-0"
+
+
+class KafkaMessage:
+    """
+    A consumed Kafka message, as returned by `Consumer.consume()`.
+    """
+
+    def __init__(self, topic: str, value: str):
+        self._topic = topic
+        self._value = value.encode()
+
+    def error(self):
+        return None
+
+    def topic(self) -> str:
+        return self._topic
+
+    def value(self) -> bytes:
+        return self._value
+
+    def headers(self):
+        return None
+
+
+def location_notification() -> EventNotifyDataExt:
+    # Crafted by the GMLC stub, as posted to the API Gateway
+    return load_gmlc().build_notification(InputData(
+        supi=SUPI, ldrReference=CORRELATION_ID, externalClientType=ExternalClientType.VALUE_ADDED_SERVICES,
+        periodicEventInfo=PeriodicEventInfo(reportingAmount=1, reportingInterval=10, reportingInfiniteInd=True),
+        locationTypeRequested=LocationTypeRequested.CURRENT_LOCATION))
+
+
+# The API Gateway produces the body of the notification as it was posted by the NF, serialized with the field names,
+# or re-serialized from the API models with the aliases
+@pytest.mark.parametrize("by_alias", [False, True])
+def test_gmlc_notification_is_decoded_like_the_api_model(by_alias):
+    body = location_notification().model_dump_json(exclude_unset=True, by_alias=by_alias)
+    notification = EventNotifyDataExt.model_validate_json(body)
+
+    gmlc_batch, ran_batch = ThroughputEventExposureConsumer.decode([KafkaMessage(GMLC_TOPIC, body)])
+
+    point = notification.location_estimate.anyof_schema_1_validator.point
+    velocity = notification.velocity_estimate.anyof_schema_1_validator
+    assert len(gmlc_batch) == 1 and len(ran_batch) == 0
+    assert gmlc_batch.correlation_ids == [notification.ldr_reference]
+    assert gmlc_batch.supis == [notification.supi]
+    assert gmlc_batch.features[0].tolist() == [point.lat, point.lon, velocity.h_speed, velocity.bearing]
+    assert gmlc_batch.timestamps[0] == pytest.approx(notification.timestamp_of_location_estimate.timestamp())
+
+
+@pytest.mark.parametrize("by_alias", [False, True])
+def test_ran_notification_keeps_unreported_rsrp_as_nan(by_alias):
+    notification = RanEventExposureNotification(event=RanEvent.RSRP_INFO, time_stamp=datetime.now(),
+                                                correlation_id=CORRELATION_ID,
+                                                rsrp_infos=[RsrpInfo(ue_id=SUPI, lte_rsrp=-95, nr_ss_rsrp=-101.5),
+                                                            RsrpInfo(ue_id="imsi-208930000000002", lte_rsrp=-90)])
+    body = notification.model_dump_json(exclude_unset=True, by_alias=by_alias)
+
+    gmlc_batch, ran_batch = ThroughputEventExposureConsumer.decode([KafkaMessage(RAN_TOPIC, body)])
+
+    assert len(gmlc_batch) == 0 and len(ran_batch) == 2
+    assert ran_batch.correlation_ids == [CORRELATION_ID, CORRELATION_ID]
+    assert ran_batch.ue_ids == [SUPI, "imsi-208930000000002"]
+    assert ran_batch.rsrp[0].tolist() == [-95.0, -101.5]
+    assert ran_batch.rsrp[1][0] == -90.0 and math.isnan(ran_batch.rsrp[1][1])
+
+
+def test_invalid_messages_are_skipped():
+    body = location_notification().model_dump_json(exclude_unset=True)
+    messages = [KafkaMessage(GMLC_TOPIC, "{}"), KafkaMessage(GMLC_TOPIC, "not json"), KafkaMessage(GMLC_TOPIC, body)]
+
+    gmlc_batch, _ = ThroughputEventExposureConsumer.decode(messages)
+
+    assert gmlc_batch.supis == [SUPI]
+    assert gmlc_batch.features.shape == (1, 4)
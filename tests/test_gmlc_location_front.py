@@ -0,0 +1,104 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("nwdaf_api")
+
+from GmlcLocationFront import GmlcLocationFront, PROVIDE_LOCATION_PATH
+from nf_stubs import load_gmlc
+
+SUPI = "imsi-208930000000001"
+LDR_REFERENCE = "ldr-12345"
+LOCATION_REQUEST = {
+    "supi": SUPI,
+    "external_client_type": "VALUE_ADDED_SERVICES",
+    "location_type_requested": "CURRENT_LOCATION",
+    "periodic_event_info": {"reporting_interval": 5, "reporting_amount": 10, "reporting_infinite_ind": False},
+    "ldr_reference": LDR_REFERENCE,
+    "hgmlc_call_back_uri": "http://127.0.0.1:1/callback",
+}
+
+
+@pytest.fixture
+def gmlc():
+    gmlc = load_gmlc()
+    gmlc.location_subscriptions.clear()
+    return gmlc
+
+
+def run_through_front(gmlc, scenario):
+    # The front and the GMLC stub are served in-process, without their lifespans (no notification is sent)
+    async def run():
+        front = GmlcLocationFront("http://gmlc")
+        front._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=gmlc.app), base_url="http://gmlc")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=front.create_app()),
+                                     base_url="http://api-gateway") as client:
+            try:
+                await scenario(front, client)
+            finally:
+                await front.close()
+
+    asyncio.run(run())
+
+
+def test_deleting_the_location_resource_cancels_the_location_request(gmlc):
+    async def scenario(front, client):
+        response = await client.post(PROVIDE_LOCATION_PATH, json=LOCATION_REQUEST)
+        assert response.status_code == 200
+        location = response.headers["location"]
+        assert location.startswith(f"http://api-gateway{PROVIDE_LOCATION_PATH}/")
+        assert len(gmlc.location_subscriptions) == 1
+
+        response = await client.delete(location)
+        assert response.status_code == 204
+        assert gmlc.location_subscriptions == {}
+        assert front.location_requests == {}
+
+        # The resource is gone with the location request
+        response = await client.delete(location)
+        assert response.status_code == 404
+
+    run_through_front(gmlc, scenario)
+
+
+def test_deleting_the_location_request_body_cancels_the_location_request(gmlc):
+    async def scenario(front, client):
+        await client.post(PROVIDE_LOCATION_PATH, json=LOCATION_REQUEST)
+        await client.post(PROVIDE_LOCATION_PATH, json={**LOCATION_REQUEST, "supi": "imsi-208930000000002"})
+        assert len(gmlc.location_subscriptions) == 2
+
+        response = await client.request("DELETE", PROVIDE_LOCATION_PATH, json=LOCATION_REQUEST)
+        assert response.status_code == 204
+        assert [data.input_data.supi for data in gmlc.location_subscriptions.values()] == ["imsi-208930000000002"]
+        assert list(front.location_requests.values()) == [(LDR_REFERENCE, "imsi-208930000000002")]
+
+    run_through_front(gmlc, scenario)
+
+
+def test_location_request_sent_again_replaces_its_resource(gmlc):
+    async def scenario(front, client):
+        first = await client.post(PROVIDE_LOCATION_PATH, json=LOCATION_REQUEST)
+        second = await client.post(PROVIDE_LOCATION_PATH, json=LOCATION_REQUEST)
+        assert first.headers["location"] != second.headers["location"]
+        assert len(front.location_requests) == 1
+        assert len(gmlc.location_subscriptions) == 1
+
+        # A location request already cancelled on the GMLC is considered cancelled
+        gmlc.location_subscriptions.clear()
+        response = await client.delete(second.headers["location"])
+        assert response.status_code == 204
+
+    run_through_front(gmlc, scenario)
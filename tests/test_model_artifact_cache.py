@@ -0,0 +1,64 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import hashlib
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from common.model_artifacts import MANIFEST_FILE, ModelManifest, bundle_hash
+from ModelArtifactCache import ModelArtifactCache
+
+
+def add_bundle(cache_dir, files: dict[str, bytes], mtime: float, link: bool) -> str:
+    # Stores the files of a bundle as the cache does, either linked to their blobs or copied from them
+    checksums = {name: hashlib.sha256(content).hexdigest() for name, content in files.items()}
+    bundle = bundle_hash(checksums)
+    bundle_dir = cache_dir / "bundles" / bundle
+    bundle_dir.mkdir()
+    for name, content in files.items():
+        blob = cache_dir / "blobs" / checksums[name]
+        blob.write_bytes(content)
+        (os.link if link else shutil.copyfile)(blob, bundle_dir / name)
+    (bundle_dir / MANIFEST_FILE).write_text(ModelManifest(hash=bundle, version="1", files=checksums).model_dump_json())
+    os.utime(bundle_dir, (mtime, mtime))
+    return bundle
+
+
+@pytest.mark.parametrize("link", [True, False])
+def test_prune_keeps_the_files_of_the_remaining_bundles(tmp_path, link):
+    cache = ModelArtifactCache(str(tmp_path), max_bundles=2)
+    add_bundle(tmp_path, {"model.keras": b"old model", "scaler.pkl": b"scaler"}, 1.0, link)
+    kept = [add_bundle(tmp_path, {"model.keras": b"model 2", "scaler.pkl": b"scaler"}, 2.0, link),
+            add_bundle(tmp_path, {"model.keras": b"model 3", "scaler.pkl": b"scaler"}, 3.0, link)]
+    (tmp_path / "blobs" / ".partial-download").write_bytes(b"")
+
+    cache.prune()
+
+    assert sorted(path.name for path in (tmp_path / "bundles").iterdir()) == sorted(kept)
+    assert sorted(path.name for path in (tmp_path / "blobs").iterdir()) == \
+        sorted(hashlib.sha256(content).hexdigest() for content in (b"model 2", b"model 3", b"scaler"))
+
+
+def test_prune_keeps_every_file_when_a_manifest_cannot_be_read(tmp_path):
+    cache = ModelArtifactCache(str(tmp_path), max_bundles=1)
+    add_bundle(tmp_path, {"model.keras": b"old model"}, 1.0, False)
+    bundle = add_bundle(tmp_path, {"model.keras": b"model"}, 2.0, False)
+    (tmp_path / "bundles" / bundle / MANIFEST_FILE).write_text("{")
+    os.utime(tmp_path / "bundles" / bundle, (2.0, 2.0))
+
+    cache.prune()
+
+    assert [path.name for path in (tmp_path / "bundles").iterdir()] == [bundle]
+    assert len(list((tmp_path / "blobs").iterdir())) == 2
@@ -0,0 +1,116 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("nwdaf_api")
+
+from nwdaf_api.models.nf_type import NFType
+
+from NfInstancePool import NfInstancePool, parse_instances
+
+INSTANCES = [("gmlc-1", 10006), ("gmlc-2", 10006), ("gmlc-3", 10006)]
+SUPIS = [f"imsi-20893{index:010d}" for index in range(3000)]
+
+
+def owners(pool: NfInstancePool) -> dict[str, str]:
+    return {supi: pool.lookup(supi).name for supi in SUPIS}
+
+
+def test_instances_are_parsed():
+    assert parse_instances(" gmlc-1:10006, 10.0.0.2:10007,") == [("gmlc-1", 10006), ("10.0.0.2", 10007)]
+    with pytest.raises(ValueError):
+        parse_instances("gmlc-1")
+    with pytest.raises(ValueError):
+        NfInstancePool(NFType.GMLC, [])
+
+
+def test_ues_are_spread_evenly_and_consistently():
+    pool = NfInstancePool(NFType.GMLC, INSTANCES)
+
+    counts = Counter(owners(pool).values())
+
+    assert set(counts) == {"gmlc-1:10006", "gmlc-2:10006", "gmlc-3:10006"}
+    assert all(count > len(SUPIS) / 3 * 0.7 for count in counts.values())
+    assert owners(NfInstancePool(NFType.GMLC, list(reversed(INSTANCES)))) == owners(pool)
+
+
+def test_added_instance_only_takes_ues_from_the_others():
+    before = owners(NfInstancePool(NFType.GMLC, INSTANCES))
+    after = owners(NfInstancePool(NFType.GMLC, INSTANCES + [("gmlc-4", 10006)]))
+
+    moved = [supi for supi in SUPIS if before[supi] != after[supi]]
+    assert moved and all(after[supi] == "gmlc-4:10006" for supi in moved)
+    assert len(moved) < len(SUPIS) / 4 * 1.3
+
+
+def test_ues_of_an_ejected_instance_move_to_the_next_ones_until_it_recovers():
+    pool = NfInstancePool(NFType.GMLC, INSTANCES, max_failures=2, ejection_time=0.0)
+    before = owners(pool)
+    instance = pool.instances["gmlc-1:10006"]
+
+    pool.record_failure(instance, "HTTP 503")
+    assert instance.healthy
+    pool.record_failure(instance, "HTTP 503")
+    assert not instance.healthy
+
+    during = owners(pool)
+    assert "gmlc-1:10006" not in during.values()
+    assert all(during[supi] == owner for supi, owner in before.items() if owner != "gmlc-1:10006")
+
+    pool.record_success(instance)
+    assert instance.healthy and owners(pool) == before
+
+
+def test_ejected_instance_stays_ejected_for_the_ejection_time():
+    pool = NfInstancePool(NFType.GMLC, INSTANCES, max_failures=1, ejection_time=30.0)
+    instance = pool.instances["gmlc-1:10006"]
+    pool.record_failure(instance, "HTTP 503")
+
+    pool.record_success(instance)
+
+    assert not instance.healthy and instance.failures == 0
+
+
+def test_owner_is_kept_when_every_instance_is_ejected():
+    pool = NfInstancePool(NFType.GMLC, INSTANCES, max_failures=1)
+    before = owners(pool)
+    for instance in pool.instances.values():
+        pool.record_failure(instance, "timeout")
+
+    assert owners(pool) == before
+
+
+@pytest.mark.parametrize("status_code, healthy", [(200, True), (204, True), (404, False), (503, False)])
+def test_health_check_requires_a_success(status_code, healthy):
+    pool = NfInstancePool(NFType.GMLC, INSTANCES[:1], max_failures=1, ejection_time=0.0)
+    instance = pool.instances["gmlc-1:10006"]
+    paths = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(status_code)
+
+    async def check():
+        instance.client = httpx.AsyncClient(base_url=instance.url, transport=httpx.MockTransport(handle))
+        try:
+            await pool._check(instance, "/health")
+        finally:
+            await pool.close()
+
+    asyncio.run(check())
+
+    assert paths == ["/health"]
+    assert instance.healthy == healthy
@@ -0,0 +1,99 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ThroughputNotificationController import NotificationPolicy, SuppressionReason, ThroughputNotificationController
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+SUB_ID = "sub-1"
+
+
+def controller_with(**policy) -> ThroughputNotificationController:
+    return ThroughputNotificationController(NotificationPolicy(**{"min_relative_change": 0.05,
+                                                                  "min_absolute_change": 0.1,
+                                                                  "max_interval": None, **policy}))
+
+
+def test_first_prediction_is_notified():
+    controller = controller_with()
+
+    assert controller.should_notify(ThroughputSubscriptionData("imsi-208930000000001"), SUB_ID, 100.0, 0.0)
+    assert controller.sent_notifications == 1
+
+
+def test_changes_below_the_threshold_are_suppressed():
+    controller = controller_with()
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    controller.should_notify(sub_data, SUB_ID, 100.0, 0.0)
+
+    # 5% of the last notified value
+    assert not controller.should_notify(sub_data, SUB_ID, 104.9, 1.0)
+    assert not controller.should_notify(sub_data, SUB_ID, 100.0, 2.0)
+    assert controller.should_notify(sub_data, SUB_ID, 105.0, 3.0)
+    assert controller.suppressed_notifications == {SuppressionReason.BELOW_THRESHOLD: 2}
+    assert sub_data.notification_states[SUB_ID].value == 105.0
+
+
+def test_absolute_threshold_applies_to_low_predictions():
+    controller = controller_with(min_absolute_change=1.0)
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    controller.should_notify(sub_data, SUB_ID, 2.0, 0.0)
+
+    assert not controller.should_notify(sub_data, SUB_ID, 2.9, 1.0)
+    assert controller.should_notify(sub_data, SUB_ID, 3.0, 2.0)
+
+
+def test_reversed_change_must_exceed_the_hysteresis():
+    controller = controller_with(hysteresis=0.5)
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    controller.should_notify(sub_data, SUB_ID, 100.0, 0.0)
+    assert controller.should_notify(sub_data, SUB_ID, 110.0, 1.0)
+
+    # Going down again needs 1.5 times 5% of 110, going further up only 5%
+    assert not controller.should_notify(sub_data, SUB_ID, 102.0, 2.0)
+    assert controller.should_notify(sub_data, SUB_ID, 115.5, 3.0)
+    assert not controller.should_notify(sub_data, SUB_ID, 107.0, 4.0)
+    assert controller.should_notify(sub_data, SUB_ID, 106.0, 5.0)
+    assert sub_data.notification_states[SUB_ID].direction == -1
+
+    # The hysteresis now applies to the increases
+    assert not controller.should_notify(sub_data, SUB_ID, 112.0, 6.0)
+    assert controller.should_notify(sub_data, SUB_ID, 100.0, 7.0)
+
+
+def test_intervals_bound_the_time_between_two_notifications():
+    controller = controller_with(min_interval=5.0, max_interval=30.0)
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    controller.should_notify(sub_data, SUB_ID, 100.0, 0.0)
+
+    assert not controller.should_notify(sub_data, SUB_ID, 200.0, 4.0)
+    assert not controller.should_notify(sub_data, SUB_ID, 100.0, 29.0)
+    # An unchanged prediction is notified again once the maximum interval has elapsed
+    assert controller.should_notify(sub_data, SUB_ID, 100.0, 30.0)
+    assert controller.suppressed_notifications == {SuppressionReason.MIN_INTERVAL: 1,
+                                                   SuppressionReason.BELOW_THRESHOLD: 1}
+
+
+def test_each_subscription_has_its_own_policy_and_state():
+    controller = controller_with()
+    controller.set_policy("sub-2", controller.default_policy.copy(min_relative_change=0.5))
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    for sub_id in (SUB_ID, "sub-2"):
+        controller.should_notify(sub_data, sub_id, 100.0, 0.0)
+
+    assert controller.should_notify(sub_data, SUB_ID, 110.0, 1.0)
+    assert not controller.should_notify(sub_data, "sub-2", 110.0, 1.0)
+
+    controller.remove_policy("sub-2")
+    assert controller.get_policy("sub-2") is controller.default_policy
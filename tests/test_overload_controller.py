@@ -0,0 +1,89 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ThroughputOverloadController import HealthStatus, ThroughputOverloadController
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+
+def pipelines(count: int, consumers: int = 1) -> list[ThroughputSubscriptionData]:
+    sub_data_list = []
+    for index in range(count):
+        sub_data = ThroughputSubscriptionData(f"imsi-2089300000{consumers:02d}{index:03d}")
+        sub_data.sub_ids = {f"sub-{consumer}" for consumer in range(consumers)}
+        sub_data_list.append(sub_data)
+    return sub_data_list
+
+
+def test_every_pipeline_is_admitted_while_healthy():
+    controller = ThroughputOverloadController(max_pending_predictions=10, max_predictions_per_tick=10)
+    ready = pipelines(5)
+
+    admitted, shed = controller.admit(ready)
+
+    assert controller.health == HealthStatus.HEALTHY
+    assert admitted == ready and shed == []
+
+
+def test_lowest_priority_pipelines_are_shed_beyond_the_budget():
+    controller = ThroughputOverloadController(max_pending_predictions=100, max_predictions_per_tick=3)
+    low, high = pipelines(3, consumers=1), pipelines(2, consumers=2)
+
+    admitted, shed = controller.admit(low + high)
+
+    assert controller.health == HealthStatus.HEALTHY
+    assert admitted == high + low[:1]
+    assert shed == low[1:]
+    assert controller.shed_predictions == 2
+
+
+def test_low_priority_pipelines_are_downsampled_while_degraded():
+    controller = ThroughputOverloadController(max_pending_predictions=8, max_predictions_per_tick=100,
+                                              downsampling_factor=3)
+    low, high = pipelines(3, consumers=1), pipelines(2, consumers=2)
+
+    # A low-priority pipeline is only predicted once every downsampling_factor cycles
+    admitted_low = []
+    for _ in range(3):
+        admitted, shed = controller.admit(low + high)
+        assert controller.health == HealthStatus.DEGRADED
+        assert all(sub_data in admitted for sub_data in high)
+        admitted_low.append([sub_data for sub_data in admitted if sub_data in low])
+    assert admitted_low == [[], [], low]
+    assert controller.downsampled_predictions == 6
+
+
+def test_budget_is_halved_while_overloaded():
+    controller = ThroughputOverloadController(max_inference_lag=1.0, max_predictions_per_tick=4, lag_smoothing=1.0)
+    controller.record_inference_lag(1.5)
+
+    admitted, shed = controller.admit(pipelines(4, consumers=2))
+
+    assert controller.health == HealthStatus.OVERLOADED
+    assert len(admitted) == 2 and len(shed) == 2
+
+
+def test_health_follows_the_smoothed_inference_lag():
+    controller = ThroughputOverloadController(max_inference_lag=2.0, lag_smoothing=0.5)
+
+    controller.record_inference_lag(4.0)
+    controller.admit([])
+    assert controller.inference_lag == 2.0 and controller.health == HealthStatus.DEGRADED
+    controller.record_inference_lag(4.0)
+    controller.admit([])
+    assert controller.health == HealthStatus.OVERLOADED
+    for _ in range(5):
+        controller.record_inference_lag(0.0)
+    controller.admit([])
+    assert controller.health == HealthStatus.HEALTHY
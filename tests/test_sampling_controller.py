@@ -0,0 +1,112 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ThroughputSamplingController import ThroughputSamplingController
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+
+def record(controller: ThroughputSamplingController, sub_data: ThroughputSubscriptionData, count: int,
+           speed: float = 0.0, rsrp: tuple = (-95.0, -101.0), prediction: float = 50.0):
+    for _ in range(count):
+        sub_data.pending_gmlc_data = (44.975, -93.26, speed, 90)
+        sub_data.pending_ran_data = rsrp
+        controller.record_prediction(sub_data, prediction)
+
+
+def pipeline(period: int) -> ThroughputSubscriptionData:
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    sub_data.reporting_period = period
+    return sub_data
+
+
+def test_periods_are_halvings_and_doublings_of_the_default_one():
+    assert ThroughputSamplingController(10, 2, 40).periods == [2, 5, 10, 20, 40]
+    assert ThroughputSamplingController(10, 10, 10).periods == [10]
+    # The default period is kept within the bounds
+    assert ThroughputSamplingController(60, 8, 40).periods == [10, 20, 40]
+
+
+def test_period_of_a_fast_ue_is_halved():
+    controller = ThroughputSamplingController(10, 2, 40, speed_threshold=5.0, min_samples=3)
+    sub_data = pipeline(10)
+
+    record(controller, sub_data, 2, speed=10.0)
+    assert controller.next_period(sub_data) is None
+    record(controller, sub_data, 1, speed=10.0)
+    assert controller.next_period(sub_data) == 5
+    assert controller.shortened_periods == 1
+
+    # The new period is observed for min_samples predictions before any other change
+    sub_data.reporting_period = 5
+    assert controller.next_period(sub_data) is None
+    record(controller, sub_data, 3, speed=10.0)
+    assert controller.next_period(sub_data) == 2
+    sub_data.reporting_period = 2
+    record(controller, sub_data, 3, speed=10.0)
+    assert controller.next_period(sub_data) is None
+
+
+def test_period_of_a_calm_ue_is_doubled_up_to_the_longest_one():
+    controller = ThroughputSamplingController(10, 2, 40, min_samples=3)
+    sub_data = pipeline(10)
+
+    for expected in (20, 40, None):
+        record(controller, sub_data, 3)
+        assert controller.next_period(sub_data) == expected
+        sub_data.reporting_period = expected or sub_data.reporting_period
+    assert controller.lengthened_periods == 2
+
+
+def test_period_is_kept_between_the_calm_and_busy_thresholds():
+    controller = ThroughputSamplingController(10, 2, 40, speed_threshold=5.0, calm_ratio=0.5, min_samples=3)
+    sub_data = pipeline(10)
+
+    record(controller, sub_data, 3, speed=4.0)
+
+    assert controller.next_period(sub_data) is None
+
+
+def test_volatile_rsrp_halves_the_period():
+    controller = ThroughputSamplingController(10, 2, 40, rsrp_std_threshold=3.0, min_samples=3, smoothing=0.5)
+    sub_data = pipeline(10)
+
+    for lte_rsrp in (-80.0, -100.0, -80.0, -100.0):
+        record(controller, sub_data, 1, rsrp=(lte_rsrp, None))
+
+    assert sub_data.sampling_statistics.rsrp_std > 3.0
+    assert controller.next_period(sub_data) == 5
+
+
+def test_rsrp_of_each_rat_is_tracked_separately():
+    controller = ThroughputSamplingController(10, 2, 40, min_samples=3)
+    sub_data = pipeline(10)
+
+    # NR coverage comes and goes, each RAT being stable on its own
+    for rsrp in ((-95.0, -110.0), (-95.0, None), (-95.0, -110.0), (-95.0, None)):
+        record(controller, sub_data, 1, rsrp=rsrp)
+
+    stats = sub_data.sampling_statistics
+    assert (stats.lte_rsrp_mean, stats.nr_rsrp_mean) == (-95.0, -110.0)
+    assert stats.rsrp_std == 0.0
+    assert controller.next_period(sub_data) == 20
+
+
+def test_unknown_period_is_changed_from_the_default_one():
+    controller = ThroughputSamplingController(10, 2, 40, min_samples=1)
+    sub_data = pipeline(None)
+
+    record(controller, sub_data, 1, speed=10.0)
+
+    assert controller.next_period(sub_data) == 5
@@ -0,0 +1,146 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("nwdaf_libcommon")
+
+from ThroughputNotificationController import NotificationPolicy, ThroughputNotificationController
+from ThroughputSnapshotStore import RESTORE_TRANSITIONS, ThroughputSnapshotStore
+from ThroughputSubscriptionData import NotificationState, ThroughputSubscriptionData
+from ThroughputSubscriptionFSM import States, ThroughputSubscriptionFSM, Transitions
+from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+
+BATCH_PERIODS = {"batch-10": 10, "batch-5": 5}
+OPEN_BATCHES = {10: "batch-10", 5: "batch-5"}
+
+
+def fsm_in(*transitions: Transitions) -> ThroughputSubscriptionFSM:
+    fsm = ThroughputSubscriptionFSM()
+    for transition in transitions:
+        fsm.transition(transition)
+    return fsm
+
+
+def pipelines() -> ThroughputSubscriptionRegistry:
+    registry = ThroughputSubscriptionRegistry()
+
+    waiting = ThroughputSubscriptionData("imsi-208930000000001")
+    waiting.sub_ids = {"sub-1", "sub-2"}
+    waiting.event_exposure_subscribed = True
+    waiting.correlation_id = "batch-10"
+    waiting.reporting_period = 10
+    waiting.skipped_cycles = 2
+    waiting.pending_ran_data = (-95.0, None)
+    waiting.notification_states["sub-1"] = NotificationState(42.5, time.monotonic() - 5.0)
+    waiting.notification_states["sub-1"].direction = -1
+    stats = waiting.sampling_statistics
+    stats.samples, stats.samples_since_change, stats.speed = 7, 2, 3.5
+    stats.lte_rsrp_mean, stats.lte_rsrp_variance, stats.prediction_mean, stats.prediction_variance = -95, 4, 40, 9
+    registry.add_subscription(waiting, fsm_in(Transitions.INITIALIZATION_DONE, Transitions.WAITING_FOR_NOTIFS))
+
+    predicted = ThroughputSubscriptionData("imsi-208930000000002")
+    predicted.sub_ids = {"sub-3"}
+    predicted.event_exposure_subscribed = True
+    predicted.correlation_id = "batch-5"
+    predicted.reporting_period = 5
+    predicted.pending_gmlc_data = (44.975, -93.26, 3.5, 90)
+    predicted.pending_ran_data = (-95.0, -101.5)
+    predicted.pending_throughput_prediction = 55.0
+    predicted.inputs_ready_since = time.monotonic() - 1.0
+    registry.add_subscription(predicted, fsm_in(Transitions.INITIALIZATION_DONE, Transitions.ALL_NOTIFS_RECEIVED,
+                                                Transitions.PREDICTION_DONE))
+
+    # Its event exposure subscriptions have not been sent yet
+    initializing = ThroughputSubscriptionData("imsi-208930000000003")
+    initializing.sub_ids = {"sub-4"}
+    registry.add_subscription(initializing, fsm_in(Transitions.INITIALIZATION_DONE))
+    return registry
+
+
+def restore(store: ThroughputSnapshotStore) -> tuple[ThroughputSubscriptionRegistry, ThroughputNotificationController,
+                                                     tuple]:
+    registry, controller = ThroughputSubscriptionRegistry(), ThroughputNotificationController()
+    return registry, controller, store.load(registry, controller)
+
+
+@pytest.mark.parametrize("state", list(States))
+def test_restore_transitions_lead_to_the_state_of_the_pipeline(state):
+    fsm = fsm_in(*RESTORE_TRANSITIONS[state])
+
+    # Pipelines that were predicting are restored as waiting
+    assert fsm.current_state == (States.WAITING_FOR_GMLC_NOTIF if state == States.PREDICTING_THROUGHPUT else state)
+
+
+def test_pipelines_are_restored_from_a_snapshot(tmp_path):
+    store = ThroughputSnapshotStore(str(tmp_path / "snapshot.bin"))
+    store.save(pipelines(), BATCH_PERIODS, OPEN_BATCHES, {"sub-3": NotificationPolicy(min_relative_change=0.2)})
+
+    registry, controller, batches = restore(store)
+
+    assert batches == (BATCH_PERIODS, OPEN_BATCHES)
+    assert controller.get_policy("sub-3").min_relative_change == 0.2
+    assert controller.get_policy("sub-1") is controller.default_policy
+
+    waiting = registry.get_subscription_data("imsi-208930000000001")
+    assert registry.get_fsm(waiting).current_state == States.WAITING_FOR_RAN_NOTIF
+    assert waiting.sub_ids == {"sub-1", "sub-2"} and waiting.event_exposure_subscribed
+    assert registry.get_subscription_data_by_correlation("batch-10", waiting.supi) is waiting
+    assert (waiting.reporting_period, waiting.skipped_cycles) == (10, 2)
+    assert waiting.pending_gmlc_data is None and waiting.pending_ran_data == (-95.0, None)
+    assert waiting.pending_throughput_prediction is None and waiting.inputs_ready_since is None
+    state = waiting.notification_states["sub-1"]
+    assert (state.value, state.direction) == (42.5, -1)
+    assert time.monotonic() - state.time == pytest.approx(5.0, abs=1.0)
+    stats = waiting.sampling_statistics
+    assert (stats.samples, stats.samples_since_change, stats.speed) == (7, 2, 3.5)
+    assert (stats.lte_rsrp_mean, stats.lte_rsrp_variance, stats.prediction_mean, stats.prediction_variance) == \
+        (-95.0, 4.0, 40.0, 9.0)
+    assert math.isnan(stats.nr_rsrp_mean)
+
+    predicted = registry.get_subscription_data("imsi-208930000000002")
+    assert registry.get_fsm(predicted).current_state == States.SENDING_ANALYTICS_NOTIF
+    assert predicted.pending_gmlc_data == (44.975, -93.26, 3.5, 90)
+    assert predicted.pending_ran_data == (-95.0, -101.5)
+    assert predicted.pending_throughput_prediction == 55.0
+    assert time.monotonic() - predicted.inputs_ready_since == pytest.approx(1.0, abs=1.0)
+
+    initializing = registry.get_subscription_data("imsi-208930000000003")
+    assert registry.get_fsm(initializing).current_state == States.INITIALIZING
+    assert initializing.correlation_id is None
+
+
+def test_empty_registry_is_restored(tmp_path):
+    store = ThroughputSnapshotStore(str(tmp_path / "snapshot.bin"))
+    store.save(ThroughputSubscriptionRegistry(), {}, {}, {})
+
+    registry, _, batches = restore(store)
+
+    assert batches == ({}, {}) and registry.get_all_subscriptions() == []
+
+
+def test_stale_or_invalid_snapshots_are_ignored(tmp_path, monkeypatch):
+    store = ThroughputSnapshotStore(str(tmp_path / "snapshot.bin"), max_age=60.0)
+    assert restore(store)[2] is None
+
+    snapshot = store.encode(pipelines(), BATCH_PERIODS, OPEN_BATCHES, {})
+    store.write(b"NOTASNAP" + snapshot[8:])
+    assert restore(store)[2] is None
+
+    store.write(snapshot)
+    created = time.time()
+    monkeypatch.setattr(time, "time", lambda: created + 120.0)
+    registry, _, batches = restore(store)
+    assert batches is None and registry.get_all_subscriptions() == []
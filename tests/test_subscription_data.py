@@ -0,0 +1,48 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ThroughputSubscriptionData import MIN_LTE_RSRP, MIN_NR_SS_RSRP, ThroughputSubscriptionData
+
+
+def pipeline(lte_rsrp, nr_ss_rsrp) -> ThroughputSubscriptionData:
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    sub_data.pending_gmlc_data = (44.975, -93.26, 3.5, 90)
+    sub_data.pending_ran_data = (lte_rsrp, nr_ss_rsrp)
+    return sub_data
+
+
+def test_input_array_holds_the_reported_rsrp():
+    input_array = pipeline(-95, -101.5).to_input_array()
+
+    assert input_array.dtype == np.float64
+    assert input_array.tolist() == [[44.975, -93.26, -95.0, -101.5, 3.5, 90.0]]
+
+
+def test_unreported_rsrp_of_a_never_reported_rat_is_the_lowest_value():
+    assert pipeline(-95, None).to_input_array()[0, 2:4].tolist() == [-95.0, MIN_NR_SS_RSRP]
+    assert pipeline(None, None).to_input_array()[0, 2:4].tolist() == [MIN_LTE_RSRP, MIN_NR_SS_RSRP]
+
+
+def test_unreported_rsrp_is_the_moving_mean_of_its_rat():
+    sub_data = pipeline(None, -101.5)
+    sub_data.sampling_statistics.lte_rsrp_mean = -97.25
+
+    input_array = sub_data.to_input_array()
+
+    assert input_array.dtype == np.float64
+    assert input_array[0, 2:4].tolist() == [-97.25, -101.5]
+    # The pending input itself is left unreported, so that the statistics of the RAT are not fed the imputed value
+    assert sub_data.pending_ran_data == (None, -101.5)
@@ -0,0 +1,107 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("nwdaf_libcommon")
+
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+from ThroughputSubscriptionFSM import ThroughputSubscriptionFSM
+from ThroughputSubscriptionRegistry import ThroughputSubscriptionRegistry
+
+SUPI = "imsi-208930000000001"
+
+
+def registry_with(*supis: str) -> ThroughputSubscriptionRegistry:
+    registry = ThroughputSubscriptionRegistry()
+    for supi in supis:
+        registry.add_subscription(ThroughputSubscriptionData(supi), ThroughputSubscriptionFSM())
+    return registry
+
+
+def test_consumers_of_a_ue_share_its_pipeline():
+    registry = registry_with(SUPI)
+
+    first = registry.add_consumer("sub-1", SUPI)
+    second = registry.add_consumer("sub-2", SUPI)
+
+    assert first is second is registry.get_subscription_data(SUPI)
+    assert first.sub_ids == {"sub-1", "sub-2"}
+    assert len(registry.get_all_subscriptions()) == 1
+
+
+def test_consumer_of_a_ue_without_pipeline_is_not_referenced():
+    registry = registry_with(SUPI)
+
+    assert registry.add_consumer("sub-1", "imsi-208930000000002") is None
+    assert registry.get_subscription_data(SUPI).sub_ids == set()
+
+
+def test_pipeline_is_left_without_consumer_once_the_last_one_is_removed():
+    registry = registry_with(SUPI)
+    registry.add_consumer("sub-1", SUPI)
+    registry.add_consumer("sub-2", SUPI)
+
+    registry.remove_consumer("sub-1", SUPI)
+    assert registry.get_subscription_data(SUPI).sub_ids == {"sub-2"}
+    # Removing a consumer twice, or from an unknown UE, is harmless
+    registry.remove_consumer("sub-1", SUPI)
+    registry.remove_consumer("sub-2", "imsi-208930000000002")
+    registry.remove_consumer("sub-2", SUPI)
+    assert registry.get_subscription_data(SUPI).sub_ids == set()
+
+
+def test_removed_pipeline_is_no_longer_found():
+    registry = registry_with(SUPI)
+    sub_data = registry.get_subscription_data(SUPI)
+
+    registry.remove_subscription(SUPI)
+
+    assert registry.get_subscription_data(SUPI) is None
+    assert registry.get_fsm(sub_data) is None
+    assert registry.get_all_subscriptions() == []
+
+
+def test_pipelines_of_a_batch_share_its_correlation_id():
+    registry = registry_with(SUPI, "imsi-208930000000002", "imsi-208930000000003")
+    for supi in (SUPI, "imsi-208930000000002"):
+        registry.set_correlation_id(registry.get_subscription_data(supi), "batch-1")
+    registry.set_correlation_id(registry.get_subscription_data("imsi-208930000000003"), "batch-2")
+
+    assert registry.get_correlation_members("batch-1") == {SUPI, "imsi-208930000000002"}
+    assert registry.get_subscription_data_by_correlation("batch-1", SUPI) is registry.get_subscription_data(SUPI)
+    assert registry.get_subscription_data_by_correlation("batch-2", SUPI) is None
+
+
+def test_pipeline_moved_to_another_batch_leaves_the_previous_one():
+    registry = registry_with(SUPI, "imsi-208930000000002")
+    sub_data = registry.get_subscription_data(SUPI)
+    registry.set_correlation_id(sub_data, "batch-1")
+    registry.set_correlation_id(registry.get_subscription_data("imsi-208930000000002"), "batch-1")
+
+    registry.set_correlation_id(sub_data, "batch-2")
+
+    assert sub_data.correlation_id == "batch-2"
+    assert registry.get_correlation_members("batch-1") == {"imsi-208930000000002"}
+    assert registry.get_correlation_members("batch-2") == {SUPI}
+    assert registry.get_subscription_data_by_correlation("batch-1", SUPI) is None
+
+
+def test_batch_is_forgotten_with_its_last_pipeline():
+    registry = registry_with(SUPI)
+    registry.set_correlation_id(registry.get_subscription_data(SUPI), "batch-1")
+
+    registry.remove_subscription(SUPI)
+
+    assert registry.get_correlation_members("batch-1") == set()
+    assert registry.get_subscription_data_by_correlation("batch-1", SUPI) is None
+    assert "batch-1" not in registry._correlation_members
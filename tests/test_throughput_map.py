@@ -0,0 +1,103 @@
+# Copyright 2025 Mitsubishi Electric R&D Centre Europe
+# Author: Vincent Artur
+
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option)  any later version.
+
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public License along with this program. If not, see https://www.gnu.org/licenses/lgpl-3.0.html
+
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+from ThroughputMap import METERS_PER_DEGREE, ThroughputMap
+from ThroughputSubscriptionData import ThroughputSubscriptionData
+
+
+def pipeline(latitude: float, longitude: float, nr_ss_rsrp: float = -100.0,
+             bearing: float = 90.0) -> ThroughputSubscriptionData:
+    sub_data = ThroughputSubscriptionData("imsi-208930000000001")
+    sub_data.pending_gmlc_data = (latitude, longitude, 3.5, bearing)
+    sub_data.pending_ran_data = (-95.0, nr_ss_rsrp)
+    return sub_data
+
+
+@pytest.mark.parametrize("latitude", [0.0, 44.975, 60.0, -33.9])
+def test_tiles_are_about_square_at_any_latitude(latitude):
+    throughput_map = ThroughputMap(cell_size=20.0)
+
+    min_latitude, min_longitude, max_latitude, max_longitude = \
+        throughput_map.tile_bounds(*throughput_map.tile_index(latitude, 10.0))
+
+    assert min_latitude <= latitude < max_latitude and min_longitude <= 10.0 < max_longitude
+    assert (max_latitude - min_latitude) * METERS_PER_DEGREE == pytest.approx(20.0)
+    center_latitude = (min_latitude + max_latitude) / 2
+    width = (max_longitude - min_longitude) * METERS_PER_DEGREE * math.cos(math.radians(center_latitude))
+    assert width == pytest.approx(20.0)
+
+
+def test_nearby_positions_share_their_tile():
+    throughput_map = ThroughputMap(cell_size=20.0)
+    min_latitude, min_longitude, max_latitude, max_longitude = \
+        throughput_map.tile_bounds(*throughput_map.tile_index(44.975, -93.26))
+    step = 1e-9
+
+    corners = [(min_latitude + step, min_longitude + step), (max_latitude - step, max_longitude - step)]
+    assert {throughput_map.tile_index(*corner) for corner in corners} == {throughput_map.tile_index(44.975, -93.26)}
+    assert throughput_map.tile_index(max_latitude + step, -93.26)[0] == throughput_map.tile_index(44.975, -93.26)[0] + 1
+    assert throughput_map.tile_index(-step, -step) == (-1, -1)
+
+
+def test_estimate_uses_the_context_then_the_tile():
+    throughput_map = ThroughputMap(min_samples=2)
+    for prediction in (10.0, 20.0):
+        throughput_map.record(pipeline(44.975, -93.26, nr_ss_rsrp=-100.0), prediction)
+    throughput_map.record(pipeline(44.975, -93.26, nr_ss_rsrp=-75.0), 60.0)
+
+    assert throughput_map.estimate(pipeline(44.975, -93.26, nr_ss_rsrp=-95.0)) == pytest.approx(15.0)
+    # Too few predictions in the context of the UE, the statistics of the whole tile are used
+    assert throughput_map.estimate(pipeline(44.975, -93.26, nr_ss_rsrp=-71.0)) == pytest.approx(30.0)
+    assert throughput_map.estimate(pipeline(45.5, -93.26)) is None
+
+
+def test_least_recently_updated_tile_is_evicted():
+    throughput_map = ThroughputMap(max_tiles=2, min_samples=1)
+    first, second, third = pipeline(44.0, -93.0), pipeline(45.0, -93.0), pipeline(46.0, -93.0)
+    throughput_map.record(first, 10.0)
+    throughput_map.record(second, 20.0)
+    throughput_map.record(first, 30.0)
+
+    throughput_map.record(third, 40.0)
+
+    assert len(throughput_map) == 2 and throughput_map.evictions == 1
+    assert throughput_map.estimate(second) is None
+    assert throughput_map.estimate(first) == pytest.approx(20.0)
+
+
+@pytest.mark.parametrize("area", [
+    # Looked up tile by tile
+    (44.9705, -93.2595, 44.9725, -93.2575),
+    # More tiles than the map, whose tiles are filtered instead
+    (44.9705, -93.2595, 44.9725, -92.0),
+    (44.0, -93.2595, 46.0, -93.2575)])
+def test_area_holds_the_tiles_it_overlaps(area):
+    throughput_map = ThroughputMap(cell_size=100.0, min_samples=1)
+    for row in range(5):
+        for column in range(5):
+            throughput_map.record(pipeline(44.97 + row * 0.001, -93.26 + column * 0.001), float(row * 5 + column))
+    min_latitude, min_longitude, max_latitude, max_longitude = area
+
+    tiles = throughput_map.area(*area)
+
+    expected = [bounds for bounds in (throughput_map.tile_bounds(*index) for index in throughput_map._tiles)
+                if bounds[2] > min_latitude and bounds[0] <= max_latitude
+                and bounds[3] > min_longitude and bounds[1] <= max_longitude]
+    assert 0 < len(tiles) < len(throughput_map)
+    assert sorted((tile["area"]["minLat"], tile["area"]["minLon"]) for tile in tiles) == \
+        sorted((bounds[0], bounds[1]) for bounds in expected)